@@ -0,0 +1,138 @@
+import os
+import atexit
+import threading
+import numpy as np
+import config
+import database
+
+# 저장 / 조회 컬럼 (backtest 컬럼형 저장소와 같은 이름 / dtype)
+CANDLE_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS candles (
+        market    TEXT    NOT NULL,   -- 업비트 마켓 코드 (KRW-XRP)
+        timeframe TEXT    NOT NULL,   -- 분 단위 (60 / 240 ...)
+        ts        INTEGER NOT NULL,   -- 봉 시작 시각 (ms)
+        open      REAL    NOT NULL,
+        high      REAL    NOT NULL,
+        low       REAL    NOT NULL,
+        close     REAL    NOT NULL,
+        volume    REAL    NOT NULL,
+        PRIMARY KEY (market, timeframe, ts)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_SQL = """
+    INSERT INTO candles (market, timeframe, ts, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (market, timeframe, ts) DO UPDATE SET
+        open = excluded.open, high = excluded.high, low = excluded.low,
+        close = excluded.close, volume = excluded.volume
+"""
+
+# ccxt / config 봉 간격 단위 → 분
+TIMEFRAME_UNIT_MINUTES = {"m": 1, "h": 60, "d": 1440, "w": 10080}
+
+
+def market_key(ticker: str) -> str:
+    """ccxt 심볼 / 업비트 마켓 코드 → 업비트 마켓 코드 ("XRP/KRW" → "KRW-XRP")"""
+    if "/" in ticker:
+        base, quote = ticker.split("/")
+        return f"{quote}-{base}"
+    return ticker
+
+
+def timeframe_key(timeframe: str) -> str:
+    """봉 간격 → 분 단위 문자열 ("1h" / "60" → "60", "4h" → "240")"""
+    timeframe = str(timeframe)
+    if timeframe.isdigit():
+        return timeframe
+    return str(int(timeframe[:-1]) * TIMEFRAME_UNIT_MINUTES[timeframe[-1]])
+
+
+_store: database.TradeStore | None = None
+_store_lock = threading.Lock()
+
+
+def candle_store() -> database.TradeStore:
+    """
+    CANDLE_DB_PATH의 캔들 저장소 (매매 기록 DB와 같은 구조 - WAL, 쓰기 전용 스레드 + 읽기 전용 연결 풀)
+    - 처음 호출 시 테이블 생성, CANDLE_DB_PATH가 바뀌면 기존 것을 닫고 새로 생성
+    """
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != config.CANDLE_DB_PATH:
+            if _store is not None:
+                _store.close()
+            os.makedirs(os.path.dirname(os.path.abspath(config.CANDLE_DB_PATH)), exist_ok=True)
+            _store = database.TradeStore(config.CANDLE_DB_PATH)
+            _store.execute(SCHEMA_SQL).result()
+        return _store
+
+
+@atexit.register
+def close():
+    """남은 쓰기를 커밋하고 캔들 저장소 종료 (프로세스 종료 시 자동 호출)"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def upsert(ticker: str, timeframe: str, rows):
+    """
+    캔들 일괄 저장 (같은 봉이 있으면 새 값으로 교체) → Future (결과 = 저장한 봉 수)
+    - rows: [[ts(ms), open, high, low, close, volume], ...] (ccxt fetch_ohlcv 형식 / (n, 6) 배열)
+    - 쓰기 스레드 큐에 넣고 바로 반환 (기다리려면 .result())
+    """
+    market, tf = market_key(ticker), timeframe_key(timeframe)
+    params = [(market, tf, int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5]))
+              for r in rows]
+
+    def job(conn):
+        conn.executemany(UPSERT_SQL, params)
+        return len(params)
+
+    return candle_store().submit(job)
+
+
+def read_range(ticker: str, timeframe: str, start_ts: int | None = None, end_ts: int | None = None) -> dict:
+    """
+    기간 캔들 조회 (기본키 범위 검색 - 필요한 봉만 읽음)
+    - start_ts ≤ ts < end_ts (ms, None이면 처음 / 끝까지)
+    - 반환: {"timestamp": int64 배열, "open" ~ "volume": float64 배열} (오래된 순) / 없으면 빈 dict
+    """
+    sql    = "SELECT ts, open, high, low, close, volume FROM candles WHERE market = ? AND timeframe = ?"
+    params = [market_key(ticker), timeframe_key(timeframe)]
+    if start_ts is not None:
+        sql += " AND ts >= ?"
+        params.append(int(start_ts))
+    if end_ts is not None:
+        sql += " AND ts < ?"
+        params.append(int(end_ts))
+    sql += " ORDER BY ts"
+
+    with candle_store().reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return {}
+    data = np.array(rows, dtype=np.float64)
+    out = {"timestamp": np.array([r[0] for r in rows], dtype=np.int64)}   # ms는 float64로 바꾸지 않음
+    out.update((name, np.ascontiguousarray(data[:, i])) for i, name in enumerate(CANDLE_COLUMNS) if i)
+    return out
+
+
+def last_ts(ticker: str, timeframe: str) -> int | None:
+    """저장된 마지막 봉 시각 (ms) / 없으면 None"""
+    with candle_store().reader() as conn:
+        row = conn.execute("SELECT MAX(ts) FROM candles WHERE market = ? AND timeframe = ?",
+                           (market_key(ticker), timeframe_key(timeframe))).fetchone()
+    return row[0]
+
+
+def count(ticker: str, timeframe: str) -> int:
+    """저장된 봉 수"""
+    with candle_store().reader() as conn:
+        return conn.execute("SELECT COUNT(*) FROM candles WHERE market = ? AND timeframe = ?",
+                            (market_key(ticker), timeframe_key(timeframe))).fetchone()[0]
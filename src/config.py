@@ -43,12 +43,84 @@ TURTLE_TRAILING_MULTIPLIER = 1.5 # 가장 중요 (트레일링 스탑 승수 (
 ENTRY_START_HOUR = 0
 ENTRY_END_HOUR   = 23
 
+# ✅ 멀티 마켓 운용 (마켓별 포지션 상태 / 파라미터, 시세·잔고 조회는 전체 마켓 공용)
+MARKETS = [TICKER]   # 예: ["XRP/KRW", "BTC/KRW"]
+MARKET_PRESETS = {   # 마켓별 터틀 파라미터 (없는 마켓/항목은 위 TURTLE_* 값 = XRP 설정 사용)
+    "BTC/KRW": {"entry_period": 30, "atr_period": 14, "risk_rate": 2.0, "max_units": 4, "cooldown_sec": 43200},
+}
+MARKET_CANDLE_SYNC_SEC = 60  # 형성 중인 봉은 체결가로 갱신 → 캔들 API는 새 봉이 열릴 때 + 이 간격(초)마다만 조회
+
+# ✅ 실시간 시세 수신 방식
+LIVE_FEED         = "websocket"  # "websocket": 업비트 웹소켓 체결마다 판정 / "rest": 1초 폴링 (기존 방식)
+LIVE_WS_STALE_SEC = 5            # 웹소켓 체결이 이 시간(초) 동안 없으면 REST로 1회 판정 (끊기면 즉시 REST 폴백)
+
+# ✅ 실시간 캔들 캐시 (upbit_client.get_ohlcv)
+OHLCV_CACHE_SIZE  = 200  # 마켓/봉 간격별 링버퍼 크기 (처음 1회만 전체 조회)
+OHLCV_REFRESH_SEC = 1.0  # 이 간격(초) 안의 재호출은 조회 없이 캐시 반환 (이후엔 최근 2봉만 조회)
+
+# ✅ 캔들 저장소 (candles - 실시간 봇 / 백테스트 공용 SQLite)
+CANDLE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "candles.db")
+CANDLE_DB_LIVE = True    # True: 실시간 봇이 조회한 캔들 중 마감된 봉을 저장소에 기록
+
+# ✅ 계좌 잔고 스냅샷 (upbit_client.get_balance / get_krw_balance 공용)
+ACCOUNT_MAX_AGE_SEC = 1.0  # 이 시간(초) 안에 조회한 잔고는 재사용 (매수/매도 직후엔 무조건 재조회)
+
+# ✅ 비동기 거래소 클라이언트 (upbit_async)
+UPBIT_ASYNC           = True  # True: 판정마다 잔고/현재가/캔들 조회를 동시에 전송 / False: 순서대로 (기존 방식)
+UPBIT_ASYNC_POOL_SIZE = 10    # keep-alive HTTP 커넥션 최대 개수
+
+# ✅ 주문 체결 확인 (execution)
+EXEC_POLL_INTERVAL_SEC = 0.05  # 주문 후 첫 체결 조회 간격 (이후 2배씩 늘림)
+EXEC_POLL_MAX_SEC      = 0.5   # 체결 조회 간격 최대값
+EXEC_FILL_TIMEOUT_SEC  = 5.0   # 이 시간 안에 체결이 안 끝나면 확인된 만큼만 기록
+
+# ✅ 판정 루프 구간별 지연 측정 (metrics)
+METRICS_ENABLED = False  # True: 구간별 소요 시간 기록 (False면 측정 코드 비용이 거의 0)
+METRICS_WINDOW  = 1024   # 구간별 최근 표본 수 (p50/p95/p99 계산 범위)
+METRICS_LOG_SEC = 60     # 이 간격(초)마다 구간별 지연 요약 1줄 로그
+METRICS_PORT    = 9108   # 로컬 조회 주소 http://127.0.0.1:9108/metrics (0: 끔)
+
+# ✅ 매매 기록 DB (database - WAL, 쓰기 전용 스레드 1개 + 읽기 전용 연결 풀)
+DB_READ_POOL_SIZE    = 2    # 읽기 전용 연결 수 (/report, /stats 등 조회가 동시에 쓸 수 있는 연결)
+DB_BUSY_TIMEOUT_SEC  = 5.0  # 잠금 대기 최대 시간 (초)
+DB_FLUSH_TIMEOUT_SEC = 5.0  # 종료 시 남은 쓰기 대기 최대 시간 (초)
+
+# ✅ 자산 추이 기록 (equity - 메모리에 모았다가 묶어서 저장, 오래된 구간은 단위를 키워서 보관)
+EQUITY_ENABLED     = True              # True: 판정마다 총자산 / 손실률 기록
+EQUITY_FLUSH_SEC   = 10.0              # 이 간격(초)마다 모인 표본을 트랜잭션 1개로 저장
+EQUITY_KEEP_1S_SEC = 24 * 3600         # 1초 단위 보관 기간 (1일)
+EQUITY_KEEP_1M_SEC = 30 * 24 * 3600    # 1분 단위 보관 기간 (30일) - 1시간 단위는 계속 보관
+EQUITY_PRUNE_SEC   = 3600              # 보관 기간이 지난 구간 삭제 간격 (초)
+
+# ✅ 텔레그램 알림 (백그라운드 전송)
+TELEGRAM_QUEUE_SIZE       = 100  # 대기 알림 최대 개수 (초과 시 가장 오래된 알림 버림)
+TELEGRAM_MIN_INTERVAL_SEC = 1.0  # 전송 최소 간격 (그 사이 쌓인 알림은 1건으로 합쳐서 전송)
+TELEGRAM_MAX_RETRIES      = 5    # 네트워크 오류 / 5xx / 429 재시도 횟수
+
+# ✅ 업비트 API 호출 한도
+UPBIT_QUOTATION_RPS = 10     # 시세 API 초당 호출 한도 (IP 기준, 캔들/현재가/마켓 목록 그룹별)
+UPBIT_EXCHANGE_RPS  = 8      # 거래 API(잔고/주문 조회) 초당 호출 한도 (default 그룹)
+UPBIT_ORDER_RPS     = 8      # 주문 생성/취소 초당 호출 한도 (order 그룹)
+RATE_LIMIT_ORDER_RESERVE = 1    # 거래 API 그룹에서 잔고 조회 등이 남겨 둘 주문용 초당 호출 수
+RATE_LIMIT_BACKOFF_SEC   = 1.0  # 429 응답 시 그 그룹 호출 보류 시간 (연속이면 2배씩, 최대 30초)
+RATE_LIMIT_MAX_RETRIES   = 3    # 429 응답 재요청 횟수 (보류가 풀린 뒤 재요청)
+
 # ✅ 손실 한도 설정
 MAX_DRAWDOWN_LIMIT = -25.0   # 계좌 -25% 도달 시 봇 중단
 
 # ✅ 백테스트 실행 옵션
 BACKTEST_SINGLE_RUN   = True   # 단일 백테스트 실행
 BACKTEST_GRID_SEARCH  = False  # 그리드 서치 실행 (CSV 없을 때만 의미 있음)
+BACKTEST_SYNC_ON_START = False # True: 시작 시 저장된 마지막 봉 이후 캔들만 증분 수집
+BACKTEST_GRID_WORKERS = 0      # 그리드 서치 프로세스 수 (0: CPU 코어 수, 1: 순차 실행)
+BACKTEST_INDICATOR_CACHE_MB = 512  # 지표 캐시 용량 상한 (프로세스당, 초과 시 LRU 제거)
+BACKTEST_DATA_SOURCE  = "npy"  # "npy": 컬럼형 저장소(data/KRW-XRP_60m/) / "sqlite": 캔들 저장소(CANDLE_DB_PATH)
+BACKTEST_START        = None   # 백테스트 시작일 "YYYY-MM-DD" (None: 처음부터)
+BACKTEST_END          = None   # 백테스트 종료일 "YYYY-MM-DD" (이 날 제외, None: 끝까지)
+
+# ✅ 워크포워드 최적화 (python -m test.optimize)
+WALK_FORWARD_TRAIN_DAYS = 365  # 학습(최적화) 구간 길이 (일)
+WALK_FORWARD_TEST_DAYS  = 90   # 검증(아웃오브샘플) 구간 길이 (일) = 창 이동 간격
 
 # ✅ 백테스트 초기 자본
 BACKTEST_INITIAL_CAPITAL = 3_000_000.0  # 백테스트 초기 자본
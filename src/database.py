@@ -1,18 +1,277 @@
 # src/database.py
 import os
+import atexit
+import queue
 import sqlite3
 import datetime
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+import config
+import metrics
 
 # 프로젝트 루트 기준 DB 경로
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_NAME = os.path.join(BASE_DIR, "..", "trading.db")
 
+_STOP = object()     # 쓰기 스레드 종료 신호
 
-def init_db():
-    """DB 테이블 생성 (없으면 생성)"""
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
-    cursor = conn.cursor()
-    cursor.execute(
+
+class TradeStore:
+    """
+    SQLite 저장소 (WAL 모드 - 쓰기 중에도 읽기가 막히지 않음)
+    - 쓰기: 전용 스레드 1개가 연결 1개로 큐 순서대로 실행 → submit()은 큐에 넣고 바로 반환
+      (그동안 쌓인 작업은 트랜잭션 1개로 묶어서 커밋 → fsync 1회)
+      트랜잭션 자체가 실패하면 (다른 프로세스가 쓰기 락을 오래 잡음 등) 그 묶음의 작업만 모두 예외, 스레드는 계속 동작
+    - 읽기: 읽기 전용 연결 풀 (reader()) - 텔레그램 /report 조회와 매매 기록이 서로 기다리지 않음
+    - flush(): 큐에 넣은 쓰기가 모두 커밋될 때까지 대기 (종료 직전 / 테스트용)
+    """
+
+    def __init__(self, path: str, readers: int | None = None, busy_timeout: float | None = None):
+        self.path         = path
+        self.readers      = readers or config.DB_READ_POOL_SIZE
+        self.busy_timeout = config.DB_BUSY_TIMEOUT_SEC if busy_timeout is None else busy_timeout
+        self.written      = 0        # 커밋된 작업 수
+        self.commits      = 0        # 커밋(트랜잭션) 수
+        self.failed       = 0        # 예외로 되돌린 작업 수
+
+        self._queue   = queue.Queue()
+        self._pending = 0            # 큐 + 실행 중인 작업 수
+        self._idle    = threading.Condition()
+        self._pool    = queue.Queue()
+        self._opened  = 0            # 만든 읽기 연결 수
+        self._pool_lock = threading.Lock()
+        self._closed  = False
+        self._ready   = threading.Event()
+        self._thread  = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    # ── 쓰기 ──
+    def submit(self, job) -> Future:
+        """
+        쓰기 작업 예약 → Future (결과 = job(conn) 반환값)
+        - job(conn): 쓰기 스레드의 연결로 실행, 커밋은 쓰기 스레드가 담당 (직접 commit 금지)
+        - 작업 1개가 예외를 내면 그 작업만 되돌림 (같이 묶인 다른 작업은 커밋)
+        """
+        if self._closed:
+            raise RuntimeError("DB 쓰기 스레드가 종료됨")
+        future = Future()
+        with self._idle:
+            self._pending += 1
+        self._queue.put((job, future))
+        return future
+
+    def execute(self, sql: str, params=()) -> Future:
+        """SQL 1개 쓰기 예약 → Future (결과 = lastrowid)"""
+        return self.submit(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """큐가 빌 때까지 대기 → 시간 안에 다 커밋됐으면 True"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    # ── 읽기 ──
+    @contextmanager
+    def reader(self):
+        """읽기 전용 연결 1개 대여 (with db_store().reader() as conn: ...) - 풀이 다 쓰이면 반납까지 대기"""
+        conn = self._borrow()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    def _borrow(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._opened < self.readers:
+                self._opened += 1
+                return self._connect(readonly=True)
+        return self._pool.get()
+
+    # ── 종료 ──
+    def close(self, timeout: float | None = None):
+        """남은 쓰기를 커밋하고 쓰기 스레드 / 읽기 연결 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(config.DB_FLUSH_TIMEOUT_SEC if timeout is None else timeout)
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # ── 내부 구현 ──
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            uri = "file:" + os.path.abspath(self.path) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout, check_same_thread=False)
+        else:
+            # isolation_level=None: 트랜잭션은 쓰기 스레드가 직접 BEGIN / COMMIT
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")    # WAL에선 커밋마다 fsync 안 해도 손상 없음
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        self._ready.set()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(item is _STOP for item in batch)
+                self._write(conn, [item for item in batch if item is not _STOP])
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: list):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            results = self._transaction(conn, batch)
+        except Exception as e:
+            # BEGIN / SAVEPOINT / COMMIT 실패 (다른 프로세스가 busy_timeout보다 오래 쓰기 락을 잡는 등)
+            # → 묶음 전체를 되돌리고 모든 작업을 실패 처리, 쓰기 스레드는 다음 묶음을 계속 처리
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                pass
+            results = [(future, None, e) for _, future in batch]
+        metrics.observe("db_commit", time.perf_counter() - started)
+
+        failed = 0
+        for future, result, error in results:
+            if future.cancelled():
+                continue
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                print(f"❌ DB 쓰기 실패: {error}")
+                future.set_exception(error)
+        with self._idle:
+            self.commits += 1
+            self.written += len(results) - failed
+            self.failed  += failed
+            self._pending -= len(batch)
+            self._idle.notify_all()
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection, batch: list) -> list:
+        """묶음 1개를 트랜잭션 1개로 실행 → [(future, 결과, 예외), ...] (작업 예외는 그 작업만 되돌림)"""
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        for job, future in batch:
+            conn.execute("SAVEPOINT job")
+            try:
+                results.append((future, job(conn), None))
+                conn.execute("RELEASE job")
+            except Exception as e:
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+                results.append((future, None, e))
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.rollback()
+            results = [(future, None, e) for future, _, _ in results]
+        return results
+
+
+_store: TradeStore | None = None
+_store_lock = threading.Lock()
+
+
+def db_store() -> TradeStore:
+    """DB_NAME 경로의 공용 저장소 (처음 호출 시 생성, DB_NAME이 바뀌면 기존 것을 닫고 새로 생성)"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != DB_NAME:
+            if _store is not None:
+                _store.close()
+            _store = TradeStore(DB_NAME)
+        return _store
+
+
+def flush(timeout: float | None = None) -> bool:
+    """예약된 매매 기록이 모두 커밋될 때까지 대기"""
+    return db_store().flush(config.DB_FLUSH_TIMEOUT_SEC if timeout is None else timeout)
+
+
+@atexit.register
+def close():
+    """남은 매매 기록을 커밋하고 DB 연결 종료 (프로세스 종료 시 자동 호출)"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+# ============================================================
+# 스키마 마이그레이션 (PRAGMA user_version = 적용된 마지막 버전)
+# ============================================================
+
+# trades 전체 → daily_rollup (마이그레이션 v3 / rebuild_rollup 공용)
+ROLLUP_BACKFILL_SQL = """
+    INSERT INTO daily_rollup (
+        date, ticker, mode, trades, wins, losses, pnl,
+        sells, sell_wins, sell_losses, sell_pnl, sell_profit_rate
+    )
+    SELECT
+        COALESCE(date, ''), COALESCE(ticker, ''), COALESCE(mode, ''),
+        COUNT(*),
+        SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END),
+        TOTAL(pnl),
+        SUM(CASE WHEN action = 'sell' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN action = 'sell' AND pnl > 0 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN action = 'sell' AND pnl <= 0 THEN 1 ELSE 0 END),
+        TOTAL(CASE WHEN action = 'sell' THEN pnl END),
+        TOTAL(CASE WHEN action = 'sell' THEN profit_rate END)
+    FROM trades
+    GROUP BY 1, 2, 3
+"""
+
+# 체결 1건 → 집계 행 누적 (없으면 생성)
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO daily_rollup (
+        date, ticker, mode, trades, wins, losses, pnl,
+        sells, sell_wins, sell_losses, sell_pnl, sell_profit_rate
+    )
+    VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (date, ticker, mode) DO UPDATE SET
+        trades           = trades           + 1,
+        wins             = wins             + excluded.wins,
+        losses           = losses           + excluded.losses,
+        pnl              = pnl              + excluded.pnl,
+        sells            = sells            + excluded.sells,
+        sell_wins        = sell_wins        + excluded.sell_wins,
+        sell_losses      = sell_losses      + excluded.sell_losses,
+        sell_pnl         = sell_pnl         + excluded.sell_pnl,
+        sell_profit_rate = sell_profit_rate + excluded.sell_profit_rate
+"""
+
+# (버전, 설명, SQL 목록) - 버전 순서대로 한 번씩만 적용, 이미 배포된 항목은 수정하지 말고 새 버전으로 추가
+MIGRATIONS = [
+    (1, "trades 테이블", [
         """
         CREATE TABLE IF NOT EXISTS trades (
             id           INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,12 +286,87 @@ def init_db():
             pnl          REAL DEFAULT 0,  -- 실현 손익 (원)
             fee          REAL DEFAULT 0   -- 수수료 (있으면 기록)
         )
+        """,
+    ]),
+    (2, "조회 인덱스 (날짜 / 전략+날짜 / 마켓+날짜)", [
+        "CREATE INDEX IF NOT EXISTS idx_trades_date        ON trades (date)",
+        "CREATE INDEX IF NOT EXISTS idx_trades_mode_date   ON trades (mode, date)",
+        "CREATE INDEX IF NOT EXISTS idx_trades_ticker_date ON trades (ticker, date)",
+    ]),
+    (3, "일별 집계 테이블 (날짜 / 마켓 / 전략) + 기존 기록 집계", [
         """
-    )
-    conn.commit()
-    conn.close()
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            date             TEXT NOT NULL,
+            ticker           TEXT NOT NULL,             -- 없으면 ''
+            mode             TEXT NOT NULL,             -- 없으면 '' (조회 시 NULL로 되돌림)
+            trades           INTEGER NOT NULL DEFAULT 0, -- 전체 체결 수 (buy + sell)
+            wins             INTEGER NOT NULL DEFAULT 0, -- pnl > 0
+            losses           INTEGER NOT NULL DEFAULT 0, -- pnl < 0
+            pnl              REAL    NOT NULL DEFAULT 0, -- pnl 합계
+            sells            INTEGER NOT NULL DEFAULT 0, -- 청산(sell) 수
+            sell_wins        INTEGER NOT NULL DEFAULT 0, -- sell & pnl > 0
+            sell_losses      INTEGER NOT NULL DEFAULT 0, -- sell & pnl <= 0
+            sell_pnl         REAL    NOT NULL DEFAULT 0, -- sell pnl 합계
+            sell_profit_rate REAL    NOT NULL DEFAULT 0, -- sell 수익률(%) 합계 (평균 = / sells)
+            PRIMARY KEY (date, ticker, mode)
+        ) WITHOUT ROWID
+        """,
+        "DELETE FROM daily_rollup",
+        ROLLUP_BACKFILL_SQL,
+    ]),
+    (4, "자산 추이 테이블 (1초 / 1분 / 1시간 단위)", [
+        """
+        CREATE TABLE IF NOT EXISTS equity (
+            resolution   INTEGER NOT NULL,  -- 단위 (초): 1 / 60 / 3600
+            ts           INTEGER NOT NULL,  -- 구간 시작 시각 (epoch 초, resolution 배수)
+            equity       REAL    NOT NULL,  -- 구간 마지막 총자산 (원)
+            equity_min   REAL    NOT NULL,  -- 구간 최저 총자산
+            equity_max   REAL    NOT NULL,  -- 구간 최고 총자산
+            drawdown     REAL    NOT NULL,  -- 구간 마지막 손실률 (초기 자산 대비 %)
+            drawdown_min REAL    NOT NULL,  -- 구간 최저 손실률
+            PRIMARY KEY (resolution, ts)
+        ) WITHOUT ROWID
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+
+def migrate(conn: sqlite3.Connection, target: int | None = None) -> list[int]:
+    """
+    user_version 이후 마이그레이션을 순서대로 적용 (쓰기 스레드 트랜잭션 안에서 실행 → 실패 시 전부 되돌림)
+    - target: 이 버전까지만 적용 (None이면 최신)
+    - 반환: 이번에 적용한 버전 목록
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    applied = []
+    for version, desc, statements in MIGRATIONS:
+        if version <= current or (target is not None and version > target):
+            continue
+        for sql in statements:
+            conn.execute(sql)
+        conn.execute(f"PRAGMA user_version = {version}")
+        print(f"🗄️ [DB 마이그레이션] v{version}: {desc}")
+        applied.append(version)
+    return applied
+
+
+def init_db(target: int | None = None) -> list[int]:
+    """DB 스키마를 최신 버전으로 맞춤 (없으면 생성) - 커밋될 때까지 대기 → 적용한 버전 목록"""
+    return db_store().submit(lambda conn: migrate(conn, target)).result()
 
 
+def rebuild_rollup():
+    """trades 전체로 daily_rollup을 다시 계산 (trades를 직접 고쳤을 때) - 커밋될 때까지 대기"""
+    def job(conn):
+        conn.execute("DELETE FROM daily_rollup")
+        conn.execute(ROLLUP_BACKFILL_SQL)
+    db_store().submit(job).result()
+
+
+@metrics.timed("db")
 def log_trade(
     ticker: str,
     action: str,
@@ -44,55 +378,61 @@ def log_trade(
     fee: float = 0.0,
 ):
     """
-    매매 기록 저장
+    매매 기록 저장 (쓰기 스레드 큐에 넣고 바로 반환 → 매매 스레드는 커밋/fsync를 기다리지 않음)
 
     - action: "buy" / "sell"
     - profit_rate, pnl: 보통 sell일 때 값이 의미 있음
     - mode: 어떤 전략에서 나온 트레이드인지 표시 (RSI / BREAKOUT_5M_V1 ...)
+    - 반환: Future (커밋 후 결과 = 새 행 id, 기다릴 필요가 있을 때만 .result())
+    - 일별 집계(daily_rollup)도 같은 트랜잭션에서 누적 → 둘 중 하나만 저장되는 경우 없음
     """
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
-    cursor = conn.cursor()
-
     now = datetime.datetime.now()
     ts = now.strftime("%Y-%m-%d %H:%M:%S")
     date_str = now.strftime("%Y-%m-%d")
 
-    cursor.execute(
-        """
-        INSERT INTO trades (
-            timestamp, date, ticker, mode, action, price, amount,
-            profit_rate, pnl, fee
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (ts, date_str, ticker, mode, action, price, amount, profit_rate, pnl, fee),
+    sell = action == "sell"
+    rollup = (
+        date_str, ticker or "", mode or "",
+        int(pnl > 0), int(pnl < 0), pnl,
+        int(sell), int(sell and pnl > 0), int(sell and pnl <= 0),
+        pnl if sell else 0.0, profit_rate if sell else 0.0,
     )
 
-    conn.commit()
-    conn.close()
+    def job(conn):
+        row_id = conn.execute(
+            """
+            INSERT INTO trades (
+                timestamp, date, ticker, mode, action, price, amount,
+                profit_rate, pnl, fee
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (ts, date_str, ticker, mode, action, price, amount, profit_rate, pnl, fee),
+        ).lastrowid
+        conn.execute(ROLLUP_UPSERT_SQL, rollup)
+        return row_id
+
+    future = db_store().submit(job)
     print(
         f"💾 [DB 저장] {ts} | {ticker} | {mode or '-'} | {action} | "
         f"{price:,.0f}원 | {amount}개 | pnl={pnl:+,.0f}"
     )
+    return future
 
 
 def get_recent_trades(limit: int = 5):
-    """최근 거래 내역 조회"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        SELECT id, timestamp, ticker, mode, action,
-               price, amount, profit_rate, pnl
-        FROM trades
-        ORDER BY id DESC
-        LIMIT ?
-        """,
-        (limit,),
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    """최근 거래 내역 조회 (아직 쓰기 큐에 있는 기록은 제외 - 필요하면 flush() 후 조회)"""
+    with db_store().reader() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, timestamp, ticker, mode, action,
+                   price, amount, profit_rate, pnl
+            FROM trades
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
     return rows
 
 
@@ -103,23 +443,25 @@ def generate_daily_report(date_str: str | None = None) -> dict:
     if date_str is None:
         date_str = datetime.date.today().strftime("%Y-%m-%d")
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        SELECT timestamp, ticker, mode, action, price, amount, profit_rate, pnl
-        FROM trades
-        WHERE date = ?
-        ORDER BY timestamp ASC
-        """,
-        (date_str,),
-    )
-    rows = cursor.fetchall()
-
-    if not rows:
+    # 전략별 성과 집계 (일별 집계 테이블 - 그날의 마켓 x 전략 행만 읽음)
+    with db_store().reader() as conn:
+        mode_rows = conn.execute(
+            """
+            SELECT
+                NULLIF(mode, '') AS mode,
+                SUM(trades)      AS cnt,
+                SUM(wins)        AS wins,
+                SUM(losses)      AS losses,
+                SUM(pnl)         AS total_pnl
+            FROM daily_rollup
+            WHERE date = ?
+            GROUP BY mode
+            """,
+            (date_str,),
+        ).fetchall()
+
+    if not mode_rows:
         print(f"📄 [{date_str}] 거래 내역이 없습니다.")
-        conn.close()
         return {
             "date": date_str,
             "total_trades": 0,
@@ -130,31 +472,13 @@ def generate_daily_report(date_str: str | None = None) -> dict:
             "modes": [],
         }
 
-    total_trades = len(rows)
-    total_pnl = sum(r[7] for r in rows)
+    total_trades = sum(r[1] for r in mode_rows)
+    total_pnl = sum(r[4] for r in mode_rows)
 
-    wins = sum(1 for r in rows if r[7] > 0)
-    losses = sum(1 for r in rows if r[7] < 0)
+    wins = sum(r[2] for r in mode_rows)
+    losses = sum(r[3] for r in mode_rows)
     win_rate = wins / total_trades * 100 if total_trades > 0 else 0.0
 
-    # 전략별 성과 집계
-    cursor.execute(
-        """
-        SELECT
-            mode,
-            COUNT(*) AS cnt,
-            SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) AS wins,
-            SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END) AS losses,
-            SUM(pnl) AS total_pnl
-        FROM trades
-        WHERE date = ?
-        GROUP BY mode
-        """,
-        (date_str,),
-    )
-    mode_rows = cursor.fetchall()
-    conn.close()
-
     mode_stats = []
     for mode, cnt, w, l, m_pnl in mode_rows:
         if cnt and w is not None and l is not None:
@@ -206,20 +530,18 @@ def get_strategy_summary(start_date: str | None = None, end_date: str | None = N
     """
     전략(mode)별 성과 요약을 반환.
     - start_date, end_date: 'YYYY-MM-DD' 형식 문자열 (둘 다 None이면 전체 기간)
+    - 일별 집계 테이블 기준 (기간 일수 x 마켓 x 전략 행만 읽음)
     반환 형식: [(mode, total_pnl, closed_trades, wins, losses, avg_profit_rate), ...]
     """
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
-    cursor = conn.cursor()
-
     sql = """
         SELECT
-            mode,
-            SUM(CASE WHEN action = 'sell' THEN pnl ELSE 0 END)                AS total_pnl,
-            SUM(CASE WHEN action = 'sell' THEN 1 ELSE 0 END)                  AS closed_trades,
-            SUM(CASE WHEN action = 'sell' AND pnl > 0 THEN 1 ELSE 0 END)      AS wins,
-            SUM(CASE WHEN action = 'sell' AND pnl <= 0 THEN 1 ELSE 0 END)     AS losses,
-            AVG(CASE WHEN action = 'sell' THEN profit_rate END)               AS avg_profit_rate
-        FROM trades
+            NULLIF(mode, '')                                                  AS mode,
+            SUM(sell_pnl)                                                     AS total_pnl,
+            SUM(sells)                                                        AS closed_trades,
+            SUM(sell_wins)                                                    AS wins,
+            SUM(sell_losses)                                                  AS losses,
+            SUM(sell_profit_rate) / NULLIF(SUM(sells), 0)                     AS avg_profit_rate
+        FROM daily_rollup
         WHERE 1=1
     """
 
@@ -235,9 +557,8 @@ def get_strategy_summary(start_date: str | None = None, end_date: str | None = N
 
     sql += " GROUP BY mode ORDER BY total_pnl DESC"
 
-    cursor.execute(sql, params)
-    rows = cursor.fetchall()
-    conn.close()
+    with db_store().reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
 
     return rows
 
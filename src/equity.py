@@ -0,0 +1,183 @@
+import atexit
+import threading
+import time
+import numpy as np
+import config
+import database as db
+
+# 저장 단위 (초) - 표본 1개를 세 단위 구간에 동시에 누적 (1분 / 1시간 구간은 조회할 때 다시 계산하지 않음)
+RESOLUTIONS = (1, 60, 3600)
+
+SERIES_COLUMNS = ("equity", "equity_min", "equity_max", "drawdown", "drawdown_min")
+
+# 구간 1개 누적 (없으면 생성) - 마지막 값은 교체, 최저/최고는 기존 값과 비교
+UPSERT_SQL = """
+    INSERT INTO equity (resolution, ts, equity, equity_min, equity_max, drawdown, drawdown_min)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, ts) DO UPDATE SET
+        equity       = excluded.equity,
+        equity_min   = MIN(equity_min, excluded.equity_min),
+        equity_max   = MAX(equity_max, excluded.equity_max),
+        drawdown     = excluded.drawdown,
+        drawdown_min = MIN(drawdown_min, excluded.drawdown_min)
+"""
+
+
+class EquityRecorder:
+    """
+    자산 추이 기록기 (판정마다 총자산 / 손실률 1개씩)
+    - record(): 메모리 버퍼에 추가만 → flush_sec마다 모인 표본을 구간별로 합쳐서 쓰기 스레드에 1건으로 넘김
+      (초당 디스크 쓰기 없음, 판정 루프는 커밋을 기다리지 않음)
+    - 1초 / 1분 / 1시간 구간을 함께 누적하고, 보관 기간이 지난 1초(keep_1s) / 1분(keep_1m) 구간은
+      prune_sec마다 삭제 → 1시간 구간만 계속 쌓임 (1년 ≈ 8,760행)
+    """
+
+    def __init__(self, flush_sec: float | None = None, keep_1s: float | None = None,
+                 keep_1m: float | None = None, prune_sec: float | None = None):
+        self.flush_sec = config.EQUITY_FLUSH_SEC if flush_sec is None else flush_sec
+        self.keep_1s   = config.EQUITY_KEEP_1S_SEC if keep_1s is None else keep_1s
+        self.keep_1m   = config.EQUITY_KEEP_1M_SEC if keep_1m is None else keep_1m
+        self.prune_sec = config.EQUITY_PRUNE_SEC if prune_sec is None else prune_sec
+        self.samples   = 0            # 누적 기록 수
+        self.flushes   = 0            # 저장 요청 수 (쓰기 스레드 작업 수)
+
+        self._buffer     = []         # [(ts, equity, drawdown), ...] 시각 순
+        self._last_flush = None
+        self._last_prune = None
+        self._lock = threading.Lock()
+
+    def record(self, equity: float, drawdown: float, ts: float | None = None):
+        """표본 1개 추가 (ts: epoch 초, None이면 지금) - flush_sec이 지났으면 모인 표본 저장"""
+        if ts is None:
+            ts = time.time()
+        with self._lock:
+            self._buffer.append((ts, equity, drawdown))
+            self.samples += 1
+            if self._last_flush is None:
+                self._last_flush = ts
+            due = ts - self._last_flush >= self.flush_sec
+        if due:
+            self.flush(ts)
+
+    def flush(self, now: float | None = None):
+        """
+        버퍼의 표본을 구간별로 합쳐서 쓰기 스레드에 넘김 → Future (결과 = 저장한 구간 행 수) / 없으면 None
+        - prune_sec이 지났으면 같은 트랜잭션에서 보관 기간이 지난 구간도 삭제
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            samples, self._buffer = self._buffer, []
+            self._last_flush = now
+            prune = self._last_prune is None or now - self._last_prune >= self.prune_sec
+            if prune:
+                self._last_prune = now
+        if not samples and not prune:
+            return None
+
+        rows = aggregate(samples)
+        cutoffs = ((1, int(now - self.keep_1s)), (60, int(now - self.keep_1m))) if prune else ()
+
+        def job(conn):
+            conn.executemany(UPSERT_SQL, rows)
+            for resolution, cutoff in cutoffs:
+                conn.execute("DELETE FROM equity WHERE resolution = ? AND ts < ?", (resolution, cutoff))
+            return len(rows)
+
+        self.flushes += 1
+        return db.db_store().submit(job)
+
+    def resolution_for(self, start: float | None, now: float | None = None) -> int:
+        """start 이후를 빠짐없이 담고 있는 가장 작은 단위 (start None = 전체 기간 → 1시간)"""
+        if start is None:
+            return 3600
+        age = (time.time() if now is None else now) - start
+        if age <= self.keep_1s:
+            return 1
+        if age <= self.keep_1m:
+            return 60
+        return 3600
+
+
+def aggregate(samples) -> list[tuple]:
+    """
+    시각 순 표본 [(ts, equity, drawdown), ...] → 단위별 구간 행
+    [(resolution, 구간 시작, 마지막 자산, 최저, 최고, 마지막 손실률, 최저 손실률), ...]
+    """
+    rows = []
+    for resolution in RESOLUTIONS:
+        buckets = {}
+        for ts, eq, dd in samples:
+            key = int(ts) // resolution * resolution
+            b = buckets.get(key)
+            if b is None:
+                buckets[key] = [eq, eq, eq, dd, dd]
+            else:
+                b[0] = eq
+                b[1] = min(b[1], eq)
+                b[2] = max(b[2], eq)
+                b[3] = dd
+                b[4] = min(b[4], dd)
+        rows.extend((resolution, key, *b) for key, b in buckets.items())
+    return rows
+
+
+def series(start: float | None = None, end: float | None = None, resolution: int | None = None) -> dict:
+    """
+    자산 추이 조회 (start ≤ ts < end, epoch 초)
+    - resolution: 1 / 60 / 3600 (None이면 start부터 빠짐없이 남아 있는 가장 작은 단위)
+    - 반환: {"ts": int64 배열, "equity" ~ "drawdown_min": float64 배열} (오래된 순) / 없으면 빈 dict
+    - 아직 버퍼에 있는 표본은 제외 (필요하면 default().flush() 후 db.flush())
+    """
+    if resolution is None:
+        resolution = default().resolution_for(start)
+    sql    = "SELECT ts, equity, equity_min, equity_max, drawdown, drawdown_min FROM equity WHERE resolution = ?"
+    params = [resolution]
+    if start is not None:
+        sql += " AND ts >= ?"
+        params.append(int(start) // resolution * resolution)
+    if end is not None:
+        sql += " AND ts < ?"
+        params.append(int(end))
+    sql += " ORDER BY ts"
+
+    with db.db_store().reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return {}
+    data = np.array(rows, dtype=np.float64)
+    out = {"ts": np.array([r[0] for r in rows], dtype=np.int64)}
+    out.update((name, np.ascontiguousarray(data[:, i + 1])) for i, name in enumerate(SERIES_COLUMNS))
+    return out
+
+
+def peak_drawdown(data: dict) -> float:
+    """
+    series() 결과의 최대 낙폭 (%) - 직전 구간까지의 최고 자산 대비 구간 최저 자산
+    - 한 구간 안의 고점 → 저점은 순서를 알 수 없어 제외 (1초 단위에서는 차이 없음)
+    """
+    if not data:
+        return 0.0
+    low  = data["equity_min"]
+    peak = np.maximum.accumulate(np.concatenate(([low[0]], data["equity_max"][:-1])))
+    return float(min(((low - peak) / peak * 100).min(), 0.0))
+
+
+_default: EquityRecorder | None = None
+_default_lock = threading.Lock()
+
+
+def default() -> EquityRecorder:
+    """config 값으로 만든 공용 기록기 (처음 호출 시 생성)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = EquityRecorder()
+        return _default
+
+
+@atexit.register
+def close():
+    """버퍼에 남은 표본 저장 (프로세스 종료 시 자동 호출 - DB 종료보다 먼저 실행됨)"""
+    if _default is not None:
+        _default.flush()
@@ -0,0 +1,104 @@
+import time
+import config
+import metrics
+import ratelimit
+import upbit_client as client
+
+
+class Fill:
+    """
+    주문 체결 결과
+    - price : 체결 평균가 / amount: 체결 수량 / fee: 수수료 (원) / cost: 체결 금액 (원, 수수료 제외)
+    - estimated: 거래소 체결 내역을 못 받아서 판정가 기준으로 추정한 값이면 True
+    """
+
+    __slots__ = ("ticker", "side", "price", "amount", "fee", "cost", "order_id", "estimated")
+
+    def __init__(self, ticker: str, side: str, price: float, amount: float, fee: float = 0.0,
+                 order_id: str | None = None, estimated: bool = False):
+        self.ticker    = ticker
+        self.side      = side
+        self.price     = price
+        self.amount    = amount
+        self.fee       = fee
+        self.cost      = price * amount
+        self.order_id  = order_id
+        self.estimated = estimated
+
+    def __repr__(self):
+        tag = " (추정)" if self.estimated else ""
+        return f"Fill({self.ticker} {self.side} {self.amount:.8f} @ {self.price:,.2f} fee={self.fee:,.2f}{tag})"
+
+
+def market_buy(ticker: str, krw_amount: float, est_price: float) -> Fill | None:
+    """
+    시장가 매수 → 체결 확인 후 실제 체결가 / 수량 / 수수료 반환
+    - est_price: 판정에 쓴 현재가 (체결 내역을 못 받았을 때만 추정용으로 사용)
+    - 주문 실패 / 체결 0 → None
+    """
+    with metrics.timer("order"):
+        order = client.buy_market(ticker, krw_amount)
+    return wait_fill(order, ticker, "buy", est_price, krw_amount / est_price if est_price > 0 else 0.0)
+
+
+def market_sell(ticker: str, amount: float, est_price: float) -> Fill | None:
+    """시장가 매도 → 체결 확인 후 실제 체결가 / 수량 / 수수료 반환 (주문 실패 / 체결 0 → None)"""
+    with metrics.timer("order"):
+        order = client.sell_market(ticker, amount)
+    return wait_fill(order, ticker, "sell", est_price, amount)
+
+
+@metrics.timed("fill")
+def wait_fill(order, ticker: str, side: str, est_price: float, est_amount: float,
+              timeout: float | None = None) -> Fill | None:
+    """
+    주문 체결 대기 (주문 조회를 짧은 간격부터 2배씩 늘려 가며 폴링, 주문 우선순위로 조회)
+    - 체결 완료 (done / 잔량 취소된 시장가 매수) → 실제 체결 내역
+    - timeout 안에 못 끝나면 그때까지 체결된 만큼, 그것도 없으면 판정가 기준 추정값 (estimated=True)
+    - 주문 id가 없는 응답 (주문 실패 / 테스트용 가짜 주문) → 추정값, 주문 자체가 None이면 None
+    """
+    if order is None:
+        return None
+    order_id = order.get("id") if isinstance(order, dict) else None
+    if not order_id:
+        return Fill(ticker, side, est_price, est_amount, estimated=True)
+
+    if timeout is None:
+        timeout = config.EXEC_FILL_TIMEOUT_SEC
+    deadline = time.monotonic() + timeout
+    delay    = config.EXEC_POLL_INTERVAL_SEC
+    with ratelimit.urgent():
+        while not _finished(order) and time.monotonic() < deadline:
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, config.EXEC_POLL_MAX_SEC)
+            polled = client.get_order(order_id, ticker)
+            if polled:
+                order = polled
+    client.account.invalidate()   # 체결 확인 전에 다른 스레드가 조회한 잔고는 버림
+
+    fill = _to_fill(order, ticker, side)
+    if fill is not None:
+        if not _finished(order):
+            print(f"⚠️ {ticker} 주문 {order_id} 체결 확인 시간 초과 → 확인된 {fill.amount:.8f}개만 기록")
+        return fill
+    if order.get("status") == "canceled":
+        print(f"❌ {ticker} 주문 {order_id} 체결 없이 취소됨")
+        return None
+    print(f"⚠️ {ticker} 주문 {order_id} 체결 확인 실패 → 판정가 기준 추정값 기록")
+    return Fill(ticker, side, est_price, est_amount, order_id=order_id, estimated=True)
+
+
+def _finished(order: dict) -> bool:
+    """더 이상 체결이 늘지 않는 상태인지 (시장가 매수는 잔량이 취소(cancel)로 끝나기도 함)"""
+    return order.get("status") in ("closed", "canceled") and (order.get("trades") or not order.get("filled"))
+
+
+def _to_fill(order: dict, ticker: str, side: str) -> Fill | None:
+    """ccxt 주문 → Fill (체결 내역이 없으면 None)"""
+    filled = float(order.get("filled") or 0.0)
+    if filled <= 0 or not order.get("trades"):
+        return None
+    average = order.get("average")
+    price   = float(average) if average else float(order["cost"]) / filled
+    fee     = float((order.get("fee") or {}).get("cost") or 0.0)
+    return Fill(ticker, side, price, filled, fee, order_id=order.get("id"))
@@ -0,0 +1,252 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# 지표 라이브러리 (ATR / 돈치안 채널 / RSI)
+#  - 배치형: 전체 배열 → 배열 (백테스트용, 워밍업 구간은 NaN)
+#  - 스트리밍형: 봉/틱 1개 갱신 O(1) (실시간용)
+#      update(...) : 마감된 봉 1개 반영
+#      peek(...)   : 형성 중인 봉을 반영했을 때의 값 (상태는 그대로)
+#  - 같은 입력이면 두 형태의 결과가 같다 (최고/최저는 비트 단위, 평균은 부동소수 반올림 오차 수준)
+# ============================================================
+
+NAN = float("nan")
+
+
+# ============================================================
+# 1. 배치형
+# ============================================================
+
+def _shift1(x: np.ndarray) -> np.ndarray:
+    out = np.empty_like(x)
+    out[:1] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    TR = max(고가-저가, |고가-전봉종가|, |저가-전봉종가|)
+    - NaN은 건너뛰고 최대값 (첫 봉 / 직전 봉 결측이면 고가-저가)
+    """
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    prev_close = _shift1(close)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def rolling_mean(x: np.ndarray, period: int) -> np.ndarray:
+    return pd.Series(x).rolling(window=period).mean().to_numpy()
+
+
+def rolling_max(x: np.ndarray, period: int) -> np.ndarray:
+    return pd.Series(x).rolling(window=period).max().to_numpy()
+
+
+def rolling_min(x: np.ndarray, period: int) -> np.ndarray:
+    return pd.Series(x).rolling(window=period).min().to_numpy()
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 20) -> np.ndarray:
+    """ATR = TR의 period봉 단순 평균"""
+    return rolling_mean(true_range(high, low, close), period)
+
+
+def donchian_upper(high: np.ndarray, period: int) -> np.ndarray:
+    """직전 period봉 최고가 (현재 봉 제외) → 돌파 진입 기준"""
+    return _shift1(rolling_max(high, period))
+
+
+def donchian_lower(low: np.ndarray, period: int) -> np.ndarray:
+    """직전 period봉 최저가 (현재 봉 제외) → 저점 이탈 청산 기준"""
+    return _shift1(rolling_min(low, period))
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI (상승폭/하락폭 period봉 단순 평균) / 첫 봉의 변화량은 0으로 계산"""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.zeros_like(close)
+    delta[1:] = np.diff(close)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+
+# ============================================================
+# 2. 스트리밍형
+# ============================================================
+
+class RollingMean:
+    """period봉 단순 평균 (보정 합계 → 장시간 갱신해도 오차 누적 없음)"""
+
+    def __init__(self, period: int):
+        self.period  = period
+        self._window = deque()
+        self._sum    = 0.0
+        self._comp   = 0.0      # Neumaier 보정항
+
+    def _add(self, x: float):
+        t = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._comp += (self._sum - t) + x
+        else:
+            self._comp += (x - t) + self._sum
+        self._sum = t
+
+    @property
+    def value(self) -> float:
+        if len(self._window) < self.period:
+            return NAN
+        return (self._sum + self._comp) / self.period
+
+    def update(self, x: float) -> float:
+        self._window.append(x)
+        self._add(x)
+        if len(self._window) > self.period:
+            self._add(-self._window.popleft())
+        return self.value
+
+    def peek(self, x: float) -> float:
+        n = len(self._window)
+        if n + 1 < self.period:
+            return NAN
+        total = self._sum + self._comp + x
+        if n == self.period:
+            total -= self._window[0]
+        return total / self.period
+
+
+class _RollingExtreme:
+    """단조 덱 기반 period봉 최고/최저 (갱신 평균 O(1))"""
+
+    def __init__(self, period: int, sign: float):
+        self.period = period
+        self._sign  = sign      # +1: 최고, -1: 최저
+        self._deque = deque()   # (봉 번호, 부호 적용 값) / 값 내림차순
+        self._n     = 0
+
+    @property
+    def value(self) -> float:
+        if self._n < self.period:
+            return NAN
+        return self._sign * self._deque[0][1]
+
+    def update(self, x: float) -> float:
+        v = self._sign * x
+        while self._deque and self._deque[-1][1] <= v:
+            self._deque.pop()
+        self._deque.append((self._n, v))
+        self._n += 1
+        while self._deque[0][0] <= self._n - 1 - self.period:
+            self._deque.popleft()
+        return self.value
+
+    def peek(self, x: float) -> float:
+        if self._n + 1 < self.period:
+            return NAN
+        v = self._sign * x
+        for idx, w in self._deque:
+            if idx > self._n - self.period:     # 새 값이 들어오면 빠지는 가장 오래된 봉 제외
+                return self._sign * max(v, w)
+        return x
+
+
+class RollingMax(_RollingExtreme):
+    def __init__(self, period: int):
+        super().__init__(period, 1.0)
+
+
+class RollingMin(_RollingExtreme):
+    def __init__(self, period: int):
+        super().__init__(period, -1.0)
+
+
+class ATR:
+    """스트리밍 ATR (atr() 배치형과 같은 값)"""
+
+    def __init__(self, period: int = 20):
+        self.period      = period
+        self._mean       = RollingMean(period)
+        self._prev_close = NAN
+
+    def _tr(self, high: float, low: float) -> float:
+        if math.isnan(self._prev_close):
+            return high - low
+        return max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+
+    @property
+    def value(self) -> float:
+        return self._mean.value
+
+    def update(self, high: float, low: float, close: float) -> float:
+        value = self._mean.update(self._tr(high, low))
+        self._prev_close = close
+        return value
+
+    def peek(self, high: float, low: float) -> float:
+        return self._mean.peek(self._tr(high, low))
+
+
+class Donchian:
+    """
+    스트리밍 돈치안 채널 (donchian_upper/lower() 배치형과 같은 값)
+    - update()는 이번 봉을 넣기 전 채널(직전 period봉)을 반환 → 배치형의 같은 행과 일치
+    - upper / lower 속성은 지금까지 마감된 period봉 채널 → 다음(형성 중인) 봉의 돌파/이탈 기준
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._high  = RollingMax(period)
+        self._low   = RollingMin(period)
+
+    @property
+    def upper(self) -> float:
+        return self._high.value
+
+    @property
+    def lower(self) -> float:
+        return self._low.value
+
+    def update(self, high: float, low: float) -> tuple[float, float]:
+        channel = (self.upper, self.lower)
+        self._high.update(high)
+        self._low.update(low)
+        return channel
+
+
+class RSI:
+    """스트리밍 RSI (rsi() 배치형과 같은 값)"""
+
+    def __init__(self, period: int = 14):
+        self.period      = period
+        self._gain       = RollingMean(period)
+        self._loss       = RollingMean(period)
+        self._prev_close = NAN
+
+    @staticmethod
+    def _rsi(gain: float, loss: float) -> float:
+        if math.isnan(gain) or math.isnan(loss):
+            return NAN
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100 - 100 / (1 + gain / loss)
+
+    def _delta(self, close: float) -> float:
+        return 0.0 if math.isnan(self._prev_close) else close - self._prev_close
+
+    @property
+    def value(self) -> float:
+        return self._rsi(self._gain.value, self._loss.value)
+
+    def update(self, close: float) -> float:
+        delta = self._delta(close)
+        self._gain.update(max(delta, 0.0))
+        self._loss.update(max(-delta, 0.0))
+        self._prev_close = close
+        return self.value
+
+    def peek(self, close: float) -> float:
+        delta = self._delta(close)
+        return self._rsi(self._gain.peek(max(delta, 0.0)), self._loss.peek(max(-delta, 0.0)))
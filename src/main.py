@@ -9,6 +9,7 @@ from telegram.ext import ApplicationBuilder, CommandHandler
 import config
 import database as db
 import upbit_client as client
+import ratelimit
 import strategy
 import database as db
 
@@ -17,7 +18,7 @@ import database as db
 # --------------------------
 #region 시작
 async def start(update: Update, _context: CallbackContext):
-    await update.message.reply_text("🤖 /profit /report /chat 명령어를 사용할 수 있습니다. ")
+    await update.message.reply_text("🤖 /profit /report /chat /limits 명령어를 사용할 수 있습니다. ")
 #endregion
 
 #region 소개
@@ -109,6 +110,21 @@ async def stats(update: Update, _context: CallbackContext):
     await update.message.reply_text(msg, parse_mode="Markdown")
 #endregion
 
+#region API 호출 한도
+async def limits(update: Update, _context: CallbackContext):
+    """업비트 API 호출 한도 현황 (/limits) - 보낸 요청 / 대기 / 429 횟수, 그룹별 남은 호출 수"""
+    st = ratelimit.governor.stats()
+    lines = [
+        "🚦 API 호출 한도",
+        f"요청: {st['requests']:,}회 | 대기: {st['delayed']:,}회 ({st['wait_sec']:.1f}초)",
+        f"한도 초과(429): {st['throttled']:,}회",
+    ]
+    for name, g in sorted(st['groups'].items()):
+        remaining = "-" if g['remaining'] is None else g['remaining']
+        lines.append(f"• {name}: 요청 {g['requests']:,} / 대기 {g['delayed']:,} / 429 {g['throttled']:,} / 남은 호출 {remaining}")
+    await update.message.reply_text("\n".join(lines))
+#endregion
+
 #region 메인 실행부
 if __name__ == "__main__":
     import asyncio
@@ -132,6 +148,7 @@ if __name__ == "__main__":
     application.add_handler(CommandHandler("report", report))
     application.add_handler(CommandHandler("chat", chat))
     application.add_handler(CommandHandler("stats", stats))
+    application.add_handler(CommandHandler("limits", limits))
 
     # 3. 전략 루프를 별도 쓰레드로 실행
     trade_thread = threading.Thread(
@@ -0,0 +1,187 @@
+import functools
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+import config
+
+# 요약에 쓰는 백분위
+QUANTILES = (50, 95, 99)
+
+
+class Histogram:
+    """
+    구간 1개의 최근 소요 시간 (고정 크기 링버퍼 - 오래된 표본부터 덮어씀)
+    - 기록은 배열 1칸 쓰기 → 판정 루프에 부담 없음, 백분위는 조회할 때만 계산
+    """
+
+    def __init__(self, size: int):
+        self.size  = size
+        self.count = 0                # 누적 기록 수 (버퍼 크기와 무관)
+        self.total = 0.0              # 누적 소요 시간 (초)
+        self._buf  = np.zeros(size, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._buf[self.count % self.size] = seconds
+            self.count += 1
+            self.total += seconds
+
+    def summary(self) -> dict:
+        """{count, p50, p95, p99, max, mean} - 시간은 ms, 백분위/최대는 최근 size개 기준"""
+        with self._lock:
+            recent = self._buf[:min(self.count, self.size)].copy()
+            count, total = self.count, self.total
+        if not len(recent):
+            return {"count": 0}
+        ms = np.percentile(recent, QUANTILES) * 1000
+        out = {"count": count}
+        out.update({f"p{q}": round(float(v), 3) for q, v in zip(QUANTILES, ms)})
+        out["max"]  = round(float(recent.max()) * 1000, 3)
+        out["mean"] = round(total / count * 1000, 3)
+        return out
+
+
+class _Timer:
+    """with 블록 소요 시간을 구간 히스토그램에 기록"""
+
+    __slots__ = ("hist", "started")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.add(time.perf_counter() - self.started)
+        return False
+
+
+class _NoopTimer:
+    """측정이 꺼져 있을 때 쓰는 빈 타이머 (공용 객체 1개 - 생성 / 시각 조회 없음)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class Registry:
+    """
+    판정 루프 구간별 지연 기록 (구간 이름 → Histogram)
+    - snapshot(): 구간별 {count, p50, p95, p99, max, mean} (ms)
+    - log_line(): 요약 1줄 (주기 로그용)
+    """
+
+    def __init__(self, size: int | None = None):
+        self.size    = size or config.METRICS_WINDOW
+        self._hists  = {}
+        self._lock   = threading.Lock()
+        self._logged = time.monotonic()
+
+    def histogram(self, stage: str) -> Histogram:
+        hist = self._hists.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(stage, Histogram(self.size))
+        return hist
+
+    def snapshot(self) -> dict[str, dict]:
+        return {stage: hist.summary() for stage, hist in sorted(self._hists.items())}
+
+    def log_line(self) -> str:
+        parts = [f"{stage} {s['p50']:.1f}/{s['p95']:.1f}/{s['p99']:.1f}ms(n={s['count']})"
+                 for stage, s in self.snapshot().items() if s["count"]]
+        return "[METRICS] p50/p95/p99 | " + " | ".join(parts)
+
+    def maybe_log(self, interval: float | None = None) -> str | None:
+        """METRICS_LOG_SEC마다 요약 1줄 반환 (그 사이 / 꺼져 있으면 None)"""
+        if not config.METRICS_ENABLED:
+            return None
+        interval = config.METRICS_LOG_SEC if interval is None else interval
+        now = time.monotonic()
+        if now - self._logged < interval:
+            return None
+        self._logged = now
+        return self.log_line()
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+registry = Registry()
+
+
+def timer(stage: str):
+    """
+    구간 타이머 (with metrics.timer("balance"): ...) → 공용 기록기에 소요 시간 기록
+    - METRICS_ENABLED가 False면 빈 타이머 반환 (설정값 확인 1회 외엔 비용 없음)
+    """
+    if not config.METRICS_ENABLED:
+        return _NOOP
+    return _Timer(registry.histogram(stage))
+
+
+def timed(stage: str):
+    """함수 전체를 구간으로 기록하는 데코레이터 (꺼져 있으면 설정값 확인 후 바로 원래 함수 호출)"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not config.METRICS_ENABLED:
+                return fn(*args, **kwargs)
+            with _Timer(registry.histogram(stage)):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def observe(stage: str, seconds: float):
+    """직접 잰 소요 시간 기록"""
+    if config.METRICS_ENABLED:
+        registry.histogram(stage).add(seconds)
+
+
+# ============================================================
+# 로컬 조회 주소 (GET /metrics → 구간별 요약 JSON)
+# ============================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"enabled": config.METRICS_ENABLED, "stages": self.registry.snapshot()},
+                          ensure_ascii=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int | None = None, reg: Registry | None = None) -> ThreadingHTTPServer:
+    """
+    127.0.0.1:port에서 조회 주소 시작 (백그라운드 스레드) → 서버 반환 (종료: server.shutdown())
+    - port=0이면 빈 포트 자동 선택 (server.server_address[1])
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": reg or registry})
+    server  = ThreadingHTTPServer(("127.0.0.1", config.METRICS_PORT if port is None else port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+import requests
+import config
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MAX_LEN = 4096          # sendMessage 본문 최대 길이
+
+
+class TelegramNotifier:
+    """
+    텔레그램 알림 백그라운드 전송기
+    - send()는 큐에 넣고 바로 반환 (매매 스레드는 네트워크를 기다리지 않음)
+    - 워커 스레드가 HTTP 세션 1개(keep-alive)로 전송
+    - 전송 간격(min_interval) 사이에 쌓인 메시지는 1건으로 합쳐서 전송 (폭주 방지)
+    - 429 → retry_after만큼 대기 후 재시도 / 네트워크·5xx → 지수 백오프 재시도 / 그 외 4xx → 버림
+    - 큐가 가득 차면 가장 오래된 메시지를 버리고 새 메시지를 넣음 (dropped 증가)
+    """
+
+    def __init__(self, token: str, chat_id: str, base_url: str = TELEGRAM_API_URL,
+                 maxsize: int = 100, min_interval: float = 1.0, max_retries: int = 5,
+                 timeout: float = 5.0):
+        self.url          = f"{base_url}/bot{token}/sendMessage"
+        self.chat_id      = chat_id
+        self.min_interval = min_interval
+        self.max_retries  = max_retries
+        self.timeout      = timeout
+        self.sent         = 0        # 전송 성공한 요청 수 (합친 메시지는 1건)
+        self.dropped      = 0        # 버린 건수 (큐 초과 메시지 + 재시도 초과 전송)
+
+        self._queue    = queue.Queue(maxsize)
+        self._session  = requests.Session()
+        self._last     = 0.0         # 마지막 전송 시각 (time.monotonic)
+        self._pending  = 0           # 큐 + 전송 중인 메시지 수
+        self._idle     = threading.Condition()
+        self._thread   = None
+        self._start_lock = threading.Lock()
+
+    # ── 공개 API ──
+    def send(self, text: str):
+        """큐에 넣고 바로 반환 (절대 블로킹하지 않음)"""
+        self._ensure_worker()
+        with self._idle:
+            self._pending += 1
+        while True:
+            try:
+                self._queue.put_nowait(text)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._done(1, dropped=True)
+                except queue.Empty:
+                    pass
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """큐가 빌 때까지 대기 (종료 직전 / 테스트용) → 시간 안에 다 보냈으면 True"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    # ── 내부 구현 ──
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self._thread.start()
+
+    def _done(self, n: int, dropped: bool = False):
+        with self._idle:
+            self._pending -= n
+            if dropped:
+                self.dropped += n
+            self._idle.notify_all()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+
+            # 전송 간격이 안 됐으면 기다리는 동안 들어온 메시지까지 모아서 1건으로
+            wait = self._last + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for text in self._merge(batch):
+                self._deliver(text)
+            self._done(len(batch))
+
+    @staticmethod
+    def _merge(batch: list[str]) -> list[str]:
+        """메시지를 빈 줄로 이어 붙이되 텔레그램 길이 제한 안에서 나눔"""
+        out, cur = [], ""
+        for text in batch:
+            text = text[:TELEGRAM_MAX_LEN]
+            if cur and len(cur) + 2 + len(text) > TELEGRAM_MAX_LEN:
+                out.append(cur)
+                cur = ""
+            cur = f"{cur}\n\n{text}" if cur else text
+        if cur:
+            out.append(cur)
+        return out
+
+    def _deliver(self, text: str) -> bool:
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self._session.post(self.url, data={"chat_id": self.chat_id, "text": text},
+                                          timeout=self.timeout)
+                self._last = time.monotonic()
+                if resp.status_code == 200:
+                    self.sent += 1
+                    return True
+                if resp.status_code == 429:
+                    # 텔레그램 호출 한도 → 알려준 시간만큼 대기
+                    try:
+                        wait = float(resp.json().get("parameters", {}).get("retry_after", delay))
+                    except ValueError:
+                        wait = delay
+                    print(f"\n⚠️ 텔레그램 호출 한도 → {wait:.0f}초 후 재전송")
+                    time.sleep(wait)
+                    continue
+                if resp.status_code < 500:
+                    print(f"\n⚠️ 텔레그램 전송 실패: {resp.status_code} {resp.text}")
+                    break
+                print(f"\n⚠️ 텔레그램 서버 오류: {resp.status_code} → {delay:.0f}초 후 재전송")
+            except requests.RequestException as e:
+                self._last = time.monotonic()
+                print(f"\n⚠️ 텔레그램 전송 예외 발생: {e} → {delay:.0f}초 후 재전송")
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+        with self._idle:
+            self.dropped += 1
+        return False
+
+
+_default: TelegramNotifier | None = None
+_default_lock = threading.Lock()
+
+
+def default() -> TelegramNotifier:
+    """config의 봇 토큰/채팅방으로 만든 공용 전송기 (처음 호출 시 생성)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = TelegramNotifier(
+                config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID,
+                maxsize=config.TELEGRAM_QUEUE_SIZE,
+                min_interval=config.TELEGRAM_MIN_INTERVAL_SEC,
+                max_retries=config.TELEGRAM_MAX_RETRIES,
+            )
+        return _default
@@ -0,0 +1,279 @@
+import asyncio
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+import config
+
+# 업비트 요청 그룹 (Remaining-Req 헤더의 group 값)
+# - 시세 API: 경로 첫 단어별로 따로 집계 (market / candles / ticker / trades / orderbook)
+# - 거래 API: 주문 생성·취소 = order, 그 외 (잔고 / 주문 조회 등) = default
+QUOTATION_GROUPS = {"market", "candles", "ticker", "trades", "orderbook"}
+EXCHANGE_GROUPS  = {"default", "order"}
+
+# 호출 우선순위 (숫자가 작을수록 먼저)
+URGENT = 0   # 주문 / 주문 직후 체결 확인
+NORMAL = 1   # 시세 / 잔고 조회
+
+THROTTLED_STATUS = {429, 418}   # 429: 호출 한도 초과 / 418: 한도 초과 반복으로 일시 차단
+
+_priority = contextvars.ContextVar("ratelimit_priority", default=NORMAL)
+_response = contextvars.ContextVar("ratelimit_response", default=None)   # 마지막 응답 (status, headers)
+
+
+def group_for(url: str, method: str = "GET") -> str:
+    """요청 URL / HTTP 메서드 → 업비트 요청 그룹"""
+    parts = urlparse(url).path.strip("/").split("/")
+    name  = parts[1] if len(parts) > 1 and parts[0] == "v1" else parts[0]
+    if name in QUOTATION_GROUPS:
+        return name
+    if name in ("orders", "order") and method.upper() in ("POST", "DELETE"):
+        return "order"
+    return "default"
+
+
+def parse_remaining(value: str | None) -> tuple[str, int] | None:
+    """
+    Remaining-Req 헤더 파싱 → (group, 이번 1초에 남은 호출 수)
+    - 예: "group=default; min=1800; sec=29" → ("default", 29)
+    - 헤더가 없거나 형식이 다르면 None
+    """
+    if not value:
+        return None
+    fields = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        fields[key.strip()] = val.strip()
+    try:
+        return fields["group"], int(fields["sec"])
+    except (KeyError, ValueError):
+        return None
+
+
+def header(headers, name: str) -> str | None:
+    """응답 헤더 조회 (대소문자 무시 - requests / aiohttp / dict 공용)"""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is not None:
+        return value
+    lower = name.lower()
+    for key, val in headers.items():
+        if key.lower() == lower:
+            return val
+    return None
+
+
+@contextlib.contextmanager
+def urgent():
+    """이 블록 안의 호출은 주문 우선순위 (대기 중인 시세/잔고 조회보다 먼저 보냄)"""
+    token = _priority.set(URGENT)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def record(status: int | None, headers):
+    """응답 상태 / 헤더 기록 (ccxt on_rest_response에서 호출 → 요청을 보낸 쪽이 complete에 넘김)"""
+    _response.set((status, headers))
+
+
+def last_response() -> tuple:
+    """현재 스레드(태스크)의 마지막 응답 (status, headers) - 응답이 없었으면 (None, None)"""
+    return _response.get() or (None, None)
+
+
+def last_status() -> int | None:
+    """현재 스레드(태스크)의 마지막 응답 상태 코드"""
+    return last_response()[0]
+
+
+class _Group:
+    """요청 그룹 1개의 호출 기록 / 서버가 알려준 남은 호출 수"""
+
+    def __init__(self, limit: int, exchange: bool = False):
+        self.limit         = limit
+        self.exchange      = exchange                # 거래 API 그룹 (주문용 여유분 적용)
+        self.sent          = collections.deque()   # 최근 1초 안에 보낸 시각
+        self.inflight      = 0                     # 응답을 아직 못 받은 요청 수
+        self.remaining     = None                  # 서버 기준 이번 1초 남은 호출 수 (None: 모름)
+        self.remaining_at  = 0.0
+        self.blocked_until = 0.0                   # 429 이후 이 시각까지 호출 보류
+        self.strikes       = 0                     # 연속 429 횟수 (백오프 배수)
+        self.waiting       = [0, 0]                # 우선순위별 대기 중인 호출 수
+        self.requests      = 0
+        self.delayed       = 0
+        self.throttled     = 0
+
+
+class RateGovernor:
+    """
+    업비트 REST 호출 한도 관리자 (동기 클라이언트 / 비동기 클라이언트 / 캔들 수집이 공유)
+    - 요청 그룹별로 최근 1초 호출 수를 세서 한도(limits) 안에서만 보냄
+    - 응답의 Remaining-Req 헤더(sec)로 서버 기준 남은 호출 수를 갱신 → 다른 프로세스가 쓴 몫까지 반영
+      (헤더가 나온 뒤 보낸 요청 / 응답 대기 중인 요청 수만큼 빼서 한도 바로 아래로 맞춤)
+    - 429 / 418 → 그 그룹 호출을 backoff초 보류 (연속이면 2배씩, 최대 30초)
+    - 주문 우선: urgent() 안의 호출이 대기 중이면 같은 그룹의 일반 호출은 양보하고,
+      거래 API 그룹은 일반 호출이 초당 reserve회를 주문용으로 남겨 둠
+    - 카운터: requests(보낸 요청) / delayed(대기 후 보낸 요청) / throttled(429·418 응답) / wait_sec(총 대기 시간)
+    """
+
+    def __init__(self, limits: dict[str, int] | None = None, default: int | None = None,
+                 reserve: int | None = None, backoff: float | None = None):
+        self.limits   = {"default": config.UPBIT_EXCHANGE_RPS, "order": config.UPBIT_ORDER_RPS,
+                         **(limits or {})}
+        self.default  = default if default is not None else config.UPBIT_QUOTATION_RPS
+        self.reserve  = reserve if reserve is not None else config.RATE_LIMIT_ORDER_RESERVE
+        self.backoff  = backoff if backoff is not None else config.RATE_LIMIT_BACKOFF_SEC
+        self.requests = 0
+        self.delayed  = 0
+        self.throttled = 0
+        self.wait_sec = 0.0
+        self._groups  = {}
+        self._cond    = threading.Condition()
+
+    # ── 호출 전 / 후 ──
+    def acquire(self, group: str, priority: int | None = None) -> float:
+        """보내도 될 때까지 대기 (동기) → 대기한 시간(초)"""
+        prio, started = self._priority(priority), time.monotonic()
+        with self._cond:
+            g = self._group(group)
+            g.waiting[prio] += 1
+            try:
+                while (delay := self._reserve(g, prio, time.monotonic())) > 0:
+                    self._cond.wait(delay)
+            finally:
+                g.waiting[prio] -= 1
+                self._cond.notify_all()
+            return self._granted(g, time.monotonic() - started)
+
+    async def acquire_async(self, group: str, priority: int | None = None) -> float:
+        """보내도 될 때까지 대기 (비동기 - 이벤트 루프는 막지 않음) → 대기한 시간(초)"""
+        prio, started = self._priority(priority), time.monotonic()
+        with self._cond:
+            g = self._group(group)
+            g.waiting[prio] += 1
+        try:
+            while True:
+                with self._cond:
+                    delay = self._reserve(g, prio, time.monotonic())
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            with self._cond:
+                g.waiting[prio] -= 1
+                self._cond.notify_all()
+        with self._cond:
+            return self._granted(g, time.monotonic() - started)
+
+    def complete(self, group: str, status: int | None = None, headers=None):
+        """
+        응답 반영 (요청마다 1회, 응답이 없어도 호출)
+        - Remaining-Req → 남은 호출 수 갱신 / 429·418 → 그룹 호출 보류
+        """
+        remaining = parse_remaining(header(headers, "Remaining-Req"))
+        with self._cond:
+            g = self._group(group)
+            g.inflight = max(0, g.inflight - 1)
+            now = time.monotonic()
+            if remaining is not None:
+                # 이 응답 뒤에 보낸 요청(응답 대기 중)은 서버 집계에 아직 안 들어갔을 수 있음
+                g.remaining, g.remaining_at = remaining[1] - g.inflight, now
+            if status in THROTTLED_STATUS:
+                g.strikes   += 1
+                g.throttled += 1
+                self.throttled += 1
+                g.blocked_until = now + min(self.backoff * 2 ** (g.strikes - 1), 30.0)
+            elif status is not None and status < 400:
+                g.strikes = 0
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """카운터 스냅샷 (전체 + 그룹별)"""
+        with self._cond:
+            return {
+                "requests": self.requests, "delayed": self.delayed,
+                "throttled": self.throttled, "wait_sec": round(self.wait_sec, 3),
+                "groups": {name: {"requests": g.requests, "delayed": g.delayed,
+                                  "throttled": g.throttled, "remaining": g.remaining}
+                           for name, g in self._groups.items()},
+            }
+
+    # ── 내부 구현 (self._cond 안에서 호출) ──
+    @staticmethod
+    def _priority(priority: int | None) -> int:
+        return _priority.get() if priority is None else priority
+
+    def _group(self, name: str) -> _Group:
+        g = self._groups.get(name)
+        if g is None:
+            g = self._groups[name] = _Group(self.limits.get(name, self.default), name in EXCHANGE_GROUPS)
+        return g
+
+    def _reserve(self, g: _Group, prio: int, now: float) -> float:
+        """지금 보낼 수 있으면 자리를 잡고 0, 아니면 다시 확인할 때까지 기다릴 시간(초)"""
+        if now < g.blocked_until:
+            return g.blocked_until - now
+        while g.sent and now - g.sent[0] >= 1.0:
+            g.sent.popleft()
+
+        room = g.limit - len(g.sent)
+        fresh = g.remaining is not None and now - g.remaining_at < 1.0
+        if fresh:
+            room = min(room, g.remaining)
+        if prio != URGENT:
+            if g.waiting[URGENT]:
+                return 0.01                         # 주문이 먼저 나갈 때까지 양보
+            if g.exchange:
+                room -= self.reserve                # 거래 API는 주문용 자리를 남겨 둠
+        if room > 0:
+            g.sent.append(now)
+            g.inflight += 1
+            if fresh:
+                g.remaining -= 1
+            return 0.0
+
+        # 다음 자리가 나는 시각: 가장 오래된 요청이 1초를 벗어날 때 / 서버 집계 1초가 끝날 때
+        wake = [g.sent[0] + 1.0] if g.sent else []
+        if fresh:
+            wake.append(g.remaining_at + 1.0)
+        return max(min(wake, default=now + 0.01) - now, 0.001)
+
+    def _granted(self, g: _Group, waited: float) -> float:
+        g.requests += 1
+        self.requests += 1
+        if waited > 0.001:
+            g.delayed += 1
+            self.delayed += 1
+            self.wait_sec += waited
+        return waited
+
+
+governor = RateGovernor()
+
+
+def get(url: str, params: dict | None = None, session=None, timeout: float = 10.0,
+        limiter: RateGovernor | None = None) -> requests.Response:
+    """
+    호출 한도를 지켜서 GET 요청 (ccxt를 거치지 않는 직접 호출용 - 캔들 수집 등)
+    - 429 / 418 → 보류가 풀릴 때까지 기다렸다가 RATE_LIMIT_MAX_RETRIES회까지 재요청
+    """
+    limiter = limiter or governor
+    group   = group_for(url)
+    sender  = session or requests
+    for attempt in range(config.RATE_LIMIT_MAX_RETRIES + 1):
+        limiter.acquire(group)
+        resp = None
+        try:
+            resp = sender.get(url, params=params, timeout=timeout)
+        finally:
+            limiter.complete(group, resp.status_code if resp is not None else None,
+                             resp.headers if resp is not None else None)
+        if resp.status_code not in THROTTLED_STATUS:
+            return resp
+    return resp
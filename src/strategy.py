@@ -1,9 +1,19 @@
 import time
+from contextlib import contextmanager
+import ccxt
+import numpy as np
 import pandas as pd
 import config
+import indicators
+import notifier
 import upbit_client as client
+import upbit_async
+import upbit_ws
 import database as db
-import requests
+import candles
+import equity
+import execution
+import metrics
 import logging
 import os
 
@@ -30,147 +40,464 @@ turtle_units: int         = 0      # 현재 보유 유닛 수
 turtle_next_add: float    = 0.0    # 다음 추가 진입 기준가
 turtle_entry_atr: float   = 0.0    # 최초 진입 시 ATR (유닛 사이즈 고정용)
 
+# 실시간 지표 상태 (마감된 1시간봉만 한 번씩 반영 → turtle_indicators())
+_live_ind: dict = {}
+
 def calculate_rsi(df, period=14):
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+    return pd.Series(indicators.rsi(df['close'].to_numpy(), period), index=df.index)
 
 def calculate_atr(df, period=20):
     """ATR (Average True Range) 계산"""
-    high = df['high']
-    low  = df['low']
-    prev_close = df['close'].shift(1)
+    return pd.Series(
+        indicators.atr(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), period),
+        index=df.index,
+    )
+
+# 청산 직후 해당 마켓 판정 중지 시간 (초) - 잔고 반영 대기
+EXIT_PAUSE_SEC = 10
+
+# 판정 루프 에러 후 대기 시간 (초)
+ERROR_PAUSE_SEC = 3
+
+# 자산 추이 기록기 (run_strategy가 EQUITY_ENABLED일 때 연결, None이면 기록 안 함)
+equity_recorder: equity.EquityRecorder | None = None
+
+
+def _error_pause(e: Exception) -> float:
+    """
+    판정 루프 에러 후 대기 시간
+    - 호출 한도 초과(429 재요청 소진): ratelimit.governor가 그 그룹 호출을 보류 시점까지 미루므로 바로 재시도
+    - 그 외: ERROR_PAUSE_SEC
+    """
+    return 0.0 if isinstance(e, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)) else ERROR_PAUSE_SEC
+
+
+# ============================================================
+# 마켓별 파라미터 / 상태
+# ============================================================
+
+class MarketParams:
+    """마켓별 터틀 파라미터 (config.MARKET_PRESETS → 없는 항목은 config.TURTLE_* 값)"""
+
+    def __init__(self, entry_period: int, atr_period: int, risk_rate: float, max_units: int,
+                 cooldown_sec: float, trailing_multiplier: float):
+        self.entry_period        = entry_period
+        self.atr_period          = atr_period
+        self.risk_rate           = risk_rate
+        self.max_units           = max_units
+        self.cooldown_sec        = cooldown_sec
+        self.trailing_multiplier = trailing_multiplier
+
+    @classmethod
+    def from_config(cls, ticker: str | None = None) -> "MarketParams":
+        """ticker 프리셋 적용 / ticker=None이면 config.TURTLE_* 값 그대로 (단일 마켓 기존 방식)"""
+        preset = config.MARKET_PRESETS.get(ticker, {}) if ticker else {}
+        return cls(
+            entry_period=preset.get("entry_period", config.TURTLE_ENTRY_PERIOD),
+            atr_period=preset.get("atr_period", config.TURTLE_ATR_PERIOD),
+            risk_rate=preset.get("risk_rate", config.TURTLE_RISK_RATE),
+            max_units=preset.get("max_units", config.TURTLE_MAX_UNITS),
+            cooldown_sec=preset.get("cooldown_sec", config.REENTRY_COOLDOWN_SEC),
+            trailing_multiplier=preset.get("trailing_multiplier", config.TURTLE_TRAILING_MULTIPLIER),
+        )
+
 
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low  - prev_close).abs(),
-    ], axis=1).max(axis=1)
+class MarketState:
+    """마켓별 포지션 상태 (기존 모듈 전역 변수와 같은 항목)"""
 
-    return tr.rolling(window=period).mean()
+    def __init__(self):
+        self.units         = 0      # 현재 보유 유닛 수
+        self.next_add      = 0.0    # 다음 추가 진입 기준가
+        self.entry_atr     = 0.0    # 최초 진입 시 ATR (유닛 사이즈 고정용)
+        self.highest_price = 0.0    # 진입 후 최고가 (트레일링 스탑용)
+        self.last_entry_ts = 0.0    # 재진입 쿨다운용 타임스탬프
 
-def calc_turtle_unit_size(total_equity: float, atr: float, curr_price: float) -> float:
+    def reset(self):
+        """청산 후 초기화 (쿨다운 타임스탬프는 유지)"""
+        self.units         = 0
+        self.next_add      = 0.0
+        self.entry_atr     = 0.0
+        self.highest_price = 0.0
+
+
+class Market:
+    """
+    마켓 1개 = 심볼 + 파라미터 + 포지션 상태 + 실시간 지표 상태
+    - candle_max_age: 캔들 API 동기화 간격 (None이면 get_ohlcv 기본값 → 매 판정 갱신)
+    """
+
+    def __init__(self, ticker: str, params: MarketParams | None = None, state: MarketState | None = None,
+                 ind: dict | None = None, candle_max_age: float | None = None):
+        self.ticker         = ticker
+        self.code           = upbit_ws.ticker_code(ticker)
+        self.params         = params if params is not None else MarketParams.from_config(ticker)
+        self.state          = state if state is not None else MarketState()
+        self.ind            = ind if ind is not None else {}
+        self.candle_max_age = candle_max_age
+        self.last_price     = 0.0   # 마지막으로 받은 현재가 (계좌 평가용)
+        self.paused_until   = 0.0   # 청산 직후 판정 중지 (time.time 기준)
+
+
+def build_markets(tickers: list[str] | None = None) -> list[Market]:
+    """config.MARKETS (또는 tickers)로 마켓 목록 생성 - 캔들은 MARKET_CANDLE_SYNC_SEC 간격으로만 동기화"""
+    return [Market(t, candle_max_age=config.MARKET_CANDLE_SYNC_SEC) for t in (tickers or config.MARKETS)]
+
+
+@contextmanager
+def _legacy_market():
+    """
+    단일 마켓 기존 방식 (config.TICKER + 모듈 전역 상태) ↔ Market 객체
+    - 전역 변수를 읽어 Market을 만들고, 끝나면 상태를 전역 변수에 다시 기록
+    """
+    global turtle_units, turtle_next_add, turtle_entry_atr, entry_highest_price, last_entry_ts
+
+    m = Market(config.TICKER, MarketParams.from_config(), ind=_live_ind)
+    s = m.state
+    s.units, s.next_add, s.entry_atr = turtle_units, turtle_next_add, turtle_entry_atr
+    s.highest_price, s.last_entry_ts = entry_highest_price, last_entry_ts
+    try:
+        yield m
+    finally:
+        turtle_units, turtle_next_add, turtle_entry_atr = s.units, s.next_add, s.entry_atr
+        entry_highest_price, last_entry_ts = s.highest_price, s.last_entry_ts
+
+
+@metrics.timed("ohlcv")
+def _candles_1h(m: Market) -> pd.DataFrame:
+    if m.candle_max_age is None:
+        return client.get_ohlcv(m.ticker, "1h")
+    return client.get_ohlcv(m.ticker, "1h", max_age=m.candle_max_age)
+
+
+# ============================================================
+# 지표
+# ============================================================
+
+def _resume_index(state: dict, key: tuple, ts, high, low, close, closed: int) -> int | None:
+    """
+    지난 호출에서 마지막으로 반영한 봉 다음 위치 / 이어갈 수 없으면 None
+    - 지표 상태는 최근 max(기간)+1봉으로만 결정되므로 그 구간이 그대로면 이어서 갱신
+    """
+    if state.get("key") != key:
+        return None
+    t_ts, t_high, t_low, t_close = state["tail"]
+    if not len(t_ts):
+        return None
+    j = int(np.searchsorted(ts[:closed], t_ts[-1]))
+    if j >= closed or ts[j] != t_ts[-1] or j + 1 < len(t_ts):
+        return None
+    if len(t_ts) < max(key) + 1 and j + 1 != len(t_ts):
+        return None                               # 앞쪽에 지표에 반영 안 된 봉이 있음
+    s = slice(j + 1 - len(t_ts), j + 1)
+    if not (np.array_equal(ts[s], t_ts) and np.array_equal(high[s], t_high)
+            and np.array_equal(low[s], t_low) and np.array_equal(close[s], t_close)):
+        return None
+    return j + 1
+
+@metrics.timed("indicators")
+def turtle_indicators(df_1h: pd.DataFrame, market: Market | None = None) -> tuple[float, float, float]:
+    """
+    (ATR, 진입 기준 고점, 직전 봉 종가) - df_1h의 마지막 행은 형성 중인 봉
+    - 마감된 봉은 스트리밍 지표에 한 번씩만 반영 → 새 봉이 마감될 때만 O(1) 갱신
+    - ATR은 형성 중인 봉까지 포함 (calculate_atr(df_1h).iloc[-1]과 같은 값)
+    - 진입 기준 고점은 형성 중인 봉 제외 최근 진입 기간봉 최고가
+    - 캔들이 이어지지 않으면 (재시작/전체 재조회/다른 데이터) 처음부터 다시 반영
+    - market: 마켓별 파라미터/지표 상태 사용 (None이면 config.TURTLE_* + 모듈 공용 상태)
+    """
+    ts     = df_1h['timestamp'].to_numpy()
+    high   = df_1h['high'].to_numpy(dtype=np.float64)
+    low    = df_1h['low'].to_numpy(dtype=np.float64)
+    close  = df_1h['close'].to_numpy(dtype=np.float64)
+    closed = len(ts) - 1
+    if closed < 1:
+        return indicators.NAN, indicators.NAN, indicators.NAN
+
+    if market is None:
+        state, key = _live_ind, (config.TURTLE_ATR_PERIOD, config.TURTLE_ENTRY_PERIOD)
+    else:
+        state, key = market.ind, (market.params.atr_period, market.params.entry_period)
+    start = _resume_index(state, key, ts, high, low, close, closed)
+    if start is None:
+        state.clear()
+        state.update(key=key, atr=indicators.ATR(key[0]), entry=indicators.Donchian(key[1]))
+        start = 0
+
+    atr, entry = state["atr"], state["entry"]
+    for j in range(start, closed):
+        atr.update(high[j], low[j], close[j])
+        entry.update(high[j], low[j])
+
+    lo = max(closed - (max(key) + 1), 0)
+    state["tail"] = tuple(a[lo:closed].copy() for a in (ts, high, low, close))
+    return atr.peek(high[-1], low[-1]), entry.upper, float(close[-2])
+
+def calc_turtle_unit_size(total_equity: float, atr: float, curr_price: float, risk_rate: float | None = None) -> float:
     """
     터틀 유닛 사이즈 계산
     unit_krw = (총자산 × 1%) / (2 × ATR) × 현재가
     → ATR이 너무 작을 때 폭발 방지용 최대 20% 캡 적용
+    - risk_rate: 마켓별 허용 손실 (None이면 config.TURTLE_RISK_RATE)
     """
     if atr <= 0:
         return 0.0
-    risk_krw     = total_equity * (config.TURTLE_RISK_RATE / 100)
+    if risk_rate is None:
+        risk_rate = config.TURTLE_RISK_RATE
+    risk_krw     = total_equity * (risk_rate / 100)
     unit_krw     = risk_krw / (2 * atr) * curr_price
     max_unit_krw = total_equity * 0.20
     return min(unit_krw, max_unit_krw)
 
 def send_msg(bot_app, text: str):
     """
-    텔레그램 메시지 전송 (동기 HTTP 방식)
+    텔레그램 메시지 전송 (백그라운드 큐 → 매매 스레드는 기다리지 않음)
     - bot_app은 더 이상 사용하지 않지만, 기존 시그니처 유지용으로 둠.
     """
     if not config.TELEGRAM_BOT_TOKEN or not config.TELEGRAM_CHAT_ID:
         return
-
-    try:
-        resp = requests.get(
-            f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage",
-            params={
-                "chat_id": config.TELEGRAM_CHAT_ID,
-                "text": text,
-            },
-            timeout=5,
-        )
-        if resp.status_code != 200:
-            print(f"\n⚠️ 텔레그램 전송 실패: {resp.status_code} {resp.text}")
-    except Exception as e:
-        print(f"\n⚠️ 텔레그램 전송 예외 발생: {e}")
+    notifier.default().send(text)
 
 #전략 설정
 
 def run_strategy(bot_app):
-    print(f"🚀 [전략 가동] {config.TICKER} | 전략: {config.STRATEGY_MODE}")
+    markets = build_markets()
+    tickers = [m.ticker for m in markets]
+    print(f"🚀 [전략 가동] {', '.join(tickers)} | 전략: {config.STRATEGY_MODE} | 시세: {config.LIVE_FEED}")
+    for m in markets:
+        p = m.params
+        print(f"   - {m.ticker}: 진입 {p.entry_period}봉 | ATR {p.atr_period} | 리스크 {p.risk_rate}% | "
+              f"유닛 {p.max_units} | 쿨다운 {p.cooldown_sec:,.0f}초")
+
+    # ✅ 시작 시 초기 자산 한 번만 계산 (전체 마켓 현재가는 1회 일괄 조회)
+    prices = client.get_current_prices(tickers)
+    initial_equity = client.get_krw_balance()
+    for m in markets:
+        init_avg, init_amt = client.get_balance(m.ticker)
+        m.last_price = prices.get(m.ticker, init_avg)
+        initial_equity += init_amt * m.last_price
+    print(f"💰 초기 자산: {initial_equity:,.0f}원")
 
-    global turtle_units, turtle_next_add, turtle_entry_atr, entry_highest_price
+    # 마감된 봉은 캔들 저장소에 기록 (백테스트와 같은 저장소)
+    if config.CANDLE_DB_LIVE:
+        client.candle_sink = candles.upsert
 
-    # ✅ 시작 시 초기 자산 한 번만 계산
-    init_avg, init_amt = client.get_balance(config.TICKER)
-    init_krw = client.get_krw_balance()
-    init_price = client.get_current_price(config.TICKER)
-    initial_equity = init_krw + init_amt * init_price
-    print(f"💰 초기 자산: {initial_equity:,.0f}원")
+    # 판정마다 총자산 / 손실률을 자산 추이로 기록
+    global equity_recorder
+    if config.EQUITY_ENABLED:
+        equity_recorder = equity.default()
+
+    # 구간별 지연 조회 주소 (측정이 켜져 있을 때만)
+    if config.METRICS_ENABLED and config.METRICS_PORT:
+        try:
+            metrics.serve()
+            print(f"⏱ 구간별 지연: http://127.0.0.1:{config.METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"⚠️ 지연 조회 주소 시작 실패: {e}")
 
+    if config.LIVE_FEED == "websocket":
+        run_ws_loop(bot_app, initial_equity, markets=markets)
+    else:
+        run_rest_loop(bot_app, initial_equity, markets=markets)
+
+    # 버퍼에 남은 자산 추이 저장
+    if equity_recorder is not None:
+        equity_recorder.flush()
+
+    # 중단 알림이 큐에 남아 있으면 보내고 종료
+    if config.TELEGRAM_BOT_TOKEN and config.TELEGRAM_CHAT_ID:
+        notifier.default().flush(timeout=30)
+
+
+def run_rest_loop(bot_app, initial_equity: float, markets: list[Market] | None = None):
+    """1초 폴링 루프 (REST로 전체 마켓 현재가를 1회 일괄 조회)"""
+    if markets is None:
+        markets = build_markets()
     while True:
         try:
-            # ✅ 계좌 손실 한도 체크 - 루프 제일 앞
-            # 잔고 조회
-            my_avg, my_amt = client.get_balance(config.TICKER)
-            my_krw = client.get_krw_balance()
-            curr_price_now = client.get_current_price(config.TICKER)
-            total_equity = my_krw + my_amt * curr_price_now
-            drawdown = (total_equity - initial_equity) / initial_equity * 100
-
-            # 손실한도 체크
-            if drawdown <= config.MAX_DRAWDOWN_LIMIT:
-                print(f"\n🛑 [계좌 손실 한도] {drawdown:.2f}% (기준: {config.MAX_DRAWDOWN_LIMIT}%)")
-                if my_amt > 0:
-                    client.sell_market(config.TICKER, my_amt)
-                    realized_pnl = (curr_price_now - my_avg) * my_amt
-                    db.log_trade(config.TICKER, "sell", curr_price_now, my_amt,
-                                 drawdown, realized_pnl, config.STRATEGY_MODE)
-                    turtle_units = 0
-                    turtle_next_add = 0.0
-                    turtle_entry_atr = 0.0
-                    entry_highest_price = 0.0
-
-                send_msg(bot_app,
-                         f"🛑 [계좌 손실 한도 도달]\n"
-                         f"초기자산: {initial_equity:,.0f}원\n"
-                         f"현재자산: {total_equity:,.0f}원\n"
-                         f"손실률: {drawdown:.2f}%\n"
-                         f"봇을 중단합니다."
-                         )
+            if not run_cycle(bot_app, markets, initial_equity):
                 break
+            time.sleep(1)
 
-            # 1. 캔들 데이터 조회
-            df = client.get_ohlcv(config.TICKER, config.TIMEFRAME)
-            if df.empty:
-                print("\n⚠️ 캔들 데이터 없음, 잠시 대기")
-                time.sleep(3)
-                continue
+        except Exception as e:
+            print(f"\n⚠️ 에러 발생: {e}")
+            time.sleep(_error_pause(e))
 
-            curr_price = df['close'].iloc[-1]
 
-            # 3. 모니터링 출력
-            print(
-                f"\r[Monitoring] Price: {curr_price:,.0f} | "
-                f"KRW: {my_krw:,.0f}원 | Amt: {my_amt:.4f}",
-                end=""
-            )
+def run_ws_loop(bot_app, initial_equity: float, stream: upbit_ws.TickerStream | None = None,
+                markets: list[Market] | None = None):
+    """
+    웹소켓 체결가 기반 루프 (전체 마켓을 소켓 1개로 구독)
+    - 새 체결가가 들어온 마켓만 판정 (판정 중 쌓인 틱은 마켓별 최신가 1개로 합쳐서 처리)
+    - 소켓이 끊겨 있거나 LIVE_WS_STALE_SEC 동안 체결이 없으면 REST로 1회 판정 (1초 간격)
+    """
+    if markets is None:
+        markets = build_markets()
+    by_code = {m.code: m.ticker for m in markets}
+    if stream is None:
+        stream = upbit_ws.TickerStream(list(by_code))
+    stream.start()
+
+    try:
+        while True:
+            try:
+                ticks = stream.next_prices(timeout=config.LIVE_WS_STALE_SEC)
+                if ticks is None:
+                    # 소켓 끊김/무응답 → REST 폴백
+                    if not run_cycle(bot_app, markets, initial_equity):
+                        break
+                    time.sleep(1)
+                    continue
+
+                prices = {by_code[c]: p for c, p in ticks.items() if c in by_code}
+                if not run_cycle(bot_app, markets, initial_equity, prices):
+                    break
+
+            except Exception as e:
+                print(f"\n⚠️ 에러 발생: {e}")
+                time.sleep(_error_pause(e))
+    finally:
+        stream.stop()
+
+
+def run_cycle(bot_app, markets: list[Market], initial_equity: float,
+              prices: dict[str, float] | None = None) -> bool:
+    """
+    전체 마켓 1회 판정 (계좌 손실 한도 → 마켓별 매수 → 손절/익절)
+    - prices: {ticker: 웹소켓 체결가} → 새 체결이 있는 마켓만 판정
+      None이면 전체 마켓 현재가를 REST 1회로 일괄 조회 (폴링 / 폴백)
+    - 잔고는 계좌 스냅샷 1개를 모든 마켓이 공유 (매매가 없으면 잔고 API 1회)
+    - equity_recorder: 있으면 총자산 / 손실률 기록 (EQUITY_FLUSH_SEC마다 묶어서 저장)
+    - UPBIT_ASYNC: 판정에 필요한 조회를 동시에 보냄 → 지연 = 조회 지연의 합 대신 가장 느린 요청 1개
+    - METRICS_ENABLED: 구간별 소요 시간 기록 (cycle / fetch / balance / ohlcv / indicators / buy / exit
+      / order / fill / db) + METRICS_LOG_SEC마다 p50/p95/p99 요약 1줄 로그
+    - 반환: False면 봇 중단 (계좌 손실 한도 도달)
+    """
+    with metrics.timer("cycle"):
+        ok = _run_cycle(bot_app, markets, initial_equity, prices)
+    line = metrics.registry.maybe_log()
+    if line:
+        print(f"\n{line}")
+        trade_logger.info(line)
+    return ok
+
+
+def _run_cycle(bot_app, markets: list[Market], initial_equity: float,
+               prices: dict[str, float] | None) -> bool:
+    tickers = [m.ticker for m in markets]
+    with metrics.timer("fetch"):
+        if config.UPBIT_ASYNC:
+            # 잔고 / 현재가 / 갱신할 캔들을 동시에 조회해서 캐시에 채움 (아래 조회는 캐시에서 바로 반환)
+            candles = [(m.ticker, "1h", m.candle_max_age) for m in markets
+                       if prices is None or m.ticker in prices]
+            fetched = upbit_async.default().tick(tickers, candles, prices=prices is None)
+            if prices is None:
+                prices = fetched
+        elif prices is None:
+            prices = client.get_current_prices(tickers)
+    for m in markets:
+        if prices.get(m.ticker, 0) > 0:
+            m.last_price = prices[m.ticker]
+
+    # ✅ 계좌 손실 한도 체크 - 전체 계좌 (원화 + 모든 마켓 평가금액) 기준
+    with metrics.timer("balance"):
+        my_krw   = client.get_krw_balance()
+        holdings = {m.ticker: client.get_balance(m.ticker) for m in markets}
+    total_equity = my_krw
+    for m in markets:
+        my_avg, my_amt = holdings[m.ticker]
+        total_equity += my_amt * (m.last_price or my_avg)
+    drawdown = (total_equity - initial_equity) / initial_equity * 100
+    if equity_recorder is not None:
+        equity_recorder.record(total_equity, drawdown)
+
+    # 손실한도 체크
+    if drawdown <= config.MAX_DRAWDOWN_LIMIT:
+        print(f"\n🛑 [계좌 손실 한도] {drawdown:.2f}% (기준: {config.MAX_DRAWDOWN_LIMIT}%)")
+        for m in markets:
+            my_avg, my_amt = holdings[m.ticker]
+            if my_amt > 0:
+                fill = execution.market_sell(m.ticker, my_amt, m.last_price or my_avg)
+                if fill is not None:
+                    realized_pnl = (fill.price - my_avg) * fill.amount
+                    db.log_trade(m.ticker, "sell", fill.price, fill.amount,
+                                 drawdown, realized_pnl, config.STRATEGY_MODE, fill.fee)
+                m.state.reset()
+
+        send_msg(bot_app,
+                 f"🛑 [계좌 손실 한도 도달]\n"
+                 f"초기자산: {initial_equity:,.0f}원\n"
+                 f"현재자산: {total_equity:,.0f}원\n"
+                 f"손실률: {drawdown:.2f}%\n"
+                 f"봇을 중단합니다."
+                 )
+        return False
+
+    now = time.time()
+    for m in markets:
+        curr_price = prices.get(m.ticker, 0)
+        if curr_price <= 0 or now < m.paused_until:
+            continue
+        # 앞 마켓에서 매매했으면 스냅샷이 무효화되어 여기서 새로 조회됨
+        with metrics.timer("balance"):
+            my_avg, my_amt = client.get_balance(m.ticker)
+            my_krw = client.get_krw_balance()
+        market_step(bot_app, m, curr_price, my_krw, my_amt, my_avg, total_equity)
+    return True
+
+
+def market_step(bot_app, m: Market, curr_price: float, my_krw: float, my_amt: float, my_avg: float,
+                total_equity: float | None = None):
+    """마켓 1개 판정 (쿨다운 / 거래 시간대 → 매수 → 손절/익절)"""
+    # 모니터링 출력
+    print(
+        f"\r[Monitoring] {m.ticker} Price: {curr_price:,.0f} | "
+        f"KRW: {my_krw:,.0f}원 | Amt: {my_amt:.4f}",
+        end=""
+    )
 
-            # 5. 재진입 쿨다운 / 거래 시간대 체크
-            global last_entry_ts
-            in_cooldown = (time.time() - last_entry_ts) < config.REENTRY_COOLDOWN_SEC
-            in_trade_hours = config.ENTRY_START_HOUR <= time.localtime().tm_hour <= config.ENTRY_END_HOUR
+    # 재진입 쿨다운 / 거래 시간대 체크
+    in_cooldown = (time.time() - m.state.last_entry_ts) < m.params.cooldown_sec
+    in_trade_hours = config.ENTRY_START_HOUR <= time.localtime().tm_hour <= config.ENTRY_END_HOUR
 
-            # 6. 매수 로직
-            df_1h = client.get_ohlcv(config.TICKER, "1h")
-            if (not in_cooldown) and in_trade_hours:
-                purchase_buy(bot_app, curr_price, my_krw, my_amt, df_1h)
+    # 매수 로직 (형성 중인 봉은 현재가로 갱신 → 캔들 API는 동기화 간격마다만)
+    client.apply_price(m.ticker, "1h", curr_price)
+    df_1h = _candles_1h(m)
+    if (not in_cooldown) and in_trade_hours:
+        market_buy(bot_app, m, curr_price, my_krw, my_amt, df_1h, total_equity)
 
-            # 7. 손절 / 익절 로직
-            loss_cut_take_profit(bot_app, curr_price, my_amt, my_avg)
+    # 손절 / 익절 로직
+    if my_amt > 0 and my_avg > 0:
+        if market_exit(bot_app, m, curr_price, my_amt, my_avg, df_1h):
+            m.paused_until = time.time() + EXIT_PAUSE_SEC
 
-            time.sleep(1)
 
-        except Exception as e:
-            print(f"\n⚠️ 에러 발생: {e}")
-            time.sleep(3)
+def strategy_step(bot_app, initial_equity: float, price: float | None = None) -> bool:
+    """
+    단일 마켓(config.TICKER, 모듈 전역 상태) 1회 판정
+    - price: 웹소켓 체결가. None이면 REST로 현재가 조회
+    - 반환: False면 봇 중단 (계좌 손실 한도 도달)
+    """
+    with _legacy_market() as m:
+        ok = run_cycle(bot_app, [m], initial_equity, None if price is None else {m.ticker: price})
+    wait = m.paused_until - time.time()
+    if wait > 0:
+        time.sleep(wait)
+    return ok
 
 
 def purchase_buy(bot_app, curr_price: float, my_krw: float, my_amt: float = 0.0, df_1h: pd.DataFrame | None = None,):
     """
-    전략 선택에 따라 매수 로직을 수행하는 함수.
+    전략 선택에 따라 매수 로직을 수행하는 함수. (단일 마켓: config.TICKER + 모듈 전역 상태)
+    """
+    with _legacy_market() as m:
+        market_buy(bot_app, m, curr_price, my_krw, my_amt, df_1h)
+
+
+@metrics.timed("buy")
+def market_buy(bot_app, m: Market, curr_price: float, my_krw: float, my_amt: float = 0.0,
+               df_1h: pd.DataFrame | None = None, total_equity: float | None = None):
+    """
+    마켓 1개 매수 로직 (전략 선택에 따라)
+    - total_equity: 유닛 사이즈 기준 총자산 (None이면 원화 + 이 마켓 평가금액)
     """
 
     mode = config.STRATEGY_MODE.upper()
@@ -179,135 +506,137 @@ def purchase_buy(bot_app, curr_price: float, my_krw: float, my_amt: float = 0.0,
     # 1) 터틀 트레이딩 V1
     # ---------------------------
     if mode == "TURTLE_V1":
-        global last_entry_ts, entry_highest_price
-        global turtle_units, turtle_next_add, turtle_entry_atr
+        s, p = m.state, m.params
 
         if df_1h is None or df_1h.empty:
-            df_1h = client.get_ohlcv(config.TICKER, "1h")
+            df_1h = _candles_1h(m)
 
-        if df_1h.empty or len(df_1h) < config.TURTLE_ENTRY_PERIOD + 5:
+        if df_1h.empty or len(df_1h) < p.entry_period + 5:
             return
 
-        df_1h['atr'] = calculate_atr(df_1h, config.TURTLE_ATR_PERIOD)
-        atr = df_1h['atr'].iloc[-1]
+        # ATR / 20봉 최고가 (현재 캔들 제외) / 직전 봉 종가
+        atr, entry_high, prev_close = turtle_indicators(df_1h, m)
         if atr <= 0 or pd.isna(atr):
             return
 
-        # 20봉 최고가 (현재 캔들 제외)
-        entry_high = df_1h['high'].iloc[-(config.TURTLE_ENTRY_PERIOD + 1):-1].max()
-        prev_close = df_1h['close'].iloc[-2]
-
         # 총자산 계산
-        total_equity = my_krw + (my_amt * curr_price)
+        if total_equity is None:
+            total_equity = my_krw + (my_amt * curr_price)
 
         # ── 신규 진입 (유닛 0인 상태) ──
-        if turtle_units == 0:
+        if s.units == 0:
             # 이번 봉에서 처음 돌파한 경우만 진입
             if not (prev_close <= entry_high < curr_price):
                 return
 
-            unit_krw = calc_turtle_unit_size(total_equity, atr, curr_price)
+            unit_krw = calc_turtle_unit_size(total_equity, atr, curr_price, p.risk_rate)
             if unit_krw < 5_000:
                 unit_krw = 5_000
             if unit_krw > my_krw:
                 return
 
-            client.buy_market(config.TICKER, unit_krw)
-            amount = unit_krw / curr_price
+            fill = execution.market_buy(m.ticker, unit_krw, curr_price)
+            if fill is None:
+                return
+            amount = fill.amount
             db.log_trade(
-                ticker=config.TICKER,
+                ticker=m.ticker,
                 action="buy",
-                price=curr_price,
+                price=fill.price,
                 amount=amount,
                 profit_rate=0.0,
                 pnl=0.0,
                 mode=config.STRATEGY_MODE,
+                fee=fill.fee,
             )
 
             # 피라미딩 상태 초기화
-            turtle_units = 1
-            turtle_entry_atr = atr  # 최초 ATR 고정
-            turtle_next_add = curr_price + 0.5 * atr  # 다음 추가 진입 기준가
-            entry_highest_price = curr_price
-            last_entry_ts = time.time()
+            s.units = 1
+            s.entry_atr = atr  # 최초 ATR 고정
+            s.next_add = curr_price + 0.5 * atr  # 다음 추가 진입 기준가
+            s.highest_price = curr_price
+            s.last_entry_ts = time.time()
 
             stop_price = curr_price - 2 * atr
             print(
-                f"\n🐢 [터틀 1유닛 진입] "
+                f"\n🐢 [터틀 1유닛 진입] {m.ticker} "
                 f"가격: {curr_price:,.0f} | ATR: {atr:,.1f} | "
                 f"손절가: {stop_price:,.0f} | 매수금액: {unit_krw:,.0f}원 | "
-                f"다음추가: {turtle_next_add:,.0f}"
+                f"다음추가: {s.next_add:,.0f}"
             )
             send_msg(
                 bot_app,
-                f"🐢 [터틀 1유닛 진입]\n"
+                f"🐢 [터틀 1유닛 진입] {m.ticker}\n"
                 f"가격: {curr_price:,.0f}원\n"
                 f"ATR: {atr:,.1f}\n"
                 f"손절가: {stop_price:,.0f}원\n"
                 f"매수금액: {unit_krw:,.0f}원\n"
-                f"다음 추가진입: {turtle_next_add:,.0f}원",
+                f"다음 추가진입: {s.next_add:,.0f}원",
             )
 
             # 신규 진입 로그
             trade_logger.info(
-                f"[BUY][1유닛진입] 가격={curr_price:,.0f} | ATR={atr:.2f} | "
-                f"매수금액={unit_krw:,.0f} | 수량={amount:.4f} | "
-                f"손절가={curr_price - 2 * atr:,.0f} | 다음추가={turtle_next_add:,.0f} | "
+                f"[BUY][1유닛진입] {m.ticker} 가격={curr_price:,.0f} | ATR={atr:.2f} | "
+                f"매수금액={unit_krw:,.0f} | 체결가={fill.price:,.0f} | 수량={amount:.4f} | 수수료={fill.fee:,.0f} | "
+                f"손절가={curr_price - 2 * atr:,.0f} | 다음추가={s.next_add:,.0f} | "
                 f"잔고(KRW)={my_krw:,.0f} | 총자산={total_equity:,.0f}"
             )
 
         # ── 피라미딩 추가 진입 (유닛 1~3인 상태) ──
-        elif 0 < turtle_units < config.TURTLE_MAX_UNITS:
+        elif 0 < s.units < p.max_units:
             # 다음 추가 기준가 돌파 시 추가 진입
-            if curr_price < turtle_next_add:
+            if curr_price < s.next_add:
                 return
 
             # 최초 ATR 기준으로 유닛 사이즈 고정
-            unit_krw = calc_turtle_unit_size(total_equity, turtle_entry_atr, curr_price)
+            unit_krw = calc_turtle_unit_size(total_equity, s.entry_atr, curr_price, p.risk_rate)
             if unit_krw < 5_000:
                 unit_krw = 5_000
             if unit_krw > my_krw:
                 return
 
-            client.buy_market(config.TICKER, unit_krw)
-            amount = unit_krw / curr_price
+            fill = execution.market_buy(m.ticker, unit_krw, curr_price)
+            if fill is None:
+                return
+            amount = fill.amount
             db.log_trade(
-                ticker=config.TICKER,
+                ticker=m.ticker,
                 action="buy",
-                price=curr_price,
+                price=fill.price,
                 amount=amount,
                 profit_rate=0.0,
                 pnl=0.0,
                 mode=config.STRATEGY_MODE,
+                fee=fill.fee,
             )
 
-            turtle_units += 1
-            turtle_next_add = curr_price + 0.5 * turtle_entry_atr  # 다음 추가 기준가 갱신
-            last_entry_ts = time.time()
+            s.units += 1
+            s.next_add = curr_price + 0.5 * s.entry_atr  # 다음 추가 기준가 갱신
+            s.last_entry_ts = time.time()
 
-            stop_price = entry_highest_price - 2 * turtle_entry_atr
+            stop_price = s.highest_price - 2 * s.entry_atr
             print(
-                f"\n🐢 [터틀 {turtle_units}유닛 추가] "
+                f"\n🐢 [터틀 {s.units}유닛 추가] {m.ticker} "
                 f"가격: {curr_price:,.0f} | "
                 f"매수금액: {unit_krw:,.0f}원 | "
-                f"다음추가: {turtle_next_add:,.0f} | "
+                f"다음추가: {s.next_add:,.0f} | "
                 f"현재손절가: {stop_price:,.0f}"
             )
             send_msg(
                 bot_app,
-                f"🐢 [터틀 {turtle_units}유닛 추가]\n"
+                f"🐢 [터틀 {s.units}유닛 추가] {m.ticker}\n"
                 f"가격: {curr_price:,.0f}원\n"
                 f"매수금액: {unit_krw:,.0f}원\n"
-                f"다음 추가진입: {turtle_next_add:,.0f}원\n"
+                f"다음 추가진입: {s.next_add:,.0f}원\n"
                 f"현재 손절가: {stop_price:,.0f}원",
             )
 
             # 피라미딩 추가 진입 로그
             trade_logger.info(
-                f"[BUY][{turtle_units + 1}유닛추가] 가격={curr_price:,.0f} | "
-                f"매수금액={unit_krw:,.0f} | 수량={amount:.4f} | "
-                f"손절가={entry_highest_price - 2 * turtle_entry_atr:,.0f} | "
-                f"다음추가={curr_price + 0.5 * turtle_entry_atr:,.0f} | "
+                f"[BUY][{s.units + 1}유닛추가] {m.ticker} 가격={curr_price:,.0f} | "
+                f"매수금액={unit_krw:,.0f} | 체결가={fill.price:,.0f} | 수량={amount:.4f} | 수수료={fill.fee:,.0f} | "
+                f"손절가={s.highest_price - 2 * s.entry_atr:,.0f} | "
+                f"다음추가={curr_price + 0.5 * s.entry_atr:,.0f} | "
                 f"잔고(KRW)={my_krw:,.0f} | 총자산={total_equity:,.0f}"
             )
     else:
@@ -315,40 +644,49 @@ def purchase_buy(bot_app, curr_price: float, my_krw: float, my_amt: float = 0.0,
         return
 
 def _turtle_exit(bot_app, curr_price, my_amt, my_avg):
+    """터틀 청산 (단일 마켓: config.TICKER + 모듈 전역 상태) - 청산했으면 10초 대기"""
+    with _legacy_market() as m:
+        sold = market_exit(bot_app, m, curr_price, my_amt, my_avg)
+    if sold:
+        time.sleep(EXIT_PAUSE_SEC)
+
+@metrics.timed("exit")
+def market_exit(bot_app, m: Market, curr_price: float, my_amt: float, my_avg: float,
+                df_1h: pd.DataFrame | None = None) -> bool:
     """
-    터틀 청산 로직 - 트레일링 스탑 방식
+    터틀 청산 로직 - 트레일링 스탑 방식 (청산했으면 True)
     - 진입 후 최고가를 추적
     - 손절가 = 최고가 - 2 * ATR (최고가 갱신될수록 손절가도 올라감)
     - 손절가 아래로 내려오면 청산
     - 익절 고정선 없음 → 추세가 꺾일 때까지 보유
     """
-    global entry_highest_price, turtle_units, turtle_next_add, turtle_entry_atr
+    s = m.state
 
-    df_1h = client.get_ohlcv(config.TICKER, "1h")
+    if df_1h is None:
+        df_1h = _candles_1h(m)
     if df_1h.empty:
-        return
+        return False
 
-    df_1h['atr'] = calculate_atr(df_1h, config.TURTLE_ATR_PERIOD)
-    atr = df_1h['atr'].iloc[-1]
+    atr = turtle_indicators(df_1h, m)[0]
     if atr <= 0 or pd.isna(atr):
-        return
+        return False
 
     # 최고가 갱신
-    if curr_price > entry_highest_price:
-        entry_highest_price = curr_price
+    if curr_price > s.highest_price:
+        s.highest_price = curr_price
 
     # 트레일링 손절가 = 최고가 - 2 * ATR
     # → 최고가가 올라갈수록 손절가도 따라 올라감
     # → 손절가는 절대 내려가지 않음
-    trailing_stop = entry_highest_price - config.TURTLE_TRAILING_MULTIPLIER * atr
+    trailing_stop = s.highest_price - m.params.trailing_multiplier * atr
 
     # 진입가 기준 수익률 / 손익 계산
     profit_rate  = (curr_price - my_avg) / my_avg * 100
     realized_pnl = (curr_price - my_avg) * my_amt
 
     print(
-        f"\r[Turtle] 현재가: {curr_price:,.0f} | "
-        f"최고가: {entry_highest_price:,.0f} | "
+        f"\r[Turtle] {m.ticker} 현재가: {curr_price:,.0f} | "
+        f"최고가: {s.highest_price:,.0f} | "
         f"트레일링 손절가: {trailing_stop:,.0f} | "
         f"수익률: {profit_rate:.2f}%",
         end=""
@@ -356,54 +694,56 @@ def _turtle_exit(bot_app, curr_price, my_amt, my_avg):
 
     # ✅ trailing_stop만 체크 (atr_spike는 run_strategy에서 이미 처리)
     if curr_price > trailing_stop:
-        return
+        return False
 
     exit_type = "익절" if profit_rate > 0 else "손절"
     print(
-        f"\n🐢 [{exit_type}] 현재가 {curr_price:,.0f} | "
+        f"\n🐢 [{exit_type}] {m.ticker} 현재가 {curr_price:,.0f} | "
         f"트레일링 손절가 {trailing_stop:,.0f} | 수익률: {profit_rate:.2f}%"
     )
 
-    client.sell_market(config.TICKER, my_amt)
+    fill = execution.market_sell(m.ticker, my_amt, curr_price)
+    if fill is None:
+        return False
+    # 기록 / 알림은 실제 체결가 기준
+    profit_rate  = (fill.price - my_avg) / my_avg * 100
+    realized_pnl = (fill.price - my_avg) * fill.amount
     db.log_trade(
-        ticker=config.TICKER,
+        ticker=m.ticker,
         action="sell",
-        price=curr_price,
-        amount=my_amt,
+        price=fill.price,
+        amount=fill.amount,
         profit_rate=profit_rate,
         pnl=realized_pnl,
         mode=config.STRATEGY_MODE,
+        fee=fill.fee,
     )
 
     send_msg(
         bot_app,
-        f"🐢 [터틀 {exit_type}]\n"
+        f"🐢 [터틀 {exit_type}] {m.ticker}\n"
         f"현재가: {curr_price:,.0f}원\n"
-        f"최고가: {entry_highest_price:,.0f}원\n"
+        f"체결가: {fill.price:,.0f}원\n"
+        f"최고가: {s.highest_price:,.0f}원\n"
         f"트레일링 손절가: {trailing_stop:,.0f}원\n"
         f"수익률: {profit_rate:.2f}%\n"
         f"실현손익: {int(realized_pnl):,}원"
     )
 
     trade_logger.info(
-        f"[SELL][{'익절' if profit_rate >= 0 else '손절'}] "
-        f"현재가={curr_price:,.0f} | 최고가={entry_highest_price:,.0f} | "
+        f"[SELL][{'익절' if profit_rate >= 0 else '손절'}] {m.ticker} "
+        f"현재가={curr_price:,.0f} | 최고가={s.highest_price:,.0f} | "
         f"손절가={trailing_stop:,.0f} | 평균진입가={my_avg:,.0f} | "
-        f"수량={my_amt:.4f} | 수익률={profit_rate:+.2f}% | "
-        f"실현손익={realized_pnl:+,.0f}"
+        f"체결가={fill.price:,.0f} | 수량={fill.amount:.4f} | 수수료={fill.fee:,.0f} | "
+        f"수익률={profit_rate:+.2f}% | 실현손익={realized_pnl:+,.0f}"
     )
 
-    # ✅ 전역 변수 초기화 (global 선언 포함)
-    entry_highest_price = 0.0
-    turtle_units = 0
-    turtle_next_add = 0.0
-    turtle_entry_atr = 0.0
-
-    time.sleep(10)
+    # ✅ 마켓 상태 초기화
+    s.reset()
+    return True
 
 def loss_cut_take_profit(bot_app, curr_price, my_amt, my_avg):
     if my_amt <= 0 or my_avg <= 0:
         return
     # ✅ 터틀 전략은 별도 청산 로직 사용
     _turtle_exit(bot_app, curr_price, my_amt, my_avg)
-
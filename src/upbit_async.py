@@ -0,0 +1,277 @@
+import asyncio
+import threading
+import aiohttp
+import ccxt.async_support as ccxt_async
+import config
+import ratelimit
+import upbit_client as client
+
+
+class GovernedAsyncUpbit(ccxt_async.upbit):
+    """
+    호출 한도 관리자(ratelimit.governor)를 거치는 ccxt 비동기 업비트 클라이언트
+    - 동기 클라이언트와 같은 관리자를 공유 → 두 경로를 합친 호출 수가 그룹 한도 안에 들어감
+    - 한도가 차면 이벤트 루프를 막지 않고 대기 / 429 / 418 → 보류가 풀린 뒤 다시 서명해서 재요청
+    """
+
+    async def request(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        for attempt in range(client._max_retries() + 1):
+            try:
+                return await super().request(path, api, method, params, headers, body, config)
+            except ccxt_async.BaseError as e:
+                if ratelimit.last_status() not in ratelimit.THROTTLED_STATUS:
+                    raise
+                if attempt == client._max_retries():
+                    raise ccxt_async.RateLimitExceeded(f"{self.id} 호출 한도 초과 ({method} {path})") from e
+
+    async def fetch(self, url, method='GET', headers=None, body=None):
+        group = ratelimit.group_for(url, method)
+        ratelimit.record(None, None)
+        await ratelimit.governor.acquire_async(group)
+        try:
+            return await super().fetch(url, method, headers, body)
+        finally:
+            ratelimit.governor.complete(group, *ratelimit.last_response())
+
+    def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers, request_body):
+        ratelimit.record(code, response_headers)
+        return super().on_rest_response(code, reason, url, method, response_headers, response_body,
+                                        request_headers, request_body)
+
+
+class AsyncUpbit:
+    """
+    ccxt 비동기 업비트 클라이언트 (전용 이벤트 루프 스레드 + 커넥션 풀 HTTP 세션 1개)
+    - 동기 코드(전략 스레드)에서 그대로 호출 → 결과가 나올 때까지 기다렸다가 반환
+    - tick(): 판정 1회에 필요한 조회(잔고 / 현재가 / 갱신할 캔들)를 동시에 보내고
+      결과를 upbit_client 캐시(계좌 스냅샷, 캔들 링버퍼)에 채움 → 판정 지연 = 가장 느린 요청 1개
+    - 세션은 keep-alive 커넥션을 pool_size개까지 재사용 (요청마다 TCP/TLS 연결 안 함)
+
+    사용 예:
+        api = AsyncUpbit()
+        prices = api.tick(["XRP/KRW", "BTC/KRW"], candles=[("XRP/KRW", "1h", 60)])
+        client.get_ohlcv("XRP/KRW", "1h", max_age=60)    # 캐시에서 바로 반환
+    """
+
+    def __init__(self, exchange=None, pool_size: int | None = None, timeout: float = 10.0):
+        self.exchange  = exchange     # None이면 처음 호출 시 생성 (세션은 이벤트 루프 안에서 만들어야 함)
+        self.pool_size = pool_size or config.UPBIT_ASYNC_POOL_SIZE
+        self.timeout   = timeout
+        self.requests  = 0            # 실제 API 요청 수 (마켓 목록 포함)
+        self._session  = None
+        self._markets_lock = asyncio.Lock()
+        self._loop     = asyncio.new_event_loop()
+        self._thread   = threading.Thread(target=self._loop.run_forever, name="upbit-async", daemon=True)
+        self._thread.start()
+
+    # ── 공개 API (동기 호출) ──
+    def tick(self, tickers, candles=(), prices: bool = True, balance: bool = True) -> dict[str, float]:
+        """
+        판정 1회 조회를 동시에 실행해서 upbit_client 캐시에 반영
+        - tickers: 현재가를 조회할 마켓 (prices=False면 조회 안 함)
+        - candles: (ticker, interval, max_age) 목록 → 갱신 시점이 된 캔들만 조회 (get_ohlcv와 같은 기준)
+        - balance: 계좌 스냅샷이 만료됐으면 잔고 조회
+        - 반환: {ticker: 현재가} (조회 실패 / prices=False면 빈 dict)
+        """
+        rings = []
+        with client._candle_lock:
+            for ticker, interval, max_age in candles:
+                ring  = client.candle_ring(ticker, interval)
+                limit = ring.due(*client.refresh_args(max_age))
+                if limit is not None and all(r is not ring for r, _ in rings):
+                    rings.append((ring, limit))
+        balance = balance and client.account.stale()
+        prices  = prices and bool(tickers)
+        if not (rings or balance or prices):
+            return {}
+
+        results = self._run(self._gather(list(tickers) if prices else None, rings, balance))
+
+        out = {}
+        if prices:
+            data = results.pop(0)
+            if isinstance(data, Exception):
+                print(f"⚠️ 현재가 일괄 조회 실패: {data}")
+            else:
+                out = {t: float(d['close']) for t, d in data.items() if d and d.get('close')}
+        if balance:
+            data = results.pop(0)
+            if isinstance(data, Exception):
+                print(f"❌ 잔고 조회 실패: {data}")
+            else:
+                client.account.fetches += 1
+                client.account.put(data)
+        reloads = []
+        with client._candle_lock:
+            for (ring, limit), rows in zip(rings, results):
+                if isinstance(rows, Exception):
+                    print(f"⚠️ 캔들 조회 실패: {rows}")
+                    continue
+                ring.fetches += 1
+                if not ring.load(rows, limit):
+                    reloads.append(ring)    # 봉이 빠짐 → 전체 재조회
+        if reloads:
+            # 전체 재조회는 락을 놓고 동시에 보냄 (응답을 기다리는 동안 다른 스레드의 캔들 조회 / 체결가 반영이 막히지 않음)
+            results = self._run(self._reload(reloads))
+            with client._candle_lock:
+                for ring, rows in zip(reloads, results):
+                    if isinstance(rows, Exception):
+                        print(f"⚠️ 캔들 전체 재조회 실패: {rows}")
+                        continue
+                    ring.load(rows, ring.size)
+        return out
+
+    def get_balance(self, ticker):
+        """(평단가, 보유수량) 반환"""
+        self.tick((), prices=False)
+        return client.get_balance(ticker)
+
+    def get_krw_balance(self):
+        """원화 잔고 반환"""
+        self.tick((), prices=False)
+        return client.get_krw_balance()
+
+    def get_current_price(self, ticker):
+        """현재가 반환 (에러 발생 시 0 반환)"""
+        return self.get_current_prices([ticker]).get(ticker, 0)
+
+    def get_current_prices(self, tickers) -> dict[str, float]:
+        """여러 마켓 현재가를 요청 1회로 조회 → {ticker: 현재가}"""
+        return self.tick(tickers, balance=False)
+
+    def get_ohlcv(self, ticker, interval, max_age: float | None = None):
+        """캔들 데이터 반환 (갱신이 필요하면 비동기로 조회 후 upbit_client 캐시에서 반환)"""
+        self.tick((), candles=[(ticker, interval, max_age)], prices=False, balance=False)
+        return client.get_ohlcv(ticker, interval, max_age=max_age)
+
+    def buy_market(self, ticker, krw_amount):
+        """시장가 매수 주문 (KRW 금액 기준으로 매수)"""
+        try:
+            return self._run(self._order("create_market_buy_order", ticker, krw_amount))
+        except Exception as e:
+            print(f"❌ 매수 주문 실패: {e}")
+        finally:
+            client.account.invalidate()
+
+    def sell_market(self, ticker, amount):
+        """시장가 매도 주문"""
+        try:
+            return self._run(self._order("create_market_sell_order", ticker, amount))
+        except Exception as e:
+            print(f"❌ 매도 주문 실패: {e}")
+        finally:
+            client.account.invalidate()
+
+    def get_order(self, order_id, ticker):
+        """주문 조회 (체결 확인용) - 실패 시 None"""
+        try:
+            return self._run(self._order("fetch_order", order_id, ticker))
+        except Exception as e:
+            print(f"⚠️ 주문 조회 실패: {e}")
+            return None
+
+    def close(self):
+        """세션 / 이벤트 루프 정리"""
+        self._run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    # ── 내부 구현 (이벤트 루프 스레드) ──
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(self.timeout * 2)
+
+    def _ensure_exchange(self):
+        if self.exchange is not None:
+            return self.exchange
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self.exchange = GovernedAsyncUpbit({
+            'apiKey': config.UPBIT_ACCESS_KEY,
+            'secret': config.UPBIT_SECRET_KEY,
+            'session': self._session,
+            'asyncio_loop': self._loop,
+            # ccxt 기본 제한은 동시 요청을 한 줄로 세움 → 끄고 ratelimit.governor의 그룹별 한도로 대신함
+            'enableRateLimit': False,
+            'options': {'defaultType': 'spot',
+                        'createMarketBuyOrderRequiresPrice': False,
+                        },
+        })
+        return self.exchange
+
+    async def _call(self, method: str, *args, **kwargs):
+        exchange = self._ensure_exchange()
+        if not exchange.markets:
+            async with self._markets_lock:            # 동시 요청이 마켓 목록을 한 번만 불러오도록
+                if not exchange.markets:
+                    self.requests += 1
+                    await exchange.load_markets()
+        self.requests += 1
+        return await getattr(exchange, method)(*args, **kwargs)
+
+    async def _order(self, method: str, *args):
+        with ratelimit.urgent():   # 대기 중인 시세/잔고 조회보다 먼저 보냄
+            return await self._call(method, *args)
+
+    async def _gather(self, tickers, rings, balance: bool) -> list:
+        jobs = []
+        if tickers is not None:
+            jobs.append(self._call("fetch_tickers", tickers))
+        if balance:
+            jobs.append(self._call("fetch_balance"))
+        for ring, limit in rings:
+            jobs.append(self._call("fetch_ohlcv", ring.ticker, timeframe=ring.interval, limit=limit))
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def _reload(self, rings) -> list:
+        jobs = [self._call("fetch_ohlcv", ring.ticker, timeframe=ring.interval, limit=ring.size) for ring in rings]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def _close(self):
+        if self.exchange is not None and hasattr(self.exchange, "close"):
+            await self.exchange.close()
+        if self._session is not None:
+            await self._session.close()
+
+
+_default: AsyncUpbit | None = None
+_default_lock = threading.Lock()
+
+
+def default() -> AsyncUpbit:
+    """공용 비동기 클라이언트 (처음 호출 시 생성)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AsyncUpbit()
+        return _default
+
+
+# ============================================================
+# upbit_client와 같은 이름의 함수 (공용 클라이언트 사용)
+# ============================================================
+
+def get_balance(ticker):
+    return default().get_balance(ticker)
+
+def get_krw_balance():
+    return default().get_krw_balance()
+
+def get_current_price(ticker):
+    return default().get_current_price(ticker)
+
+def get_current_prices(tickers):
+    return default().get_current_prices(tickers)
+
+def get_ohlcv(ticker, interval, max_age: float | None = None):
+    return default().get_ohlcv(ticker, interval, max_age=max_age)
+
+def buy_market(ticker, krw_amount):
+    return default().buy_market(ticker, krw_amount)
+
+def sell_market(ticker, amount):
+    return default().sell_market(ticker, amount)
+
+def get_order(order_id, ticker):
+    return default().get_order(order_id, ticker)
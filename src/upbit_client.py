@@ -1,20 +1,104 @@
+import threading
+import time
 import ccxt
+import numpy as np
 import pandas as pd
 import config
+import ratelimit
 
-# 업비트 객체 생성
-upbit = ccxt.upbit({
+
+def _max_retries() -> int:
+    """429 재요청 횟수 (ccxt request()의 config 인자가 모듈 이름을 가리므로 따로 읽음)"""
+    return config.RATE_LIMIT_MAX_RETRIES
+
+
+class GovernedUpbit(ccxt.upbit):
+    """
+    호출 한도 관리자(ratelimit.governor)를 거치는 ccxt 업비트 클라이언트
+    - 요청마다 그룹 한도 안에서 보냄 + 응답의 Remaining-Req / 429를 관리자에 반영
+    - 429 / 418 → 보류가 풀릴 때까지 기다렸다가 다시 서명해서 재요청 (RATE_LIMIT_MAX_RETRIES회)
+    """
+
+    def request(self, path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        for attempt in range(_max_retries() + 1):
+            try:
+                return super().request(path, api, method, params, headers, body, config)
+            except ccxt.BaseError as e:
+                if ratelimit.last_status() not in ratelimit.THROTTLED_STATUS:
+                    raise
+                if attempt == _max_retries():
+                    raise ccxt.RateLimitExceeded(f"{self.id} 호출 한도 초과 ({method} {path})") from e
+
+    def fetch(self, url, method='GET', headers=None, body=None):
+        group = ratelimit.group_for(url, method)
+        ratelimit.record(None, None)
+        ratelimit.governor.acquire(group)
+        try:
+            return super().fetch(url, method, headers, body)
+        finally:
+            ratelimit.governor.complete(group, *ratelimit.last_response())
+
+    def on_rest_response(self, code, reason, url, method, response_headers, response_body, request_headers, request_body):
+        ratelimit.record(code, response_headers)
+        return super().on_rest_response(code, reason, url, method, response_headers, response_body,
+                                        request_headers, request_body)
+
+
+
+# 업비트 객체 생성 (ccxt 기본 호출 제한 대신 ratelimit.governor가 그룹별 한도를 관리)
+upbit = GovernedUpbit({
     'apiKey': config.UPBIT_ACCESS_KEY,
     'secret': config.UPBIT_SECRET_KEY,
+    'enableRateLimit': False,
     'options': {'defaultType': 'spot',
                 'createMarketBuyOrderRequiresPrice': False,
                 }
 })
 
+class AccountSnapshot:
+    """
+    계좌 잔고 스냅샷 (fetch_balance 1회 결과를 모든 조회에 공유)
+    - ACCOUNT_MAX_AGE_SEC 안에 조회한 스냅샷은 재사용 → 판정 1회에 잔고 API 1회
+    - 매수/매도 직후 invalidate() → 다음 조회는 반드시 새로 조회
+    - 전략 스레드 / 텔레그램 핸들러가 같이 쓰므로 조회는 락 안에서 1개만 진행
+    """
+
+    def __init__(self):
+        self.balance    = None        # ccxt fetch_balance() 결과
+        self.fetched_at = 0.0         # 조회 시각 (time.monotonic)
+        self.fetches    = 0           # 실제 API 조회 횟수
+        self._lock      = threading.RLock()
+
+    def get(self, max_age: float | None = None) -> dict:
+        with self._lock:
+            if self.stale(max_age):
+                self.fetches += 1
+                self.put(upbit.fetch_balance())
+            return self.balance
+
+    def stale(self, max_age: float | None = None) -> bool:
+        """새로 조회해야 하는지 (없음 / 무효화됨 / 유효 시간 경과)"""
+        if max_age is None:
+            max_age = config.ACCOUNT_MAX_AGE_SEC
+        return self.balance is None or time.monotonic() - self.fetched_at > max_age
+
+    def put(self, balance: dict):
+        """다른 경로(비동기 클라이언트)로 조회한 잔고를 스냅샷으로 저장"""
+        with self._lock:
+            self.balance, self.fetched_at = balance, time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self.balance = None
+
+
+account = AccountSnapshot()
+
+
 def get_balance(ticker):
     """(평단가, 보유수량) 반환"""
     try:
-        balances = upbit.fetch_balance()
+        balances = account.get()
         #currency = ticker.split('-')[1]  # KRW-BTC -> BTC
         currency = ticker.split('/')[0]  # BTC/KRW -> BTC
 
@@ -33,7 +117,7 @@ def get_balance(ticker):
 def get_krw_balance():
     """원화 잔고 반환"""
     try:
-        return upbit.fetch_balance()['total']['KRW']
+        return account.get()['total']['KRW']
     except:
         return 0
 
@@ -52,34 +136,221 @@ def get_current_price(ticker):
         return 0
 
 
-def get_ohlcv(ticker, interval):
-    """캔들 데이터 반환"""
+def get_current_prices(tickers) -> dict[str, float]:
+    """
+    여러 마켓 현재가를 요청 1회로 조회 → {ticker: 현재가}
+    - 조회 실패 / 가격 없는 마켓은 빠짐 (실패 시 빈 dict)
+    """
     try:
-        ohlcv = upbit.fetch_ohlcv(ticker, timeframe=interval, limit=200)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        return df
+        data = upbit.fetch_tickers(list(tickers))
+        return {t: float(d['close']) for t, d in data.items() if d and d.get('close')}
+    except Exception as e:
+        print(f"⚠️ 현재가 일괄 조회 실패: {e}")
+        return {}
+
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# 마감된 봉 저장 함수 candle_sink(ticker, interval, rows) - run_strategy가 candles.upsert로 연결 (None이면 저장 안 함)
+candle_sink = None
+
+
+class CandleRing:
+    """
+    마켓/봉 간격별 캔들 링버퍼 (고정 크기)
+    - 처음 1회만 size개 전체 조회, 이후엔 최근 2봉만 조회해서
+      형성 중인 봉은 덮어쓰고 새 봉이 열리면 가장 오래된 봉 자리에 기록
+    - 각 행을 k, k + size 두 곳에 써 두기 때문에 최근 n봉이 항상 연속 메모리 → 복사 없는 view
+    - 조회 사이에 봉이 빠졌으면 (장시간 단절) 전체를 다시 조회
+    - candle_sink가 연결돼 있으면 조회 결과 중 새로 마감된 봉만 넘김 (봉마다 1회)
+    """
+
+    def __init__(self, ticker: str, interval: str, size: int):
+        self.ticker   = ticker
+        self.interval = interval
+        self.size     = size
+        self.tf_ms    = upbit.parse_timeframe(interval) * 1000
+        self.count    = 0             # 채워진 봉 수 (≤ size)
+        self.head     = 0             # 다음에 기록할 슬롯
+        self.fetched_at = 0.0         # 마지막 조회 시각 (time.monotonic)
+        self.fetches  = 0             # 실제 API 조회 횟수
+        self.persisted_ts = 0         # candle_sink로 넘긴 마지막 마감 봉 시각 (ms)
+        self._buf     = np.zeros((2 * size, len(OHLCV_COLUMNS)), dtype=np.float64)
+
+    def view(self) -> np.ndarray:
+        """최근 count봉 (오래된 순, 읽기 전용 view)"""
+        end = self.head + self.size
+        out = self._buf[end - self.count:end]
+        out.flags.writeable = False
+        return out
+
+    def last_ts(self) -> int:
+        return int(self._buf[self.head + self.size - 1, 0]) if self.count else 0
+
+    def _write(self, slot: int, row):
+        self._buf[slot] = row
+        self._buf[slot + self.size] = row
+
+    def _append(self, row):
+        self._write(self.head, row)
+        self.head  = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def due(self, min_interval: float, rollover_interval: float | None = None) -> int | None:
+        """
+        조회가 필요하면 요청할 봉 개수 (처음: size, 이후: 최근 2봉) / 필요 없으면 None
+        - min_interval 안의 재호출은 조회 생략
+        - rollover_interval: 형성 중인 봉의 마감 시각이 지났으면 min_interval과 무관하게
+          이 간격마다 조회 (새 봉이 열릴 때만 API 호출, 그 사이는 apply_price로 갱신)
+        """
+        if not self.count:
+            return self.size
+        age = time.monotonic() - self.fetched_at
+        rollover = (rollover_interval is not None and age >= rollover_interval
+                    and time.time() * 1000 >= self.last_ts() + self.tf_ms)
+        if age < min_interval and not rollover:
+            return None
+        return 2
+
+    def load(self, rows, limit: int) -> bool:
+        """
+        조회 결과 반영 (limit ≥ size면 전체 교체, 아니면 최근 봉 병합)
+        - 조회 사이에 봉이 빠졌으면 반영하지 않고 False (전체 재조회 필요)
+        """
+        if limit >= self.size or not self.count:
+            self.count, self.head = 0, 0
+            for row in rows[-self.size:]:
+                self._append(row)
+        elif rows and rows[0][0] > self.last_ts() + self.tf_ms:
+            return False
+        else:
+            for row in rows:
+                self._merge(row)
+        self.fetched_at = time.monotonic()
+        if candle_sink is not None:
+            self._persist(rows)
+        return True
+
+    def _persist(self, rows):
+        """조회 결과 중 마감됐고 아직 넘기지 않은 봉 → candle_sink (형성 중인 봉은 제외)"""
+        now_ms = time.time() * 1000
+        closed = [row for row in rows if row[0] > self.persisted_ts and row[0] + self.tf_ms <= now_ms]
+        if closed:
+            candle_sink(self.ticker, self.interval, closed)
+            self.persisted_ts = closed[-1][0]
+
+    def refresh(self, min_interval: float, rollover_interval: float | None = None):
+        limit = self.due(min_interval, rollover_interval)
+        if limit is None:
+            return
+        self.fetches += 1
+        rows = upbit.fetch_ohlcv(self.ticker, timeframe=self.interval, limit=limit)
+        if not self.load(rows, limit):
+            # 봉이 빠짐 → 전체 재조회
+            self.load(upbit.fetch_ohlcv(self.ticker, timeframe=self.interval, limit=self.size), self.size)
+
+    def apply_price(self, price: float) -> bool:
+        """
+        체결가를 형성 중인 봉에 반영 (고가/저가/종가, 거래량은 다음 조회 때 갱신)
+        - 봉 마감 시각이 이미 지났으면 반영하지 않음 (새 봉은 다음 refresh에서 조회)
+        """
+        if not self.count or time.time() * 1000 >= self.last_ts() + self.tf_ms:
+            return False
+        slot = (self.head - 1) % self.size
+        row  = self._buf[slot].copy()
+        row[2] = max(row[2], price)
+        row[3] = min(row[3], price)
+        row[4] = price
+        self._write(slot, row)
+        return True
+
+    def _merge(self, row):
+        last = self.last_ts()
+        if row[0] > last:
+            self._append(row)                     # 새 봉 시작 (가장 오래된 봉 밀어냄)
+            return
+        # 형성 중인 봉 / 직전에 마감된 봉 갱신
+        back = (last - row[0]) // self.tf_ms
+        if back < self.count and (last - row[0]) % self.tf_ms == 0:
+            self._write((self.head - 1 - back) % self.size, row)
+
+
+_candle_cache: dict[tuple[str, str], CandleRing] = {}
+_candle_lock = threading.Lock()
+
+
+def candle_ring(ticker, interval) -> CandleRing:
+    """마켓/봉 간격별 링버퍼 (없으면 생성) - _candle_lock 안에서 호출"""
+    ring = _candle_cache.get((ticker, interval))
+    if ring is None:
+        ring = _candle_cache[(ticker, interval)] = CandleRing(ticker, interval, config.OHLCV_CACHE_SIZE)
+    return ring
+
+
+def refresh_args(max_age: float | None) -> tuple[float, float | None]:
+    """get_ohlcv의 max_age → CandleRing.due / refresh 인자 (min_interval, rollover_interval)"""
+    if max_age is None:
+        return config.OHLCV_REFRESH_SEC, None
+    return max_age, config.OHLCV_REFRESH_SEC
+
+
+def get_ohlcv(ticker, interval, max_age: float | None = None):
+    """
+    캔들 데이터 반환 (마켓/봉 간격별 링버퍼 캐시)
+    - max_age(기본 OHLCV_REFRESH_SEC) 안의 재호출은 조회 없이 캐시 반환, 그 외엔 최근 2봉만 조회해서 갱신
+    - max_age를 길게 주면 (apply_price로 형성 중인 봉을 갱신하는 경우) 새 봉이 열릴 때만 추가 조회
+    - 반환 DataFrame의 시세 컬럼은 캐시 버퍼의 view (새 컬럼 추가는 자유, 기존 값 수정은 복사본에만 반영)
+      → 같은 마켓/봉 간격으로 다음 get_ohlcv를 호출하기 전까지만 사용 (보관하려면 .copy())
+    """
+    try:
+        with _candle_lock:
+            ring = candle_ring(ticker, interval)
+            ring.refresh(*refresh_args(max_age))
+            data = ring.view()
+
+        columns = {'timestamp': data[:, 0].astype(np.int64)}
+        columns.update((name, data[:, i]) for i, name in enumerate(OHLCV_COLUMNS) if i)
+        return pd.DataFrame(columns, copy=False)
     except Exception as e:
         print(f"⚠️ 캔들 조회 실패: {e}")
         return pd.DataFrame()  # 빈 데이터프레임 반환
 
 
+def apply_price(ticker, interval, price: float) -> bool:
+    """실시간 체결가를 캐시된 캔들의 형성 중인 봉에 반영 (캐시가 없으면 무시)"""
+    with _candle_lock:
+        ring = _candle_cache.get((ticker, interval))
+        return ring.apply_price(price) if ring is not None else False
+
+
 def buy_market(ticker, krw_amount):
     """시장가 매수 주문 (KRW 금액 기준으로 매수)"""
     try:
-        # 현재가 조회
-        price = get_current_price(ticker)
-        if price <= 0:
-            raise Exception("현재가 조회 실패로 매수 불가")
-        # createMarketBuyOrderRequiresPrice = False 이므로
-        # amount 자리에 '쓸 KRW 금액'을 넣어주면 됨
-        return upbit.create_market_buy_order(ticker, krw_amount)
+        with ratelimit.urgent():   # 대기 중인 시세/잔고 조회보다 먼저 보냄
+            # createMarketBuyOrderRequiresPrice = False 이므로
+            # amount 자리에 '쓸 KRW 금액'을 넣어주면 됨 (현재가 조회 불필요)
+            return upbit.create_market_buy_order(ticker, krw_amount)
     except Exception as e:
         print(f"❌ 매수 주문 실패: {e}")
+    finally:
+        account.invalidate()   # 주문 성공/실패와 무관하게 잔고 재조회
 
 
 def sell_market(ticker, amount):
     """시장가 매도 주문"""
     try:
-        return upbit.create_market_sell_order(ticker, amount)
+        with ratelimit.urgent():
+            return upbit.create_market_sell_order(ticker, amount)
     except Exception as e:
         print(f"❌ 매도 주문 실패: {e}")
+    finally:
+        account.invalidate()
+
+
+def get_order(order_id, ticker):
+    """주문 조회 (체결 확인용) - 실패 시 None"""
+    try:
+        return upbit.fetch_order(order_id, ticker)
+    except Exception as e:
+        print(f"⚠️ 주문 조회 실패: {e}")
+        return None
@@ -0,0 +1,156 @@
+import json
+import threading
+import uuid
+import websocket
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+
+class TickerStream:
+    """
+    업비트 웹소켓 현재가(ticker) 구독 스레드
+    - 체결이 들어올 때마다 마켓별 최신가 갱신 (처리 중 쌓인 틱은 최신가 1개로 합쳐짐)
+    - 연결이 끊기면 지수 백오프로 자동 재연결 (끊긴 동안 connected = False → 호출부는 REST 폴백)
+
+    사용 예:
+        stream = TickerStream(["KRW-XRP"])
+        stream.start()
+        price = stream.next_price("KRW-XRP", timeout=5)   # None이면 끊김/무응답
+        prices = stream.next_prices(timeout=5)           # 여러 마켓: {code: 체결가}
+    """
+
+    def __init__(self, codes: list[str], url: str = UPBIT_WS_URL,
+                 reconnect_max_sec: float = 30.0, ping_interval: float = 30.0):
+        self.codes     = list(codes)
+        self.url       = url
+        self.connected = False
+        self.reconnects = 0          # 재연결 시도 횟수
+        self.messages   = 0          # 수신한 체결 메시지 수
+
+        self._reconnect_max = reconnect_max_sec
+        self._ping_interval = ping_interval
+        self._delay   = 1.0
+        self._prices  = {}           # {code: (체결가, 체결 시각 ms)}
+        self._version = {}           # {code: 갱신 횟수}
+        self._seen    = {}           # {code: next_price()가 마지막으로 돌려준 갱신 횟수}
+        self._cond    = threading.Condition()
+        self._stop    = threading.Event()
+        self._ws      = None
+        self._thread  = None
+
+    # ── 공개 API ──
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="upbit-ws", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def latest(self, code: str) -> tuple[float, int] | None:
+        """마지막 체결 (가격, 시각 ms) / 아직 없으면 None"""
+        with self._cond:
+            return self._prices.get(code)
+
+    def next_price(self, code: str, timeout: float) -> float | None:
+        """
+        code의 새 체결가를 기다렸다가 반환 (이전 호출 이후 여러 틱이 왔으면 최신가 1개)
+        - 연결이 끊겨 있으면 바로 None
+        - timeout 동안 새 체결이 없어도 None (호출부에서 REST로 1회 판정)
+        """
+        with self._cond:
+            seen = self._seen.get(code, 0)
+            ok = self._cond.wait_for(
+                lambda: not self.connected or self._stop.is_set() or self._version.get(code, 0) != seen,
+                timeout,
+            )
+            if not ok or not self.connected or self._stop.is_set():
+                return None
+            self._seen[code] = self._version[code]
+            return self._prices[code][0]
+
+    def next_prices(self, timeout: float) -> dict[str, float] | None:
+        """
+        next_price의 다중 마켓 버전 → 이전 호출 이후 새 체결이 있는 마켓만 {code: 최신 체결가}
+        - 구독 중인 모든 마켓을 소켓 1개 / 판정 루프 1개로 처리할 때 사용
+        - 연결 끊김 / timeout 동안 어느 마켓도 체결이 없으면 None
+        """
+        def fresh():
+            return [c for c, v in self._version.items() if v != self._seen.get(c, 0)]
+
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: not self.connected or self._stop.is_set() or fresh(),
+                timeout,
+            )
+            if not ok or not self.connected or self._stop.is_set():
+                return None
+            out = {}
+            for code in fresh():
+                self._seen[code] = self._version[code]
+                out[code] = self._prices[code][0]
+            return out
+
+    # ── 내부 구현 ──
+    def _run(self):
+        while not self._stop.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            self._ws.run_forever(ping_interval=self._ping_interval, ping_timeout=10)
+            self._set_connected(False)
+
+            if self._stop.wait(self._delay):
+                break
+            self.reconnects += 1
+            self._delay = min(self._delay * 2, self._reconnect_max)
+
+    def _on_open(self, ws):
+        ws.send(json.dumps([
+            {"ticket": f"zillion-{uuid.uuid4().hex[:8]}"},
+            {"type": "ticker", "codes": self.codes, "isOnlyRealtime": True},
+        ]))
+        self._delay = 1.0
+        self._set_connected(True)
+        print(f"\n🔌 [웹소켓] 연결됨 | {', '.join(self.codes)}")
+
+    def _on_message(self, ws, message):
+        data  = json.loads(message)
+        code  = data.get("code")
+        price = data.get("trade_price")
+        if code is None or price is None:
+            return
+        with self._cond:
+            self._prices[code]  = (float(price), int(data.get("trade_timestamp") or data.get("timestamp") or 0))
+            self._version[code] = self._version.get(code, 0) + 1
+            self.messages += 1
+            self._cond.notify_all()
+
+    def _on_error(self, ws, error):
+        if not self._stop.is_set():
+            print(f"\n⚠️ [웹소켓] 오류: {error}")
+
+    def _on_close(self, ws, status_code, reason):
+        if not self._stop.is_set():
+            print(f"\n⚠️ [웹소켓] 연결 끊김 (code={status_code}) → {self._delay:.0f}초 후 재연결, 그동안 REST 폴백")
+
+    def _set_connected(self, value: bool):
+        with self._cond:
+            self.connected = value
+            self._cond.notify_all()
+
+
+def ticker_code(ticker: str) -> str:
+    """ccxt 심볼 → 업비트 마켓 코드 (XRP/KRW → KRW-XRP)"""
+    base, quote = ticker.split("/")
+    return f"{quote}-{base}"
@@ -0,0 +1,165 @@
+"""
+계좌 잔고 스냅샷 테스트 (가짜 업비트 잔고 API 사용)
+
+테스트 항목:
+  [TEST 01] 판정 1회 (get_balance + get_krw_balance) → 잔고 API 1회
+  [TEST 02] ACCOUNT_MAX_AGE_SEC 경과 시 재조회 / 매수·매도 직후엔 바로 재조회
+  [TEST 03] 여러 스레드 동시 조회 → API 1회 / 조회 실패 시 0 반환 후 다음 호출에서 복구
+
+실행 방법:
+    python -m test.accounttest
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import upbit_client as client
+
+# ============================================================
+# 0. 가짜 업비트 잔고 API
+# ============================================================
+
+class FakeAccount:
+    def __init__(self):
+        self.krw, self.xrp, self.avg = 1_000_000.0, 0.0, 0.0
+        self.calls = 0
+        self.fail  = False
+        self.delay = 0.0
+
+    def fetch_balance(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("network down")
+        return {
+            "info" : [{"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0"},
+                      {"currency": "XRP", "balance": str(self.xrp), "avg_buy_price": str(self.avg)}],
+            "total": {"KRW": self.krw, "XRP": self.xrp},
+        }
+
+    def fetch_ticker(self, ticker):
+        return {"close": 500.0}
+
+    def create_market_buy_order(self, ticker, krw):
+        self.krw -= krw
+        self.xrp += krw / 500.0
+        self.avg  = 500.0
+        return {"status": "ok"}
+
+    def create_market_sell_order(self, ticker, amount):
+        self.xrp -= amount
+        self.krw += amount * 500.0
+        return {"status": "ok"}
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def setup(max_age: float = 60.0) -> FakeAccount:
+    fake = FakeAccount()
+    for name in ("fetch_balance", "fetch_ticker", "create_market_buy_order", "create_market_sell_order"):
+        setattr(client.upbit, name, getattr(fake, name))
+    client.account.invalidate()
+    config.ACCOUNT_MAX_AGE_SEC = max_age
+    return fake
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_one_fetch_per_tick():
+    print_header("[TEST 01] 판정 1회 → 잔고 API 1회")
+    fake = setup()
+    for _ in range(5):
+        client.get_balance("XRP/KRW")
+        client.get_krw_balance()
+    check(fake.calls == 1, f"판정 5회 (잔고 조회 10회) → API {fake.calls}회")
+    check(client.get_krw_balance() == 1_000_000.0 and client.get_balance("XRP/KRW") == (0.0, 0.0), "잔고 값 동일")
+
+
+def test_2_staleness_and_invalidation():
+    print_header("[TEST 02] 유효 시간 / 주문 직후 재조회")
+    fake = setup(max_age=0.2)
+    client.get_krw_balance()
+    time.sleep(0.25)
+    client.get_krw_balance()
+    check(fake.calls == 2, f"유효 시간 경과 → 재조회 | API {fake.calls}회")
+
+    config.ACCOUNT_MAX_AGE_SEC = 60.0
+    client.buy_market("XRP/KRW", 100_000)
+    avg, amt = client.get_balance("XRP/KRW")
+    check(fake.calls == 3 and amt == 200.0 and avg == 500.0, f"매수 직후 재조회 → 보유 {amt:.0f}개 | API {fake.calls}회")
+    check(client.get_krw_balance() == 900_000.0 and fake.calls == 3, "이어지는 원화 조회는 같은 스냅샷 사용")
+
+    client.sell_market("XRP/KRW", amt)
+    check(client.get_balance("XRP/KRW")[1] == 0.0 and fake.calls == 4, "매도 직후 재조회 → 보유 0개")
+
+
+def test_3_threads_and_failure():
+    print_header("[TEST 03] 동시 조회 / 조회 실패")
+    fake = setup()
+    fake.delay = 0.1
+    threads = [threading.Thread(target=client.get_krw_balance) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    check(fake.calls == 1, f"스레드 8개 동시 조회 → API {fake.calls}회")
+
+    fake.delay = 0.0
+    client.account.invalidate()
+    fake.fail = True
+    check(client.get_balance("XRP/KRW") == (0, 0) and client.get_krw_balance() == 0, "조회 실패 → 기존처럼 0 반환")
+    fake.fail = False
+    check(client.get_krw_balance() == 1_000_000.0, "다음 호출에서 복구 (실패 결과는 캐시하지 않음)")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = {name: getattr(client.upbit, name) for name in
+                ("fetch_balance", "fetch_ticker", "create_market_buy_order", "create_market_sell_order")}
+    original_age = config.ACCOUNT_MAX_AGE_SEC
+    tests = [
+        test_1_one_fetch_per_tick,
+        test_2_staleness_and_invalidation,
+        test_3_threads_and_failure,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t()
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+    finally:
+        for name, fn in original.items():
+            setattr(client.upbit, name, fn)
+        config.ACCOUNT_MAX_AGE_SEC = original_age
+        client.account.invalidate()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 계좌 스냅샷 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
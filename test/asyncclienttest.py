@@ -0,0 +1,359 @@
+"""
+비동기 거래소 클라이언트 테스트 + 판정 지연 벤치마크 (로컬 가짜 업비트 REST 서버 사용)
+
+테스트 항목:
+  [TEST 01] tick() → 잔고 / 현재가 / 캔들 요청 동시 전송 + upbit_client 캐시에 반영
+  [TEST 02] upbit_client와 같은 이름의 함수 (조회 / 주문 후 잔고 재조회)
+  [TEST 03] 커넥션 풀 → 요청이 많아도 TCP 연결은 풀 크기 이하로 재사용
+  [TEST 04] 요청 하나가 실패해도 나머지 결과는 반영
+  [TEST 05] 봉이 빠진 캔들 → 캔들 캐시 락을 놓은 채로 전체 재조회
+  [TEST 06] 벤치마크: 마켓 3개 판정 1회 지연 (동기 순차 vs 비동기 동시)
+
+실행 방법:
+    python -m test.asyncclienttest
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime, timezone
+from aiohttp import web
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import database as db
+import upbit_client as client
+import upbit_async
+import strategy
+
+HOUR_MS = 3_600_000
+TICKERS = ["XRP/KRW", "BTC/KRW", "ETH/KRW"]
+
+# ============================================================
+# 0. 가짜 업비트 REST 서버
+# ============================================================
+
+class FakeUpbitREST:
+    """
+    업비트 REST 응답 흉내 (마켓 목록 / 현재가 / 잔고 / 1시간봉 / 주문)
+    - latency: 요청마다 응답 지연 (초)
+    - fail   : 이 문자열이 경로에 들어간 요청은 500 응답
+    - 동시에 처리 중인 요청 수 최대값(max_inflight)과 클라이언트 포트(peers) 기록
+    """
+
+    def __init__(self):
+        self.latency  = 0.0
+        self.fail     = ""
+        self.krw      = 1_000_000.0
+        self.coins    = {}
+        self.paths: list[str] = []
+        self.peers    = set()
+        self.inflight = 0
+        self.max_inflight = 0
+        self._ready   = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait(5)
+
+    def reset(self):
+        self.paths.clear()
+        self.peers.clear()
+        self.max_inflight = 0
+        self.fail = ""
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, req: web.Request):
+        self.paths.append(req.path)
+        self.peers.add(req.transport.get_extra_info("peername"))
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.fail and self.fail in req.path:
+                return web.json_response({"error": {"message": "boom"}}, status=500)
+            return await self._route(req)
+        finally:
+            self.inflight -= 1
+
+    async def _route(self, req: web.Request):
+        p = req.path
+        if p.endswith("/market/all"):
+            return web.json_response([{"market": f"KRW-{t.split('/')[0]}", "korean_name": t, "english_name": t,
+                                       "market_warning": "NONE"} for t in TICKERS])
+        if p.endswith("/ticker"):
+            return web.json_response([{"market": m, "trade_price": 500.0, "timestamp": int(time.time() * 1000)}
+                                      for m in req.query["markets"].split(",")])
+        if p.endswith("/accounts"):
+            rows = [{"currency": "KRW", "balance": str(self.krw), "locked": "0", "avg_buy_price": "0",
+                     "unit_currency": "KRW"}]
+            rows += [{"currency": c, "balance": str(a), "locked": "0", "avg_buy_price": "500",
+                      "unit_currency": "KRW"} for c, a in self.coins.items()]
+            return web.json_response(rows)
+        if "/candles/" in p:
+            end = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+            n = int(req.query.get("count", 200))
+            return web.json_response([{
+                "market": req.query["market"],
+                "candle_date_time_utc": datetime.fromtimestamp((end - i * HOUR_MS) / 1000, timezone.utc)
+                                                .strftime("%Y-%m-%dT%H:%M:%S"),
+                "opening_price": 500.0, "high_price": 501.0, "low_price": 499.0, "trade_price": 500.0,
+                "timestamp": end - i * HOUR_MS, "candle_acc_trade_volume": 10.0,
+            } for i in range(n)])
+        if p.endswith("/orders") and req.method == "POST":
+            body = await req.json()
+            coin = body["market"].split("-")[1]
+            if body["side"] == "bid":
+                self.krw -= float(body["price"])
+                self.coins[coin] = self.coins.get(coin, 0.0) + float(body["price"]) / 500.0
+            else:
+                self.coins[coin] = self.coins.get(coin, 0.0) - float(body["volume"])
+                self.krw += float(body["volume"]) * 500.0
+            return web.json_response({"uuid": "fake-order", "side": body["side"], "ord_type": body["ord_type"],
+                                      "state": "wait", "market": body["market"],
+                                      "created_at": "2024-01-01T00:00:00+09:00"}, status=201)
+        return web.json_response({"error": {"message": p}}, status=404)
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def point(exchange, server: FakeUpbitREST):
+    exchange.apiKey, exchange.secret = "ACCESS", "SECRET"
+    exchange.urls["api"] = {"public": server.url, "private": server.url}
+
+def make_async(server: FakeUpbitREST, **kw) -> upbit_async.AsyncUpbit:
+    api = upbit_async.AsyncUpbit(**kw)
+    api._run(_open(api))
+    point(api.exchange, server)
+    return api
+
+async def _open(api: upbit_async.AsyncUpbit):
+    api._ensure_exchange()
+
+def reset_caches():
+    client._candle_cache.clear()
+    client.account.invalidate()
+
+def fail_sync(*args, **kwargs):
+    raise AssertionError("동기 클라이언트 호출됨")
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_tick_concurrent(server: FakeUpbitREST):
+    print_header("[TEST 01] tick() 동시 요청 + 캐시 반영")
+    api = make_async(server)
+    try:
+        api.tick(TICKERS, prices=True, balance=False)                  # 마켓 목록 로드 (처음 1회)
+        time.sleep(1.0)                                                # 호출 한도 버스트 회복
+        server.reset()
+        server.latency = 0.1
+        reset_caches()
+        candles = [(t, "1h", 60) for t in TICKERS]
+        started = time.perf_counter()
+        prices = api.tick(TICKERS, candles)
+        elapsed = time.perf_counter() - started
+        check(prices == {t: 500.0 for t in TICKERS}, "현재가 {ticker: 가격}")
+        check(server.max_inflight == 5, f"요청 5개 (현재가 1 + 잔고 1 + 캔들 3) → 동시 처리 {server.max_inflight}개")
+        check(elapsed < 0.25, f"응답 지연 100ms × 5 → {elapsed * 1000:.0f}ms")
+
+        saved = (client.upbit.fetch_balance, client.upbit.fetch_ohlcv)
+        client.upbit.fetch_balance = client.upbit.fetch_ohlcv = fail_sync
+        try:
+            df = client.get_ohlcv("BTC/KRW", "1h", max_age=60)
+            ok = client.get_krw_balance() == server.krw and len(df) == config.OHLCV_CACHE_SIZE
+        finally:
+            client.upbit.fetch_balance, client.upbit.fetch_ohlcv = saved
+        check(ok, f"upbit_client 캐시에서 바로 반환 (잔고 / 캔들 {len(df)}봉, 동기 API 호출 0회)")
+
+        server.reset()
+        api.tick(TICKERS, candles, prices=False)
+        check(server.paths == [], "잔고 스냅샷 / 캔들 모두 유효 → 요청 0개")
+    finally:
+        server.latency = 0.0
+        api.close()
+
+
+def test_2_same_functions(server: FakeUpbitREST):
+    print_header("[TEST 02] upbit_client와 같은 함수")
+    reset_caches()
+    original = upbit_async._default
+    upbit_async._default = api = make_async(server)
+    try:
+        check(upbit_async.get_current_price("XRP/KRW") == 500.0, "get_current_price")
+        check(upbit_async.get_krw_balance() == server.krw, "get_krw_balance")
+        df = upbit_async.get_ohlcv("XRP/KRW", "1h")
+        check(len(df) == config.OHLCV_CACHE_SIZE and df["close"].iloc[-1] == 500.0, f"get_ohlcv {len(df)}봉")
+
+        upbit_async.buy_market("XRP/KRW", 100_000)
+        avg, amt = upbit_async.get_balance("XRP/KRW")
+        check(amt == 200.0 and avg == 500.0, f"buy_market 후 잔고 재조회 → 보유 {amt:.0f}개")
+        upbit_async.sell_market("XRP/KRW", amt)
+        check(upbit_async.get_balance("XRP/KRW")[1] == 0.0 and upbit_async.get_krw_balance() == 1_000_000.0,
+              "sell_market 후 잔고 재조회")
+    finally:
+        upbit_async._default = original
+        api.close()
+
+
+def test_3_pool(server: FakeUpbitREST):
+    print_header("[TEST 03] 커넥션 풀")
+    api = make_async(server, pool_size=4)
+    try:
+        server.reset()
+        server.latency = 0.02
+        config.ACCOUNT_MAX_AGE_SEC = 0.0
+        for _ in range(20):
+            reset_caches()
+            api.tick(TICKERS, [(t, "1h", 60) for t in TICKERS])
+        check(len(server.paths) >= 100 and len(server.peers) <= 4,
+              f"요청 {len(server.paths)}개 → TCP 연결 {len(server.peers)}개 (풀 4)")
+    finally:
+        server.latency = 0.0
+        config.ACCOUNT_MAX_AGE_SEC = 1.0
+        api.close()
+
+
+def test_4_partial_failure(server: FakeUpbitREST):
+    print_header("[TEST 04] 일부 요청 실패")
+    api = make_async(server)
+    try:
+        reset_caches()
+        server.reset()
+        server.fail = "/candles/"
+        prices = api.tick(TICKERS, [("XRP/KRW", "1h", 60)])
+        check(prices.get("XRP/KRW") == 500.0 and not client.account.stale(), "캔들 실패 → 현재가 / 잔고는 반영")
+        check(client._candle_cache[("XRP/KRW", "1h")].count == 0, "실패한 캔들은 캐시에 반영 안 함")
+        server.fail = ""
+        api.tick((), [("XRP/KRW", "1h", 60)], prices=False)
+        check(client._candle_cache[("XRP/KRW", "1h")].count == config.OHLCV_CACHE_SIZE, "다음 tick에서 복구")
+    finally:
+        api.close()
+
+
+def test_5_gap_reload_outside_lock(server: FakeUpbitREST):
+    print_header("[TEST 05] 봉 누락 → 락 밖에서 전체 재조회")
+    api = make_async(server)
+    try:
+        reset_caches()
+        api.tick((), [("XRP/KRW", "1h", 60), ("BTC/KRW", "1h", 60)], prices=False, balance=False)
+        rings = [client._candle_cache[(t, "1h")] for t in ("XRP/KRW", "BTC/KRW")]
+        latest = [ring.last_ts() for ring in rings]
+        for ring in rings:                                    # 10시간 단절 흉내
+            ring._buf[:, 0] -= 10 * HOUR_MS
+            ring.fetched_at = 0.0
+
+        locked, call = [], api._call
+        async def recording_call(method, *args, **kwargs):
+            if kwargs.get("limit") == config.OHLCV_CACHE_SIZE:
+                locked.append(client._candle_lock.locked())
+            return await call(method, *args, **kwargs)
+        api._call = recording_call
+        api.tick((), [("XRP/KRW", "1h", 60), ("BTC/KRW", "1h", 60)], prices=False, balance=False)
+
+        check(locked == [False, False], f"전체 재조회 {len(locked)}건 → 요청 중 락 잡혀 있음: {locked}")
+        check([ring.last_ts() for ring in rings] == latest
+              and all(ring.count == config.OHLCV_CACHE_SIZE for ring in rings), "재조회 결과로 캐시 복구")
+    finally:
+        api.close()
+
+
+def test_6_benchmark(server: FakeUpbitREST):
+    print_header("[TEST 06] 벤치마크: 마켓 3개 판정 1회 지연")
+    latency = 0.03
+    saved = (client.upbit.urls["api"], client.upbit.apiKey, client.upbit.secret, upbit_async._default,
+             config.UPBIT_ASYNC, db.log_trade, strategy.send_msg)
+    point(client.upbit, server)
+    upbit_async._default = api = make_async(server)
+    db.log_trade = lambda *args, **kwargs: None
+    strategy.send_msg = lambda bot_app, text: None
+    server.latency = latency
+
+    def bench(use_async: bool) -> tuple[float, float]:
+        config.UPBIT_ASYNC = use_async
+        markets = strategy.build_markets(TICKERS)
+        strategy.run_cycle(None, markets, server.krw)       # 마켓 목록 로드
+        cold, warm = [], []
+        for _ in range(5):
+            reset_caches()                                  # 캔들 3개 전체 조회 + 현재가 + 잔고
+            time.sleep(1.0)                                 # 호출 한도 버스트 회복
+            started = time.perf_counter()
+            strategy.run_cycle(None, markets, server.krw)
+            cold.append(time.perf_counter() - started)
+            for _ in range(3):                              # 캔들 캐시 유효 → 현재가 + 잔고
+                client.account.invalidate()                 # 1초 폴링마다 잔고 스냅샷 만료와 같은 조건
+                started = time.perf_counter()
+                strategy.run_cycle(None, markets, server.krw)
+                warm.append(time.perf_counter() - started)
+        return sorted(cold)[len(cold) // 2], sorted(warm)[len(warm) // 2]
+
+    try:
+        sync_cold, sync_warm = bench(False)
+        async_cold, async_warm = bench(True)
+        print(f"\n    응답 지연 {latency * 1000:.0f}ms 가정 / 판정 1회 중앙값")
+        print(f"    {'':<22}{'동기 (기존)':>12}{'비동기':>12}")
+        print(f"    {'캔들 갱신 (요청 5개)':<20}{sync_cold * 1000:>11.0f}ms{async_cold * 1000:>10.0f}ms")
+        print(f"    {'일반 판정 (요청 2개)':<20}{sync_warm * 1000:>11.0f}ms{async_warm * 1000:>10.0f}ms")
+        check(async_cold < sync_cold * 0.5, f"캔들 갱신 판정 {sync_cold / async_cold:.1f}배 빠름")
+        check(async_warm < sync_warm, f"일반 판정 {sync_warm / async_warm:.1f}배 빠름")
+    finally:
+        (client.upbit.urls["api"], client.upbit.apiKey, client.upbit.secret, upbit_async._default,
+         config.UPBIT_ASYNC, db.log_trade, strategy.send_msg) = saved
+        server.latency = 0.0
+        api.close()
+        reset_caches()
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    server = FakeUpbitREST()
+    tests = [
+        test_1_tick_concurrent,
+        test_2_same_functions,
+        test_3_pool,
+        test_4_partial_failure,
+        test_5_gap_reload_outside_lock,
+        test_6_benchmark,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t(server)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 비동기 클라이언트 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
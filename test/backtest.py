@@ -6,8 +6,16 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'
 import pandas as pd
 import numpy as np
 import config
-import requests
-import time
+import candles
+import indicators
+import ratelimit
+import itertools
+import hashlib
+import json
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,14 +25,45 @@ DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
 # 1. 과거 데이터 수집
 # ============================================================
 
-def fetch_ohlcv_full(ticker: str, timeframe: str = "60") -> pd.DataFrame:
+# config.TIMEFRAME 표기 → 업비트 분봉 단위
+TIMEFRAME_MINUTES = {"1m": "1", "3m": "3", "5m": "5", "15m": "15", "1h": "60", "4h": "240"}
+
+
+def to_upbit_minutes(timeframe: str) -> str:
+    """"1h" / "60" 어느 쪽으로 받아도 업비트 분 단위 문자열로 변환 (모르는 값은 60분봉)"""
+    if timeframe.isdigit():
+        return timeframe
+    return TIMEFRAME_MINUTES.get(timeframe, "60")
+
+
+def _candles_to_frame(candles: list) -> pd.DataFrame:
+    """업비트 캔들 응답(list[dict]) → OHLCV DataFrame (timestamp 오름차순, 중복 제거)"""
+    rows = []
+    for d in candles:
+        rows.append([
+            d["timestamp"],
+            d["opening_price"],
+            d["high_price"],
+            d["low_price"],
+            d["trade_price"],
+            d["candle_acc_trade_volume"],
+        ])
+
+    df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df.drop_duplicates(subset="timestamp").sort_values("timestamp").reset_index(drop=True)
+
+
+def fetch_ohlcv_full(ticker: str, timeframe: str = "60", since_ts: int | None = None) -> pd.DataFrame:
     """
-    업비트 REST API 직접 호출로 전체 과거 데이터 수집
+    업비트 REST API 직접 호출로 과거 데이터 수집
     - ticker  : "KRW-XRP" 형식 (업비트 native)
     - timeframe: 분 단위 문자열 ("60" = 1시간봉, "240" = 4시간봉)
-    - 상장일까지 전체 수집 가능
+    - since_ts: None이면 상장일까지 전체 수집
+                값이 있으면 그 timestamp(ms)가 속한 봉까지만 거슬러 올라가고 멈춤 (증분 동기화용)
     """
     url = f"https://api.upbit.com/v1/candles/minutes/{timeframe}"
+    interval_ms = int(timeframe) * 60_000
     all_ohlcv = []
     to = None  # None이면 현재 시각 기준 최근 200개
 
@@ -35,7 +74,7 @@ def fetch_ohlcv_full(ticker: str, timeframe: str = "60") -> pd.DataFrame:
         if to:
             params["to"] = to
 
-        resp = requests.get(url, params=params)
+        resp = ratelimit.get(url, params=params)   # 업비트 호출 한도 안에서 요청 (429면 대기 후 재요청)
         data = resp.json()
 
         if not data or len(data) == 0:
@@ -50,153 +89,686 @@ def fetch_ohlcv_full(ticker: str, timeframe: str = "60") -> pd.DataFrame:
         if len(data) < 200:
             break  # 더 이상 데이터 없음
 
+        # 증분 모드: 저장된 마지막 봉까지 내려왔으면 종료
+        if since_ts is not None and data[-1]["timestamp"] // interval_ms <= since_ts // interval_ms:
+            break
+
         to = oldest  # 다음 루프: oldest 이전 데이터 요청
-        time.sleep(0.11)  # API 제한: 초당 10회 → 0.1초 간격
 
     print(f"\n✅ 총 {len(all_ohlcv)}개 수집 완료")
 
-    # DataFrame 변환
-    rows = []
-    for d in all_ohlcv:
-        rows.append([
-            d["timestamp"],
-            d["opening_price"],
-            d["high_price"],
-            d["low_price"],
-            d["trade_price"],
-            d["candle_acc_trade_volume"],
-        ])
-
-    df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df = df.drop_duplicates(subset="timestamp").sort_values("timestamp").reset_index(drop=True)
+    df = _candles_to_frame(all_ohlcv)
+    if since_ts is not None:
+        # 저장된 마지막 봉(수집 당시 미완성일 수 있음)부터 이후만 남김
+        df = df[df["timestamp"] // interval_ms >= since_ts // interval_ms].reset_index(drop=True)
 
-    print(f"   기간: {df['datetime'].iloc[0]} ~ {df['datetime'].iloc[-1]}")
+    if not df.empty:
+        print(f"   기간: {df['datetime'].iloc[0]} ~ {df['datetime'].iloc[-1]}")
     return df
 
-# ── 데이터 경로 동적 생성 ──
+
+def sync_ohlcv(ticker: str, timeframe: str) -> int:
+    """
+    저장된 마지막 봉 이후 캔들만 받아서 저장소에 추가 (증분 동기화)
+    - 저장소가 비어 있으면 전체 수집
+    - BACKTEST_DATA_SOURCE가 "sqlite"면 캔들 저장소(candles)에 저장
+    - 반환: 추가/갱신된 봉 수
+    """
+    minutes = to_upbit_minutes(timeframe)
+    if config.BACKTEST_DATA_SOURCE == "sqlite":
+        last_ts = candles.last_ts(ticker, minutes)
+    else:
+        stored  = load_ohlcv_arrays(ticker, timeframe)
+        last_ts = int(stored["timestamp"][-1]) if stored and len(stored["timestamp"]) else None
+
+    df_new = fetch_ohlcv_full(ticker, minutes, since_ts=last_ts)
+    if df_new.empty:
+        return 0
+    if config.BACKTEST_DATA_SOURCE == "sqlite":
+        candles.upsert(ticker, minutes, _candle_store_rows(df_new, minutes)).result()
+        print(f"💾 캔들 저장소 갱신: {ticker} {minutes}m (+{len(df_new)}개)")
+    elif last_ts is None:
+        save_ohlcv(df_new, ticker, timeframe)
+    else:
+        append_ohlcv(df_new, ticker, timeframe)
+    return len(df_new)
+
+
+def _candle_store_rows(columns, timeframe: str) -> np.ndarray:
+    """
+    캔들 컬럼(DataFrame / 배열 dict) → 캔들 저장소 행 (n, 6)
+    - 업비트 캔들 timestamp는 봉 안 마지막 체결 시각 → 봉 시작 시각으로 내려서 저장
+      (실시간 경로 ccxt fetch_ohlcv와 같은 키 → 같은 봉이 두 행으로 저장되지 않음)
+    """
+    interval_ms = int(to_upbit_minutes(timeframe)) * 60_000
+    rows = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in CANDLE_COLUMNS])
+    rows[:, 0] = np.asarray(columns["timestamp"], dtype=np.int64) // interval_ms * interval_ms
+    return rows
+
+
+def sync_all_ohlcv():
+    """data/ 아래 모든 캔들 저장소를 증분 동기화 (야간 배치용)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for name in sorted(os.listdir(DATA_DIR)):
+        if _read_store_meta(os.path.join(DATA_DIR, name)) is None:
+            continue
+        ticker, _, tf = name[:-1].rpartition("_")  # "KRW-XRP_60m" → ("KRW-XRP", "60")
+        count = sync_ohlcv(ticker, tf)
+        print(f"🔄 {ticker} {tf}: {count}개 봉 갱신")
+
+# ── 캔들 저장소 (컬럼형 바이너리) ──
+# data/KRW-XRP_60m/
+#   ├── meta.json              ← 현재 버전 / 행 수 / 컬럼 dtype
+#   ├── timestamp.{버전}.npy    ← int64 (ms)
+#   └── open/high/low/close/volume.{버전}.npy  ← float64
+# - 로드: np.load(mmap_mode='r')로 메모리 매핑 → 파싱/복사 없이 바로 사용
+# - 저장: 새 버전 파일을 먼저 쓰고(fsync) meta.json을 os.replace로 교체 → 중간에 죽어도 이전 버전 유지
+# - 증분 추가: 여유 공간이 있으면 현재 버전 파일 뒤에 새 봉만 이어 쓰고 meta.json의 행 수만 교체
+CANDLE_COLUMNS = {
+    "timestamp": np.int64,
+    "open"     : np.float64,
+    "high"     : np.float64,
+    "low"      : np.float64,
+    "close"    : np.float64,
+    "volume"   : np.float64,
+}
+STORE_SLACK        = 0.25     # 전체 저장 시 파일 여유 공간 (행 수 대비) - 증분 추가는 이 안에서 이어 씀
+STORE_MIN_SLACK    = 4096     # 최소 여유 행 수
+STORE_LOAD_RETRIES = 3        # 로드 중 버전 교체로 파일이 사라졌을 때 meta.json 다시 읽는 횟수
+
+
 def get_data_path(ticker: str, timeframe: str) -> str:
     """
-    ticker, timeframe 기반으로 데이터 파일 경로 생성
-    예: KRW-XRP, 60 → data/KRW-XRP_60m.csv
+    ticker, timeframe 기반으로 캔들 저장소 디렉터리 경로 생성
+    - timeframe은 분 단위로 통일 ("1h" / "60" 모두 같은 저장소)
+    예: KRW-XRP, 60 → data/KRW-XRP_60m/
     """
     os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, f"{ticker}_{to_upbit_minutes(timeframe)}m")
+
+
+def get_csv_path(ticker: str, timeframe: str) -> str:
+    """구 CSV 저장 경로 (마이그레이션용) 예: data/KRW-XRP_60m.csv"""
     return os.path.join(DATA_DIR, f"{ticker}_{timeframe}m.csv")
 
+
+def _read_store_meta(path: str) -> dict | None:
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fsync(path: str):
+    """파일 내용을 디스크까지 기록 (meta.json 교체 전에 호출 → 교체 후 정전이 나도 빈 파일을 가리키지 않음)"""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _write_meta(path: str, version: int, rows: int):
+    new_meta = {
+        "version": version,
+        "rows"   : int(rows),
+        "columns": {name: np.dtype(dtype).name for name, dtype in CANDLE_COLUMNS.items()},
+    }
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(new_meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def _write_store(path: str, columns: dict):
+    """
+    컬럼 배열 dict를 새 버전으로 기록 후 meta.json 원자적 교체
+    - 파일은 행 수보다 여유 있게 잡아 둠 (STORE_SLACK) → 이후 증분 추가는 새 버전 없이 뒤에 이어 씀
+    - 직전 버전 파일은 남겨 둠 (교체 직전에 meta.json을 읽은 다른 프로세스가 아직 열 수 있음),
+      그보다 오래된 버전만 정리
+    """
+    os.makedirs(path, exist_ok=True)
+    meta    = _read_store_meta(path)
+    old_ver = meta["version"] if meta else None
+    version = (old_ver or 0) + 1
+    rows    = len(columns["timestamp"])
+    capacity = rows + max(int(rows * STORE_SLACK), STORE_MIN_SLACK)
+
+    for name, dtype in CANDLE_COLUMNS.items():
+        file_path = os.path.join(path, f"{name}.{version}.npy")
+        out = np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=(capacity,))
+        out[:rows] = columns[name]
+        out.flush()
+        del out
+        _fsync(file_path)
+
+    _write_meta(path, version, rows)
+
+    # 직전 버전보다 오래된 파일 정리 (Windows에서 다른 프로세스가 매핑 중이면 다음 저장 때 재시도)
+    for fname in os.listdir(path):
+        parts = fname.split(".")
+        if len(parts) == 3 and parts[2] == "npy" and parts[1].isdigit() and int(parts[1]) < version - 1:
+            try:
+                os.remove(os.path.join(path, fname))
+            except OSError:
+                pass
+
+
+def _dedupe_buckets(columns: dict, interval_ms: int) -> dict:
+    """봉 단위 중복 제거 (같은 봉이면 뒤에 있는 값 유지) + timestamp 오름차순 정렬"""
+    bucket = columns["timestamp"] // interval_ms
+    order  = np.argsort(bucket, kind="stable")
+    sorted_bucket = bucket[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = sorted_bucket[:-1] != sorted_bucket[1:]
+    order = order[keep]
+    return {name: values[order] for name, values in columns.items()}
+
+
 def save_ohlcv(df: pd.DataFrame, ticker: str, timeframe: str):
-    """수집한 데이터를 CSV로 저장"""
+    """수집한 데이터를 컬럼형 저장소(.npy)로 저장"""
     path = get_data_path(ticker, timeframe)
-    df.to_csv(path, index=False)
+    _write_store(path, {name: df[name].to_numpy() for name in CANDLE_COLUMNS})
     print(f"💾 데이터 저장 완료: {path} ({len(df)}개)")
 
-def load_ohlcv(ticker: str, timeframe: str) -> pd.DataFrame:
-    """저장된 CSV에서 데이터 로드"""
+
+def append_ohlcv(df: pd.DataFrame, ticker: str, timeframe: str):
+    """
+    저장소에 새 캔들 반영 (meta.json 교체로 원자적 반영)
+    - 같은 봉(timestamp를 봉 간격으로 내린 값)이 겹치면 새로 받은 쪽을 남김
+      → 저장 당시 미완성이던 마지막 봉도 확정값으로 교체됨
+    - 새 캔들이 저장된 마지막 봉 이후(마지막 봉 교체 포함)이고 파일 여유 공간에 들어가면
+      그 행들만 현재 버전 파일 뒤에 이어 쓰고 meta.json의 행 수만 갱신 (기존 행은 읽지도 쓰지도 않음)
+      (덮어쓰는 기존 행은 미완성이던 마지막 봉 1개뿐 → 중간에 죽어도 다음 동기화가 그 봉부터 다시 받음)
+    - 그보다 과거 봉이 섞여 있거나(다운로더 과거 구간) 여유 공간이 모자라면 전체를 새 버전으로 저장
+    """
+    interval_ms = int(to_upbit_minutes(timeframe)) * 60_000
+    path   = get_data_path(ticker, timeframe)
+    new    = _dedupe_buckets({name: df[name].to_numpy(dtype=dtype) for name, dtype in CANDLE_COLUMNS.items()},
+                             interval_ms)
+    if not len(new["timestamp"]):
+        return
+    stored = load_ohlcv_arrays(ticker, timeframe)
+    if not stored:
+        _write_store(path, new)
+        print(f"💾 데이터 추가 완료: {path} (+{len(df)}개 → 총 {len(new['timestamp'])}개)")
+        return
+
+    # 새 캔들 첫 봉 이후의 저장된 행만 병합 대상 (저장소는 timestamp 오름차순)
+    rows  = len(stored["timestamp"])
+    start = int(np.searchsorted(stored["timestamp"], new["timestamp"][0] // interval_ms * interval_ms, side="left"))
+    tail  = _dedupe_buckets({name: np.concatenate([stored[name][start:], new[name]]) for name in CANDLE_COLUMNS},
+                            interval_ms)
+    total = start + len(tail["timestamp"])
+
+    meta     = _read_store_meta(path)
+    capacity = len(np.load(os.path.join(path, f"timestamp.{meta['version']}.npy"), mmap_mode="r"))
+    if start >= rows - 1 and total <= capacity:
+        for name, dtype in CANDLE_COLUMNS.items():
+            file_path = os.path.join(path, f"{name}.{meta['version']}.npy")
+            out = np.lib.format.open_memmap(file_path, mode="r+")
+            out[start:total] = tail[name]
+            out.flush()
+            del out
+            _fsync(file_path)
+        _write_meta(path, meta["version"], total)
+    else:
+        _write_store(path, {name: np.concatenate([stored[name][:start], tail[name]]) for name in CANDLE_COLUMNS})
+    print(f"💾 데이터 추가 완료: {path} (+{len(df)}개 → 총 {total}개)")
+
+
+def load_ohlcv_arrays(ticker: str, timeframe: str) -> dict:
+    """
+    저장소 컬럼을 메모리 매핑으로 로드 (복사 없음, 읽기 전용)
+    - 반환: {"timestamp": int64 memmap, "open": float64 memmap, ...} / 저장소 없으면 빈 dict
+    - 파일은 여유 공간까지 잡혀 있으므로 meta.json의 행 수만큼만 잘라서 반환
+    - meta.json을 읽은 직후 다른 프로세스가 새 버전으로 교체하고 옛 파일을 지웠으면 meta.json부터 다시 읽음
+    """
+    path = get_data_path(ticker, timeframe)
+    for attempt in range(STORE_LOAD_RETRIES + 1):
+        meta = _read_store_meta(path)
+        if meta is None:
+            return {}
+        version, rows = meta["version"], meta["rows"]
+        try:
+            return {
+                name: np.load(os.path.join(path, f"{name}.{version}.npy"), mmap_mode="r")[:rows]
+                for name in CANDLE_COLUMNS
+            }
+        except FileNotFoundError:
+            if attempt == STORE_LOAD_RETRIES:
+                raise
+
+
+def date_to_ms(date_str: str | None) -> int | None:
+    """"YYYY-MM-DD" → 그날 0시(UTC) timestamp(ms) / None은 그대로"""
+    return None if date_str is None else int(pd.Timestamp(date_str).value // 1_000_000)
+
+
+def load_ohlcv(ticker: str, timeframe: str, start: str | None = None, end: str | None = None) -> pd.DataFrame:
+    """
+    저장소에서 데이터 로드 (BACKTEST_DATA_SOURCE: "npy" 컬럼형 저장소 / "sqlite" 캔들 저장소)
+    - start ≤ 봉 < end ("YYYY-MM-DD", None이면 처음 / 끝까지) 구간만 반환
+    - npy: 저장소가 없고 구 CSV만 있으면 한 번 마이그레이션 후 로드
+    - sqlite: 캔들 저장소에 해당 마켓이 없으면 컬럼형 저장소에서 1회 복사 후 로드
+    - datetime은 int64 timestamp(ms)에서 바로 변환 (문자열 파싱 없음)
+    """
+    start_ts, end_ts = date_to_ms(start), date_to_ms(end)
+    if config.BACKTEST_DATA_SOURCE == "sqlite":
+        return load_ohlcv_sqlite(ticker, timeframe, start_ts, end_ts)
+
     path = get_data_path(ticker, timeframe)
-    if not os.path.exists(path):
+    if _read_store_meta(path) is None:
+        # 구 CSV는 "1h" / "60" 어느 표기로 저장됐을 수 있으므로 둘 다 확인
+        if not (migrate_csv(ticker, timeframe) or migrate_csv(ticker, to_upbit_minutes(timeframe))):
+            return pd.DataFrame()
+
+    arrays = load_ohlcv_arrays(ticker, timeframe)
+    if start_ts is not None or end_ts is not None:
+        ts = arrays["timestamp"]
+        lo = 0 if start_ts is None else int(np.searchsorted(ts, start_ts, side="left"))
+        hi = len(ts) if end_ts is None else int(np.searchsorted(ts, end_ts, side="left"))
+        arrays = {name: values[lo:hi] for name, values in arrays.items()}
+    return _arrays_to_frame(arrays, path)
+
+
+def load_ohlcv_sqlite(ticker: str, timeframe: str, start_ts: int | None = None,
+                      end_ts: int | None = None) -> pd.DataFrame:
+    """캔들 저장소(SQLite)에서 필요한 구간만 조회 (기본키 범위 검색)"""
+    minutes = to_upbit_minutes(timeframe)
+    if not candles.count(ticker, minutes):
+        stored = load_ohlcv_arrays(ticker, timeframe)
+        if not stored:
+            return pd.DataFrame()
+        rows = _candle_store_rows(stored, minutes)
+        candles.upsert(ticker, minutes, rows).result()
+        print(f"🔁 컬럼형 저장소 → 캔들 저장소 복사: {ticker} {minutes}m ({len(rows)}개)")
+
+    arrays = candles.read_range(ticker, minutes, start_ts, end_ts)
+    if not arrays:
         return pd.DataFrame()
-    df = pd.read_csv(path)
-    df["datetime"] = pd.to_datetime(df["datetime"])
-    df = df.dropna(subset=["datetime"]).reset_index(drop=True)  # ← 추가
-    print(f"📂 데이터 로드 완료: {path} ({len(df)}개)")
+    return _arrays_to_frame(arrays, f"{config.CANDLE_DB_PATH} [{ticker} {minutes}m]")
+
+
+def _arrays_to_frame(arrays: dict, source: str) -> pd.DataFrame:
+    df = pd.DataFrame(arrays, copy=False)
+    if df.empty:
+        return df
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    print(f"📂 데이터 로드 완료: {source} ({len(df)}개)")
     print(f"   기간: {df['datetime'].iloc[0]} ~ {df['datetime'].iloc[-1]}")
     return df
 
+
+def migrate_csv(ticker: str, timeframe: str) -> bool:
+    """구 CSV(data/{ticker}_{timeframe}m.csv) → 컬럼형 저장소 1회 변환"""
+    csv_path = get_csv_path(ticker, timeframe)
+    if not os.path.exists(csv_path):
+        return False
+
+    df = pd.read_csv(csv_path)
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df = df.dropna(subset=["datetime"]).reset_index(drop=True)
+    if "timestamp" not in df.columns:
+        df["timestamp"] = df["datetime"].to_numpy(dtype="datetime64[ms]").view(np.int64)
+
+    save_ohlcv(df, ticker, timeframe)
+    print(f"🔁 CSV 마이그레이션 완료: {csv_path} → {get_data_path(ticker, timeframe)}")
+    return True
+
+
+# 캔들이 아닌 결과 CSV (그리드 서치 / 트레이드 내역 / 최적화 결과)
+RESULT_CSV_PREFIXES = ("grid_search_", "trades_", "walk_forward_", "halving_search_")
+
+
+def migrate_csv_store():
+    """data/ 폴더의 캔들 CSV({ticker}_{timeframe}m.csv) 전체를 컬럼형 저장소로 변환"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for fname in sorted(os.listdir(DATA_DIR)):
+        if not fname.endswith("m.csv") or fname.startswith(RESULT_CSV_PREFIXES):
+            continue
+        ticker, _, tf = fname[:-len("m.csv")].rpartition("_")
+        if not ticker:
+            continue
+        if _read_store_meta(get_data_path(ticker, tf)) is None:
+            migrate_csv(ticker, tf)
+
 # ============================================================
 # 2. 지표 계산
 # ============================================================
 
 def calculate_atr(df: pd.DataFrame, period: int = 20) -> pd.Series:
-    high       = df['high']
-    low        = df['low']
-    prev_close = df['close'].shift(1)
+    return pd.Series(
+        indicators.atr(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), period),
+        index=df.index,
+    )
 
-    tr = pd.concat([
-        high - low,
-        (high - prev_close).abs(),
-        (low  - prev_close).abs(),
-    ], axis=1).max(axis=1)
 
-    return tr.rolling(window=period).mean()
+def default_params() -> dict:
+    """
+    config.py의 현재 터틀 설정 → 백테스트 파라미터 dict
+    - 그리드 서치 등에서는 config를 덮어쓰지 않고 이 dict를 복사해서 값만 바꿔 넘긴다
+    """
+    return {
+        "entry_period"       : config.TURTLE_ENTRY_PERIOD,
+        "atr_period"         : config.TURTLE_ATR_PERIOD,
+        "risk_rate"          : config.TURTLE_RISK_RATE,
+        "max_units"          : config.TURTLE_MAX_UNITS,
+        "cooldown_sec"       : config.REENTRY_COOLDOWN_SEC,
+        "trailing_multiplier": config.TURTLE_TRAILING_MULTIPLIER,
+        "exit_mode"          : config.TURTLE_EXIT_MODE,
+    }
 
 
-def prepare_indicators(df: pd.DataFrame) -> pd.DataFrame:
+def prepare_indicators(df: pd.DataFrame, params: dict | None = None) -> pd.DataFrame:
+    if params is None:
+        params = default_params()
     df = df.copy()
-    df['atr'] = calculate_atr(df, config.TURTLE_ATR_PERIOD)
-    df['entry_high'] = df['high'].shift(1).rolling(window=config.TURTLE_ENTRY_PERIOD).max()
-    df['exit_low_10'] = df['low'].rolling(10).min().shift(1)
-    df['exit_low_20'] = df['low'].rolling(20).min().shift(1)
+    df['atr'] = calculate_atr(df, params['atr_period'])
+    df['entry_high'] = indicators.donchian_upper(df['high'].to_numpy(), params['entry_period'])
+    df['exit_low_10'] = indicators.donchian_lower(df['low'].to_numpy(), 10)
+    df['exit_low_20'] = indicators.donchian_lower(df['low'].to_numpy(), 20)
 
     return df.dropna().reset_index(drop=True)
 
 
+# ── 지표 메모이제이션 (그리드 서치/워크포워드용) ──
+# 조합이 수백 개여도 실제로 다른 지표는 (ENTRY_PERIOD 개수 + ATR_PERIOD 개수)뿐이다.
+# 지표 컬럼을 (데이터셋 지문, 지표 이름, 기간) 키로 한 번만 계산해서 재사용한다.
+
+class IndicatorCache:
+    """
+    지표 컬럼 LRU 캐시
+    - key    : (데이터셋 지문, 지표 이름, 기간)
+    - max_mb : 보관 배열 총 용량 상한 (초과 시 가장 오래 안 쓴 항목부터 제거, None이면 config 값)
+    """
+
+    def __init__(self, max_mb: float | None = None):
+        if max_mb is None:
+            max_mb = config.BACKTEST_INDICATOR_CACHE_MB
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.nbytes    = 0
+        self.hits      = 0
+        self.misses    = 0
+        self._store: OrderedDict = OrderedDict()
+        self._pinned: dict = {}     # 미리 계산해서 넘겨받은 컬럼 (용량 상한 / LRU 제거 대상 아님)
+
+    def preload(self, columns: dict):
+        """미리 계산된 지표 컬럼 등록 {키: 배열} (그리드 서치 워커 - 부모가 계산한 공유 메모리 view)"""
+        self._pinned.update(columns)
+
+    def get(self, key: tuple, compute) -> np.ndarray:
+        """캐시에 있으면 반환, 없으면 compute()로 계산 후 저장"""
+        arr = self._pinned.get(key)
+        if arr is not None:
+            self.hits += 1
+            return arr
+        arr = self._store.get(key)
+        if arr is not None:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return arr
+
+        self.misses += 1
+        arr = compute()
+        if arr.nbytes > self.max_bytes:
+            return arr  # 단일 항목이 상한보다 크면 캐시하지 않음
+
+        self._store[key] = arr
+        self.nbytes += arr.nbytes
+        while self.nbytes > self.max_bytes:
+            _, old = self._store.popitem(last=False)
+            self.nbytes -= old.nbytes
+        return arr
+
+    def clear(self):
+        """항목과 적중/미스 횟수 모두 초기화"""
+        self._store.clear()
+        self._pinned.clear()
+        self.nbytes = 0
+        self.hits   = 0
+        self.misses = 0
+
+
+def frame_to_raw_arrays(df: pd.DataFrame) -> dict:
+    """
+    원본 캔들 DataFrame → 지표 계산용 배열 + 데이터셋 지문
+    - valid: 원본 컬럼 중 하나라도 NaN이면 False (prepare_indicators()의 dropna와 동일 기준)
+    """
+    raw = {
+        "ts"    : np.ascontiguousarray(df['datetime'].to_numpy(dtype='datetime64[ns]').view(np.int64)),
+        "high"  : np.ascontiguousarray(df['high'].to_numpy(dtype=np.float64)),
+        "low"   : np.ascontiguousarray(df['low'].to_numpy(dtype=np.float64)),
+        "close" : np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64)),
+        "valid" : np.ascontiguousarray(~df.isna().any(axis=1).to_numpy()),
+    }
+    raw["fingerprint"] = dataset_fingerprint(raw)
+    return raw
+
+
+def dataset_fingerprint(raw: dict) -> str:
+    """캔들 배열 내용 기반 해시 (같은 데이터면 같은 지문 → 캐시 키로 사용)"""
+    h = hashlib.blake2b(digest_size=16)
+    for name in ("ts", "high", "low", "close", "valid"):
+        h.update(raw[name].tobytes())
+    return h.hexdigest()
+
+
+def indicator_specs(raw: dict, params: dict) -> list[tuple[tuple, object]]:
+    """
+    params 1개에 필요한 지표 컬럼 [(캐시 키, 계산 함수), ...] - ATR / 진입 고가 / 10·20봉 저가 순서
+    (indicator_arrays()와 그리드 서치 사전 계산이 같은 키를 쓰도록 공용)
+    """
+    fp = raw["fingerprint"]
+    high, low, close = raw["high"], raw["low"], raw["close"]
+    atr_period, entry_period = params['atr_period'], params['entry_period']
+    return [
+        ((fp, "atr", atr_period),          lambda: indicators.atr(high, low, close, atr_period)),
+        ((fp, "entry_high", entry_period), lambda: indicators.donchian_upper(high, entry_period)),
+        ((fp, "exit_low", 10),             lambda: indicators.donchian_lower(low, 10)),
+        ((fp, "exit_low", 20),             lambda: indicators.donchian_lower(low, 20)),
+    ]
+
+
+def indicator_arrays(raw: dict, params: dict, cache: IndicatorCache | None = None) -> dict:
+    """
+    prepare_indicators() + frame_to_arrays()의 배열 버전
+    - DataFrame 복사 없이 지표 컬럼을 cache에서 꺼내 쓰고, 유효 구간만 잘라 커널 입력 생성
+    """
+    if cache is None:
+        cache = IndicatorCache()
+
+    atr, entry_high, low_10, low_20 = (cache.get(key, compute) for key, compute in indicator_specs(raw, params))
+
+    mask = (raw["valid"] & ~np.isnan(atr) & ~np.isnan(entry_high)
+            & ~np.isnan(low_10) & ~np.isnan(low_20))
+
+    return {
+        "ts"          : raw["ts"][mask],
+        "close"       : raw["close"][mask],
+        "atr"         : atr[mask],
+        "entry_high"  : entry_high[mask],
+        "exit_low_10" : low_10[mask],
+        "exit_low_20" : low_20[mask],
+    }
+
+
 # ============================================================
 # 3. 백테스트 엔진
 # ============================================================
 
-def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL) -> dict:
+FEE_RATE = 0.0005      # 업비트 수수료 0.05%
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def frame_to_arrays(df: pd.DataFrame) -> dict:
+    """
+    지표 계산이 끝난 DataFrame → 백테스트 커널 입력용 연속 NumPy 배열
+    - ts   : datetime → int64 (ns)
+    - 나머지: float64 (청산용 exit_low 컬럼이 없으면 0으로 채움)
+    """
+    n = len(df)
+
+    def col(name: str) -> np.ndarray:
+        if name not in df.columns:
+            return np.zeros(n, dtype=np.float64)
+        return np.ascontiguousarray(df[name].to_numpy(dtype=np.float64))
+
+    ts = df['datetime'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    return {
+        "ts"          : np.ascontiguousarray(ts),
+        "close"       : col('close'),
+        "atr"         : col('atr'),
+        "entry_high"  : col('entry_high'),
+        "exit_low_10" : col('exit_low_10'),
+        "exit_low_20" : col('exit_low_20'),
+    }
+
+
+def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                 params: dict | None = None) -> dict:
     """
-    TURTLE_V1 백테스트 실행
+    TURTLE_V1 백테스트 실행 (DataFrame 입력용 래퍼)
+    - 실제 시뮬레이션은 run_backtest_arrays() 커널이 수행
+    - params: default_params() 형식 (None이면 config 값 사용)
+    """
+    return run_backtest_arrays(frame_to_arrays(df), initial_capital=initial_capital, params=params)
+
+
+def equity_frame(result: dict) -> pd.DataFrame:
+    """
+    백테스트 결과의 자산 곡선 배열 → DataFrame (datetime / equity / drawdown)
+    - 결과에는 배열만 들어 있으므로 차트/분석 등 필요한 호출부에서만 만들어 쓴다
+    """
+    equity = result["equity"]
+    peak   = np.maximum.accumulate(equity) if len(equity) else equity
+    return pd.DataFrame({
+        "datetime": pd.to_datetime(result["ts"], unit="ns"),
+        "equity"  : equity,
+        "drawdown": (equity - peak) / peak * 100,
+    })
+
+
+def slice_arrays(arrays: dict, start_ts: int, end_ts: int) -> tuple[dict, float]:
+    """
+    커널 입력 배열을 [start_ts, end_ts) 구간으로 자르기 (복사 없는 뷰)
+    - 지표는 전체 기간에서 계산된 값을 그대로 쓰므로 구간 앞부분 워밍업 손실이 없다
+    - 반환: (잘린 배열 dict, 구간 직전 봉 종가 / 없으면 0)
+    """
+    ts = arrays["ts"]
+    a, b = np.searchsorted(ts, [start_ts, end_ts])
+    prev_close = float(arrays["close"][a - 1]) if a > 0 else 0.0
+    return {name: values[a:b] for name, values in arrays.items()}, prev_close
+
+
+BAR_CHUNK = 65_536    # 커널이 한 번에 파이썬 스칼라로 풀어 두는 봉 수
+
+
+def _iter_bars(*columns: np.ndarray):
+    """
+    여러 컬럼 배열을 봉 단위 튜플로 순회
+    - BAR_CHUNK씩 tolist()로 풀어서 numpy 스칼라 박싱 비용을 없애고,
+      전체 배열을 한꺼번에 리스트로 만들지 않아 메모리 사용량을 일정하게 유지
+    """
+    n = len(columns[0])
+    for start in range(0, n, BAR_CHUNK):
+        yield from zip(*(c[start:start + BAR_CHUNK].tolist() for c in columns))
+
+
+def run_backtest_arrays(arrays: dict, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                        params: dict | None = None, verbose: bool = True,
+                        prev_close: float = 0.0) -> dict:
+    """
+    TURTLE_V1 백테스트 커널 (NumPy 배열 입력)
     - 트레일링 스탑 방식 청산
     - 피라미딩 최대 4유닛
+    - 포지션/피라미딩/트레일링 상태는 전부 파이썬 스칼라로 유지
+    - arrays : frame_to_arrays() 결과 (ts, close, atr, entry_high, exit_low_10, exit_low_20)
+    - params : default_params() 형식 (None이면 config 값 사용, config는 절대 수정하지 않음)
+    - verbose: False면 낙폭 경고/임시 출력 생략 (그리드 서치 워커용)
+    - prev_close: 첫 봉 직전 종가 (기간을 잘라서 돌릴 때 첫 봉 돌파 판정용, 기본 0)
     """
+    if params is None:
+        params = default_params()
+
+    ts_arr = arrays["ts"]
+    n      = len(ts_arr)
+
+    risk_rate    = params['risk_rate']
+    max_units    = params['max_units']
+    cooldown_sec = params['cooldown_sec']
+    trailing_mul = params['trailing_multiplier']
+    exit_mode    = params['exit_mode'].upper()
+    dd_limit     = config.MAX_DRAWDOWN_LIMIT if verbose else float('-inf')
+
+    # 청산 모드별 저점 기준 (TRAILING / 알 수 없는 모드 → None = 트레일링 스탑)
+    if exit_mode == "10DAY_LOW":
+        exit_lows, exit_label = arrays["exit_low_10"], "10day_low"
+    elif exit_mode == "20DAY_LOW":
+        exit_lows, exit_label = arrays["exit_low_20"], "20day_low"
+    else:
+        exit_lows, exit_label = None, "trailing_stop"
+
     peak_equity = initial_capital  # 고점 자산 추적
-    last_drawdown_alert_date = None  # 마지막 알림 날짜 (중복 방지)
+    last_drawdown_alert_day = None  # 마지막 알림 날짜 (중복 방지)
     capital       = initial_capital
     position      = 0.0
     highest_price = 0.0    # 진입 후 최고가 (트레일링 스탑 기준)
     units         = 0      # 현재 보유 유닛 수
     next_add      = 0.0    # 다음 피라미딩 추가 기준가
     entry_atr     = 0.0    # 최초 진입 ATR (유닛 사이즈 고정용)
-    entry_cost   = 0.0     # 실제 총 투입 원가 추적
-    last_exit_dt = None    # 마지막 청산 시각 (재진입 쿨다운 기준)
+    entry_cost    = 0.0    # 실제 총 투입 원가 추적
+    last_exit_ts  = None   # 마지막 청산 시각 ns (재진입 쿨다운 기준)
+    last_close    = prev_close  # 직전 봉 종가
     trades        = []
-    equity_curve  = []
 
-    FEE_RATE = 0.0005      # 업비트 수수료 0.05%
+    # 자산 곡선은 미리 할당한 배열에 기록하고, MDD는 순회하면서 바로 추적
+    equity        = np.empty(n, dtype=np.float64)
+    mdd           = 0.0    # 최대 낙폭 (%)
+    mdd_idx       = 0      # 최대 낙폭 발생 봉 인덱스
+    deep_dd_bars  = 0      # 낙폭 -25% 이하 봉 수
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # 봉(캔들) 순회 — 시간 순으로 한 봉씩 읽으며 아래 작업 수행
     #   [A] 포지션 없음 → 진입 조건 충족 시 매수
     #   [B] 포지션 있음 → 청산 조건 충족 시 매도, 아니면 피라미딩 추가 매수
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-    for i, row in df.iterrows():
-        curr_price = float(row['close'])
-        atr        = float(row['atr'])
-        entry_high = float(row['entry_high'])
-        dt         = row['datetime']
+    bars = _iter_bars(ts_arr, arrays["close"], arrays["atr"], arrays["entry_high"],
+                      exit_lows if exit_lows is not None else arrays["exit_low_10"])
+    for i, (ts, curr_price, atr, entry_high, exit_low) in enumerate(bars):
+        prev_close = last_close
+        last_close = curr_price
 
         # 현재 총자산 = 원화 + 보유 코인 평가액
         total_equity = capital + position * curr_price
-        equity_curve.append({"datetime": dt, "equity": total_equity})
+        equity[i] = total_equity
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # [!] 계좌 손실한도 -25% 체크
+        # [!] 계좌 손실한도 -25% 체크 (고점 자본 대비, 참고용 출력)
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        # 원전(고점 자본 대비 -25%)
-
-        # 고점 갱신
         if total_equity > peak_equity:
             peak_equity = total_equity
 
         drawdown = (total_equity - peak_equity) / peak_equity * 100
-        if drawdown <= config.MAX_DRAWDOWN_LIMIT:
-            alert_date = dt.date() if hasattr(dt, 'date') else str(dt)[:10]
-            if alert_date != last_drawdown_alert_date:
-                last_drawdown_alert_date = alert_date
-                print(f"\n⚠️ [백테스트] 고점 대비 낙폭 {drawdown:.2f}% 도달 ({dt}) - 참고용")
+        if drawdown < mdd:
+            mdd, mdd_idx = drawdown, i
+        if drawdown <= -25:
+            deep_dd_bars += 1
+        if drawdown <= dd_limit:
+            alert_day = ts // NS_PER_DAY
+            if alert_day != last_drawdown_alert_day:
+                last_drawdown_alert_day = alert_day
+                print(f"\n⚠️ [백테스트] 고점 대비 낙폭 {drawdown:.2f}% 도달 ({pd.Timestamp(ts)}) - 참고용")
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # [A] 포지션 없음 → 신규 진입 체크
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         if position == 0:
-            # 직전 봉 종가 (첫 봉이면 0)
-            prev_close = float(df['close'].iloc[i - 1]) if i > 0 else 0.0
-
             # 재진입 쿨다운 체크
             # → 마지막 청산 후 REENTRY_COOLDOWN_SEC 이내면 진입 금지
-            if last_exit_dt is not None:
-                elapsed = (dt - last_exit_dt).total_seconds()
-                if elapsed < config.REENTRY_COOLDOWN_SEC:
+            if last_exit_ts is not None:
+                elapsed = (ts - last_exit_ts) / 1e9
+                if elapsed < cooldown_sec:
                     continue
 
             # 터틀 진입 조건:
@@ -204,7 +776,7 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
             #   - ATR 유효값일 때만 진입 (0이면 유닛 사이즈 계산 불가)
             if curr_price > entry_high and prev_close <= entry_high and atr > 0:
                 # 유닛 계산: 허용손실(총자산 1%) / 손절폭(2*ATR) * 현재가
-                risk_krw     = total_equity * (config.TURTLE_RISK_RATE / 100)
+                risk_krw     = total_equity * (risk_rate / 100)
                 unit_krw     = risk_krw / (2 * atr) * curr_price
 
                 # ATR이 너무 작을 때 매수금액 폭발 방지 (총자산 20% 상한)
@@ -225,8 +797,7 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
                 capital -= unit_krw
 
                 # 피라미딩 상태 초기화
-                # entry_cost = unit_krw - fee  # ← [수정] 1유닛 원가 초기화
-                entry_cost = unit_krw  # ← [수정] 1유닛 원가 초기화
+                entry_cost    = unit_krw                # 1유닛 원가 초기화
                 highest_price = curr_price
                 entry_atr     = atr                     # 최초 ATR 고정
                 next_add      = curr_price + 0.5 * atr  # 다음 추가 기준가
@@ -234,7 +805,7 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
 
                 trades.append({
                     "type"     : "buy",
-                    "datetime" : dt,
+                    "datetime" : pd.Timestamp(ts),
                     "price"    : curr_price,
                     "amount"   : position,
                     "unit_krw" : unit_krw,
@@ -246,150 +817,129 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
         # [B] 포지션 있음 → 피라미딩 + 청산 체크
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         else:
-                # 1. 최고가 갱신 (트레일링 스탑 기준선 끌어올리기)
-                if curr_price > highest_price:
-                    highest_price = curr_price
+            # 1. 최고가 갱신 (트레일링 스탑 기준선 끌어올리기)
+            if curr_price > highest_price:
+                highest_price = curr_price
 
-                # 2. entry_atr 방어 (0이면 손절가 계산 불가 → 스킵)
-                if entry_atr <= 0:
-                    continue
+            # 2. entry_atr 방어 (0이면 손절가 계산 불가 → 스킵)
+            if entry_atr <= 0:
+                continue
 
-                # 3. trailing_stop 계산
-                # 트레일링 손절가 = 최고가 - 2 × 최초ATR
+            # 3. 청산 조건 판단 (exit_mode에 따라 기준 다름)
+            if exit_lows is None:
+                # 트레일링 손절가 = 최고가 - 승수 × 최초ATR
                 # → 최고가가 올라갈수록 손절가도 따라 올라감 (수익 보호)
-                trailing_stop = highest_price - config.TURTLE_TRAILING_MULTIPLIER * entry_atr
-
-                # 5. 청산 조건 판단 (exit_mode에 따라 기준 다름)
-                exit_mode = config.TURTLE_EXIT_MODE.upper()
-
-                # 트레일링 스탑: 최고가 - 2ATR 아래로 내려오면 청산
-                if exit_mode == "TRAILING":
-                    if curr_price <= trailing_stop:
-                        exit_reason = "trailing_stop"
-                    else:
-                        exit_reason = None
-
-                # 원전 터틀 S1: 10일 저점 하향 돌파 시 청산
-                elif exit_mode == "10DAY_LOW":
-                    exit_low = float(row.get('exit_low_10', 0) or 0)
-                    if exit_low > 0 and curr_price <= exit_low:
-                        exit_reason = "10day_low"
-                    else:
-                        exit_reason = None
-
-                # 원전 터틀 S2: 20일 저점 하향 돌파 시 청산
-                elif exit_mode == "20DAY_LOW":
-                    exit_low = float(row.get('exit_low_20', 0) or 0)
-                    if exit_low > 0 and curr_price <= exit_low:
-                        exit_reason = "20day_low"
-                    else:
-                        exit_reason = None
-
-                else:
-                    # 알 수 없는 모드 → TRAILING 폴백
-                    if curr_price <= trailing_stop:
-                        exit_reason = "trailing_stop"
-                    else:
-                        exit_reason = None
-
-                # 6. 청산 실행 (exit_reason 있으면 피라미딩 스킵하고 바로 청산)
-                if exit_reason:
-                    sell_amount = position * curr_price
-                    fee = sell_amount * FEE_RATE
-
-                    # ✅ 가중평균 진입가 기반 손익 계산
-                    weighted_avg = entry_cost / position
-                    pnl = sell_amount - fee - entry_cost
-                    profit_rate = (curr_price - weighted_avg) / weighted_avg * 100
-
-                    capital += sell_amount - fee
-
-                    # ✅ 포지션 및 피라미딩 상태 전체 초기화
-                    position = 0.0
-                    highest_price = 0.0
-                    units = 0
-                    next_add = 0.0
-                    entry_atr = 0.0
-                    entry_cost = 0.0
-                    last_exit_dt = dt
+                trailing_stop = highest_price - trailing_mul * entry_atr
+                exit_hit = curr_price <= trailing_stop
+            else:
+                # 원전 터틀 S1/S2: 10일/20일 저점 하향 돌파 시 청산
+                exit_hit = exit_low > 0 and curr_price <= exit_low
+
+            # 4. 청산 실행 (피라미딩 스킵하고 바로 청산)
+            if exit_hit:
+                sell_amount = position * curr_price
+                fee = sell_amount * FEE_RATE
+
+                # ✅ 가중평균 진입가 기반 손익 계산
+                weighted_avg = entry_cost / position
+                pnl = sell_amount - fee - entry_cost
+                profit_rate = (curr_price - weighted_avg) / weighted_avg * 100
+
+                capital += sell_amount - fee
+
+                # ✅ 포지션 및 피라미딩 상태 전체 초기화
+                position = 0.0
+                highest_price = 0.0
+                units = 0
+                next_add = 0.0
+                entry_atr = 0.0
+                entry_cost = 0.0
+                last_exit_ts = ts
+
+                trades.append({
+                    "type": "sell",
+                    "datetime": pd.Timestamp(ts),
+                    "price": curr_price,
+                    "exit_reason": exit_label,
+                    "pnl": pnl,
+                    "profit_rate": profit_rate,
+                })
+                continue  # ← 청산 후 피라미딩 스킵
+
+            # ── 피라미딩 추가 진입 (청산 없을 때만) ──
+            # 현재가가 다음 추가 기준가 이상이고 최대 유닛 미달 시 추가 매수
+            if units < max_units and curr_price >= next_add:
+                risk_krw = total_equity * (risk_rate / 100)
+                unit_krw = risk_krw / (2 * entry_atr) * curr_price
+                max_unit_krw = total_equity * 0.20
+                unit_krw = min(unit_krw, max_unit_krw)
+
+                if unit_krw < 5_000:
+                    unit_krw = 5_000
+
+                if unit_krw <= capital:
+                    fee = unit_krw * FEE_RATE
+                    add_amt = (unit_krw - fee) / curr_price
+                    position += add_amt
+                    capital -= unit_krw
+                    entry_cost += unit_krw  # 실투입금 누적
+                    units += 1
+                    next_add = curr_price + 0.5 * entry_atr
 
                     trades.append({
-                        "type": "sell",
-                        "datetime": dt,
+                        "type": "buy",
+                        "datetime": pd.Timestamp(ts),
                         "price": curr_price,
-                        "exit_reason": exit_reason,  # ← atr_spike / trailing_stop 구분
-                        "pnl": pnl,
-                        "profit_rate": profit_rate,
+                        "amount": add_amt,
+                        "unit_krw": unit_krw,
+                        "units": units,
                     })
-                    continue  # ← 청산 후 피라미딩 스킵
-
-                # ── 피라미딩 추가 진입 (청산 없을 때만) ──
-                # 현재가가 다음 추가 기준가 이상이고 최대 유닛 미달 시 추가 매수
-                if units < config.TURTLE_MAX_UNITS and curr_price >= next_add:
-                    risk_krw = total_equity * (config.TURTLE_RISK_RATE / 100)
-                    unit_krw = risk_krw / (2 * entry_atr) * curr_price
-                    max_unit_krw = total_equity * 0.20
-                    unit_krw = min(unit_krw, max_unit_krw)
-
-                    if unit_krw < 5_000:
-                        unit_krw = 5_000
-
-                    if unit_krw <= capital:
-                        fee = unit_krw * FEE_RATE
-                        add_amt = (unit_krw - fee) / curr_price
-                        position += add_amt
-                        capital -= unit_krw
-                        # entry_cost += unit_krw - fee  # 수수료 제외 실투입금 누적
-                        entry_cost += unit_krw  # 수수료 제외 실투입금 누적
-                        units += 1
-                        next_add = curr_price + 0.5 * entry_atr
-
-                        trades.append({
-                            "type": "buy",
-                            "datetime": dt,
-                            "price": curr_price,
-                            "amount": add_amt,
-                            "unit_krw": unit_krw,
-                            "units": units,
-                        })
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # 백테스트 종료 시점 미청산 포지션 강제 청산
     #
-    # 반복문이 끝날 때까지 트레일링 스탑 / ATR 스파이크 조건이
-    # 한 번도 충족되지 않으면 포지션이 열린 채로 남는다.
-    # 이 경우 마지막 봉의 종가로 강제 청산해서
+    # 반복문이 끝날 때까지 청산 조건이 한 번도 충족되지 않으면
+    # 포지션이 열린 채로 남는다. 이 경우 마지막 봉의 종가로 강제 청산해서
     # 최종 자산(final_equity)과 total_pnl에 정확히 반영한다.
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     if position > 0:
-        curr_price  = float(df['close'].iloc[-1])
+        curr_price  = float(arrays["close"][-1])
         sell_amount = position * curr_price
         fee         = sell_amount * FEE_RATE
 
-        # ✅ [수정] 가중평균 진입가 기반 pnl 계산
-        weighted_avg = entry_cost / position  # 가중평균 진입가
+        # ✅ 가중평균 진입가 기반 pnl 계산
+        weighted_avg = entry_cost / position
         pnl = sell_amount - fee - entry_cost
         profit_rate = (curr_price - weighted_avg) / weighted_avg * 100
         capital    += sell_amount - fee
 
-        position = 0.0
-        highest_price = 0.0
-        units = 0
-        next_add = 0.0
-        entry_atr = 0.0
-        entry_cost = 0.0  # ← 추가
-
         trades.append({
             "type"        : "sell",
-            "datetime"    : df['datetime'].iloc[-1],
+            "datetime"    : pd.Timestamp(int(ts_arr[-1])),
             "price"       : curr_price,
             "exit_reason" : "force_close",
             "pnl"         : pnl,
             "profit_rate" : profit_rate,
         })
 
-    # ── 성과 계산 ──
-    final_equity  = capital
+    stats = summarize_trades(trades, initial_capital, capital, mdd)
+
+    #임시
+    if verbose and n:
+        print(f"최저 낙폭: {mdd:.2f}% ({pd.Timestamp(int(ts_arr[mdd_idx]))})")
+        print(f"-25% 이하 구간 수: {deep_dd_bars}봉")
+
+    return {
+        "trades"  : trades,
+        "ts"      : ts_arr,     # int64 (ns) - 봉 시각
+        "equity"  : equity,     # float64    - 봉별 총자산
+        "mdd_ts"  : pd.Timestamp(int(ts_arr[mdd_idx])) if n else None,
+        "stats"   : stats,
+    }
+
+
+def summarize_trades(trades: list, initial_capital: float, final_equity: float, mdd: float) -> dict:
+    """트레이드 리스트 → 성과 지표 dict"""
     sell_trades   = [t for t in trades if t['type'] == 'sell']
     total_trades  = len(sell_trades)
     wins          = [t for t in sell_trades if t['pnl'] > 0]
@@ -403,13 +953,7 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
         if losses and sum(t['pnl'] for t in losses) != 0 else float('inf')
     )
 
-    # MDD 계산
-    equity_df = pd.DataFrame(equity_curve)
-    peak      = equity_df['equity'].cummax()
-    drawdown  = (equity_df['equity'] - peak) / peak * 100
-    mdd       = drawdown.min()
-
-    stats = {
+    return {
         "initial_capital" : initial_capital,
         "final_equity"    : final_equity,
         "total_return"    : (final_equity - initial_capital) / initial_capital * 100,
@@ -424,20 +968,7 @@ def run_backtest(df: pd.DataFrame, initial_capital: float = config.BACKTEST_INIT
         "total_pnl"       : total_pnl,
     }
 
-    #임시
-    equity_df = pd.DataFrame(equity_curve)
-    peak = equity_df['equity'].cummax()
-    dd = (equity_df['equity'] - peak) / peak * 100
-    worst = dd.min()
-    worst_dt = equity_df.loc[dd.idxmin(), 'datetime']
-    print(f"최저 낙폭: {worst:.2f}% ({worst_dt})")
-    print(f"-25% 이하 구간 수: {(dd <= -25).sum()}봉")
 
-    return {
-        "trades"       : trades,
-        "equity_curve" : equity_curve,
-        "stats"        : stats,
-    }
 # ============================================================
 # 4. 결과 출력
 # ============================================================
@@ -703,79 +1234,193 @@ def print_crash_analysis(result: dict):
 # 6. 그리드 서치 (파라미터 최적화)
 # ============================================================
 
-def run_grid_search(df_raw: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL):
+# ── 프로세스 풀 워커 공유 데이터 ──
+# 원본 캔들 배열은 SharedMemory에 한 번만 올리고, 워커는 블록 이름만 받아서 붙는다.
+# → 태스크(조합)마다 캔들 데이터를 피클링해서 보내지 않음
+# 지표는 워커별 IndicatorCache에 쌓여서 같은 기간을 쓰는 조합끼리 재사용된다.
+_worker_shms  = []      # 워커 프로세스에서 붙은 SharedMemory (GC 방지용 참조 유지)
+_worker_raw   = None    # 워커 프로세스의 원본 캔들 배열 (공유 메모리 뷰)
+_worker_cache = None    # 워커 프로세스의 지표 캐시
+
+
+def _share_arrays(raw: dict, columns: dict | None = None) -> tuple[dict, list]:
+    """
+    frame_to_raw_arrays() 배열 + 미리 계산한 지표 컬럼을 SharedMemory 블록 1개로 복사
+    - columns: {캐시 키: 지표 배열} (indicator_specs() 키)
+    - 반환: (spec, shms) / spec = {"fingerprint": 지문, "n": 길이, "block": 블록이름,
+                                   "arrays": [(이름, 오프셋, dtype), ...], "columns": [(캐시 키, 오프셋, dtype), ...]}
+    """
+    arrays  = [(name, values) for name, values in raw.items() if isinstance(values, np.ndarray)]
+    pinned  = list((columns or {}).items())
+    entries = arrays + pinned
+    offsets, size = [], 0
+    for _, values in entries:
+        size = -(-size // 8) * 8                    # 8바이트 정렬
+        offsets.append(size)
+        size += values.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    spec = {"fingerprint": raw["fingerprint"], "n": len(raw["ts"]), "block": shm.name, "arrays": [], "columns": []}
+    for i, ((key, values), offset) in enumerate(zip(entries, offsets)):
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=offset)[:] = values
+        spec["arrays" if i < len(arrays) else "columns"].append((key, offset, values.dtype.str))
+    return spec, [shm]
+
+
+def _attach_arrays(spec: dict) -> tuple[dict, dict]:
+    """_share_arrays() 블록에 붙어서 복사 없이 (원본 배열 dict, {캐시 키: 지표 컬럼}) 구성"""
+    shm = shared_memory.SharedMemory(name=spec["block"])
+    _worker_shms.append(shm)
+    view = lambda offset, dtype: np.ndarray((spec["n"],), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+    raw = {"fingerprint": spec["fingerprint"]}
+    raw.update((name, view(offset, dtype)) for name, offset, dtype in spec["arrays"])
+    columns = {key: view(offset, dtype) for key, offset, dtype in spec["columns"]}
+    return raw, columns
+
+
+def _grid_worker_init(spec: dict):
+    """워커 프로세스 초기화 (프로세스당 1회) - 지표 컬럼은 부모가 계산한 공유 메모리 view를 그대로 사용"""
+    global _worker_raw, _worker_cache
+    _worker_raw, columns = _attach_arrays(spec)
+    _worker_cache = IndicatorCache()
+    _worker_cache.preload(columns)
+
+
+def _grid_worker_call(task, params: dict, *args):
+    """워커에서 task(공유 배열, params, 워커 캐시, *args) 실행"""
+    return task(_worker_raw, params, _worker_cache, *args)
+
+
+def resolve_workers(workers: int | None, total: int) -> int:
+    """workers 설정값 → 실제 프로세스 수 (None: config.BACKTEST_GRID_WORKERS, 0: CPU 코어 수)"""
+    if workers is None:
+        workers = config.BACKTEST_GRID_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, total))
+
+
+def map_params(raw: dict, combos: list, task, *args, workers: int | None = None):
+    """
+    파라미터 조합마다 task(raw, params, cache, *args)를 실행해서 결과를 조합 순서대로 yield
+    - task는 모듈 최상위 함수여야 함 (프로세스 풀로 피클링)
+    - workers가 1이면 현재 프로세스에서 순차 실행 (캐시 1개 → 지표 컬럼마다 1번 계산)
+    - 아니면 조합들에 필요한 지표 컬럼을 부모에서 1번씩 계산해서 원본 캔들과 함께 SharedMemory로 공유
+      → 워커는 계산 없이 view만 조립 (워커 수와 무관하게 컬럼마다 1번 계산)
+    - 소비를 중간에 멈추면 close() 시점에 풀 종료 + 공유 메모리 해제
+    """
+    workers = resolve_workers(workers, len(combos))
+
+    if workers == 1:
+        cache = IndicatorCache()
+        for p in combos:
+            yield task(raw, p, cache, *args)
+        return
+
+    columns = {}
+    for p in combos:
+        for key, compute in indicator_specs(raw, p):
+            if key not in columns:
+                columns[key] = compute()
+    spec, shms = _share_arrays(raw, columns)
+    del columns
+    executor = None
+    try:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_grid_worker_init,
+            initargs=(spec,),
+        )
+        chunksize = max(1, len(combos) // (workers * 8))
+        yield from executor.map(
+            _grid_worker_call,
+            itertools.repeat(task), combos, *(itertools.repeat(arg) for arg in args),
+            chunksize=chunksize,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
+def _grid_eval(raw: dict, params: dict, cache: IndicatorCache, initial_capital: float) -> dict:
+    """파라미터 1개 조합 평가 → stats (config는 건드리지 않음)"""
+    arrays = indicator_arrays(raw, params, cache)
+    result = run_backtest_arrays(arrays, initial_capital=initial_capital,
+                                 params=params, verbose=False)
+    return result['stats']
+
+
+# ── 탐색할 파라미터 범위 정의 (키는 default_params() 키) ──
+GRID_PARAM_GRID = {
+    "entry_period": [10, 15, 20, 25, 30],              # TURTLE_ENTRY_PERIOD
+    "atr_period"  : [10, 14, 20],                      # TURTLE_ATR_PERIOD
+    "risk_rate"   : [0.5, 1.0, 1.5, 2.0],              # TURTLE_RISK_RATE
+    "max_units"   : [1, 2, 3, 4],                      # TURTLE_MAX_UNITS
+    "cooldown_sec": [43200, 86400, 172800, 259200],    # REENTRY_COOLDOWN_SEC (12h, 24h, 48h, 72h)
+}
+
+
+def grid_combos(param_grid: dict = GRID_PARAM_GRID, base: dict | None = None) -> list[dict]:
+    """
+    param_grid의 모든 조합 → 파라미터 dict 리스트 (앞쪽 키가 바깥 루프인 중첩 루프 순서)
+    - 그리드에 없는 키는 base (None이면 default_params()) 값 사용
+    """
+    if base is None:
+        base = default_params()
+    keys = list(param_grid)
+    return [{**base, **dict(zip(keys, values))}
+            for values in itertools.product(*param_grid.values())]
+
+
+def run_grid_search(df_raw: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                    workers: int | None = None, param_grid: dict = GRID_PARAM_GRID):
     """
     파라미터 조합을 자동 순회하며 최적 조합 탐색
     - 각 조합마다 백테스트 실행 후 성과 비교
+    - 조합별 파라미터는 dict로 명시 전달 (config 모듈 값은 변경하지 않음)
+    - workers: 프로세스 수 (None이면 config.BACKTEST_GRID_WORKERS, 0이면 CPU 코어 수, 1이면 순차 실행)
+    - param_grid: 탐색 범위 (기본 GRID_PARAM_GRID)
     - 최종적으로 수익률 기준 상위 10개 출력
     """
+    combos  = grid_combos(param_grid)
+    total   = len(combos)
+    workers = resolve_workers(workers, total)
 
-    # ── 탐색할 파라미터 범위 정의 ──
-    param_grid = {
-        "TURTLE_ENTRY_PERIOD" : [10, 15, 20, 25, 30],
-        "TURTLE_ATR_PERIOD"   : [10, 14, 20],
-        "TURTLE_RISK_RATE"    : [0.5, 1.0, 1.5, 2.0],
-        "TURTLE_MAX_UNITS"    : [1, 2, 3, 4],
-        "REENTRY_COOLDOWN_SEC": [43200, 86400, 172800, 259200],  # 12h, 24h, 48h, 72h
-    }
-
-    # 전체 조합 수 계산
-    total = 1
-    for v in param_grid.values():
-        total *= len(v)
-    print(f"\n🔍 그리드 서치 시작 | 총 {total}개 조합\n")
+    print(f"\n🔍 그리드 서치 시작 | 총 {total}개 조합 | 프로세스 {workers}개\n")
 
+    raw     = frame_to_raw_arrays(df_raw)
     results = []
-    count   = 0
-
-    # ── 파라미터 조합 순회 ──
-    for entry_period in param_grid["TURTLE_ENTRY_PERIOD"]:
-        for atr_period in param_grid["TURTLE_ATR_PERIOD"]:
-            for risk_rate in param_grid["TURTLE_RISK_RATE"]:
-                for max_units in param_grid["TURTLE_MAX_UNITS"]:
-                    for cooldown in param_grid["REENTRY_COOLDOWN_SEC"]:
-                        count += 1
-
-                        # config 파라미터 임시 변경
-                        # → 각 조합마다 config 값을 덮어써서 백테스트에 반영
-                        config.TURTLE_ENTRY_PERIOD  = entry_period
-                        config.TURTLE_ATR_PERIOD    = atr_period
-                        config.TURTLE_RISK_RATE     = risk_rate
-                        config.TURTLE_MAX_UNITS     = max_units
-                        config.REENTRY_COOLDOWN_SEC = cooldown
-
-                        # 지표 재계산 (ENTRY_PERIOD, ATR_PERIOD가 바뀌므로 필수)
-                        df = prepare_indicators(df_raw)
-
-                        # 백테스트 실행
-                        result = run_backtest(df, initial_capital=initial_capital)
-                        s      = result['stats']
-
-                        # 진행 상황 출력
-                        print(
-                            f"\r[{count:>4}/{total}] "
-                            f"EP={entry_period:>2} ATR={atr_period:>2} "
-                            f"RISK={risk_rate:.1f} UNIT={max_units} "
-                            f"CD={cooldown//3600:>2}h | "
-                            f"수익률={s['total_return']:>+7.2f}% "
-                            f"PF={s['profit_factor']:>5.2f} "
-                            f"MDD={s['mdd']:>+6.2f}%",
-                            end=""
-                        )
-
-                        results.append({
-                            "entry_period" : entry_period,
-                            "atr_period"   : atr_period,
-                            "risk_rate"    : risk_rate,
-                            "max_units"    : max_units,
-                            "cooldown_h"   : cooldown // 3600,
-                            "total_return" : s['total_return'],
-                            "win_rate"     : s['win_rate'],
-                            "profit_factor": s['profit_factor'],
-                            "mdd"          : s['mdd'],
-                            "total_trades" : s['total_trades'],
-                            "total_pnl"    : s['total_pnl'],
-                        })
+
+    with closing(map_params(raw, combos, _grid_eval, initial_capital, workers=workers)) as stats_iter:
+        # ── 결과 수집 (조합 순서 유지) ──
+        for count, (p, s) in enumerate(zip(combos, stats_iter), 1):
+            print(
+                f"\r[{count:>4}/{total}] "
+                f"EP={p['entry_period']:>2} ATR={p['atr_period']:>2} "
+                f"RISK={p['risk_rate']:.1f} UNIT={p['max_units']} "
+                f"CD={p['cooldown_sec']//3600:>2}h | "
+                f"수익률={s['total_return']:>+7.2f}% "
+                f"PF={s['profit_factor']:>5.2f} "
+                f"MDD={s['mdd']:>+6.2f}%",
+                end=""
+            )
+
+            results.append({
+                "entry_period" : p['entry_period'],
+                "atr_period"   : p['atr_period'],
+                "risk_rate"    : p['risk_rate'],
+                "max_units"    : p['max_units'],
+                "cooldown_h"   : p['cooldown_sec'] // 3600,
+                "total_return" : s['total_return'],
+                "win_rate"     : s['win_rate'],
+                "profit_factor": s['profit_factor'],
+                "mdd"          : s['mdd'],
+                "total_trades" : s['total_trades'],
+                "total_pnl"    : s['total_pnl'],
+            })
 
     print(f"\n\n✅ 그리드 서치 완료 | {total}개 조합 탐색")
 
@@ -887,14 +1532,18 @@ def save_trades_csv(result: dict, ticker: str, timeframe: str):
 # ============================================================
 
 if __name__ == "__main__":
-    # 1. 데이터 로드
-    df_raw = load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME)
+    # 1. 데이터 로드 (구 CSV가 남아 있으면 컬럼형 저장소로 1회 변환)
+    migrate_csv_store()
+    period = (config.BACKTEST_START, config.BACKTEST_END)
+    df_raw = load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME, *period)
     if df_raw.empty:
         print("📥 저장된 데이터 없음 → API에서 수집")
-        timeframe_map = {"1m": "1", "3m": "3", "5m": "5", "15m": "15", "1h": "60", "4h": "240"}
-        tf = timeframe_map.get(config.TIMEFRAME, "60")
-        df_raw = fetch_ohlcv_full(ticker=config.TICKER_UPBIT, timeframe=tf)
-        save_ohlcv(df_raw, config.TICKER_UPBIT, config.TIMEFRAME)
+        sync_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME)
+        df_raw = load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME, *period)
+    elif config.BACKTEST_SYNC_ON_START:
+        print("🔄 최신 캔들 증분 동기화")
+        if sync_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME):
+            df_raw = load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME, *period)
 
     # 2. 그리드 서치
     if config.BACKTEST_GRID_SEARCH:
@@ -0,0 +1,358 @@
+"""
+백테스트 엔진 테스트 (합성 캔들 사용)
+
+테스트 항목:
+  [TEST 01] 배열 커널 == 기존 iterrows 루프 저장 결과 (청산 3종 / 피라미딩 / 쿨다운, 트레이드 / 성과 / 자산 곡선)
+  [TEST 02] 그리드 서치 프로세스 풀(공유 메모리) == 순차 실행 (순위표 / CSV) + 지표는 부모에서 1번만 계산 + 공유 메모리 해제
+  [TEST 03] 지표 캐시 용량 상한 / LRU 제거 순서 / 적중·미스 횟수 / clear / config 기본값
+  [TEST 04] 컬럼형 저장소 저장 → 메모리 매핑 로드 / 버전 교체 (meta.json 원자적 교체) / 구 CSV 마이그레이션
+
+실행 방법:
+    python -m test.backtesttest
+
+기준 결과 (fixtures/backtest_iterrows_golden.json):
+    배열 커널 도입 전(baseline) run_backtest()의 iterrows 루프를 make_candles(2000) →
+    prepare_indicators() 입력으로 SCENARIOS마다 실행해서 저장한 값 (config.TURTLE_* 로 파라미터 지정)
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+from test import backtest as bt
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "backtest_iterrows_golden.json")
+
+# (청산 모드, 최대 유닛, 쿨다운 초) - 기준 결과를 만든 설정
+SCENARIOS = [
+    ("TRAILING",  4, 43200),
+    ("10DAY_LOW", 4, 86400),
+    ("20DAY_LOW", 3, 172800),
+]
+
+SMALL_GRID = {
+    "entry_period": [10, 20],
+    "atr_period"  : [14, 20],
+    "risk_rate"   : [1.0],
+    "max_units"   : [2, 4],
+    "cooldown_sec": [43200, 172800],
+}
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def make_candles(n: int, seed: int = 11) -> pd.DataFrame:
+    """1시간봉 랜덤워크 캔들 (추세 구간이 자주 생기도록 사인파 드리프트 추가)"""
+    rng   = np.random.default_rng(seed)
+    ret   = rng.normal(0, 0.012, n) + 0.0006 * np.sin(np.arange(n) / 150)
+    close = 500 * np.exp(np.cumsum(ret))
+    ts    = 1_514_764_800_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    df = pd.DataFrame({
+        "timestamp": ts,
+        "open"     : np.r_[close[0], close[:-1]],
+        "high"     : close * (1 + np.abs(rng.normal(0, 0.006, n))),
+        "low"      : close * (1 - np.abs(rng.normal(0, 0.006, n))),
+        "close"    : close,
+        "volume"   : rng.uniform(1e5, 1e6, n),
+    })
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+def scenario_params(mode: str, units: int, cooldown: int) -> dict:
+    return {**bt.default_params(), "exit_mode": mode, "max_units": units, "cooldown_sec": cooldown}
+
+def run_quiet(df: pd.DataFrame, params: dict) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return bt.run_backtest(df, initial_capital=3_000_000.0, params=params)
+
+def shm_exists(name: str) -> bool:
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+def same_trades(new: list, old: list) -> bool:
+    if len(new) != len(old):
+        return False
+    for a, b in zip(new, old):
+        if set(a) != set(b) or str(a["datetime"]) != b["datetime"]:
+            return False
+        if any(a[k] != b[k] for k in a if k != "datetime"):
+            return False
+    return True
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_kernel_matches_iterrows():
+    print_header("[TEST 01] 배열 커널 == 기존 iterrows 루프")
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    df = bt.prepare_indicators(make_candles(2000))
+
+    for mode, units, cooldown in SCENARIOS:
+        old    = golden[mode]
+        result = run_quiet(df, scenario_params(mode, units, cooldown))
+        stats  = {k: float(v) for k, v in result["stats"].items()}
+        pyramid = max(t.get("units", 0) for t in result["trades"])
+        print(f"    {mode:<9} 매매 {len(result['trades'])}건 | 청산 {stats['total_trades']:.0f}건 | "
+              f"최대 유닛 {pyramid} | 수익률 {stats['total_return']:+.2f}%")
+        check(same_trades(result["trades"], old["trades"]), f"{mode}: 트레이드 내역 일치 (시각 / 가격 / 수량 / 사유)")
+        check(stats == old["stats"], f"{mode}: 성과 지표 일치")
+        check(np.array_equal(result["equity"], np.array(old["equity"])), f"{mode}: 봉별 자산 곡선 일치")
+        check(pyramid == units, f"{mode}: 피라미딩 {units}유닛까지 발생")
+
+    # 쿨다운이 실제로 진입을 막는 구간이 있어야 위 비교가 쿨다운 처리까지 검증함
+    no_cooldown = run_quiet(df, scenario_params(*SCENARIOS[0][:2], 0))
+    check(len(no_cooldown["trades"]) != len(golden[SCENARIOS[0][0]]["trades"]),
+          "쿨다운 0 → 매매 내역이 달라짐 (쿨다운에 막힌 진입 포함)")
+
+
+def worker_cache_misses(raw: dict, params: dict, cache: bt.IndicatorCache) -> int:
+    """map_params 작업 함수 - 커널 입력을 만든 뒤 워커 캐시에서 새로 계산한 지표 수"""
+    bt.indicator_arrays(raw, params, cache)
+    return cache.misses
+
+
+def test_2_grid_pool_matches_sequential():
+    print_header("[TEST 02] 그리드 서치 프로세스 풀 == 순차 실행")
+    df     = make_candles(24 * 200, seed=4)
+    shared = []                                               # 만들어진 공유 메모리 블록 이름
+
+    def recording_share(*args):
+        spec, shms = share_arrays(*args)
+        shared.extend(shm.name for shm in shms)
+        return spec, shms
+
+    share_arrays, bt._share_arrays = bt._share_arrays, recording_share
+    original_dir = bt.DATA_DIR
+    try:
+        frames, blocks = {}, {}
+        for workers in (1, 2):
+            bt.DATA_DIR = tempfile.mkdtemp(prefix="zillion_grid_")
+            with contextlib.redirect_stdout(io.StringIO()):
+                results_df = bt.run_grid_search(df, 3_000_000.0, workers=workers, param_grid=SMALL_GRID)
+            csv_name = [f for f in os.listdir(bt.DATA_DIR) if f.startswith("grid_search_")]
+            frames[workers] = (results_df, pd.read_csv(os.path.join(bt.DATA_DIR, csv_name[0]), index_col="rank"))
+            blocks[workers] = len(shared) - sum(blocks.values())
+
+        # 소비 도중 멈춰도 (close) 풀 종료 + 공유 메모리 해제
+        raw    = bt.frame_to_raw_arrays(df)
+        combos = bt.grid_combos(SMALL_GRID)
+        stats_iter = bt.map_params(raw, combos, bt._grid_eval, 3_000_000.0, workers=2)
+        next(stats_iter)
+        stats_iter.close()
+
+        # 워커는 지표를 계산하지 않음 (부모가 컬럼마다 1번 계산해서 공유)
+        misses = list(bt.map_params(raw, combos, worker_cache_misses, workers=2))
+    finally:
+        bt._share_arrays, bt.DATA_DIR = share_arrays, original_dir
+
+    (seq, seq_csv), (pool, pool_csv) = frames[1], frames[2]
+    print(f"    조합 {len(seq)}개 | 1위: EP={seq['entry_period'].iloc[0]} ATR={seq['atr_period'].iloc[0]} "
+          f"UNIT={seq['max_units'].iloc[0]} 수익률 {seq['total_return'].iloc[0]:+.2f}%")
+    check(len(seq) == len(bt.grid_combos(SMALL_GRID)) and seq.equals(pool), "순위표(results_df) 일치")
+    check(seq_csv.equals(pool_csv), "저장된 CSV 일치")
+    check(blocks[1] == 0 and blocks[2] > 0, f"공유 메모리는 프로세스 풀 실행 때만 사용 (순차 {blocks[1]}개 / 풀 {blocks[2]}개)")
+    check(misses == [0] * len(combos), f"워커 지표 계산 0회 (조합 {len(combos)}개 모두 공유 컬럼 사용)")
+    check(not any(shm_exists(name) for name in shared), f"공유 메모리 블록 {len(shared)}개 모두 해제 (중간 종료 포함)")
+
+
+def test_3_indicator_cache():
+    print_header("[TEST 03] 지표 캐시 LRU")
+    item_mb = 8_000 / (1024 * 1024)                           # float64 1,000개 = 8,000바이트
+    cache   = bt.IndicatorCache(max_mb=item_mb * 3)           # 3개까지 보관
+    calls   = []
+
+    def get(name: str) -> np.ndarray:
+        def compute():
+            calls.append(name)
+            return np.zeros(1000)
+        return cache.get((name,), compute)
+
+    for name in ("a", "b", "c"):
+        get(name)
+    get("a")                                                  # a 사용 → 가장 오래 안 쓴 항목은 b
+    get("d")                                                  # 상한 초과 → b 제거
+    print(f"    보관: {[k[0] for k in cache._store]} | {cache.nbytes:,}바이트 | 적중 {cache.hits} / 미스 {cache.misses}")
+    check([k[0] for k in cache._store] == ["c", "a", "d"] and cache.nbytes == 24_000,
+          "상한 초과 시 가장 오래 안 쓴 항목(b)부터 제거, 용량 3개 유지")
+    check(cache.hits == 1 and cache.misses == 4, "적중 1 (a) / 미스 4 (a, b, c, d)")
+
+    get("b")                                                  # 제거된 항목은 다시 계산
+    check(calls == ["a", "b", "c", "d", "b"] and [k[0] for k in cache._store] == ["a", "d", "b"],
+          "제거된 항목 재요청 → 다시 계산, 이번엔 c 제거")
+    big = cache.get(("big",), lambda: np.zeros(4000))
+    check(len(big) == 4000 and ("big",) not in cache._store and cache.nbytes == 24_000,
+          "상한보다 큰 단일 항목은 캐시하지 않음")
+
+    cache.clear()
+    check(len(cache._store) == 0 and cache.nbytes == 0 and cache.hits == 0 and cache.misses == 0,
+          "clear() → 항목 / 용량 / 적중·미스 횟수 초기화")
+
+    original = config.BACKTEST_INDICATOR_CACHE_MB
+    config.BACKTEST_INDICATOR_CACHE_MB = 1
+    try:
+        check(bt.IndicatorCache().max_bytes == 1024 * 1024, "기본 상한은 생성 시점의 config 값")
+    finally:
+        config.BACKTEST_INDICATOR_CACHE_MB = original
+
+
+def test_4_npy_store():
+    print_header("[TEST 04] 컬럼형 저장소 / CSV 마이그레이션")
+    original_dir = bt.DATA_DIR
+    bt.DATA_DIR  = tempfile.mkdtemp(prefix="zillion_store_")
+    df   = make_candles(500, seed=5)
+    cols = list(bt.CANDLE_COLUMNS)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # 저장 → 로드 (메모리 매핑)
+            bt.save_ohlcv(df.iloc[:300], "KRW-XRP", "60")
+            path   = bt.get_data_path("KRW-XRP", "1h")
+            v1     = bt.load_ohlcv_arrays("KRW-XRP", "1h")
+            meta1  = bt._read_store_meta(path)
+            files1 = sorted(os.listdir(path))
+
+            # 증분 추가 중 meta.json 교체 직전에 실패 → 이전 행 수 그대로
+            real_replace = os.replace
+            def failing_replace(src, dst):
+                raise OSError("disk full")
+            os.replace = failing_replace
+            try:
+                bt.append_ohlcv(df.iloc[300:], "KRW-XRP", "60")
+                crashed = False
+            except OSError:
+                crashed = True
+            finally:
+                os.replace = real_replace
+            after_crash = bt.load_ohlcv_arrays("KRW-XRP", "60")
+            crash_meta  = bt._read_store_meta(path)
+
+            # 정상 증분 추가 → 새 버전 없이 뒤에 이어 씀 (기존 행은 다시 쓰지 않음)
+            rewrites = []
+            real_write = bt._write_store
+            bt._write_store = lambda *args: rewrites.append(1) or real_write(*args)
+            try:
+                bt.append_ohlcv(df.iloc[300:], "KRW-XRP", "60")
+                tail_meta = bt._read_store_meta(path)
+                forming = df.iloc[[499]].copy()
+                forming["close"] += 1.0
+                bt.append_ohlcv(forming, "KRW-XRP", "60")                   # 마지막 봉 교체
+                tail_rewrites = len(rewrites)
+                tail = bt.load_ohlcv_arrays("KRW-XRP", "60")
+
+                # 마지막 봉보다 과거 봉이 섞이면 전체를 새 버전으로
+                past = df.iloc[[100]].copy()
+                past["close"] += 1.0
+                bt.append_ohlcv(past, "KRW-XRP", "60")
+                meta2, files2 = bt._read_store_meta(path), sorted(os.listdir(path))
+                bt.append_ohlcv(df.iloc[[100]], "KRW-XRP", "60")
+                meta3, files3 = bt._read_store_meta(path), sorted(os.listdir(path))
+                v3 = bt.load_ohlcv_arrays("KRW-XRP", "60")
+            finally:
+                bt._write_store = real_write
+
+            # 다른 프로세스가 meta.json을 읽은 직후 버전 교체 + 옛 파일 삭제 → meta.json 다시 읽어서 로드
+            real_meta, stale = bt._read_store_meta, [dict(meta1)]
+            bt._read_store_meta = lambda p: stale.pop() if stale else real_meta(p)
+            try:
+                reloaded = bt.load_ohlcv_arrays("KRW-XRP", "60")
+            finally:
+                bt._read_store_meta = real_meta
+
+        print(f"    v1 파일: {files1}")
+        print(f"    v3 파일: {files3}")
+        check(meta1 == {"version": 1, "rows": 300, "columns": {n: np.dtype(d).name for n, d in bt.CANDLE_COLUMNS.items()}},
+              "meta.json: 버전 1 / 행 수 / 컬럼 dtype")
+        check(all(isinstance(v1[n], np.memmap) and v1[n].dtype == d and not v1[n].flags.writeable
+                  for n, d in bt.CANDLE_COLUMNS.items()), "메모리 매핑 로드 (읽기 전용, int64 timestamp / float64 시세)")
+        check(all(np.array_equal(v1[n], df[n].iloc[:300].to_numpy()) for n in cols), "저장 → 로드 값 일치")
+        check(crashed and after_crash["timestamp"].shape == (300,) and crash_meta["rows"] == 300,
+              "meta.json 교체 전 실패 → 이전 행 수 그대로 로드")
+        check(tail_rewrites == 0 and tail_meta == {**meta1, "rows": 500} and len(tail["timestamp"]) == 500
+              and all(np.array_equal(tail[n][:499], df[n].iloc[:499].to_numpy()) for n in cols),
+              "증분 추가 → 같은 버전 파일 뒤에 새 봉만 기록 (전체 다시 쓰기 0회)")
+        check(tail["close"][499] == df["close"].iloc[499] + 1.0, "마지막 봉은 새로 받은 값으로 교체 (행 수 유지)")
+        check(meta2["version"] == 2 and meta2["rows"] == 500 and any(f.endswith(".1.npy") for f in files2),
+              "과거 봉 교체 → 새 버전 (직전 버전 파일은 남겨 둠)")
+        check(meta3["version"] == 3 and not any(f.endswith(".1.npy") for f in files3)
+              and all(f.split(".")[1] in ("2", "3") for f in files3 if f.endswith(".npy"))
+              and "meta.json.tmp" not in files3, "다음 버전 저장 때 직전보다 오래된 파일 / 임시 meta 파일 정리")
+        check(all(np.array_equal(v3[n][:499], df[n].iloc[:499].to_numpy()) for n in cols),
+              "버전 교체 후 값 일치 (과거 봉 원래 값으로 복구)")
+        check(len(reloaded["timestamp"]) == 500, "읽는 사이 지워진 버전 → meta.json 다시 읽어서 로드")
+
+        # 구 CSV 마이그레이션 (timestamp 컬럼 있음 / datetime만 있음) + 결과 CSV는 건너뜀
+        legacy = df.drop(columns=["timestamp"])[["datetime", "open", "high", "low", "close", "volume"]]
+        df.to_csv(bt.get_csv_path("KRW-BTC", "60"), index=False)
+        legacy.to_csv(bt.get_csv_path("KRW-ETH", "240"), index=False)
+        results = [f"{prefix}KRW-BTC_60m.csv" for prefix in bt.RESULT_CSV_PREFIXES]
+        for name in results:
+            pd.DataFrame({"rank": [1], "total_return": [1.0]}).to_csv(os.path.join(bt.DATA_DIR, name), index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bt.migrate_csv_store()
+            btc = bt.load_ohlcv("KRW-BTC", "1h")
+            eth = bt.load_ohlcv("KRW-ETH", "240")
+            again = bt.migrate_csv("KRW-BTC", "60") and bt._read_store_meta(bt.get_data_path("KRW-BTC", "60"))
+        stores = sorted(f for f in os.listdir(bt.DATA_DIR) if os.path.isdir(os.path.join(bt.DATA_DIR, f)))
+        print(f"    저장소: {stores}")
+        check(np.array_equal(btc["timestamp"], df["timestamp"]) and btc["datetime"].equals(df["datetime"])
+              and np.allclose(btc[cols[1:]], df[cols[1:]], rtol=1e-12), "timestamp 있는 CSV → 그대로 변환")
+        check(np.array_equal(eth["timestamp"].to_numpy(), df["timestamp"].to_numpy())
+              and eth["timestamp"].dtype == np.int64, "datetime만 있는 CSV → timestamp(ms) 계산")
+        check(stores == ["KRW-BTC_60m", "KRW-ETH_240m", "KRW-XRP_60m"],
+              f"결과 CSV {len(results)}종 (grid_search_ / trades_ / walk_forward_ / halving_search_)은 변환 안 함")
+        check(bt._read_store_meta(bt.get_data_path("KRW-ETH", "240"))["version"] == 1,
+              "이미 저장소가 있으면 migrate_csv_store는 다시 변환하지 않음")
+    finally:
+        bt.DATA_DIR = original_dir
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    tests = [
+        test_1_kernel_matches_iterrows,
+        test_2_grid_pool_matches_sequential,
+        test_3_indicator_cache,
+        test_4_npy_store,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 백테스트 엔진 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,184 @@
+"""
+실시간 캔들 캐시 테스트 (가짜 업비트 캔들 API 사용)
+
+테스트 항목:
+  [TEST 01] 첫 호출만 전체 조회 → 갱신 간격 안의 재호출은 조회 없음
+  [TEST 02] 형성 중인 봉 갱신 + 봉 마감 시 롤오버 (링버퍼 한 바퀴 이상) → 항상 최근 2봉만 조회
+  [TEST 03] 봉이 빠지면 전체 재조회 / 조회 실패 시 빈 DataFrame 후 복구
+  [TEST 04] 반환 DataFrame은 캐시 버퍼 view (복사 없음) + 새 컬럼 추가는 캐시에 영향 없음
+
+실행 방법:
+    python -m test.candlecachetest
+"""
+
+import sys
+import os
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import upbit_client as client
+
+# ============================================================
+# 0. 가짜 업비트 캔들 API
+# ============================================================
+
+HOUR_MS = 3_600_000
+TICKER  = "XRP/KRW"
+
+
+class FakeCandles:
+    """fetch_ohlcv(limit=n) → 최근 n봉 (마지막 봉은 형성 중)"""
+
+    def __init__(self, n: int):
+        self.rows   = [self._bar(1_700_000_000_000 + i * HOUR_MS, 500.0 + i) for i in range(n)]
+        self.limits = []
+        self.fail   = False
+
+    @staticmethod
+    def _bar(ts: int, price: float) -> list:
+        return [ts, price, price + 5, price - 5, price, 1000.0]
+
+    def fetch_ohlcv(self, ticker, timeframe="1h", limit=200):
+        if self.fail:
+            raise ConnectionError("network down")
+        self.limits.append(limit)
+        return [list(r) for r in self.rows[-limit:]]
+
+    def tick(self, price: float):
+        """형성 중인 봉에 체결 반영"""
+        bar = self.rows[-1]
+        bar[2], bar[3], bar[4] = max(bar[2], price), min(bar[3], price), price
+        bar[5] += 10.0
+
+    def new_bar(self, price: float):
+        self.rows.append(self._bar(self.rows[-1][0] + HOUR_MS, price))
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def same(df, fake: FakeCandles, size: int) -> bool:
+    expected = np.array(fake.rows[-size:], dtype=np.float64)
+    return df.to_numpy(dtype=np.float64).shape == expected.shape and np.array_equal(df.to_numpy(dtype=np.float64), expected)
+
+def setup(n: int = 300, size: int = 50, refresh: float = 0.0) -> FakeCandles:
+    fake = FakeCandles(n)
+    client.upbit.fetch_ohlcv = fake.fetch_ohlcv
+    client._candle_cache.clear()
+    config.OHLCV_CACHE_SIZE  = size
+    config.OHLCV_REFRESH_SEC = refresh
+    return fake
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_first_fetch_and_throttle():
+    print_header("[TEST 01] 첫 호출 전체 조회 + 갱신 간격")
+    fake = setup(refresh=60.0)
+    df = client.get_ohlcv(TICKER, "1h")
+    check(same(df, fake, 50), f"최근 50봉 == 원본 | {len(df)}봉, 컬럼 {list(df.columns)}")
+    check(fake.limits == [50], f"첫 조회 limit={fake.limits}")
+    check(df["timestamp"].dtype == np.int64, "timestamp int64 유지")
+
+    for _ in range(10):
+        client.get_ohlcv(TICKER, "1h")
+    check(fake.limits == [50], "갱신 간격 안의 재호출 10회 → 추가 조회 0회")
+
+
+def test_2_forming_bar_and_rollover():
+    print_header("[TEST 02] 형성 중인 봉 갱신 + 롤오버")
+    fake = setup(size=50)
+    client.get_ohlcv(TICKER, "1h")
+
+    fake.tick(900.0)
+    df = client.get_ohlcv(TICKER, "1h")
+    check(df["close"].iloc[-1] == 900.0 and df["high"].iloc[-1] == 900.0, "형성 중인 봉 종가/고가 갱신")
+
+    ok = True
+    for i in range(120):                     # 링버퍼(50) 두 바퀴 이상
+        fake.tick(600.0 + i)
+        fake.new_bar(601.0 + i)              # 직전 봉 마감 + 새 봉 시작
+        fake.tick(602.0 + i)
+        ok &= same(client.get_ohlcv(TICKER, "1h"), fake, 50)
+    check(ok, "롤오버 120회 동안 매번 최근 50봉 == 원본 (마감 봉 최종가 포함)")
+    check(fake.limits[0] == 50 and set(fake.limits[1:]) == {2}, f"이후 조회는 모두 limit=2 | {len(fake.limits) - 1}회")
+
+
+def test_3_gap_and_failure():
+    print_header("[TEST 03] 봉 누락 → 전체 재조회 / 조회 실패")
+    fake = setup(size=50)
+    client.get_ohlcv(TICKER, "1h")
+
+    for i in range(5):
+        fake.new_bar(700.0 + i)
+    df = client.get_ohlcv(TICKER, "1h")
+    check(same(df, fake, 50), "5봉 누락 후 최근 50봉 == 원본")
+    check(fake.limits[-2:] == [2, 50], f"limit=2 조회에서 누락 감지 → 전체 재조회 | {fake.limits}")
+
+    fake.fail = True
+    check(client.get_ohlcv(TICKER, "1h").empty, "조회 실패 → 빈 DataFrame (기존 동작)")
+    fake.fail = False
+    fake.tick(999.0)
+    check(same(client.get_ohlcv(TICKER, "1h"), fake, 50), "다음 호출에서 복구")
+
+
+def test_4_view():
+    print_header("[TEST 04] 복사 없는 view")
+    fake = setup(size=50)
+    df  = client.get_ohlcv(TICKER, "1h")
+    ring = client._candle_cache[(TICKER, "1h")]
+    check(np.shares_memory(df["close"].to_numpy(), ring._buf), "시세 컬럼은 링버퍼 메모리 공유")
+
+    df["atr"] = df["high"] - df["low"]       # 전략에서 하는 방식
+    again = client.get_ohlcv(TICKER, "1h")
+    check("atr" not in again.columns and same(again, fake, 50), "새 컬럼 추가는 캐시에 영향 없음")
+
+    new_fake = setup(n=20, size=50)
+    df = client.get_ohlcv(TICKER, "1h")
+    check(same(df, new_fake, 20), f"상장 직후처럼 봉이 size보다 적으면 있는 만큼 | {len(df)}봉")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = (client.upbit.fetch_ohlcv, config.OHLCV_CACHE_SIZE, config.OHLCV_REFRESH_SEC)
+    tests = [
+        test_1_first_fetch_and_throttle,
+        test_2_forming_bar_and_rollover,
+        test_3_gap_and_failure,
+        test_4_view,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t()
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+    finally:
+        client.upbit.fetch_ohlcv, config.OHLCV_CACHE_SIZE, config.OHLCV_REFRESH_SEC = original
+        client._candle_cache.clear()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 캔들 캐시 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,300 @@
+"""
+캔들 저장소 테스트 (임시 SQLite 파일 + 가짜 업비트 캔들 API)
+
+테스트 항목:
+  [TEST 01] 일괄 저장(같은 봉은 교체) / 기간 조회 → numpy 배열 (int64 timestamp, float64 시세)
+  [TEST 02] 기간 조회는 기본키 범위 검색 + CSV 전체 로드 대비 지연 (1시간봉 5년치 중 1개월)
+  [TEST 03] 실시간 캔들 캐시 → 마감된 봉만 저장 (형성 중인 봉 제외, 봉마다 1회)
+  [TEST 04] 백테스트 데이터 소스 "sqlite" = "npy" (같은 구간, 첫 로드 때 컬럼형 저장소에서 복사)
+  [TEST 05] 같은 봉을 실시간 경로(봉 시작 시각)와 백테스트 경로(마지막 체결 시각)로 저장 → 1행
+
+실행 방법:
+    python -m test.candlestoretest
+"""
+
+import sys
+import os
+import io
+import time
+import sqlite3
+import shutil
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import candles
+import upbit_client as client
+from test import backtest as bt
+
+HOUR_MS = 3_600_000
+TICKER  = "XRP/KRW"
+
+# ============================================================
+# 0. 가짜 업비트 캔들 API / 합성 캔들
+# ============================================================
+
+class FakeCandles:
+    """fetch_ohlcv(limit=n) → 최근 n봉 (마지막 봉 = 지금 형성 중인 봉)"""
+
+    def __init__(self, n: int):
+        now_bar = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        self.rows = [self._bar(now_bar - (n - 1 - i) * HOUR_MS, 500.0 + i) for i in range(n)]
+
+    @staticmethod
+    def _bar(ts: int, price: float) -> list:
+        return [ts, price, price + 5, price - 5, price, 1000.0]
+
+    def fetch_ohlcv(self, ticker, timeframe="1h", limit=200):
+        return [list(r) for r in self.rows[-limit:]]
+
+    def new_bar(self, price: float):
+        self.rows.append(self._bar(self.rows[-1][0] + HOUR_MS, price))
+
+
+class FakeClock:
+    """upbit_client의 time 모듈 대신 사용 - time()만 offset초 앞당김 (봉 마감 판정용)"""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def time(self) -> float:
+        return time.time() + self.offset
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def synthetic_bars(n: int, start_ms: int = 1_600_000_000_000 // HOUR_MS * HOUR_MS) -> np.ndarray:
+    """(n, 6) 합성 1시간봉 [ts, open, high, low, close, volume]"""
+    rng   = np.random.default_rng(5)
+    close = 500.0 + np.cumsum(rng.normal(0, 2, n))
+    out   = np.empty((n, 6))
+    out[:, 0] = start_ms + np.arange(n) * HOUR_MS
+    out[:, 1] = close - rng.uniform(0, 1, n)
+    out[:, 2] = close + rng.uniform(0, 3, n)
+    out[:, 3] = close - rng.uniform(0, 3, n)
+    out[:, 4] = close
+    out[:, 5] = rng.uniform(100, 1000, n)
+    return out
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def fresh_store() -> str:
+    config.CANDLE_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="zillion_candles_"), "candles.db")
+    candles.candle_store()
+    return config.CANDLE_DB_PATH
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_upsert_read():
+    print_header("[TEST 01] 일괄 저장 / 기간 조회")
+    fresh_store()
+    check(candles.market_key("XRP/KRW") == "KRW-XRP" and candles.market_key("KRW-XRP") == "KRW-XRP",
+          "마켓 표기 통일 (XRP/KRW = KRW-XRP)")
+    check(candles.timeframe_key("1h") == "60" and candles.timeframe_key("60") == "60"
+          and candles.timeframe_key("4h") == "240", "봉 간격 표기 통일 (1h = 60)")
+
+    bars = synthetic_bars(100)
+    check(candles.upsert(TICKER, "1h", bars).result() == 100, "100봉 저장")
+    fixed = bars[-1].copy()
+    fixed[4] += 10
+    candles.upsert("KRW-XRP", "60", [fixed]).result()            # 같은 봉 (다른 표기) → 교체
+
+    data = candles.read_range("KRW-XRP", "60")
+    check(len(data["timestamp"]) == 100 and data["close"][-1] == fixed[4], "같은 봉은 새 값으로 교체 (행 수 유지)")
+    check(data["timestamp"].dtype == np.int64 and data["close"].dtype == np.float64
+          and np.array_equal(data["timestamp"], bars[:, 0].astype(np.int64)), "int64 timestamp / float64 시세, 오래된 순")
+
+    start, end = int(bars[10, 0]), int(bars[20, 0])
+    part = candles.read_range(TICKER, "1h", start, end)
+    check(len(part["timestamp"]) == 10 and part["timestamp"][0] == start and part["timestamp"][-1] < end,
+          "start ≤ ts < end 구간만")
+    check(np.array_equal(part["open"], bars[10:20, 1]), "시세 값 일치")
+    check(candles.read_range(TICKER, "4h") == {} and candles.last_ts(TICKER, "1h") == int(bars[-1, 0]),
+          "다른 봉 간격은 비어 있음 / 마지막 봉 시각")
+
+
+def test_2_range_benchmark():
+    print_header("[TEST 02] 기간 조회 = 기본키 범위 검색")
+    path = fresh_store()
+    n    = 5 * 365 * 24
+    bars = synthetic_bars(n)
+    started = time.perf_counter()
+    candles.upsert(TICKER, "1h", bars).result()
+    print(f"    {n:,}봉 저장: {time.perf_counter() - started:.2f}초")
+
+    conn = sqlite3.connect(path)
+    plan = " / ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM candles WHERE market = ? AND timeframe = ? AND ts >= ? AND ts < ?",
+        ("KRW-XRP", "60", 0, 1)))
+    conn.close()
+    print(f"    조회 계획: {plan}")
+    check("SEARCH" in plan and "PRIMARY KEY" in plan, "기본키 (market, timeframe, ts) 범위 검색")
+
+    csv_path = os.path.join(os.path.dirname(path), "KRW-XRP_60m.csv")
+    frame = pd.DataFrame(bars, columns=list(candles.CANDLE_COLUMNS))
+    frame["timestamp"] = frame["timestamp"].astype(np.int64)
+    frame.to_csv(csv_path, index=False)
+
+    start, end = int(bars[-24 * 30, 0]), int(bars[-1, 0]) + HOUR_MS
+    started = time.perf_counter()
+    df = pd.read_csv(csv_path)
+    df = df[(df["timestamp"] >= start) & (df["timestamp"] < end)]
+    csv_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    part = candles.read_range(TICKER, "1h", start, end)
+    sql_ms = (time.perf_counter() - started) * 1000
+    print(f"    최근 30일({len(part['timestamp'])}봉): CSV 전체 로드 {csv_ms:.1f}ms → 범위 조회 {sql_ms:.1f}ms")
+    check(len(part["timestamp"]) == len(df) == 24 * 30, "같은 봉 수")
+    check(sql_ms < csv_ms, "필요한 구간만 읽어서 더 빠름")
+
+
+def test_3_live_persist():
+    print_header("[TEST 03] 실시간 캔들 캐시 → 마감된 봉 저장")
+    fresh_store()
+    fake = FakeCandles(60)
+    calls = []
+
+    def sink(ticker, interval, rows):
+        calls.append(len(rows))
+        candles.upsert(ticker, interval, rows)
+
+    clock = FakeClock()
+    original = (client.upbit.fetch_ohlcv, client.candle_sink, config.OHLCV_CACHE_SIZE, client.time)
+    client.upbit.fetch_ohlcv = fake.fetch_ohlcv
+    client.candle_sink, config.OHLCV_CACHE_SIZE, client.time = sink, 50, clock
+    client._candle_cache.clear()
+    try:
+        client.get_ohlcv(TICKER, "1h", max_age=0)
+        client.get_ohlcv(TICKER, "1h", max_age=0)            # 새로 마감된 봉 없음
+        first = list(calls)
+        clock.offset += HOUR_MS / 1000                        # 1시간 뒤: 형성 중이던 봉 마감 + 새 봉
+        fake.new_bar(700.0)
+        client.get_ohlcv(TICKER, "1h", max_age=0)
+    finally:
+        client.upbit.fetch_ohlcv, client.candle_sink, config.OHLCV_CACHE_SIZE, client.time = original
+        client._candle_cache.clear()
+
+    candles.candle_store().flush(5)
+    stored = candles.read_range(TICKER, "1h")
+    print(f"    저장 호출: {calls} | 저장된 봉: {len(stored['timestamp'])}")
+    check(first == [49], "첫 조회: 50봉 중 마감된 49봉 (형성 중인 봉 제외)")
+    check(calls == [49, 1], "다음 봉이 열리면 방금 마감된 1봉만 저장")
+    check(len(stored["timestamp"]) == 50 and stored["timestamp"][-1] == fake.rows[-2][0],
+          "형성 중인 봉은 저장소에 없음")
+
+
+def test_4_backtest_source():
+    print_header("[TEST 04] 백테스트 데이터 소스 sqlite = npy")
+    fresh_store()
+    original = (bt.DATA_DIR, config.BACKTEST_DATA_SOURCE)
+    bt.DATA_DIR = tempfile.mkdtemp(prefix="zillion_bt_")
+    bars  = synthetic_bars(24 * 120)
+    frame = pd.DataFrame(bars, columns=list(candles.CANDLE_COLUMNS))
+    frame["timestamp"] = frame["timestamp"].astype(np.int64)
+    period = ("2020-10-01", "2020-11-01")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bt.save_ohlcv(frame, "KRW-XRP", "60")
+            config.BACKTEST_DATA_SOURCE = "npy"
+            npy = bt.load_ohlcv("KRW-XRP", "1h", *period)
+            config.BACKTEST_DATA_SOURCE = "sqlite"
+            copied = bt.load_ohlcv("KRW-XRP", "1h", *period)
+            again  = bt.load_ohlcv("KRW-XRP", "1h", *period)
+    finally:
+        bt.DATA_DIR, config.BACKTEST_DATA_SOURCE = original
+
+    print(f"    {period[0]} ~ {period[1]}: npy {len(npy)}봉 | sqlite {len(copied)}봉 "
+          f"({npy['datetime'].iloc[0]} ~ {npy['datetime'].iloc[-1]})")
+    check(len(npy) == 31 * 24 and npy["datetime"].iloc[0] == pd.Timestamp(period[0]), "npy: 요청 구간만")
+    check(candles.count("KRW-XRP", "60") == len(bars), "첫 로드 때 컬럼형 저장소 전체를 캔들 저장소로 복사")
+    cols = list(candles.CANDLE_COLUMNS) + ["datetime"]
+    check(copied[cols].equals(npy[cols]) and again[cols].equals(npy[cols]), "sqlite 결과 = npy 결과")
+
+
+def test_5_same_bar_both_paths():
+    print_header("[TEST 05] 실시간 / 백테스트 경로 → 같은 봉은 1행")
+    fresh_store()
+    bars = synthetic_bars(15)
+    raw  = pd.DataFrame(bars, columns=list(candles.CANDLE_COLUMNS))
+    raw["timestamp"] = raw["timestamp"].astype(np.int64) + HOUR_MS - 1000   # 업비트 캔들 timestamp = 마지막 체결 시각
+    raw["close"] += 1.0
+    candles.upsert(TICKER, "1h", bars[:10]).result()                      # 실시간 경로 (ccxt = 봉 시작 시각)
+
+    since = []
+    def fake_fetch(ticker, timeframe, since_ts=None):
+        since.append(since_ts)
+        return raw[raw["timestamp"] // HOUR_MS >= since_ts // HOUR_MS].reset_index(drop=True)
+
+    original = (bt.fetch_ohlcv_full, bt.DATA_DIR, config.BACKTEST_DATA_SOURCE)
+    bt.fetch_ohlcv_full, config.BACKTEST_DATA_SOURCE = fake_fetch, "sqlite"
+    bt.DATA_DIR = tempfile.mkdtemp(prefix="zillion_bt_")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            added = bt.sync_ohlcv("KRW-XRP", "1h")                       # 백테스트 경로 (증분 동기화)
+        stored = candles.read_range(TICKER, "1h")
+        check(since == [int(bars[9, 0])] and added == 6, f"마지막 저장 봉부터 조회 → {added}봉 반영")
+        check(np.array_equal(stored["timestamp"], bars[:, 0].astype(np.int64)),
+              f"{len(stored['timestamp'])}행 = 봉 15개 (봉 시작 시각으로 저장, 같은 봉 중복 없음)")
+        check(stored["close"][9] == bars[9, 4] + 1.0, "겹친 봉은 나중에 받은 값으로 교체")
+
+        # 컬럼형 저장소(마지막 체결 시각) → 캔들 저장소 복사도 봉 시작 시각으로
+        fresh_store()
+        with contextlib.redirect_stdout(io.StringIO()):
+            bt.save_ohlcv(raw, "KRW-XRP", "60")
+            bt.load_ohlcv("KRW-XRP", "1h")
+        candles.upsert(TICKER, "1h", bars).result()
+        check(candles.count(TICKER, "1h") == 15, "복사 후 실시간 경로로 같은 봉 저장 → 행 수 그대로")
+    finally:
+        shutil.rmtree(bt.DATA_DIR, ignore_errors=True)
+        bt.fetch_ohlcv_full, bt.DATA_DIR, config.BACKTEST_DATA_SOURCE = original
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = config.CANDLE_DB_PATH
+    tests = [
+        test_1_upsert_read,
+        test_2_range_benchmark,
+        test_3_live_persist,
+        test_4_backtest_source,
+        test_5_same_bar_both_paths,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    candles.close()
+    config.CANDLE_DB_PATH = original
+    print("\n" + "=" * 65)
+    print(f"  🏁 캔들 저장소 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,411 @@
+"""
+매매 기록 DB 테스트 (임시 DB 파일 - WAL / 쓰기 전용 스레드 / 읽기 전용 연결 풀)
+
+테스트 항목:
+  [TEST 01] WAL 모드 + 테이블 생성
+  [TEST 02] log_trade는 쓰기 스레드 큐에 넣고 바로 반환 (커밋 중이어도 대기 없음) → flush() 후 조회
+  [TEST 03] 쓰기 트랜잭션이 길어도 /report 조회(읽기 전용 연결)는 막히지 않음
+  [TEST 04] 쌓인 쓰기는 트랜잭션 1개로 묶어서 커밋 / 실패한 작업만 되돌림
+  [TEST 05] 여러 스레드 동시 기록 → 순서대로 전부 저장 + 기록 지연 비교 (기존: 매번 연결 + 커밋)
+  [TEST 06] 스키마 마이그레이션 (user_version 기준 한 번씩만 적용, 기존 기록 유지)
+  [TEST 07] 리포트 조회 지연 벤치마크: 전체 스캔 → 인덱스 → 일별 집계 (합성 거래 100만 건)
+  [TEST 08] 일별 집계 = 원본 거래 집계 (리포트 / 전략 요약 / 다시 계산)
+  [TEST 09] 다른 프로세스가 쓰기 락을 busy_timeout보다 오래 잡음 → 그 묶음만 실패, 쓰기 스레드는 계속 동작
+
+실행 방법:
+    python -m test.databasetest
+"""
+
+import sys
+import os
+import io
+import random
+import sqlite3
+import datetime
+import contextlib
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import database as db
+
+BENCH_TRADES = 1_000_000
+BENCH_MODES   = ["TURTLE_V1", "RSI", "BREAKOUT_5M_V1", "PULLBACK_5M_V1"]
+BENCH_TICKERS = ["XRP/KRW", "BTC/KRW", "ETH/KRW", "SOL/KRW"]
+BENCH_DAYS    = 1000
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def fresh_db() -> str:
+    """임시 경로로 DB 교체 (이전 저장소는 db_store()가 닫음)"""
+    db.DB_NAME = os.path.join(tempfile.mkdtemp(prefix="zillion_db_"), "trading.db")
+    db.init_db()
+    return db.DB_NAME
+
+def synthetic_trades(n: int):
+    """합성 거래 n건 (BENCH_DAYS일에 고르게 분포, 마켓 / 전략 순환)"""
+    rnd   = random.Random(1)
+    start = datetime.date(2023, 1, 1)
+    for i in range(n):
+        day = (start + datetime.timedelta(days=i * BENCH_DAYS // n)).isoformat()
+        yield (f"{day} 12:00:00", day, BENCH_TICKERS[i % 4], BENCH_MODES[(i // 4) % 4],
+               "sell" if i % 2 else "buy", 1000.0, 1.0, rnd.uniform(-5, 5), rnd.uniform(-1000, 1000), 0.5)
+
+INSERT_SQL = ("INSERT INTO trades (timestamp, date, ticker, mode, action, price, amount, profit_rate, pnl, fee) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# 일별 집계 이전 방식 (원본 거래를 매번 집계)
+RAW_REPORT_SQL = """
+    SELECT mode, COUNT(*), SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END), SUM(pnl)
+    FROM trades WHERE date = ? GROUP BY mode
+"""
+RAW_SUMMARY_SQL = """
+    SELECT mode,
+           SUM(CASE WHEN action = 'sell' THEN pnl ELSE 0 END)            AS total_pnl,
+           SUM(CASE WHEN action = 'sell' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN action = 'sell' AND pnl > 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN action = 'sell' AND pnl <= 0 THEN 1 ELSE 0 END),
+           AVG(CASE WHEN action = 'sell' THEN profit_rate END)
+    FROM trades WHERE date >= ? AND date <= ? GROUP BY mode ORDER BY total_pnl DESC
+"""
+
+def raw_daily_report(conn, date_str: str) -> tuple:
+    """이전 generate_daily_report와 같은 조회 2개 → (거래 수, 승, 패, PnL)"""
+    rows = conn.execute("SELECT timestamp, ticker, mode, action, price, amount, profit_rate, pnl "
+                        "FROM trades WHERE date = ? ORDER BY timestamp ASC", (date_str,)).fetchall()
+    conn.execute(RAW_REPORT_SQL, (date_str,)).fetchall()
+    return (len(rows), sum(1 for r in rows if r[7] > 0), sum(1 for r in rows if r[7] < 0), sum(r[7] for r in rows))
+
+def raw_queries(conn) -> dict:
+    return {"리포트": lambda: raw_daily_report(conn, "2024-06-01"),
+            "전략 요약": lambda: conn.execute(RAW_SUMMARY_SQL, ("2024-06-01", "2024-06-07")).fetchall()}
+
+RAW_QUERIES    = "raw"
+ROLLUP_QUERIES = "rollup"
+
+def close(a, b, tol: float = 1e-6) -> bool:
+    return a is None and b is None or a is not None and b is not None and abs(a - b) <= tol * max(1.0, abs(b))
+
+def same_rows(a: list, b: list) -> bool:
+    """전략별 요약 행 비교 (합계 순서가 달라 생기는 부동소수 오차 허용)"""
+    return len(a) == len(b) and all(
+        x[0] == y[0] and close(x[1], y[1]) and tuple(x[2:5]) == tuple(y[2:5]) and close(x[5], y[5])
+        for x, y in zip(sorted(a, key=lambda r: str(r[0])), sorted(b, key=lambda r: str(r[0]))))
+
+def time_queries(kind: str, repeat: int = 5) -> dict:
+    """데일리 리포트 / 1주 전략 요약 평균 조회 시간 (ms) - kind: 원본 거래 집계(raw) / db 함수(rollup)"""
+    out = {}
+    conn = sqlite3.connect(db.DB_NAME)
+    if kind == RAW_QUERIES:
+        queries = raw_queries(conn).items()
+    else:
+        queries = [("리포트", lambda: db.generate_daily_report("2024-06-01")),
+                   ("전략 요약", lambda: db.get_strategy_summary("2024-06-01", "2024-06-07"))]
+    for name, fn in queries:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+        out[name] = (time.perf_counter() - started) / repeat * 1000
+    conn.close()
+    return out
+
+def query_plan(sql: str, params=()) -> str:
+    conn = sqlite3.connect(db.DB_NAME)
+    plan = " / ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    conn.close()
+    return plan
+
+def hold_writer(seconds: float) -> threading.Event:
+    """쓰기 스레드가 트랜잭션을 연 채로 seconds초 붙잡혀 있게 함 → 붙잡힌 시점에 set되는 Event"""
+    started = threading.Event()
+
+    def job(conn):
+        conn.execute("INSERT INTO trades (ticker, action) VALUES ('HOLD/KRW', 'buy')")
+        started.set()
+        time.sleep(seconds)
+
+    db.db_store().submit(job)
+    started.wait(2)
+    return started
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_wal():
+    print_header("[TEST 01] WAL 모드 + 테이블 생성")
+    path = fresh_db()
+    conn = sqlite3.connect(path)
+    mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    conn.close()
+    check(mode == "wal", f"journal_mode = {mode}")
+    check("trades" in tables, "trades 테이블 생성")
+    with db.db_store().reader() as ro:
+        try:
+            ro.execute("INSERT INTO trades (ticker) VALUES ('X')")
+            readonly = False
+        except sqlite3.OperationalError:
+            readonly = True
+    check(readonly, "조회용 연결은 읽기 전용")
+
+
+def test_2_non_blocking_log():
+    print_header("[TEST 02] log_trade 대기 없음 → flush 후 조회")
+    fresh_db()
+    hold_writer(0.5)
+    started = time.perf_counter()
+    future = db.log_trade("XRP/KRW", "buy", 1000.0, 10.0, mode="TURTLE_V1")
+    elapsed = time.perf_counter() - started
+    print(f"    쓰기 스레드가 0.5초 커밋 중일 때 log_trade: {elapsed * 1000:.2f}ms")
+    check(elapsed < 0.05 and not future.done(), "커밋을 기다리지 않고 바로 반환")
+    check(db.flush(2.0), "flush() → 큐 비움")
+    rows = db.get_recent_trades(1)
+    check(future.done() and rows and rows[0][0] == future.result() and rows[0][2] == "XRP/KRW",
+          "flush 후 조회에 반영 (Future 결과 = 행 id)")
+
+
+def test_3_read_while_writing():
+    print_header("[TEST 03] 쓰기 중 조회")
+    fresh_db()
+    today = time.strftime("%Y-%m-%d")
+    db.log_trade("XRP/KRW", "sell", 1100.0, 10.0, profit_rate=10.0, pnl=1000.0, mode="TURTLE_V1")
+    db.flush()
+    hold_writer(0.5)
+    started = time.perf_counter()
+    report = db.generate_daily_report(today)
+    summary = db.get_strategy_summary()
+    elapsed = time.perf_counter() - started
+    print(f"    쓰기 트랜잭션 0.5초 중 리포트 + 요약 조회: {elapsed * 1000:.1f}ms")
+    check(elapsed < 0.25, "쓰기 트랜잭션이 끝날 때까지 기다리지 않음")
+    check(report["total_trades"] == 1 and report["total_pnl"] == 1000.0, "커밋된 기록 기준 리포트")
+    check(summary and summary[0][0] == "TURTLE_V1", "전략별 요약")
+    db.flush()
+
+
+def test_4_batch_commit():
+    print_header("[TEST 04] 묶음 커밋 / 실패 작업만 되돌림")
+    fresh_db()
+    store = db.db_store()
+    hold_writer(0.2)
+    commits = store.commits
+    futures = [db.log_trade("XRP/KRW", "buy", 1000.0 + i, 1.0) for i in range(20)]
+    bad = store.execute("INSERT INTO no_such_table VALUES (1)")
+    futures += [db.log_trade("BTC/KRW", "buy", 100.0, 1.0)]
+    db.flush()
+    print(f"    작업 {len(futures) + 1}개 → 커밋 {store.commits - commits}회 | 실패 {store.failed}개")
+    check(store.commits - commits <= 2, "대기 중 쌓인 쓰기는 트랜잭션 1개로 커밋")
+    check(bad.exception() is not None and store.failed == 1, "잘못된 쓰기는 예외 (Future)")
+    check(all(f.exception() is None for f in futures) and len(db.get_recent_trades(100)) == 22,
+          "같이 묶인 다른 기록은 저장됨")
+
+
+def test_5_concurrent_writers():
+    print_header("[TEST 05] 동시 기록 + 지연 비교")
+    path = fresh_db()
+    n_threads, per_thread = 4, 50
+
+    def worker(k: int):
+        for i in range(per_thread):
+            db.log_trade(f"T{k}/KRW", "buy", float(i), 1.0)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(n_threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    queued = (time.perf_counter() - started) / (n_threads * per_thread)
+    db.flush()
+    rows = db.get_recent_trades(10_000)
+    by_ticker = {}
+    for row in sorted(rows):
+        by_ticker.setdefault(row[2], []).append(row[5])
+    check(len(rows) == n_threads * per_thread, f"{len(rows)}건 저장")
+    check(all(prices == sorted(prices) for prices in by_ticker.values()), "스레드별 기록 순서 유지")
+
+    # 기존 방식: 기록마다 연결 + INSERT + 커밋 (rollback journal, fsync 대기)
+    legacy = os.path.join(os.path.dirname(path), "legacy.db")
+    conn = sqlite3.connect(legacy)
+    conn.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY, ticker TEXT, price REAL)")
+    conn.commit()
+    conn.close()
+    n = 100
+    started = time.perf_counter()
+    for i in range(n):
+        conn = sqlite3.connect(legacy)
+        conn.execute("INSERT INTO trades (ticker, price) VALUES (?, ?)", ("XRP/KRW", float(i)))
+        conn.commit()
+        conn.close()
+    direct = (time.perf_counter() - started) / n
+    print(f"    기록 1건당 매매 스레드 대기: 기존 {direct * 1000:.3f}ms → 큐 {queued * 1000:.3f}ms")
+    check(queued < direct, "매매 스레드 대기 감소")
+
+
+def test_6_migrations():
+    print_header("[TEST 06] 스키마 마이그레이션")
+    path = os.path.join(tempfile.mkdtemp(prefix="zillion_db_"), "trading.db")
+    db.DB_NAME = path
+    check(db.init_db(target=1) == [1], "새 DB → v1 (테이블만)")
+    db.db_store().execute(INSERT_SQL, next(synthetic_trades(1))).result()
+    applied = db.init_db()
+    check(applied == list(range(2, db.SCHEMA_VERSION + 1)), f"v1 DB → 남은 버전만 적용 {applied}")
+    check(db.init_db() == [], "다시 실행하면 적용 없음")
+
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='trades'")}
+    count   = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    rollup  = conn.execute("SELECT SUM(trades) FROM daily_rollup").fetchone()[0]
+    conn.close()
+    print(f"    user_version={version} | 인덱스: {sorted(indexes)}")
+    check(version == db.SCHEMA_VERSION, "user_version = 최신 버전")
+    check({"idx_trades_date", "idx_trades_mode_date", "idx_trades_ticker_date"} <= indexes,
+          "날짜 / 전략+날짜 / 마켓+날짜 인덱스")
+    check(count == 1 and rollup == 1, "기존 기록 유지 + 일별 집계에 반영")
+
+
+def test_7_index_benchmark():
+    print_header(f"[TEST 07] 인덱스 / 일별 집계 전후 조회 지연 (거래 {BENCH_TRADES:,}건)")
+    db.DB_NAME = os.path.join(tempfile.mkdtemp(prefix="zillion_db_"), "trading.db")
+    db.init_db(target=1)
+    started = time.perf_counter()
+    db.db_store().submit(lambda conn: conn.executemany(INSERT_SQL, synthetic_trades(BENCH_TRADES))).result()
+    print(f"    합성 거래 생성: {time.perf_counter() - started:.1f}초")
+
+    report_sql = "SELECT * FROM trades WHERE date = ? ORDER BY timestamp"
+    raw         = time_queries(RAW_QUERIES)
+    plan_before = query_plan(report_sql, ("2024-06-01",))
+    started = time.perf_counter()
+    db.init_db(target=2)
+    index_sec   = time.perf_counter() - started
+    indexed     = time_queries(RAW_QUERIES)
+    plan_after  = query_plan(report_sql, ("2024-06-01",))
+    started = time.perf_counter()
+    db.init_db()
+    rollup_sec  = time.perf_counter() - started
+    rolled      = time_queries(ROLLUP_QUERIES)
+
+    conn = sqlite3.connect(db.DB_NAME)
+    week_rows = conn.execute("SELECT COUNT(*) FROM daily_rollup WHERE date BETWEEN '2024-06-01' AND '2024-06-07'").fetchone()[0]
+    conn.close()
+    print(f"    인덱스 생성: {index_sec:.1f}초 | 일별 집계 생성: {rollup_sec:.1f}초 (1주 = 집계 {week_rows}행)")
+    print(f"    조회 계획: {plan_before}  →  {plan_after}")
+    print(f"    {'':<6}   전체 스캔 →  인덱스  → 일별 집계")
+    for name in raw:
+        print(f"    {name:<6}: {raw[name]:8.2f}ms → {indexed[name]:6.2f}ms → {rolled[name]:6.2f}ms")
+    check("SCAN" in plan_before and "idx_trades_date" in plan_after, "날짜 조건이 전체 스캔 → 인덱스 검색")
+    check(all(indexed[k] * 5 < raw[k] for k in raw), "인덱스: 리포트 / 전략 요약 5배 이상 빨라짐")
+    check(all(rolled[k] < indexed[k] for k in raw), "일별 집계: 인덱스 조회보다 빠름")
+    db.close()
+
+
+def test_8_rollup_consistency():
+    print_header("[TEST 08] 일별 집계 = 원본 거래 집계")
+    fresh_db()
+    rnd = random.Random(3)
+    for _ in range(300):
+        action = rnd.choice(["buy", "sell"])
+        pnl    = rnd.choice([0.0, rnd.uniform(-500, 500)]) if action == "sell" else 0.0
+        db.log_trade(rnd.choice(BENCH_TICKERS[:2]), action, 1000.0, 1.0, profit_rate=pnl / 100, pnl=pnl,
+                     mode=rnd.choice(BENCH_MODES[:2] + [None]))
+    db.flush()
+    today = time.strftime("%Y-%m-%d")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = db.generate_daily_report(today)
+    summary = db.get_strategy_summary(today, today)
+    conn = sqlite3.connect(db.DB_NAME)
+    raw_report  = raw_daily_report(conn, today)
+    raw_summary = conn.execute(RAW_SUMMARY_SQL, (today, today)).fetchall()
+    conn.close()
+    print(f"    리포트: {report['total_trades']}건 {report['wins']}승/{report['losses']}패 PnL {report['total_pnl']:+,.0f}")
+    check((report["total_trades"], report["wins"], report["losses"]) == raw_report[:3]
+          and close(report["total_pnl"], raw_report[3]), "데일리 리포트 합계 일치")
+    check(same_rows(summary, raw_summary), f"전략별 요약 일치 ({len(summary)}개 전략, 전략 없음 포함)")
+
+    db.rebuild_rollup()
+    check(same_rows(db.get_strategy_summary(today, today), raw_summary), "rebuild_rollup() 후에도 일치")
+
+    future = db.log_trade("XRP/KRW", "sell", 1000.0, 1.0, pnl=100.0, mode="X")
+    check(isinstance(future.result(), int) and db.get_strategy_summary(today, today)[0][0] == "X",
+          "log_trade 커밋 즉시 집계 반영 (같은 트랜잭션)")
+
+
+def test_9_lock_contention():
+    print_header("[TEST 09] 쓰기 락 경합 (다른 연결이 BEGIN IMMEDIATE 유지)")
+    path  = os.path.join(tempfile.mkdtemp(prefix="zillion_db_"), "shared.db")
+    store = db.TradeStore(path, busy_timeout=0.2)
+    try:
+        store.execute("CREATE TABLE t (v INTEGER)").result()
+        other = sqlite3.connect(path, isolation_level=None)     # 같은 파일을 쓰는 다른 프로세스 흉내
+        other.execute("BEGIN IMMEDIATE")
+        blocked = [store.execute("INSERT INTO t VALUES (?)", (i,)) for i in range(3)]
+        done = store.flush(5)
+        other.execute("ROLLBACK")
+        other.close()
+
+        errors = [f.exception(0) for f in blocked]
+        print(f"    락 대기 중 작업 3개 → {[type(e).__name__ for e in errors]}")
+        check(done and all(isinstance(e, sqlite3.OperationalError) for e in errors),
+              "busy_timeout 초과 → 묶음의 모든 Future에 예외 (대기 중 작업 수도 0으로 복귀)")
+        check(store._thread.is_alive(), "쓰기 스레드 살아 있음")
+
+        after = store.execute("INSERT INTO t VALUES (99)")
+        check(store.flush(5) and after.exception() is None, "락이 풀린 뒤 쓰기는 정상 커밋")
+        with store.reader() as conn:
+            check(conn.execute("SELECT v FROM t").fetchall() == [(99,)], "실패한 묶음은 저장 안 됨")
+    finally:
+        store.close()
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = db.DB_NAME
+    tests = [
+        test_1_wal,
+        test_2_non_blocking_log,
+        test_3_read_while_writing,
+        test_4_batch_commit,
+        test_5_concurrent_writers,
+        test_6_migrations,
+        test_7_index_benchmark,
+        test_8_rollup_consistency,
+        test_9_lock_contention,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    db.close()
+    db.DB_NAME = original
+    print("\n" + "=" * 65)
+    print(f"  🏁 매매 기록 DB 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
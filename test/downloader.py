@@ -0,0 +1,215 @@
+# test/downloader.py
+"""
+멀티 마켓 캔들 히스토리 다운로더
+
+- (market, timeframe) 목록을 스레드 풀로 동시에 수집
+- 모든 스레드가 호출 한도 관리자 1개(ratelimit.RateGovernor, 업비트 시세 API 초당 한도)를 공유
+  (응답의 Remaining-Req 헤더로 남은 호출 수를 맞추고 429면 그 시점까지 보류)
+- requests.Session 커넥션 풀 재사용 (페이지마다 새 연결 X)
+- 일정 분량마다 저장소에 반영 + 체크포인트 기록 → 중단 후 재실행하면 이어서 수집
+  (체크포인트를 반영보다 먼저 기록 → 어느 시점에 죽어도 받은 구간이 빠지지 않음, 겹친 봉은 저장 시 중복 제거)
+
+실행 방법:
+    python -m test.downloader KRW-XRP:60 KRW-BTC:60 KRW-ETH:240
+"""
+import sys
+import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from test import backtest as bt
+import config
+import ratelimit
+
+UPBIT_API_URL = "https://api.upbit.com"
+PAGE_SIZE     = 200        # 업비트 캔들 API 1회 최대 개수
+FLUSH_ROWS    = 200_000    # 이만큼 모이면 저장소에 반영 + 체크포인트 기록
+MAX_RETRIES   = 5          # 페이지당 재시도 횟수 (네트워크 오류 / 429 / 5xx)
+
+
+class CandleDownloader:
+    """
+    여러 (market, timeframe)의 캔들을 동시에 수집해서 backtest 저장소에 반영
+
+    - base_url    : 업비트 API 주소 (테스트에서는 로컬 가짜 서버 주소)
+    - rate_per_sec: 모든 작업이 공유하는 초당 호출 한도
+    - workers     : 동시에 진행할 (market, timeframe) 작업 수
+    """
+
+    def __init__(self, base_url: str = UPBIT_API_URL,
+                 rate_per_sec: float = config.UPBIT_QUOTATION_RPS, workers: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.workers  = workers
+        self.governor = ratelimit.RateGovernor(limits={"candles": rate_per_sec})
+        self.requests = 0   # 실제 보낸 HTTP 요청 수 (재시도 포함)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._count_lock = threading.Lock()
+
+    # ── 공개 API ──
+    def download(self, jobs: list[tuple[str, str]]) -> dict:
+        """
+        jobs: [("KRW-XRP", "60"), ("KRW-BTC", "240"), ...]
+        반환: {(market, timeframe): 추가/갱신된 봉 수 또는 Exception}
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {job: pool.submit(self.download_one, *job) for job in jobs}
+            for job, fut in futures.items():
+                try:
+                    results[job] = fut.result()
+                except Exception as e:
+                    print(f"\n❌ [{job[0]} {job[1]}분봉] 수집 중단: {e} (재실행하면 이어서 수집)")
+                    results[job] = e
+        return results
+
+    def download_one(self, market: str, timeframe: str) -> int:
+        """
+        (market, timeframe) 1개 작업
+        - 체크포인트가 있으면 그 위치부터 이어서 내려가고,
+          끝나면 저장된 마지막 봉 이후 최신 캔들까지 한 번 더 동기화
+        """
+        total = 0
+        while True:
+            checkpoint = self._load_checkpoint(market, timeframe)
+            total += self._run(market, timeframe, checkpoint)
+            if checkpoint is None:
+                return total
+
+    # ── 내부 구현 ──
+    def _run(self, market: str, timeframe: str, checkpoint: dict | None) -> int:
+        """
+        최신 봉 → 과거 방향으로 페이지를 내려가며 stop_ts가 속한 봉까지 수집
+        - stop_ts None: 상장일까지 전체 수집
+        """
+        interval_ms = int(timeframe) * 60_000
+
+        if checkpoint is None:
+            stored  = bt.load_ohlcv_arrays(market, timeframe)
+            stop_ts = int(stored["timestamp"][-1]) if stored and len(stored["timestamp"]) else None
+            cursor  = None
+        else:
+            stop_ts = checkpoint["stop_ts"]
+            cursor  = checkpoint["cursor"]
+
+        stop_bucket = stop_ts // interval_ms if stop_ts is not None else None
+        buffer, total = [], 0
+        buffer_cursor = cursor   # 지금 버퍼가 시작된 위치 (반영 전에 죽으면 여기부터 다시)
+
+        while True:
+            page = self._fetch_page(market, timeframe, cursor)
+            if not page:
+                break
+
+            buffer.extend(page)
+            cursor = page[-1]["candle_date_time_utc"]
+            done = len(page) < PAGE_SIZE or (
+                stop_bucket is not None and page[-1]["timestamp"] // interval_ms <= stop_bucket
+            )
+            if done:
+                break
+
+            if len(buffer) >= FLUSH_ROWS:
+                # 반영 전에 버퍼 시작 위치를 먼저 기록 → 반영 직후 죽어도 원래 stop_ts로 이어서 수집
+                # (체크포인트 없이 재시작하면 방금 반영한 최신 봉까지만 최신이라고 판단해 과거 구간이 빠짐)
+                self._save_checkpoint(market, timeframe, {"cursor": buffer_cursor, "stop_ts": stop_ts})
+                total += self._flush(market, timeframe, buffer, stop_bucket)
+                self._save_checkpoint(market, timeframe, {"cursor": cursor, "stop_ts": stop_ts})
+                buffer, buffer_cursor = [], cursor
+
+        total += self._flush(market, timeframe, buffer, stop_bucket)
+        self._clear_checkpoint(market, timeframe)
+        return total
+
+    def _fetch_page(self, market: str, timeframe: str, to: str | None) -> list:
+        """캔들 1페이지 (최신순) 조회 - 호출 한도 대기 후 요청, 실패 시 지수 백오프 재시도"""
+        url    = f"{self.base_url}/v1/candles/minutes/{timeframe}"
+        params = {"market": market, "count": PAGE_SIZE}
+        if to:
+            params["to"] = to
+
+        for attempt in range(MAX_RETRIES):
+            self.governor.acquire("candles")
+            with self._count_lock:
+                self.requests += 1
+            resp = None
+            try:
+                resp = self.session.get(url, params=params, timeout=10)
+                if resp.status_code == 200:
+                    return resp.json()
+                error = f"HTTP {resp.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            finally:
+                status, headers = (resp.status_code, resp.headers) if resp is not None else (None, None)
+                self.governor.complete("candles", status, headers)
+            if resp is None or resp.status_code not in ratelimit.THROTTLED_STATUS:
+                time.sleep(min(0.2 * 2 ** attempt, 5.0))   # 429는 관리자가 보류 시간만큼 다음 호출을 미룸
+
+        raise RuntimeError(f"{market} {timeframe}분봉 조회 실패 ({error})")
+
+    def _flush(self, market: str, timeframe: str, candles: list, stop_bucket: int | None) -> int:
+        """모인 캔들을 저장소에 반영 (stop_ts 봉 이전은 이미 저장돼 있으므로 제외)"""
+        if not candles:
+            return 0
+        df = bt._candles_to_frame(candles)
+        if stop_bucket is not None:
+            interval_ms = int(timeframe) * 60_000
+            df = df[df["timestamp"] // interval_ms >= stop_bucket].reset_index(drop=True)
+        if df.empty:
+            return 0
+
+        if bt.load_ohlcv_arrays(market, timeframe):
+            bt.append_ohlcv(df, market, timeframe)
+        else:
+            bt.save_ohlcv(df, market, timeframe)
+        return len(df)
+
+    # ── 체크포인트 (data/.download/{market}_{timeframe}m.json) ──
+    @staticmethod
+    def _checkpoint_path(market: str, timeframe: str) -> str:
+        return os.path.join(bt.DATA_DIR, ".download", f"{market}_{timeframe}m.json")
+
+    def _load_checkpoint(self, market: str, timeframe: str) -> dict | None:
+        path = self._checkpoint_path(market, timeframe)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, market: str, timeframe: str, state: dict):
+        path = self._checkpoint_path(market, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def _clear_checkpoint(self, market: str, timeframe: str):
+        path = self._checkpoint_path(market, timeframe)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    # 인자 형식: KRW-XRP:60 KRW-BTC:240 (없으면 config 기본 종목/봉)
+    args = sys.argv[1:] or [f"{config.TICKER_UPBIT}:{bt.to_upbit_minutes(config.TIMEFRAME)}"]
+    jobs = [(a.split(":")[0], a.split(":")[1]) for a in args]
+
+    started = time.time()
+    downloader = CandleDownloader()
+    results = downloader.download(jobs)
+
+    print("\n" + "=" * 50)
+    for (market, tf), res in results.items():
+        status = f"{res}개 봉" if isinstance(res, int) else f"실패 ({res})"
+        print(f"  {market} {tf}분봉: {status}")
+    print(f"  총 요청 {downloader.requests}회 | {time.time() - started:.1f}초")
+    print("=" * 50)
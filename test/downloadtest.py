@@ -0,0 +1,325 @@
+"""
+멀티 마켓 다운로더 테스트 (로컬 가짜 업비트 캔들 서버 사용)
+
+테스트 항목:
+  [TEST 01] 여러 (market, timeframe) 동시 수집 → 저장소 데이터가 서버 캔들과 일치
+  [TEST 02] 공유 호출 한도 → 전체 호출 속도가 한도를 넘지 않음
+  [TEST 03] 수집 중단 후 재실행 → 체크포인트부터 이어서 수집
+  [TEST 04] 이미 최신이면 1페이지만 조회
+  [TEST 05] 저장소 반영 직후 / 체크포인트 기록 전에 죽어도 재실행하면 과거 구간까지 전부 수집
+  [TEST 06] 증분 동기화(sync_ohlcv) → 마지막 저장 봉 이후만 조회, 미완성 봉은 새로 받은 값으로 교체
+
+실행 방법:
+    python -m test.downloadtest
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import datetime
+import numpy as np
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+from test import backtest as bt
+from test import downloader
+from test.downloader import CandleDownloader
+
+# ============================================================
+# 0. 가짜 캔들 서버
+# ============================================================
+
+START_MS = 1_514_764_800_000   # 2018-01-01 00:00:00 UTC
+
+
+def make_candles(market: str, timeframe: str, n: int) -> list:
+    """업비트 응답 형식 캔들 (오래된 → 최신 순)"""
+    interval = int(timeframe) * 60_000
+    seed = sum(map(ord, market)) + int(timeframe)
+    rows = []
+    for i in range(n):
+        start = START_MS + i * interval
+        price = 100.0 + seed + i * 0.5
+        rows.append({
+            "market"                 : market,
+            "candle_date_time_utc"   : datetime.datetime.fromtimestamp(start / 1000, datetime.timezone.utc)
+                                               .strftime("%Y-%m-%dT%H:%M:%S"),
+            "timestamp"              : start + interval - 1000,
+            "opening_price"          : price,
+            "high_price"             : price + 1.0,
+            "low_price"              : price - 1.0,
+            "trade_price"            : price + 0.25,
+            "candle_acc_trade_volume": 10.0 + i,
+        })
+    return rows
+
+
+class FakeCandleHandler(BaseHTTPRequestHandler):
+    candles: dict = {}       # {(market, timeframe): [...]}
+    fail_after: int | None = None
+    served: int = 0
+    times: list = []
+
+    def do_GET(self):
+        cls = type(self)
+        url = urlparse(self.path)
+        qs  = parse_qs(url.query)
+        cls.served += 1
+        cls.times.append(time.monotonic())
+
+        if cls.fail_after is not None and cls.served > cls.fail_after:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        timeframe = url.path.rsplit("/", 1)[-1]
+        market    = qs["market"][0]
+        count     = int(qs.get("count", ["200"])[0])
+        to        = qs.get("to", [None])[0]
+
+        rows = cls.candles.get((market, timeframe), [])
+        if to:
+            rows = [c for c in rows if c["candle_date_time_utc"] < to.replace(" ", "T")]
+        page = list(reversed(rows[-count:]))
+
+        body = json.dumps(page).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCandleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def reset_server(candles: dict, fail_after: int | None = None):
+    FakeCandleHandler.candles    = candles
+    FakeCandleHandler.fail_after = fail_after
+    FakeCandleHandler.served     = 0
+    FakeCandleHandler.times      = []
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def store_matches(market: str, timeframe: str, candles: list) -> bool:
+    stored   = bt.load_ohlcv_arrays(market, timeframe)
+    expected = bt._candles_to_frame(candles)
+    if not stored or len(stored["timestamp"]) != len(expected):
+        return False
+    return all(np.array_equal(stored[c], expected[c].to_numpy()) for c in bt.CANDLE_COLUMNS)
+
+def fresh_data_dir():
+    bt.DATA_DIR = tempfile.mkdtemp(prefix="zillion_dl_")
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_concurrent_download(base_url: str):
+    print_header("[TEST 01] 여러 마켓/봉 동시 수집")
+    fresh_data_dir()
+    jobs = [("KRW-XRP", "60"), ("KRW-BTC", "60"), ("KRW-ETH", "240"), ("KRW-XRP", "240")]
+    candles = {job: make_candles(*job, n=450 + i * 130) for i, job in enumerate(jobs)}
+    reset_server(candles)
+
+    dl = CandleDownloader(base_url=base_url, rate_per_sec=200, workers=4)
+    results = dl.download(jobs)
+
+    for job in jobs:
+        check(results[job] == len(candles[job]), f"{job} 수집 {results[job]}개 (기대 {len(candles[job])})")
+        check(store_matches(*job, candles[job]), f"{job} 저장소 == 서버 캔들")
+
+
+def test_2_shared_rate_limit(base_url: str):
+    print_header("[TEST 02] 공유 호출 한도 속도 제한")
+    fresh_data_dir()
+    jobs = [("KRW-XRP", "60"), ("KRW-BTC", "60"), ("KRW-ETH", "60")]
+    reset_server({job: make_candles(*job, n=3000) for job in jobs})   # 작업당 15페이지
+
+    rate = 20
+    dl = CandleDownloader(base_url=base_url, rate_per_sec=rate, workers=3)
+    dl.download(jobs)
+
+    times = FakeCandleHandler.times
+    elapsed = times[-1] - times[0]
+    observed = (len(times) - rate) / elapsed if elapsed > 0 else float("inf")   # 초기 버스트 제외
+    print(f"    요청 {len(times)}회 | {elapsed:.2f}초 | 버스트 이후 {observed:.1f}회/초 (한도 {rate})")
+    check(observed <= rate * 1.1, "초당 호출 수가 한도 이내")
+
+
+def test_3_resume_after_interruption(base_url: str):
+    print_header("[TEST 03] 중단 후 재실행 → 이어서 수집")
+    fresh_data_dir()
+    job = ("KRW-XRP", "60")
+    candles = {job: make_candles(*job, n=2500)}          # 13페이지
+
+    old_flush, old_retries = downloader.FLUSH_ROWS, downloader.MAX_RETRIES
+    downloader.FLUSH_ROWS, downloader.MAX_RETRIES = 600, 1
+    try:
+        # 1차: 7번째 요청부터 서버 오류 → 중단
+        reset_server(candles, fail_after=6)
+        dl = CandleDownloader(base_url=base_url, rate_per_sec=500, workers=1)
+        first = dl.download([job])
+        check(isinstance(first[job], Exception), "1차 수집 중단됨")
+        checkpoint = dl._load_checkpoint(*job)
+        check(checkpoint is not None, f"체크포인트 기록됨 | {checkpoint}")
+        partial = len(bt.load_ohlcv_arrays(*job)["timestamp"])
+        check(0 < partial < 2500, f"중단 전까지 {partial}개 저장")
+
+        # 2차: 서버 정상화 → 체크포인트부터 이어서
+        reset_server(candles)
+        second = CandleDownloader(base_url=base_url, rate_per_sec=500, workers=1)
+        second.download([job])
+        check(store_matches(*job, candles[job]), "재실행 후 전체 데이터 일치")
+        check(second._load_checkpoint(*job) is None, "체크포인트 삭제됨")
+        check(second.requests < 13, f"처음부터 다시 받지 않음 | 요청 {second.requests}회 (< 13)")
+    finally:
+        downloader.FLUSH_ROWS, downloader.MAX_RETRIES = old_flush, old_retries
+
+
+def test_4_up_to_date(base_url: str):
+    print_header("[TEST 04] 최신 상태면 1페이지만 조회 + 신규 봉만 추가")
+    fresh_data_dir()
+    job = ("KRW-BTC", "240")
+    candles = make_candles(*job, n=900)
+    reset_server({job: candles[:800]})
+    CandleDownloader(base_url=base_url, rate_per_sec=500).download([job])
+
+    reset_server({job: candles})
+    dl = CandleDownloader(base_url=base_url, rate_per_sec=500)
+    added = dl.download([job])[job]
+    check(dl.requests == 1, f"요청 {dl.requests}회 (1이어야 함)")
+    check(added == 101, f"추가/갱신 {added}개 (마지막 저장 봉 + 신규 100개)")
+    check(store_matches(*job, candles), "저장소 == 서버 캔들")
+
+
+def test_5_crash_after_flush(base_url: str):
+    print_header("[TEST 05] 반영 직후 / 체크포인트 기록 전 중단 → 재실행 시 누락 없음")
+    job = ("KRW-ETH", "60")
+    candles = {job: make_candles(*job, n=2500)}          # 600개마다 반영 → 4번 반영 + 마지막
+
+    old_flush, old_retries = downloader.FLUSH_ROWS, downloader.MAX_RETRIES
+    downloader.FLUSH_ROWS, downloader.MAX_RETRIES = 600, 1
+    try:
+        for crash_at in (1, 2):                          # 첫 번째 / 두 번째 반영 직후
+            fresh_data_dir()
+            reset_server(candles)
+            dl = CandleDownloader(base_url=base_url, rate_per_sec=500, workers=1)
+            flushes, save_checkpoint = [], dl._save_checkpoint
+
+            def crashing_checkpoint(market, timeframe, state):
+                if len(flushes) == crash_at:             # 반영 이후 첫 체크포인트 기록에서 중단
+                    raise RuntimeError("체크포인트 기록 전 중단")
+                save_checkpoint(market, timeframe, state)
+
+            flush = dl._flush
+            dl._flush = lambda *args: flushes.append(1) or flush(*args)
+            dl._save_checkpoint = crashing_checkpoint
+            first = dl.download([job])
+            partial = len(bt.load_ohlcv_arrays(*job)["timestamp"])
+            check(isinstance(first[job], Exception) and 0 < partial < 2500,
+                  f"{crash_at}번째 반영 직후 중단 | {partial}개 저장")
+
+            second = CandleDownloader(base_url=base_url, rate_per_sec=500, workers=1)
+            second.download([job])
+            check(store_matches(*job, candles[job]), "재실행 후 과거 구간까지 전체 데이터 일치")
+            check(second._load_checkpoint(*job) is None, "체크포인트 삭제됨")
+            shutil.rmtree(bt.DATA_DIR, ignore_errors=True)
+    finally:
+        downloader.FLUSH_ROWS, downloader.MAX_RETRIES = old_flush, old_retries
+
+
+def test_6_incremental_sync(base_url: str):
+    print_header("[TEST 06] 증분 동기화 → 마지막 저장 봉 이후만 + 미완성 봉 교체")
+    fresh_data_dir()
+    job = ("KRW-XRP", "60")
+    candles = make_candles(*job, n=1000)
+
+    # 저장 당시 형성 중이던 마지막 봉 (봉 시작 30초 뒤 시점의 값)
+    forming = dict(candles[599])
+    forming["timestamp"]   = START_MS + 599 * 3_600_000 + 30_000
+    forming["trade_price"] = forming["opening_price"]
+    bt.save_ohlcv(bt._candles_to_frame(candles[:599] + [forming]), *job)
+
+    def local_get(url, *args, **kwargs):               # 업비트 주소 → 가짜 서버
+        return original_get(url.replace(downloader.UPBIT_API_URL, base_url), *args, **kwargs)
+
+    reset_server({job: candles})
+    original_get, original_source = bt.ratelimit.get, config.BACKTEST_DATA_SOURCE
+    bt.ratelimit.get, config.BACKTEST_DATA_SOURCE = local_get, "npy"
+    try:
+        added = bt.sync_ohlcv(*job)
+    finally:
+        bt.ratelimit.get, config.BACKTEST_DATA_SOURCE = original_get, original_source
+
+    stored = bt.load_ohlcv_arrays(*job)
+    check(FakeCandleHandler.served == 3, f"요청 {FakeCandleHandler.served}회 (전체 5페이지 중 3페이지)")
+    check(added == 401, f"추가/갱신 {added}개 (미완성 봉 1개 + 신규 400개)")
+    check(len(stored["timestamp"]) == 1000, f"저장 {len(stored['timestamp'])}개 (같은 봉 중복 없음)")
+    check(stored["close"][599] == candles[599]["trade_price"]
+          and stored["timestamp"][599] == candles[599]["timestamp"], "미완성 봉 → 새로 받은 확정값")
+    check(store_matches(*job, candles), "저장소 == 서버 캔들")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    server, base_url = start_server()
+    original_dir = bt.DATA_DIR
+    tests = [
+        test_1_concurrent_download,
+        test_2_shared_rate_limit,
+        test_3_resume_after_interruption,
+        test_4_up_to_date,
+        test_5_crash_after_flush,
+        test_6_incremental_sync,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t(base_url)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+            finally:
+                if bt.DATA_DIR != original_dir:
+                    shutil.rmtree(bt.DATA_DIR, ignore_errors=True)
+                bt.DATA_DIR = original_dir
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 다운로더 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
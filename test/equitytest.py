@@ -0,0 +1,261 @@
+"""
+자산 추이 기록 테스트 (임시 DB + 가짜 업비트 API)
+
+테스트 항목:
+  [TEST 01] 1초 / 1분 / 1시간 구간 = pandas resample (마지막 / 최저 / 최고), 같은 초 표본은 1행
+  [TEST 02] 버퍼 → 묶음 저장 (표본마다 디스크 쓰기 없음) + 기록 1회 비용
+  [TEST 03] 보관 기간 (1초 1일 / 1분 30일 / 1시간 계속) + 조회 단위 자동 선택
+  [TEST 04] 최대 낙폭 (직전 구간까지의 최고 자산 대비) - 단위와 무관하게 같은 값
+  [TEST 05] 판정 1회 → 총자산 / 손실률 기록 (run_cycle)
+
+실행 방법:
+    python -m test.equitytest
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import database as db
+import upbit_client as client
+import equity
+import strategy
+
+HOUR_MS = 3_600_000
+HOUR    = 3600
+DAY     = 24 * HOUR
+TICKER  = "XRP/KRW"
+
+# ============================================================
+# 0. 가짜 업비트 API
+# ============================================================
+
+class FakeUpbit:
+    """현재가 / 잔고 / 1시간봉 (1000 횡보)"""
+
+    def __init__(self):
+        self.price = 1000.0
+        self.krw   = 10_000_000.0
+        self.coin  = 100.0
+
+    def fetch_tickers(self, tickers):
+        return {t: {"close": self.price} for t in tickers}
+
+    def fetch_balance(self):
+        info = [{"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0"},
+                {"currency": "XRP", "balance": str(self.coin), "avg_buy_price": "1000"}]
+        return {"info": info, "total": {"KRW": self.krw, "XRP": self.coin}}
+
+    def fetch_ohlcv(self, ticker, timeframe="1h", limit=200):
+        end_ms = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        return [[end_ms - (limit - 1 - i) * HOUR_MS, 1000.0, 1001.0, 999.0, 1000.0, 10.0]
+                for i in range(limit)]
+
+
+PATCHED = ("fetch_tickers", "fetch_balance", "fetch_ohlcv")
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def fresh_db() -> str:
+    db.DB_NAME = os.path.join(tempfile.mkdtemp(prefix="zillion_equity_"), "trading.db")
+    db.init_db()
+    return db.DB_NAME
+
+def row_counts() -> dict:
+    conn = sqlite3.connect(db.DB_NAME)
+    counts = dict(conn.execute("SELECT resolution, COUNT(*) FROM equity GROUP BY resolution").fetchall())
+    conn.close()
+    return counts
+
+def random_walk(n: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 10_000_000.0 + np.cumsum(rng.normal(0, 5_000, n))
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_downsampling():
+    print_header("[TEST 01] 1초 / 1분 / 1시간 구간 집계")
+    fresh_db()
+    start = int(time.time()) // HOUR * HOUR - 3 * HOUR
+    ts    = start + np.arange(3 * HOUR * 2) * 0.5                  # 3시간, 초당 2개
+    eq    = random_walk(len(ts))
+    dd    = (eq - eq[0]) / eq[0] * 100
+
+    rec = equity.EquityRecorder(flush_sec=10)
+    for t, e, d in zip(ts, eq, dd):
+        rec.record(float(e), float(d), float(t))
+    rec.flush(ts[-1] + 1)
+    db.flush(10)
+    print(f"    표본 {rec.samples:,}개 | 저장 요청 {rec.flushes}회 | 행 수 {row_counts()}")
+    check(row_counts() == {1: 3 * HOUR, 60: 3 * 60, 3600: 3}, "1초 10,800 / 1분 180 / 1시간 3행")
+
+    frame = pd.DataFrame({"eq": eq, "dd": dd}, index=pd.to_datetime(ts, unit="s"))
+    ok = True
+    for resolution, rule in ((1, "1s"), (60, "1min"), (3600, "1h")):
+        data = equity.series(start, start + 3 * HOUR, resolution)
+        g = frame.resample(rule)
+        expected = (g["eq"].last(), g["eq"].min(), g["eq"].max(), g["dd"].last(), g["dd"].min())
+        ok &= np.array_equal(data["ts"], start + np.arange(3 * HOUR // resolution) * resolution)
+        ok &= all(np.allclose(data[name], e.to_numpy())
+                  for name, e in zip(equity.SERIES_COLUMNS, expected))
+    check(ok, "구간 마지막 / 최저 / 최고 = pandas resample (묶음 경계를 넘는 구간 포함)")
+    check(equity.series(start, start + 2, 1)["equity"][0] == eq[1], "같은 초의 표본은 1행 (마지막 값)")
+
+
+def test_2_batched_writes():
+    print_header("[TEST 02] 버퍼 → 묶음 저장")
+    fresh_db()
+    store = db.db_store()
+    rec   = equity.EquityRecorder(flush_sec=10)
+    start = time.time() - 600
+    before = store.written
+
+    started = time.perf_counter()
+    for i in range(600):                                      # 10분 = 초당 1개
+        rec.record(10_000_000.0 + i, 0.0, start + i)
+    cost = (time.perf_counter() - started) / 600
+    rec.flush(start + 600)
+    db.flush(10)
+
+    jobs = store.written - before
+    print(f"    표본 600개 → 쓰기 작업 {jobs}개 | 기록 1회 {cost * 1e6:.1f}µs")
+    check(rec.flushes == jobs and jobs <= 61, "10초마다 1번만 쓰기 스레드로 (표본마다 쓰기 없음)")
+    rec.record(1.0, 0.0, start + 601)
+    db.flush(10)
+    check(row_counts()[1] == 600, "flush 전 표본은 버퍼에만 있음")
+    check(cost < 50e-6, "판정 루프 부담 50µs 미만")
+
+
+def test_3_retention():
+    print_header("[TEST 03] 보관 기간 / 조회 단위")
+    fresh_db()
+    now = int(time.time()) // 60 * 60
+    rec = equity.EquityRecorder(flush_sec=10)
+    original = equity._default
+    equity._default = rec
+    try:
+        for age in (40 * DAY, 10 * DAY, 2 * HOUR):                # 시점마다 2분씩
+            for i in range(120):
+                rec.record(10_000_000.0, 0.0, now - age + i)
+        rec.flush(now)
+        db.flush(10)
+
+        counts = row_counts()
+        print(f"    행 수 {counts}")
+        check(counts[1] == 120, "1초 구간: 최근 1일만 (2시간 전 120행)")
+        check(counts[60] == 4, "1분 구간: 최근 30일만 (10일 전 / 2시간 전 2행씩)")
+        check(counts[3600] == 3, "1시간 구간: 전부 보관")
+
+        picks = [rec.resolution_for(now - age, now) for age in (3 * HOUR, 15 * DAY, 60 * DAY)]
+        check(picks == [1, 60, 3600] and rec.resolution_for(None) == 3600,
+              "조회 단위: 3시간 전 → 1초 / 15일 전 → 1분 / 60일 전 → 1시간")
+        check(len(equity.series(now - 60 * DAY)["ts"]) == 3 and len(equity.series(now - 3 * HOUR)["ts"]) == 120,
+              "series(start) = start 이후가 남아 있는 가장 작은 단위")
+    finally:
+        equity._default = original
+
+
+def test_4_peak_drawdown():
+    print_header("[TEST 04] 최대 낙폭")
+    fresh_db()
+    start = int(time.time()) // HOUR * HOUR - 3 * HOUR
+    path  = np.concatenate([np.linspace(100, 120, HOUR), np.linspace(120, 90, HOUR), np.linspace(90, 110, HOUR)])
+    rec   = equity.EquityRecorder(flush_sec=60)
+    for i, e in enumerate(path):
+        rec.record(float(e), (e - 100.0), start + i)
+    rec.flush(start + 3 * HOUR)
+    db.flush(10)
+
+    result = {r: equity.peak_drawdown(equity.series(start, resolution=r)) for r in equity.RESOLUTIONS}
+    print(f"    단위별 최대 낙폭: {result}")
+    check(all(abs(v - -25.0) < 1e-6 for v in result.values()), "120 → 90 = -25% (1초 / 1분 / 1시간 같음)")
+    check(equity.peak_drawdown({}) == 0.0, "기록 없음 → 0")
+
+
+def test_5_run_cycle():
+    print_header("[TEST 05] 판정 루프 → 자산 추이")
+    fresh_db()
+    fake = FakeUpbit()
+    for name in PATCHED:
+        setattr(client.upbit, name, getattr(fake, name))
+    client._candle_cache.clear()
+    client.account.invalidate()
+
+    rec = equity.EquityRecorder()
+    original = (strategy.equity_recorder, config.UPBIT_ASYNC, config.ENTRY_START_HOUR, config.ENTRY_END_HOUR)
+    strategy.equity_recorder, config.UPBIT_ASYNC = rec, False
+    config.ENTRY_START_HOUR = config.ENTRY_END_HOUR = -1         # 매수 판정 생략
+    try:
+        m = strategy.Market(TICKER)
+        initial = fake.krw + fake.coin * fake.price
+        strategy.run_cycle(None, [m], initial)
+        fake.price = 1010.0
+        client.account.invalidate()
+        strategy.run_cycle(None, [m], initial)
+    finally:
+        (strategy.equity_recorder, config.UPBIT_ASYNC,
+         config.ENTRY_START_HOUR, config.ENTRY_END_HOUR) = original
+
+    rec.flush()
+    db.flush(10)
+    data = equity.series(time.time() - 60, resolution=60)
+    expected = fake.krw + fake.coin * 1010.0
+    dd = (expected - initial) / initial * 100
+    print(f"    표본 {rec.samples}개 | 마지막 총자산 {data['equity'][-1]:,.0f}원 | 손실률 {data['drawdown'][-1]:.3f}%")
+    check(rec.samples == 2, "판정마다 1개")
+    check(data["equity"][-1] == expected and abs(data["drawdown"][-1] - dd) < 1e-9,
+          "총자산 = 원화 + 평가금액, 손실률 = 초기 자산 대비")
+    check(data["equity_min"].min() == initial, "구간 최저 = 상승 전 총자산")
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = db.DB_NAME
+    tests = [
+        test_1_downsampling,
+        test_2_batched_writes,
+        test_3_retention,
+        test_4_peak_drawdown,
+        test_5_run_cycle,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    db.close()
+    db.DB_NAME = original
+    print("\n" + "=" * 65)
+    print(f"  🏁 자산 추이 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
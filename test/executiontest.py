@@ -0,0 +1,239 @@
+"""
+주문 체결 확인 테스트 (가짜 업비트 주문 API - 주문 후 몇 번째 조회에서 체결되는지 조절)
+
+테스트 항목:
+  [TEST 01] 시장가 매수 → 현재가 조회 없이 주문 1회
+  [TEST 02] 체결될 때까지 짧은 간격부터 늘려 가며 조회 → 실제 체결가 / 수량 / 수수료
+  [TEST 03] 시장가 매수 잔량 취소(cancel) 상태도 체결 완료로 처리 / 체결 없는 취소 → None
+  [TEST 04] 시간 초과 → 확인된 체결분만 / 체결 내역이 전혀 없으면 판정가 기준 추정
+  [TEST 05] 전략 매매 기록(db.log_trade)에 추정값 대신 실제 체결 내역 저장
+
+실행 방법:
+    python -m test.executiontest
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import database as db
+import upbit_client as client
+import execution
+import strategy
+
+# ============================================================
+# 0. 가짜 업비트 주문 API
+# ============================================================
+
+class FakeExchange:
+    """
+    ccxt 주문 구조를 흉내 내는 가짜 거래소
+    - fill_after: 주문 후 이 횟수만큼 조회해야 체결 완료 (그 전엔 open)
+    - slippage  : 체결가 = 판정가 * (1 + slippage)
+    - final     : 체결 완료 상태 ("closed" / "canceled")
+    """
+
+    def __init__(self, price: float = 500.0, fill_after: int = 2, slippage: float = 0.002,
+                 final: str = "closed", fee_rate: float = 0.0005):
+        self.price      = price
+        self.fill_after = fill_after
+        self.slippage   = slippage
+        self.final      = final
+        self.fee_rate   = fee_rate
+        self.partial    = None       # 체결 완료 전 조회에서 보여 줄 부분 체결 수량
+        self.calls      = {"fetch_ticker": 0, "create_order": 0, "fetch_order": 0}
+        self.poll_times: list[float] = []
+        self.orders     = {}
+        self.krw, self.coin, self.avg = 1_000_000.0, 0.0, 0.0
+
+    def fetch_ticker(self, ticker):
+        self.calls["fetch_ticker"] += 1
+        return {"close": self.price}
+
+    def fetch_tickers(self, tickers):
+        return {t: {"close": self.price} for t in tickers}
+
+    def fetch_balance(self):
+        info = [{"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0"},
+                {"currency": "XRP", "balance": str(self.coin), "avg_buy_price": str(self.avg)}]
+        return {"info": info, "total": {"KRW": self.krw, "XRP": self.coin}}
+
+    def create_market_buy_order(self, ticker, krw):
+        fill_price = self.price * (1 + self.slippage)
+        return self._create(ticker, "buy", krw / fill_price, fill_price)
+
+    def create_market_sell_order(self, ticker, amount):
+        return self._create(ticker, "sell", amount, self.price * (1 - self.slippage))
+
+    def fetch_order(self, order_id, ticker=None):
+        self.calls["fetch_order"] += 1
+        self.poll_times.append(time.monotonic())
+        o = self.orders[order_id]
+        o["polls"] += 1
+        if o["polls"] >= self.fill_after and self.fill_after >= 0:
+            return self._view(o, self.final, o["amount"])
+        return self._view(o, "open", self.partial or 0.0)
+
+    def _create(self, ticker, side, amount, fill_price):
+        self.calls["create_order"] += 1
+        order_id = f"uuid-{self.calls['create_order']}"
+        self.orders[order_id] = {"id": order_id, "ticker": ticker, "side": side, "amount": amount,
+                                 "fill_price": fill_price, "polls": 0}
+        return self._view(self.orders[order_id], "open", 0.0)
+
+    def _view(self, o: dict, status: str, filled: float) -> dict:
+        trades = [{"price": o["fill_price"], "amount": filled}] if filled else []
+        cost   = o["fill_price"] * filled
+        return {"id": o["id"], "symbol": o["ticker"], "side": o["side"], "status": status,
+                "filled": filled, "cost": cost, "average": o["fill_price"] if filled else None,
+                "fee": {"currency": "KRW", "cost": cost * self.fee_rate}, "trades": trades}
+
+
+PATCHED = ("fetch_ticker", "fetch_tickers", "fetch_balance",
+           "create_market_buy_order", "create_market_sell_order", "fetch_order")
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def setup(**kw) -> FakeExchange:
+    fake = FakeExchange(**kw)
+    for name in PATCHED:
+        setattr(client.upbit, name, getattr(fake, name))
+    client.account.invalidate()
+    return fake
+
+def close(a: float, b: float, tol: float = 1e-9) -> bool:
+    return abs(a - b) <= tol * max(1.0, abs(b))
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_no_price_lookup():
+    print_header("[TEST 01] 매수 주문 전 현재가 조회 없음")
+    fake = setup(fill_after=1)
+    execution.market_buy("XRP/KRW", 100_000, 500.0)
+    print(f"    현재가 조회 {fake.calls['fetch_ticker']}회 | 주문 {fake.calls['create_order']}회")
+    check(fake.calls["fetch_ticker"] == 0 and fake.calls["create_order"] == 1, "주문 1회만 전송")
+
+
+def test_2_poll_until_filled():
+    print_header("[TEST 02] 체결될 때까지 폴링 → 실제 체결 내역")
+    fake = setup(fill_after=4, slippage=0.004)
+    started = time.monotonic()
+    fill = execution.market_buy("XRP/KRW", 100_000, 500.0)
+    elapsed = time.monotonic() - started
+    expected_price = 500.0 * 1.004
+    gaps = [b - a for a, b in zip([started] + fake.poll_times, fake.poll_times)]
+    print(f"    {fill} | 조회 {fake.calls['fetch_order']}회 | {elapsed * 1000:.0f}ms")
+    print(f"    조회 간격(ms): {[round(g * 1000) for g in gaps]}")
+    check(fill is not None and not fill.estimated, "체결 내역 수신 (추정값 아님)")
+    check(close(fill.price, expected_price) and close(fill.amount, 100_000 / expected_price),
+          f"체결가 {fill.price:,.2f} (판정가 500) / 수량 {fill.amount:.4f}")
+    check(close(fill.fee, 100_000 * 0.0005), f"수수료 {fill.fee:,.2f}원")
+    check(fake.calls["fetch_order"] == 4, "체결 완료 시점에 조회 중단")
+    check(all(b >= a * 1.5 for a, b in zip(gaps[1:], gaps[2:])), "조회 간격이 점점 늘어남 (백오프)")
+    check(elapsed < 1.0, "빠른 체결은 1초 안에 확인")
+
+
+def test_3_canceled_market_buy():
+    print_header("[TEST 03] 잔량 취소(cancel)로 끝난 시장가 매수")
+    setup(fill_after=1, final="canceled")
+    fill = execution.market_buy("XRP/KRW", 100_000, 500.0)
+    check(fill is not None and fill.amount > 0 and not fill.estimated, "체결분이 있으면 체결 완료로 처리")
+
+    fake = setup(fill_after=1, final="canceled")
+    order = fake.create_market_sell_order("XRP/KRW", 10.0)
+    fake.orders[order["id"]]["amount"] = 0.0
+    fill = execution.wait_fill(order, "XRP/KRW", "sell", 500.0, 10.0)
+    check(fill is None, "체결 없이 취소 → None (기록 안 함)")
+    check(execution.wait_fill(None, "XRP/KRW", "sell", 500.0, 10.0) is None, "주문 실패 → None")
+
+
+def test_4_timeout():
+    print_header("[TEST 04] 체결 확인 시간 초과")
+    fake = setup(fill_after=10**6)
+    fake.partial = 40.0
+    started = time.monotonic()
+    order = fake.create_market_sell_order("XRP/KRW", 100.0)
+    fill = execution.wait_fill(order, "XRP/KRW", "sell", 500.0, 100.0, timeout=0.5)
+    elapsed = time.monotonic() - started
+    print(f"    {fill} | {elapsed:.2f}초")
+    check(fill is not None and fill.amount == 40.0 and not fill.estimated, "확인된 부분 체결분만 기록")
+    check(0.45 <= elapsed < 1.0, "timeout 안에서 종료")
+
+    fake.partial = None
+    order = fake.create_market_sell_order("XRP/KRW", 100.0)
+    fill = execution.wait_fill(order, "XRP/KRW", "sell", 500.0, 100.0, timeout=0.2)
+    check(fill is not None and fill.estimated and fill.price == 500.0 and fill.amount == 100.0,
+          "체결 내역 없음 → 판정가 기준 추정값 (estimated)")
+    fill = execution.wait_fill({"status": "ok"}, "XRP/KRW", "buy", 500.0, 200.0)
+    check(fill.estimated and fill.amount == 200.0, "주문 id 없는 응답 → 추정값")
+
+
+def test_5_strategy_logs_fill():
+    print_header("[TEST 05] 전략 매매 기록 = 실제 체결 내역")
+    fake = setup(fill_after=1, slippage=0.01)
+    fake.coin, fake.avg = 100.0, 600.0
+    logged = []
+    original = (db.log_trade, config.UPBIT_ASYNC, config.TELEGRAM_BOT_TOKEN)
+    db.log_trade = lambda *a, **kw: logged.append((a, kw))
+    config.UPBIT_ASYNC, config.TELEGRAM_BOT_TOKEN = False, None
+    try:
+        m = strategy.Market("XRP/KRW")
+        # 초기 자산을 크게 잡아서 계좌 손실 한도 → 전체 청산 경로 실행
+        running = strategy.run_cycle(None, [m], initial_equity=10_000_000.0)
+    finally:
+        db.log_trade, config.UPBIT_ASYNC, config.TELEGRAM_BOT_TOKEN = original
+
+    args = logged[0][0] if logged else ()
+    print(f"    기록: {args}")
+    check(not running and len(logged) == 1, "손실 한도 → 매도 1건 기록")
+    check(close(args[2], 500.0 * 0.99) and close(args[3], 100.0), f"가격 = 체결가 {500 * 0.99:,.0f} (판정가 500 아님)")
+    check(close(args[5], (500.0 * 0.99 - 600.0) * 100.0), "실현손익도 체결가 기준")
+    check(close(args[7], 500.0 * 0.99 * 100.0 * 0.0005), "수수료 기록")
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    config.EXEC_POLL_INTERVAL_SEC = 0.02
+    config.EXEC_POLL_MAX_SEC      = 0.2
+    tests = [
+        test_1_no_price_lookup,
+        test_2_poll_until_filled,
+        test_3_canceled_market_buy,
+        test_4_timeout,
+        test_5_strategy_logs_fill,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 주문 체결 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,229 @@
+"""
+지표 라이브러리 테스트 (배치형 == 스트리밍형)
+
+테스트 항목:
+  [TEST 01] ATR → 배치형 == 스트리밍 update() == 기존 pandas 계산
+  [TEST 02] 돈치안 채널 / 최고·최저 → 배치형과 비트 단위로 동일 (단조 덱)
+  [TEST 03] RSI → 배치형 == 스트리밍 update() (횡보 구간 포함)
+  [TEST 04] 형성 중인 봉 peek() → 그 봉까지 넣은 배치형 마지막 값과 동일, 상태는 그대로
+  [TEST 05] 실시간 터틀 지표 → 새 봉 마감 시에만 갱신 + 데이터가 바뀌면 재계산
+
+실행 방법:
+    python -m test.indicatortest
+"""
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import indicators
+import strategy
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+RTOL = 1e-12   # 평균 기반 지표 (합산 순서 차이에 의한 반올림 오차만 허용)
+
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def make_bars(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """랜덤워크 고가/저가/종가 + 완전 횡보 구간 (변화량 0 → RSI 경계값 확인용)"""
+    rng   = np.random.default_rng(seed)
+    close = 500 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[n // 2: n // 2 + 40] = close[n // 2]
+    high  = close * (1 + np.abs(rng.normal(0, 0.005, n)))
+    low   = close * (1 - np.abs(rng.normal(0, 0.005, n)))
+    return high, low, close
+
+def same(a, b, rtol: float = 0.0) -> bool:
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return False
+    if rtol == 0.0:
+        return np.array_equal(a, b, equal_nan=True)
+    return np.allclose(a, b, rtol=rtol, atol=0.0, equal_nan=True)
+
+def max_rel(a, b) -> float:
+    a, b = np.asarray(a), np.asarray(b)
+    m = ~np.isnan(a) & (b != 0)
+    return float(np.max(np.abs(a[m] - b[m]) / np.abs(b[m]))) if m.any() else 0.0
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_atr():
+    print_header("[TEST 01] ATR 배치형 == 스트리밍형")
+    high, low, close = make_bars(100_000)
+    for period in (14, 20, 55):
+        batch  = indicators.atr(high, low, close, period)
+        stream = indicators.ATR(period)
+        online = [stream.update(h, l, c) for h, l, c in zip(high.tolist(), low.tolist(), close.tolist())]
+        check(same(online, batch, RTOL), f"period {period:<2} | 10만 봉 최대 상대오차 {max_rel(online, batch):.1e}")
+
+    df  = pd.DataFrame({"high": high, "low": low, "close": close})
+    tr  = pd.concat([df["high"] - df["low"], (df["high"] - df["close"].shift(1)).abs(),
+                     (df["low"] - df["close"].shift(1)).abs()], axis=1).max(axis=1)
+    old = tr.rolling(window=20).mean().to_numpy()
+    check(same(indicators.atr(high, low, close, 20), old), "배치형 == 기존 pandas 계산 (비트 단위)")
+
+
+def test_2_donchian():
+    print_header("[TEST 02] 돈치안 채널 / 최고·최저")
+    high, low, _ = make_bars(50_000, seed=1)
+    for period in (10, 20, 55):
+        upper, lower = indicators.donchian_upper(high, period), indicators.donchian_lower(low, period)
+        channel = indicators.Donchian(period)
+        online  = np.array([channel.update(h, l) for h, l in zip(high.tolist(), low.tolist())])
+        check(same(online[:, 0], upper) and same(online[:, 1], lower),
+              f"period {period:<2} | 상단/하단 비트 단위 동일")
+
+        mx, mn = indicators.RollingMax(period), indicators.RollingMin(period)
+        ok = same([mx.update(x) for x in high.tolist()], indicators.rolling_max(high, period))
+        ok &= same([mn.update(x) for x in low.tolist()], indicators.rolling_min(low, period))
+        check(ok and len(mx._deque) <= period, f"period {period:<2} | 최고/최저 동일, 덱 크기 {len(mx._deque)} ≤ {period}")
+
+    old = pd.Series(high).shift(1).rolling(window=20).max().to_numpy()
+    check(same(indicators.donchian_upper(high, 20), old), "상단 == 기존 high.shift(1).rolling().max()")
+
+
+def test_3_rsi():
+    print_header("[TEST 03] RSI 배치형 == 스트리밍형")
+    _, _, close = make_bars(50_000, seed=2)
+    batch  = indicators.rsi(close, 14)
+    stream = indicators.RSI(14)
+    online = [stream.update(c) for c in close.tolist()]
+    flat   = slice(25_000 + 14, 25_000 + 40)
+    check(same(online, batch, RTOL), f"5만 봉 최대 상대오차 {max_rel(online, batch):.1e}")
+    check(np.isnan(batch[flat]).all() and np.isnan(np.array(online)[flat]).all(), "변화 없는 구간 → 둘 다 NaN")
+
+    s = pd.Series(close)
+    delta = s.diff()
+    gain  = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss  = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    old   = (100 - 100 / (1 + gain / loss)).to_numpy()
+    check(same(batch, old), "배치형 == 기존 calculate_rsi (비트 단위)")
+
+
+def test_4_peek():
+    print_header("[TEST 04] 형성 중인 봉 peek()")
+    high, low, close = make_bars(300, seed=3)
+    atr, ch, rsi = indicators.ATR(20), indicators.Donchian(20), indicators.RSI(14)
+    mx = indicators.RollingMax(20)
+    ok_atr = ok_rsi = ok_max = True
+    for i in range(299):
+        atr.update(high[i], low[i], close[i])
+        ch.update(high[i], low[i])
+        rsi.update(close[i])
+        mx.update(high[i])
+        # 다음 봉이 형성 중이라고 보고 여러 틱 peek
+        for tick in (0.97, 1.0, 1.03):
+            h, l, c = high[i + 1] * tick, low[i + 1] * tick, close[i + 1] * tick
+            H, L, C = np.r_[high[:i + 1], h], np.r_[low[:i + 1], l], np.r_[close[:i + 1], c]
+            ok_atr &= same([atr.peek(h, l)], indicators.atr(H, L, C, 20)[-1:], RTOL)
+            ok_rsi &= same([rsi.peek(c)], indicators.rsi(C, 14)[-1:], RTOL)
+            ok_max &= same([mx.peek(h)], indicators.rolling_max(H, 20)[-1:])
+    check(ok_atr, "ATR peek == 형성 중인 봉까지 넣은 배치형 마지막 값")
+    check(ok_rsi, "RSI peek == 배치형 마지막 값")
+    check(ok_max, "최고가 peek == 배치형 마지막 값")
+    check(same([ch.upper], [high[-21:-1].max()]) and same([atr.value], indicators.atr(high[:-1], low[:-1], close[:-1], 20)[-1:], RTOL),
+          "peek 후에도 상태는 마감 봉 기준 그대로")
+
+
+def test_5_live_turtle():
+    print_header("[TEST 05] 실시간 터틀 지표")
+    high, low, close = make_bars(400, seed=4)
+    ts = 1_700_000_000_000 + np.arange(400, dtype=np.int64) * 3_600_000
+
+    def frame(end: int, forming_close: float | None = None) -> pd.DataFrame:
+        df = pd.DataFrame({"timestamp": ts[end - 200:end], "open": close[end - 200:end],
+                           "high": high[end - 200:end], "low": low[end - 200:end],
+                           "close": close[end - 200:end], "volume": 1000.0})
+        if forming_close is not None:
+            df.loc[df.index[-1], ["high", "low", "close"]] = [forming_close * 1.01, forming_close * 0.99, forming_close]
+        return df
+
+    def expected(df: pd.DataFrame) -> tuple:
+        P = config.TURTLE_ENTRY_PERIOD
+        return (strategy.calculate_atr(df, config.TURTLE_ATR_PERIOD).iloc[-1],
+                df["high"].iloc[-(P + 1):-1].max(), df["close"].iloc[-2])
+
+    strategy._live_ind.clear()
+    ok, rebuilds = True, 0
+    for end in range(200, 400):
+        for tick in (None, close[end - 1] * 1.02):        # 같은 봉 안에서 틱 변화
+            df = frame(end, tick)
+            before = strategy._live_ind.get("atr")
+            got = strategy.turtle_indicators(df)
+            rebuilds += strategy._live_ind["atr"] is not before
+            ok &= same(got, expected(df), RTOL)
+    check(ok, "200개 봉 × 틱 2회 → (ATR, 진입 고점, 직전 종가) == 기존 DataFrame 계산")
+    check(rebuilds == 1, f"처음 1회만 전체 계산, 이후 증분 갱신 | 재계산 {rebuilds}회")
+
+    df = frame(300)
+    df.loc[df.index[-5], "high"] *= 1.5                   # 같은 시각, 다른 캔들
+    got = strategy.turtle_indicators(df)
+    check(same(got, expected(df), RTOL), "마감 봉 값이 달라지면 처음부터 재계산")
+
+    original = config.TURTLE_ATR_PERIOD
+    config.TURTLE_ATR_PERIOD = 14
+    try:
+        df = frame(310)
+        check(same(strategy.turtle_indicators(df), expected(df), RTOL), "기간 설정이 바뀌면 재계산")
+    finally:
+        config.TURTLE_ATR_PERIOD = original
+
+    df = frame(399)
+    strategy.turtle_indicators(df)
+    started = time.perf_counter()
+    for _ in range(1000):
+        strategy.turtle_indicators(df)
+    inc = (time.perf_counter() - started) / 1000
+    started = time.perf_counter()
+    for _ in range(200):
+        expected(df)
+    full = (time.perf_counter() - started) / 200
+    print(f"    1회 판정당: 증분 {inc * 1e6:,.0f}µs / 기존 DataFrame 전체 계산 {full * 1e6:,.0f}µs")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    tests = [
+        test_1_atr,
+        test_2_donchian,
+        test_3_rsi,
+        test_4_peek,
+        test_5_live_turtle,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 지표 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
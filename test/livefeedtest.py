@@ -0,0 +1,338 @@
+"""
+웹소켓 실시간 시세 테스트 (로컬 가짜 업비트 웹소켓 서버 사용)
+
+테스트 항목:
+  [TEST 01] 구독 메시지 전송 + 체결가 수신 (판정 중 쌓인 틱은 최신가 1개로 합침)
+  [TEST 02] 서버가 연결을 끊음 → 즉시 REST 폴백 신호(None) → 자동 재연결 후 수신 재개
+  [TEST 03] 웹소켓 루프 → 체결마다 판정, 끊긴 동안만 REST 현재가 조회, 손실 한도 시 종료
+
+실행 방법:
+    python -m test.livefeedtest
+"""
+
+import sys
+import os
+import json
+import time
+import base64
+import hashlib
+import socket
+import struct
+import threading
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import strategy
+import upbit_client as client
+import upbit_ws
+
+# ============================================================
+# 0. 가짜 업비트 웹소켓 서버 (RFC 6455 최소 구현)
+# ============================================================
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeUpbitWS:
+    """
+    로컬 웹소켓 서버
+    - 클라이언트가 보낸 구독 메시지를 subscriptions에 기록
+    - send_ticker(): 접속 중인 모든 클라이언트에 업비트 ticker 형식 바이너리 프레임 전송
+    - drop()      : 접속 중인 연결을 강제로 끊음 (네트워크 단절 흉내)
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.clients: list[socket.socket] = []
+        self.subscriptions: list = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        try:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                request += conn.recv(4096)
+            headers = dict(
+                line.split(": ", 1) for line in request.decode().split("\r\n")[1:] if ": " in line
+            )
+            accept = base64.b64encode(
+                hashlib.sha1((headers["Sec-WebSocket-Key"] + WS_GUID).encode()).digest()
+            ).decode()
+            conn.sendall(
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+            )
+            with self._lock:
+                self.clients.append(conn)
+                self.connections += 1
+
+            while True:
+                opcode, payload = self._recv_frame(conn)
+                if opcode == 0x8:       # close → 응답 후 종료
+                    self._send_frame(conn, 0x8, payload)
+                    break
+                if opcode == 0x9:       # ping → pong
+                    self._send_frame(conn, 0xA, payload)
+                elif opcode in (0x1, 0x2):
+                    self.subscriptions.append(json.loads(payload))
+        except (OSError, ConnectionError, KeyError, struct.error):
+            pass
+        finally:
+            with self._lock:
+                if conn in self.clients:
+                    self.clients.remove(conn)
+            conn.close()
+
+    @staticmethod
+    def _recv_exact(conn: socket.socket, n: int) -> bytes:
+        buf = b""
+        while len(buf) < n:
+            chunk = conn.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("closed")
+            buf += chunk
+        return buf
+
+    def _recv_frame(self, conn: socket.socket) -> tuple[int, bytes]:
+        b1, b2 = self._recv_exact(conn, 2)
+        length = b2 & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(conn, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(conn, 8))[0]
+        mask = self._recv_exact(conn, 4) if b2 & 0x80 else b"\0\0\0\0"
+        data = self._recv_exact(conn, length)
+        return b1 & 0x0F, bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+
+    @staticmethod
+    def _send_frame(conn: socket.socket, opcode: int, payload: bytes):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        else:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        conn.sendall(header + payload)
+
+    def send_ticker(self, code: str, price: float):
+        payload = json.dumps({
+            "type": "ticker", "code": code, "trade_price": price,
+            "trade_timestamp": int(time.time() * 1000), "stream_type": "REALTIME",
+        }).encode()
+        with self._lock:
+            for conn in list(self.clients):
+                try:
+                    self._send_frame(conn, 0x2, payload)   # 업비트는 바이너리 프레임으로 전송
+                except OSError:
+                    pass
+
+    def drop(self):
+        with self._lock:
+            for conn in self.clients:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                conn.close()
+            self.clients.clear()
+
+    def close(self):
+        self.drop()
+        self.sock.close()
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+CODE = "KRW-XRP"
+
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def wait_until(cond, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+def flat_df(price: float, n: int = 40) -> pd.DataFrame:
+    """돌파가 일어나지 않는 횡보 1시간봉"""
+    now_ms = int(time.time()) * 1000
+    rows = [[now_ms + i * 3_600_000, price, price + 10, price - 10, price, 1000.0] for i in range(n)]
+    return pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_subscribe_and_receive(server: FakeUpbitWS):
+    print_header("[TEST 01] 구독 + 체결가 수신")
+    stream = upbit_ws.TickerStream([CODE], url=server.url)
+    stream.start()
+    try:
+        check(wait_until(lambda: stream.connected), "연결됨")
+        check(wait_until(lambda: server.subscriptions), "구독 메시지 수신")
+        sub = server.subscriptions[-1]
+        check(sub[1]["type"] == "ticker" and sub[1]["codes"] == [CODE], f"구독 내용 | {sub[1]}")
+
+        for p in (100.0, 101.0, 102.0):
+            server.send_ticker(CODE, p)
+        wait_until(lambda: stream.messages == 3)
+        check(stream.next_price(CODE, timeout=1) == 102.0, "쌓인 틱 3개 → 최신가 102 1개로 반환")
+
+        started = time.time()
+        check(stream.next_price(CODE, timeout=0.3) is None and time.time() - started >= 0.25,
+              "새 체결 없으면 timeout 후 None")
+
+        server.send_ticker(CODE, 103.0)
+        check(stream.next_price(CODE, timeout=1) == 103.0, "다음 체결 103 수신")
+        check(stream.latest(CODE)[0] == 103.0, "latest() == 103")
+    finally:
+        stream.stop()
+        server.drop()
+
+
+def test_2_reconnect(server: FakeUpbitWS):
+    print_header("[TEST 02] 연결 끊김 → REST 폴백 신호 → 자동 재연결")
+    stream = upbit_ws.TickerStream([CODE], url=server.url)
+    stream.start()
+    try:
+        wait_until(lambda: stream.connected)
+        before = server.connections
+
+        server.drop()
+        check(wait_until(lambda: not stream.connected, 2), "끊김 감지 (connected = False)")
+        started = time.time()
+        check(stream.next_price(CODE, timeout=5) is None and time.time() - started < 0.5,
+              "끊긴 동안 next_price()는 기다리지 않고 바로 None")
+
+        check(wait_until(lambda: stream.connected, 5), f"자동 재연결 | reconnects={stream.reconnects}")
+        check(server.connections == before + 1, "서버 재접속 1회")
+        wait_until(lambda: len(server.subscriptions) >= 2)
+        server.send_ticker(CODE, 200.0)
+        check(stream.next_price(CODE, timeout=1) == 200.0, "재연결 후 체결 수신 재개")
+    finally:
+        stream.stop()
+        server.drop()
+
+
+def test_3_ws_loop(server: FakeUpbitWS):
+    print_header("[TEST 03] 웹소켓 루프 + REST 폴백")
+    calls = {"ticker": 0, "ohlcv": 0}
+    state = {"krw": 1_000_000.0}
+    steps = []
+
+    original = (client.get_balance, client.get_krw_balance, client.get_current_prices,
+                client.get_ohlcv, strategy.send_msg, strategy.run_cycle, config.LIVE_WS_STALE_SEC, config.UPBIT_ASYNC)
+
+    def fake_tickers(tickers):
+        calls["ticker"] += 1
+        return {t: 500.0 for t in tickers}
+
+    def fake_ohlcv(ticker, interval, max_age=None):
+        calls["ohlcv"] += 1
+        return flat_df(500.0)
+
+    def recording_cycle(bot_app, markets, initial_equity, prices=None):
+        steps.append(None if prices is None else prices[config.TICKER])
+        return original[5](bot_app, markets, initial_equity, prices)
+
+    client.get_balance       = lambda ticker: (0, 0)
+    client.get_krw_balance   = lambda: state["krw"]
+    client.get_current_prices = fake_tickers
+    client.get_ohlcv         = fake_ohlcv
+    strategy.send_msg        = lambda bot_app, text: print(f"  [TG] {text.splitlines()[0]}")
+    strategy.run_cycle       = recording_cycle
+    config.LIVE_WS_STALE_SEC = 1
+    config.UPBIT_ASYNC       = False
+
+    stream = upbit_ws.TickerStream([CODE], url=server.url)
+    markets = [strategy.Market(config.TICKER)]
+    loop = threading.Thread(target=strategy.run_ws_loop, args=(None, 1_000_000.0, stream, markets), daemon=True)
+    try:
+        loop.start()
+        check(wait_until(lambda: None in steps, 2), "연결 전에는 REST로 판정")
+        wait_until(lambda: stream.connected)
+        time.sleep(1.2)                            # 연결 전 REST 판정 뒤 1초 대기가 끝날 때까지
+        n, rest_calls = len(steps), calls["ticker"]
+
+        for p in (500.0, 501.0):
+            server.send_ticker(CODE, p)
+            wait_until(lambda: p in steps, 2)
+        check(steps[n:] == [500.0, 501.0], f"체결마다 판정 | {steps[n:]}")
+        check(calls["ticker"] == rest_calls, "웹소켓 수신 중 REST 현재가 조회 0회")
+
+        server.drop()
+        n = len(steps)
+        check(wait_until(lambda: None in steps[n:], 3), "끊긴 동안 REST로 판정")
+        check(calls["ticker"] > rest_calls, f"REST 현재가 조회 {calls['ticker'] - rest_calls}회 (폴백)")
+
+        check(wait_until(lambda: stream.connected, 5), "재연결")
+        n = len(steps)
+        state["krw"] = 1.0                         # 다음 판정에서 손실 한도 도달 → 루프 종료
+        server.send_ticker(CODE, 502.0)
+        loop.join(5)
+        check(502.0 in steps[n:], "재연결 후 체결가로 판정")
+        check(not loop.is_alive(), "손실 한도 도달 → 루프 종료")
+        check(not stream.connected or stream._stop.is_set(), "루프 종료 시 웹소켓 정리")
+    finally:
+        (client.get_balance, client.get_krw_balance, client.get_current_prices,
+         client.get_ohlcv, strategy.send_msg, strategy.run_cycle, config.LIVE_WS_STALE_SEC, config.UPBIT_ASYNC) = original
+        stream.stop()
+        server.drop()
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    server = FakeUpbitWS()
+    tests = [
+        test_1_subscribe_and_receive,
+        test_2_reconnect,
+        test_3_ws_loop,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t(server)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+    finally:
+        server.close()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 실시간 시세 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,267 @@
+"""
+멀티 마켓 러너 테스트 (가짜 업비트 API 사용)
+
+테스트 항목:
+  [TEST 01] 마켓별 파라미터 프리셋 (BTC 프리셋 / 그 외 TURTLE_* 기본값)
+  [TEST 02] 마켓별 상태 분리 (한 마켓 진입이 다른 마켓 / 기존 전역 상태에 영향 없음)
+  [TEST 03] 마켓 N개 판정 1회 → 현재가 API 1회 + 잔고 API 1회 (캔들은 동기화 간격마다만)
+  [TEST 04] 형성 중인 봉은 체결가로 갱신 / 봉 마감 시각이 지나면 캔들 재조회
+  [TEST 05] 계좌 손실 한도 → 전체 마켓 평가금액 기준, 전 마켓 청산 후 중단
+
+실행 방법:
+    python -m test.markettest
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import database as db
+import upbit_client as client
+import strategy
+
+HOUR_MS = 3_600_000
+TICKERS = ["XRP/KRW", "BTC/KRW", "ETH/KRW"]
+
+# ============================================================
+# 0. 가짜 업비트 API
+# ============================================================
+
+class FakeUpbit:
+    """
+    현재가 / 잔고 / 캔들 / 주문 API 기록
+    - 캔들: 마켓별 기준가 1000 횡보 (고가 1001 / 저가 999), 마지막 봉 = end_ms 시각에 열린 봉
+    """
+
+    def __init__(self, end_ms: int):
+        self.end_ms = end_ms
+        self.price  = {t: 1000.0 for t in TICKERS}
+        self.krw    = 10_000_000.0
+        self.coins  = {t.split("/")[0]: 0.0 for t in TICKERS}
+        self.avg    = {t.split("/")[0]: 0.0 for t in TICKERS}
+        self.calls  = {"fetch_tickers": 0, "fetch_ticker": 0, "fetch_balance": 0, "fetch_ohlcv": 0}
+
+    def fetch_tickers(self, tickers):
+        self.calls["fetch_tickers"] += 1
+        return {t: {"close": self.price[t]} for t in tickers}
+
+    def fetch_ticker(self, ticker):
+        self.calls["fetch_ticker"] += 1
+        return {"close": self.price[ticker]}
+
+    def fetch_balance(self):
+        self.calls["fetch_balance"] += 1
+        info = [{"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0"}]
+        info += [{"currency": c, "balance": str(a), "avg_buy_price": str(self.avg[c])} for c, a in self.coins.items()]
+        return {"info": info, "total": {"KRW": self.krw, **self.coins}}
+
+    def fetch_ohlcv(self, ticker, timeframe="1h", limit=200):
+        self.calls["fetch_ohlcv"] += 1
+        return [[self.end_ms - (limit - 1 - i) * HOUR_MS, 1000.0, 1001.0, 999.0, 1000.0, 10.0]
+                for i in range(limit)]
+
+    def create_market_buy_order(self, ticker, krw):
+        coin = ticker.split("/")[0]
+        self.krw -= krw
+        self.coins[coin] += krw / self.price[ticker]
+        self.avg[coin] = self.price[ticker]
+        return {"status": "ok"}
+
+    def create_market_sell_order(self, ticker, amount):
+        coin = ticker.split("/")[0]
+        self.coins[coin] -= amount
+        self.krw += amount * self.price[ticker]
+        return {"status": "ok"}
+
+
+PATCHED = ("fetch_tickers", "fetch_ticker", "fetch_balance", "fetch_ohlcv",
+           "create_market_buy_order", "create_market_sell_order")
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def current_hour_ms() -> int:
+    return int(time.time() * 1000) // HOUR_MS * HOUR_MS
+
+def setup(end_ms: int | None = None) -> FakeUpbit:
+    fake = FakeUpbit(current_hour_ms() if end_ms is None else end_ms)
+    for name in PATCHED:
+        setattr(client.upbit, name, getattr(fake, name))
+    client._candle_cache.clear()
+    client.account.invalidate()
+    return fake
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_presets():
+    print_header("[TEST 01] 마켓별 파라미터 프리셋")
+    xrp, btc = strategy.build_markets(["XRP/KRW", "BTC/KRW"])
+    check((xrp.params.entry_period, xrp.params.atr_period, xrp.params.risk_rate)
+          == (config.TURTLE_ENTRY_PERIOD, config.TURTLE_ATR_PERIOD, config.TURTLE_RISK_RATE),
+          f"XRP → TURTLE_* 기본값 | 진입 {xrp.params.entry_period}봉, ATR {xrp.params.atr_period}")
+    preset = config.MARKET_PRESETS["BTC/KRW"]
+    check((btc.params.entry_period, btc.params.atr_period, btc.params.risk_rate)
+          == (preset["entry_period"], preset["atr_period"], preset["risk_rate"]),
+          f"BTC → 프리셋 | 진입 {btc.params.entry_period}봉, ATR {btc.params.atr_period}, 리스크 {btc.params.risk_rate}%")
+    check(btc.params.trailing_multiplier == config.TURTLE_TRAILING_MULTIPLIER, "프리셋에 없는 항목은 기본값")
+    check((xrp.code, btc.code) == ("KRW-XRP", "KRW-BTC"), "웹소켓 마켓 코드")
+
+
+def test_2_state_isolation():
+    print_header("[TEST 02] 마켓별 상태 분리")
+    fake = setup()
+    strategy.turtle_units = 0
+    strategy.entry_highest_price = 0.0
+    markets = strategy.build_markets(TICKERS)
+    fake.price["XRP/KRW"] = 1050.0                       # XRP만 돌파
+
+    ok = strategy.run_cycle(None, markets, fake.krw, {t: fake.price[t] for t in TICKERS})
+    xrp, btc, eth = markets
+    check(ok, "판정 완료")
+    check(xrp.state.units == 1 and xrp.state.highest_price == 1050.0 and fake.coins["XRP"] > 0,
+          f"XRP 1유닛 진입 | 보유 {fake.coins['XRP']:.2f}개")
+    check(btc.state.units == 0 and eth.state.units == 0 and fake.coins["BTC"] == 0, "BTC / ETH 상태 그대로")
+    check(strategy.turtle_units == 0 and strategy.entry_highest_price == 0.0, "기존 단일 마켓 전역 상태 그대로")
+    check(xrp.ind["key"] == (xrp.params.atr_period, xrp.params.entry_period)
+          and btc.ind["key"] == (btc.params.atr_period, btc.params.entry_period)
+          and xrp.ind["atr"] is not btc.ind["atr"], "지표 상태도 마켓별 (기간이 달라도 서로 재계산 안 함)")
+
+
+def test_3_batched_requests():
+    print_header("[TEST 03] 마켓 N개 → 판정당 API 호출")
+    fake = setup()
+    config.ACCOUNT_MAX_AGE_SEC = 60.0
+    markets = strategy.build_markets(TICKERS)
+
+    cycles = 20
+    for _ in range(cycles):
+        strategy.run_cycle(None, markets, fake.krw)       # REST 폴링 (전체 현재가 일괄 조회)
+    c = fake.calls
+    check(c["fetch_tickers"] == cycles and c["fetch_ticker"] == 0,
+          f"마켓 {len(TICKERS)}개 × 판정 {cycles}회 → 현재가 API {c['fetch_tickers']}회")
+    check(c["fetch_balance"] == 1, f"잔고 API {c['fetch_balance']}회 (스냅샷 공유)")
+    check(c["fetch_ohlcv"] == len(TICKERS), f"캔들 API {c['fetch_ohlcv']}회 (마켓별 처음 1회만)")
+
+    before = dict(c)
+    for i in range(cycles):
+        strategy.run_cycle(None, markets, fake.krw, {"BTC/KRW": 1000.0 + i % 2})   # 웹소켓 체결
+    check(c["fetch_tickers"] == before["fetch_tickers"] and c["fetch_ohlcv"] == before["fetch_ohlcv"],
+          "웹소켓 체결가 판정 → 현재가 / 캔들 API 0회")
+
+    # 기존 방식 (마켓마다 별도 프로세스, 판정마다 현재가 + 캔들 + 잔고 1회씩)
+    legacy = len(TICKERS) * cycles * 3
+    ours = c["fetch_tickers"] + c["fetch_balance"] + c["fetch_ohlcv"]
+    print(f"    REST 판정 {cycles}회 기준: 마켓별 프로세스 약 {legacy}회 → {ours}회")
+
+
+def test_4_forming_bar_and_rollover():
+    print_header("[TEST 04] 형성 중인 봉 갱신 / 봉 마감 후 재조회")
+    fake = setup()
+    config.OHLCV_REFRESH_SEC = 0.2
+    m = strategy.build_markets(["XRP/KRW"])[0]
+    strategy.run_cycle(None, [m], fake.krw, {"XRP/KRW": 1000.0})
+    strategy.run_cycle(None, [m], fake.krw, {"XRP/KRW": 1003.0})
+    strategy.run_cycle(None, [m], fake.krw, {"XRP/KRW": 996.0})
+    df = client.get_ohlcv("XRP/KRW", "1h", max_age=60)
+    last = df.iloc[-1]
+    check((last["high"], last["low"], last["close"]) == (1003.0, 996.0, 996.0),
+          f"체결가 반영 | 고가 {last['high']:.0f} / 저가 {last['low']:.0f} / 종가 {last['close']:.0f}")
+    check(df["close"].iloc[-2] == 1000.0, "마감된 봉은 그대로")
+    check(fake.calls["fetch_ohlcv"] == 1, f"캔들 API {fake.calls['fetch_ohlcv']}회")
+
+    fake = setup(end_ms=current_hour_ms() - HOUR_MS)     # 캐시의 마지막 봉이 이미 마감됨
+    client.get_ohlcv("XRP/KRW", "1h", max_age=60)
+    check(not client.apply_price("XRP/KRW", "1h", 2000.0), "마감 시각이 지난 봉에는 체결가 반영 안 함")
+    client.get_ohlcv("XRP/KRW", "1h", max_age=60)
+    check(fake.calls["fetch_ohlcv"] == 1, "OHLCV_REFRESH_SEC 안에서는 재조회 안 함")
+    fake.end_ms = current_hour_ms()                      # 거래소에 새 봉이 열림
+    time.sleep(0.25)
+    df = client.get_ohlcv("XRP/KRW", "1h", max_age=60)
+    check(fake.calls["fetch_ohlcv"] == 2 and df["timestamp"].iloc[-1] == fake.end_ms,
+          "봉 마감 → 동기화 간격 전이라도 재조회해서 새 봉 추가")
+
+
+def test_5_drawdown_all_markets():
+    print_header("[TEST 05] 계좌 손실 한도 (전체 마켓 기준)")
+    fake = setup()
+    markets = strategy.build_markets(TICKERS)
+    fake.krw = 1_000_000.0
+    fake.coins.update(XRP=1000.0, BTC=1000.0)
+    fake.avg.update(XRP=1000.0, BTC=1000.0)
+    for m in markets[:2]:
+        m.state.units, m.state.next_add = 1, 1e9         # 추가 진입 없음
+    initial = 3_000_000.0
+
+    fake.price.update({"XRP/KRW": 800.0, "BTC/KRW": 800.0})      # 1,000,000 + 800,000 × 2 = -13%
+    check(strategy.run_cycle(None, markets, initial), "마켓별 -20%여도 계좌 기준 -13% → 계속")
+
+    client.account.invalidate()
+    fake.price.update({"XRP/KRW": 500.0, "BTC/KRW": 500.0})      # 1,000,000 + 500,000 × 2 = -33%
+    ok = strategy.run_cycle(None, markets, initial)
+    check(not ok, "계좌 기준 -33% → 중단")
+    check(fake.coins["XRP"] == 0 and fake.coins["BTC"] == 0, "보유 마켓 전부 청산")
+    check(all(m.state.units == 0 for m in markets), "마켓 상태 초기화")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    original = {name: getattr(client.upbit, name) for name in PATCHED}
+    original_cfg = (config.ACCOUNT_MAX_AGE_SEC, config.OHLCV_REFRESH_SEC, config.STRATEGY_MODE,
+                    config.ENTRY_START_HOUR, config.ENTRY_END_HOUR, config.UPBIT_ASYNC)
+    original_fn = (db.log_trade, strategy.send_msg)
+    db.log_trade = lambda *args, **kwargs: None
+    strategy.send_msg = lambda bot_app, text: print(f"\n  [TG] {text.splitlines()[0]}")
+    config.STRATEGY_MODE = "TURTLE_V1"
+    config.ENTRY_START_HOUR, config.ENTRY_END_HOUR = 0, 23
+    config.UPBIT_ASYNC = False                            # 가짜 API는 동기 클라이언트(client.upbit)에만 연결
+
+    tests = [
+        test_1_presets,
+        test_2_state_isolation,
+        test_3_batched_requests,
+        test_4_forming_bar_and_rollover,
+        test_5_drawdown_all_markets,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t()
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+    finally:
+        for name, fn in original.items():
+            setattr(client.upbit, name, fn)
+        (config.ACCOUNT_MAX_AGE_SEC, config.OHLCV_REFRESH_SEC, config.STRATEGY_MODE,
+         config.ENTRY_START_HOUR, config.ENTRY_END_HOUR, config.UPBIT_ASYNC) = original_cfg
+        db.log_trade, strategy.send_msg = original_fn
+        client._candle_cache.clear()
+        client.account.invalidate()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 멀티 마켓 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
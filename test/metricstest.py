@@ -0,0 +1,261 @@
+"""
+판정 루프 구간별 지연 측정 테스트 (가짜 업비트 API + 임시 DB)
+
+테스트 항목:
+  [TEST 01] 히스토그램 p50/p95/p99 = numpy 백분위 (최근 N개 기준, 누적 개수는 유지)
+  [TEST 02] 측정 꺼짐 → 기록 없음 + 구간당 추가 비용 2µs 미만
+  [TEST 03] 판정 1회 → 구간별 기록 (cycle / fetch / balance / ohlcv / indicators / buy / order / fill / db)
+  [TEST 04] 로컬 조회 주소 GET /metrics → 구간별 요약 JSON
+  [TEST 05] METRICS_LOG_SEC마다 요약 1줄 로그
+
+실행 방법:
+    python -m test.metricstest
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import time
+import contextlib
+import urllib.request
+import urllib.error
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import database as db
+import upbit_client as client
+import metrics
+import strategy
+
+HOUR_MS = 3_600_000
+TICKER  = "XRP/KRW"
+
+# ============================================================
+# 0. 가짜 업비트 API
+# ============================================================
+
+class FakeUpbit:
+    """현재가 / 잔고 / 1시간봉 (1000 횡보) / 주문 - 응답마다 delay초 지연"""
+
+    def __init__(self, delay: float = 0.002):
+        self.delay = delay
+        self.price = 1000.0
+        self.krw   = 10_000_000.0
+        self.coin  = 0.0
+
+    def fetch_tickers(self, tickers):
+        time.sleep(self.delay)
+        return {t: {"close": self.price} for t in tickers}
+
+    def fetch_balance(self):
+        time.sleep(self.delay)
+        info = [{"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0"},
+                {"currency": "XRP", "balance": str(self.coin), "avg_buy_price": "1000"}]
+        return {"info": info, "total": {"KRW": self.krw, "XRP": self.coin}}
+
+    def fetch_ohlcv(self, ticker, timeframe="1h", limit=200):
+        time.sleep(self.delay)
+        end_ms = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        return [[end_ms - (limit - 1 - i) * HOUR_MS, 1000.0, 1001.0, 999.0, 1000.0, 10.0]
+                for i in range(limit)]
+
+    def create_market_buy_order(self, ticker, krw):
+        time.sleep(self.delay)
+        self.krw  -= krw
+        self.coin += krw / self.price
+        return {"status": "ok"}
+
+
+PATCHED = ("fetch_tickers", "fetch_balance", "fetch_ohlcv", "create_market_buy_order")
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def setup() -> FakeUpbit:
+    fake = FakeUpbit()
+    for name in PATCHED:
+        setattr(client.upbit, name, getattr(fake, name))
+    client._candle_cache.clear()
+    client.account.invalidate()
+    metrics.registry.reset()
+    return fake
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_histogram():
+    print_header("[TEST 01] 히스토그램 백분위")
+    rng  = np.random.default_rng(7)
+    data = rng.exponential(0.02, 5000)
+    hist = metrics.Histogram(1024)
+    for v in data:
+        hist.add(float(v))
+    s = hist.summary()
+    expected = np.percentile(data[-1024:], (50, 95, 99)) * 1000
+    print(f"    {s}")
+    check(s["count"] == 5000, "누적 기록 수 유지")
+    check(all(abs(s[f"p{q}"] - e) < 1e-3 for q, e in zip((50, 95, 99), expected)),
+          "p50/p95/p99 = 최근 1024개 numpy 백분위")
+    check(abs(s["max"] - data[-1024:].max() * 1000) < 1e-3, "최대값도 최근 표본 기준")
+    check(metrics.Histogram(8).summary() == {"count": 0}, "빈 구간")
+
+
+def test_2_disabled_overhead():
+    print_header("[TEST 02] 측정 꺼짐 → 기록 없음 / 비용")
+    config.METRICS_ENABLED = False
+    metrics.registry.reset()
+
+    @metrics.timed("decorated")
+    def work():
+        return 1
+
+    n = 200_000
+    started = time.perf_counter()
+    for _ in range(n):
+        pass
+    base = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(n):
+        with metrics.timer("loop"):
+            pass
+    off_timer = (time.perf_counter() - started - base) / n
+
+    started = time.perf_counter()
+    for _ in range(n):
+        work()
+    off_deco = (time.perf_counter() - started - base) / n
+
+    config.METRICS_ENABLED = True
+    started = time.perf_counter()
+    for _ in range(n):
+        with metrics.timer("loop"):
+            pass
+    on_timer = (time.perf_counter() - started - base) / n
+    config.METRICS_ENABLED = False
+
+    print(f"    구간당 비용: 꺼짐 {off_timer * 1e9:.0f}ns (데코레이터 {off_deco * 1e9:.0f}ns) | 켜짐 {on_timer * 1e9:.0f}ns")
+    check(metrics.registry.snapshot().get("loop", {}).get("count") == n and "decorated" not in metrics.registry.snapshot(),
+          "꺼져 있는 동안은 기록 없음")
+    check(off_timer < 2e-6 and off_deco < 2e-6, "꺼짐 비용 구간당 2µs 미만")
+
+
+def test_3_cycle_stages():
+    print_header("[TEST 03] 판정 루프 구간별 기록")
+    fake = setup()
+    original = (db.DB_NAME, config.UPBIT_ASYNC, config.METRICS_ENABLED, config.TELEGRAM_BOT_TOKEN)
+    db.DB_NAME = os.path.join(tempfile.mkdtemp(prefix="zillion_metrics_"), "trading.db")
+    db.init_db()
+    config.UPBIT_ASYNC, config.METRICS_ENABLED, config.TELEGRAM_BOT_TOKEN = False, True, None
+    try:
+        m = strategy.Market(TICKER)
+        for _ in range(5):
+            strategy.run_cycle(None, [m], fake.krw)
+        fake.price = 1050.0                                   # 돌파 → 1유닛 매수
+        strategy.run_cycle(None, [m], fake.krw)
+    finally:
+        db.DB_NAME, config.UPBIT_ASYNC, config.METRICS_ENABLED, config.TELEGRAM_BOT_TOKEN = original
+
+    snap = metrics.registry.snapshot()
+    for stage, s in snap.items():
+        print(f"    {stage:<11} n={s['count']:<3} p50={s['p50']:.3f}ms p99={s['p99']:.3f}ms")
+    expected = {"cycle", "fetch", "balance", "ohlcv", "indicators", "buy", "order", "fill", "db"}
+    check(expected <= set(snap), f"구간 기록: {sorted(expected - set(snap)) or '전부'}")
+    check(snap["cycle"]["count"] == 6 and m.state.units == 1, "판정 6회 / 매수 1회")
+    check(snap["fetch"]["p50"] >= 2.0 and snap["cycle"]["p50"] >= snap["fetch"]["p50"],
+          "가짜 API 지연(2ms)이 조회 구간에 잡힘 / 전체 ≥ 구간")
+    check(snap["db"]["count"] == 1 and snap["order"]["count"] == 1, "주문 / DB 기록 구간 1회씩")
+
+
+def test_4_endpoint():
+    print_header("[TEST 04] 로컬 조회 주소")
+    reg = metrics.Registry(64)
+    for v in (0.001, 0.002, 0.003):
+        reg.histogram("balance").add(v)
+    server = metrics.serve(port=0, reg=reg)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{url}/metrics", timeout=2) as resp:
+            body = json.loads(resp.read())
+        print(f"    {body}")
+        check(body["stages"]["balance"]["count"] == 3 and body["stages"]["balance"]["p50"] == 2.0,
+              "GET /metrics → 구간별 요약")
+        try:
+            urllib.request.urlopen(f"{url}/other", timeout=2)
+            status = 200
+        except urllib.error.HTTPError as e:
+            status = e.code
+        check(status == 404, "그 외 경로 404")
+    finally:
+        server.shutdown()
+
+
+def test_5_periodic_log():
+    print_header("[TEST 05] 주기 로그")
+    fake = setup()
+    original = (config.UPBIT_ASYNC, config.METRICS_ENABLED, config.METRICS_LOG_SEC)
+    config.UPBIT_ASYNC, config.METRICS_ENABLED, config.METRICS_LOG_SEC = False, True, 0.3
+    out = io.StringIO()
+    try:
+        m = strategy.Market(TICKER)
+        metrics.registry.maybe_log(interval=0)             # 기준 시각 초기화
+        with contextlib.redirect_stdout(out):
+            strategy.run_cycle(None, [m], fake.krw)
+            first = out.getvalue().count("[METRICS]")
+            time.sleep(0.35)
+            strategy.run_cycle(None, [m], fake.krw)
+            strategy.run_cycle(None, [m], fake.krw)
+    finally:
+        config.UPBIT_ASYNC, config.METRICS_ENABLED, config.METRICS_LOG_SEC = original
+
+    lines = [l for l in out.getvalue().splitlines() if "[METRICS]" in l]
+    print(f"    {lines[-1] if lines else '-'}")
+    check(first == 0 and len(lines) == 1, "간격마다 1줄만 출력")
+    check(bool(lines) and "cycle" in lines[0] and "balance" in lines[0], "구간별 p50/p95/p99 포함")
+    config.METRICS_ENABLED = False
+    check(metrics.registry.maybe_log(interval=0) is None, "꺼져 있으면 로그 없음")
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    tests = [
+        test_1_histogram,
+        test_2_disabled_overhead,
+        test_3_cycle_stages,
+        test_4_endpoint,
+        test_5_periodic_log,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 지연 측정 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
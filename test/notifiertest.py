@@ -0,0 +1,234 @@
+"""
+텔레그램 알림 큐 테스트 (로컬 가짜 텔레그램 서버 사용)
+
+테스트 항목:
+  [TEST 01] 서버가 느려도 send()는 바로 반환 + HTTP 연결 1개 재사용
+  [TEST 02] 전송 간격 사이에 쌓인 알림 → 1건으로 합쳐서 전송 (순서 유지, 길이 제한 분할)
+  [TEST 03] 429 → retry_after 대기 후 재전송 / 5xx → 재시도 / 400 → 버림
+  [TEST 04] 큐가 가득 차면 오래된 알림부터 버림 (send()는 블로킹 없음)
+  [TEST 05] strategy.send_msg → 큐 경유 (매매 스레드 대기 없음)
+
+실행 방법:
+    python -m test.notifiertest
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config
+import notifier
+import strategy
+
+# ============================================================
+# 0. 가짜 텔레그램 서버
+# ============================================================
+
+class FakeTelegram:
+    """
+    sendMessage 요청 기록
+    - responses: 앞에서부터 하나씩 꺼내 쓰는 (상태코드, 본문) 목록 → 비면 200
+    - delay    : 응답 지연 (초)
+    """
+
+    def __init__(self):
+        self.messages: list[str] = []
+        self.requests  = 0
+        self.connections = set()
+        self.responses: list[tuple[int, dict]] = []
+        self.delay = 0.0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"      # keep-alive
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                fake.requests += 1
+                fake.connections.add(self.client_address)
+                time.sleep(fake.delay)
+                status, payload = fake.responses.pop(0) if fake.responses else (200, {"ok": True})
+                if status == 200:
+                    fake.messages.append(parse_qs(body)["text"][0])
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        self.messages.clear()
+        self.requests = 0
+        self.connections.clear()
+        self.responses.clear()
+        self.delay = 0.0
+
+    def close(self):
+        self.server.shutdown()
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def make(server: FakeTelegram, **kw) -> notifier.TelegramNotifier:
+    server.reset()
+    kw.setdefault("min_interval", 0.0)
+    return notifier.TelegramNotifier("TOKEN", "CHAT", base_url=server.url, **kw)
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_non_blocking(server: FakeTelegram):
+    print_header("[TEST 01] 느린 서버 + 세션 재사용")
+    tg = make(server)
+    server.delay = 1.0
+    started = time.perf_counter()
+    tg.send("🐢 [터틀 1유닛 진입]")
+    elapsed = time.perf_counter() - started
+    check(elapsed < 0.05, f"send() {elapsed * 1000:.1f}ms (서버 응답 1초)")
+    check(tg.flush(5) and server.messages == ["🐢 [터틀 1유닛 진입]"], "백그라운드 전송 완료")
+
+    server.delay = 0.0
+    for i in range(5):
+        tg.send(f"msg {i}")
+        tg.flush(5)
+    check(server.requests == 6 and len(server.connections) == 1,
+          f"요청 {server.requests}건 → HTTP 연결 {len(server.connections)}개 (keep-alive)")
+
+
+def test_2_coalesce(server: FakeTelegram):
+    print_header("[TEST 02] 알림 폭주 → 합쳐서 전송")
+    tg = make(server, min_interval=0.5)
+    tg.send("first")
+    time.sleep(0.1)                                # 첫 알림 전송 후 간격 대기 중
+    for i in range(10):
+        tg.send(f"burst {i}")
+    check(tg.flush(5), "전송 완료")
+    joined = "\n\n".join(server.messages)
+    check(server.requests == 2, f"알림 11건 → 요청 {server.requests}건")
+    check(joined == "\n\n".join(["first"] + [f"burst {i}" for i in range(10)]), "내용/순서 유지")
+
+    tg = make(server, min_interval=0.5)
+    tg.send("x")
+    time.sleep(0.1)
+    big = "가" * 3000
+    for _ in range(3):
+        tg.send(big)
+    tg.flush(5)
+    check(all(len(m) <= notifier.TELEGRAM_MAX_LEN for m in server.messages) and server.requests == 4,
+          f"길이 제한 4096자 → 3000자 알림 3건은 나눠서 전송 | 요청 {server.requests}건")
+
+
+def test_3_retry(server: FakeTelegram):
+    print_header("[TEST 03] 429 / 5xx / 400")
+    tg = make(server)
+    server.responses = [(429, {"ok": False, "parameters": {"retry_after": 1}})]
+    started = time.time()
+    tg.send("after 429")
+    tg.flush(10)
+    check(server.messages == ["after 429"] and time.time() - started >= 1.0,
+          f"429 → retry_after 1초 대기 후 전송 ({time.time() - started:.1f}초)")
+
+    server.reset()
+    server.responses = [(502, {}), (503, {})]
+    tg.send("after 5xx")
+    tg.flush(10)
+    check(server.messages == ["after 5xx"] and server.requests == 3, f"5xx 2회 → 3번째 요청에서 전송")
+
+    server.reset()
+    server.responses = [(400, {"ok": False, "description": "Bad Request"})]
+    tg.send("bad")
+    tg.flush(10)
+    tg.send("next")
+    check(tg.flush(10) and server.messages == ["next"] and server.requests == 2 and tg.dropped == 1,
+          "400 → 재시도 없이 버리고 다음 알림 전송")
+
+
+def test_4_bounded(server: FakeTelegram):
+    print_header("[TEST 04] 큐 크기 제한")
+    tg = make(server, maxsize=5)
+    server.delay = 0.5
+    tg.send("in flight")
+    time.sleep(0.1)                                # 워커가 첫 알림 전송 중
+    started = time.perf_counter()
+    for i in range(20):
+        tg.send(f"q {i}")
+    elapsed = time.perf_counter() - started
+    check(elapsed < 0.05, f"큐 초과 중에도 send() 20회 {elapsed * 1000:.1f}ms")
+    check(tg.flush(10) and tg.dropped == 15, f"오래된 알림 {tg.dropped}건 버림")
+    check(server.messages[-1] == "\n\n".join(f"q {i}" for i in range(15, 20)), "가장 최근 5건은 전송")
+
+
+def test_5_strategy_send_msg(server: FakeTelegram):
+    print_header("[TEST 05] strategy.send_msg")
+    server.reset()
+    server.delay = 1.0
+    original = (config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID, notifier._default)
+    config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID = "TOKEN", "CHAT"
+    notifier._default = notifier.TelegramNotifier("TOKEN", "CHAT", base_url=server.url, min_interval=0.0)
+    try:
+        started = time.perf_counter()
+        strategy.send_msg(None, "🛑 [계좌 손실 한도 도달]")
+        elapsed = time.perf_counter() - started
+        check(elapsed < 0.05, f"send_msg() {elapsed * 1000:.1f}ms (서버 응답 1초)")
+        check(notifier.default().flush(5) and server.messages == ["🛑 [계좌 손실 한도 도달]"], "전송 완료")
+    finally:
+        config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID, notifier._default = original
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    server = FakeTelegram()
+    tests = [
+        test_1_non_blocking,
+        test_2_coalesce,
+        test_3_retry,
+        test_4_bounded,
+        test_5_strategy_send_msg,
+    ]
+
+    fail = 0
+    try:
+        for t in tests:
+            try:
+                t(server)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"  ❌ 예외: {e}")
+                fail += 1
+    finally:
+        server.close()
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 텔레그램 알림 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
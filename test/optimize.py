@@ -0,0 +1,381 @@
+# test/optimize.py
+"""
+파라미터 최적화 드라이버 (그리드 서치 다음 단계)
+
+워크포워드 (run_walk_forward)
+- 학습/검증 창을 검증 구간 길이만큼 밀어가며 진행
+- 학습 구간 최고 조합을 바로 다음 검증 구간에 적용하고, 검증 구간 자산 곡선을 이어 붙임
+  → 전체 기간 수익률 1위(인샘플)가 아니라 "그때 알 수 있었던 최적값"으로 낸 성과
+
+연속 절반 탐색 (run_halving_search)
+- 그리드 서치 범위 + TURTLE_TRAILING_MULTIPLIER / TURTLE_EXIT_MODE까지 탐색
+- 전체 후보를 최근 짧은 구간으로 먼저 돌려 상위 1/ETA만 남기고,
+  남은 후보일수록 더 긴 구간으로 다시 평가 → 마지막 라운드만 전체 기간 백테스트
+- 실행한 백테스트 수 / 전체 기간 환산 횟수를 전수 그리드와 비교해서 출력
+
+속도
+- 조합마다 전체 기간 백테스트를 1번만 돌리고, 봉별 자산 곡선에서 학습 창마다
+  수익률/MDD를 잘라서 채점 → 창 개수와 상관없이 그리드 서치 1회와 비슷한 시간
+- 지표는 전체 기간 기준으로 IndicatorCache에서 꺼내 쓰므로 창마다 워밍업 손실/재계산 없음
+
+실행 방법:
+    python -m test.optimize              # 워크포워드
+    python -m test.optimize halving      # 연속 절반 탐색
+"""
+import sys
+import os
+import math
+import time
+import numpy as np
+import pandas as pd
+from contextlib import closing
+
+from test import backtest as bt
+import config
+
+
+# ============================================================
+# 1. 워크포워드 창 / 구간 채점
+# ============================================================
+
+def walk_forward_windows(ts: np.ndarray, train_days: float, test_days: float) -> list[dict]:
+    """
+    봉 시각 배열 (int64 ns) → 워크포워드 창 목록
+    - 반환: [{"train_start", "train_end", "test_start", "test_end"}, ...] (ns, 끝 시각은 미포함)
+    - 첫 학습 구간은 데이터 시작부터, 이후 검증 구간 길이만큼 밀면서 진행
+    - 마지막 검증 구간은 데이터 끝에서 잘림
+    """
+    if not len(ts):
+        return []
+
+    train_ns = int(train_days * bt.NS_PER_DAY)
+    test_ns  = int(test_days * bt.NS_PER_DAY)
+    end      = int(ts[-1]) + 1
+    start    = int(ts[0])
+
+    windows = []
+    while start + train_ns < end:
+        test_start = start + train_ns
+        windows.append({
+            "train_start": start,
+            "train_end"  : test_start,
+            "test_start" : test_start,
+            "test_end"   : min(test_start + test_ns, end),
+        })
+        start += test_ns
+    return windows
+
+
+def segment_stats(ts: np.ndarray, equity: np.ndarray, start_ts: int, end_ts: int,
+                  initial_capital: float) -> tuple[float, float]:
+    """
+    자산 곡선의 [start_ts, end_ts) 구간 → (수익률 %, 구간 내 MDD %)
+    - 구간 시작 기준 자산은 직전 봉 자산 (첫 봉부터면 초기 자본)
+    """
+    a, b = np.searchsorted(ts, [start_ts, end_ts])
+    if a >= b:
+        return 0.0, 0.0
+
+    base = equity[a - 1] if a > 0 else initial_capital
+    seg  = np.concatenate(([base], equity[a:b]))
+    peak = np.maximum.accumulate(seg)
+    return float((seg[-1] / base - 1) * 100), float(((seg - peak) / peak).min() * 100)
+
+
+def _window_scores(raw: dict, params: dict, cache: bt.IndicatorCache,
+                   initial_capital: float, bounds: list) -> list[tuple[float, float]]:
+    """조합 1개를 전체 기간으로 1번 돌린 뒤 학습 창별 (수익률, MDD) 반환 (map_params 작업 함수)"""
+    arrays = bt.indicator_arrays(raw, params, cache)
+    result = bt.run_backtest_arrays(arrays, initial_capital=initial_capital,
+                                    params=params, verbose=False)
+    return [segment_stats(result["ts"], result["equity"], s, e, initial_capital) for s, e in bounds]
+
+
+# ============================================================
+# 2. 워크포워드 실행
+# ============================================================
+
+def run_walk_forward(df_raw: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                     train_days: float | None = None, test_days: float | None = None,
+                     param_grid: dict | None = None, workers: int | None = None) -> dict:
+    """
+    워크포워드 최적화
+    - train_days / test_days: None이면 config.WALK_FORWARD_TRAIN_DAYS / WALK_FORWARD_TEST_DAYS
+    - param_grid: 탐색 범위 (None이면 bt.GRID_PARAM_GRID)
+    - workers   : 프로세스 수 (bt.run_grid_search와 동일 규칙)
+    - 검증 구간은 앞 구간 최종 자산으로 이어서 시작하고, 구간 끝에서 미청산 포지션은 강제 청산
+    - 반환: run_backtest()와 같은 형식 (trades / ts / equity / mdd_ts / stats) + windows (창별 요약 DataFrame)
+    """
+    train_days = config.WALK_FORWARD_TRAIN_DAYS if train_days is None else train_days
+    test_days  = config.WALK_FORWARD_TEST_DAYS  if test_days  is None else test_days
+    param_grid = bt.GRID_PARAM_GRID if param_grid is None else param_grid
+
+    raw     = bt.frame_to_raw_arrays(df_raw)
+    windows = walk_forward_windows(raw["ts"], train_days, test_days)
+    if not windows:
+        raise ValueError(f"데이터 기간이 학습 구간({train_days}일)보다 짧음")
+
+    combos  = bt.grid_combos(param_grid)
+    total   = len(combos)
+    workers = bt.resolve_workers(workers, total)
+    bounds  = [(w["train_start"], w["train_end"]) for w in windows]
+
+    print(f"\n🔍 워크포워드 시작 | 창 {len(windows)}개 (학습 {train_days}일 / 검증 {test_days}일) "
+          f"| 조합 {total}개 | 프로세스 {workers}개\n")
+    started = time.time()
+
+    # ── 1단계: 조합별 학습 창 채점 (조합당 전체 기간 백테스트 1회) ──
+    scores = []
+    with closing(bt.map_params(raw, combos, _window_scores, initial_capital, bounds,
+                               workers=workers)) as score_iter:
+        for count, s in enumerate(score_iter, 1):
+            scores.append(s)
+            print(f"\r[{count:>4}/{total}] 학습 구간 채점 중", end="")
+    print(f"\n✅ 채점 완료 | {time.time() - started:.1f}초")
+
+    # ── 2단계: 창마다 학습 1위 조합으로 다음 검증 구간 실행 (자본 이어가기) ──
+    cache   = bt.IndicatorCache()
+    capital = initial_capital
+    trades, ts_parts, equity_parts, rows = [], [], [], []
+
+    for i, w in enumerate(windows):
+        # 정렬 기준은 그리드 서치와 동일: 수익률 내림차순 (같으면 MDD 오름차순)
+        best   = min(range(total), key=lambda c: (-scores[c][i][0], scores[c][i][1]))
+        params = combos[best]
+
+        arrays = bt.indicator_arrays(raw, params, cache)
+        seg, prev_close = bt.slice_arrays(arrays, w["test_start"], w["test_end"])
+        result = bt.run_backtest_arrays(seg, initial_capital=capital, params=params,
+                                        verbose=False, prev_close=prev_close)
+        s = result["stats"]
+
+        trades.extend(result["trades"])
+        ts_parts.append(result["ts"])
+        equity_parts.append(result["equity"])
+        rows.append({
+            "train_start" : pd.Timestamp(w["train_start"]),
+            "test_start"  : pd.Timestamp(w["test_start"]),
+            "test_end"    : pd.Timestamp(w["test_end"]),
+            **{key: params[key] for key in param_grid},
+            "train_return": scores[best][i][0],
+            "train_mdd"   : scores[best][i][1],
+            "test_return" : s["total_return"],
+            "test_mdd"    : s["mdd"],
+            "test_trades" : s["total_trades"],
+        })
+        capital = s["final_equity"]
+
+    # ── 3단계: 검증 구간 자산 곡선 이어 붙이기 ──
+    ts     = np.concatenate(ts_parts)
+    equity = np.concatenate(equity_parts)
+    if len(equity):
+        peak    = np.maximum.accumulate(np.concatenate(([initial_capital], equity)))[1:]
+        dd      = (equity - peak) / peak * 100
+        mdd_idx = int(dd.argmin())
+        mdd     = min(float(dd[mdd_idx]), 0.0)
+        mdd_ts  = pd.Timestamp(int(ts[mdd_idx]))
+    else:
+        mdd, mdd_ts = 0.0, None
+
+    print(f"✅ 워크포워드 완료 | 총 {time.time() - started:.1f}초")
+
+    return {
+        "trades" : trades,
+        "ts"     : ts,
+        "equity" : equity,
+        "mdd_ts" : mdd_ts,
+        "stats"  : bt.summarize_trades(trades, initial_capital, capital, mdd),
+        "windows": pd.DataFrame(rows),
+    }
+
+
+def print_walk_forward(result: dict):
+    """창별 선택 조합 + 학습/검증 성과 표 출력"""
+    windows = result["windows"]
+    print("\n" + "=" * 80)
+    print("🧭 워크포워드 창별 결과 (학습 1위 조합 → 다음 검증 구간)")
+    print("=" * 80)
+    print(windows.to_string(
+        index=False,
+        formatters={
+            "train_start" : lambda v: str(v)[:10],
+            "test_start"  : lambda v: str(v)[:10],
+            "test_end"    : lambda v: str(v)[:10],
+            "train_return": "{:+.2f}%".format,
+            "train_mdd"   : "{:+.2f}%".format,
+            "test_return" : "{:+.2f}%".format,
+            "test_mdd"    : "{:+.2f}%".format,
+        },
+    ))
+    print("=" * 80)
+
+
+# ============================================================
+# 3. 연속 절반 탐색 (Successive Halving)
+# ============================================================
+
+# 그리드 서치 범위 + 청산 방식 / 트레일링 승수
+HALVING_PARAM_GRID = {
+    **bt.GRID_PARAM_GRID,
+    "trailing_multiplier": [1.0, 1.5, 2.0, 2.5, 3.0],             # TURTLE_TRAILING_MULTIPLIER
+    "exit_mode"          : ["TRAILING", "10DAY_LOW", "20DAY_LOW"],  # TURTLE_EXIT_MODE
+}
+HALVING_ETA      = 3     # 라운드마다 상위 1/ETA만 다음 라운드로
+HALVING_MIN_DAYS = 90    # 첫 라운드 평가 구간 최소 길이 (일)
+HALVING_TOP_K    = 10    # 마지막(전체 기간) 라운드에 남길 후보 수
+
+
+def halving_candidates(param_grid: dict = HALVING_PARAM_GRID) -> list[dict]:
+    """
+    param_grid 전체 조합 중 결과가 같은 중복 제거
+    - 저점 청산(10DAY_LOW / 20DAY_LOW)은 트레일링 승수를 쓰지 않으므로 첫 승수 1개만 남김
+    """
+    seen, combos = set(), []
+    for p in bt.grid_combos(param_grid):
+        key = tuple(sorted(p.items()))
+        if p["exit_mode"] != "TRAILING":
+            key = tuple(sorted({**p, "trailing_multiplier": None}.items()))
+        if key not in seen:
+            seen.add(key)
+            combos.append(p)
+    return combos
+
+
+def _slice_eval(raw: dict, params: dict, cache: bt.IndicatorCache,
+                initial_capital: float, start_ts: int) -> tuple[dict, int]:
+    """start_ts 이후 구간만 백테스트 → (stats, 봉 수) (map_params 작업 함수)"""
+    arrays = bt.indicator_arrays(raw, params, cache)
+    seg, prev_close = bt.slice_arrays(arrays, start_ts, np.iinfo(np.int64).max)
+    result = bt.run_backtest_arrays(seg, initial_capital=initial_capital, params=params,
+                                    verbose=False, prev_close=prev_close)
+    return result["stats"], len(seg["ts"])
+
+
+def run_halving_search(df_raw: pd.DataFrame, initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                       param_grid: dict | None = None, eta: int = HALVING_ETA,
+                       min_days: float = HALVING_MIN_DAYS, top_k: int = HALVING_TOP_K,
+                       workers: int | None = None) -> pd.DataFrame:
+    """
+    연속 절반 탐색 (Successive Halving)
+    - 라운드 r의 평가 구간 = 최근 (전체 기간 / eta^(마지막 라운드 - r)), 최소 min_days
+    - 라운드마다 수익률 기준 상위 1/eta 생존, 마지막 라운드는 전체 기간으로 top_k개 이하 평가
+    - 정렬 기준은 그리드 서치와 동일: 수익률 내림차순 (같으면 MDD 오름차순)
+    - 반환: 마지막 라운드 결과 DataFrame (rank 1부터, 전체 기간 성과)
+    """
+    param_grid = HALVING_PARAM_GRID if param_grid is None else param_grid
+
+    raw        = bt.frame_to_raw_arrays(df_raw)
+    ts         = raw["ts"]
+    first, end = int(ts[0]), int(ts[-1]) + 1
+    total_days = (end - first) / bt.NS_PER_DAY
+
+    candidates = halving_candidates(param_grid)
+    exhaustive = math.prod(len(v) for v in param_grid.values())
+    rounds     = max(1, math.ceil(math.log(max(len(candidates) / top_k, 1), eta)) + 1)
+    workers    = bt.resolve_workers(workers, len(candidates))
+
+    print(f"\n🔍 연속 절반 탐색 시작 | 후보 {len(candidates)}개 (전수 그리드 {exhaustive}개) "
+          f"| 라운드 {rounds}개 | 프로세스 {workers}개\n")
+    started = time.time()
+
+    runs, bar_total, results, prev_start = 0, 0, [], None
+    for r in range(rounds):
+        last  = r == rounds - 1
+        days  = total_days if last else min(total_days, max(min_days, total_days / eta ** (rounds - 1 - r)))
+        start = first if last else end - int(days * bt.NS_PER_DAY)
+
+        if start == prev_start:
+            # 구간이 이전 라운드와 같으면 (min_days 하한) 다시 돌리지 않고 이전 순위를 그대로 사용
+            results = results[:len(candidates)]
+        else:
+            results = []
+            with closing(bt.map_params(raw, candidates, _slice_eval, initial_capital, start,
+                                       workers=workers)) as stats_iter:
+                for p, (s, bars) in zip(candidates, stats_iter):
+                    results.append((p, s))
+                    bar_total += bars
+            runs += len(candidates)
+            results.sort(key=lambda x: (-x[1]['total_return'], x[1]['mdd']))
+        prev_start = start
+
+        best = results[0][1]
+        print(f"  라운드 {r + 1}/{rounds} | 구간 {days:>7.1f}일 | 후보 {len(candidates):>5}개 "
+              f"| 1위 수익률 {best['total_return']:>+8.2f}% MDD {best['mdd']:>+7.2f}%")
+
+        if last:
+            break
+        keep = max(top_k, math.ceil(len(candidates) / eta))
+        candidates = [p for p, _ in results[:keep]]
+
+    full_bars = len(ts)
+    equiv     = bar_total / full_bars if full_bars else 0.0
+    print(f"\n✅ 연속 절반 탐색 완료 | {time.time() - started:.1f}초")
+    print(f"   백테스트 {runs}회 (전체 기간 환산 {equiv:.0f}회) | 전수 그리드 {exhaustive}회 대비 "
+          f"{equiv / exhaustive * 100:.1f}%")
+
+    results_df = pd.DataFrame([
+        {
+            **{key: p[key] for key in param_grid},
+            "total_return" : s['total_return'],
+            "win_rate"     : s['win_rate'],
+            "profit_factor": s['profit_factor'],
+            "mdd"          : s['mdd'],
+            "total_trades" : s['total_trades'],
+            "total_pnl"    : s['total_pnl'],
+        }
+        for p, s in results
+    ])
+    results_df.index += 1
+    results_df.index.name = "rank"
+    results_df.attrs.update({"backtests": runs, "full_equivalent": equiv, "exhaustive": exhaustive})
+    return results_df
+
+
+def print_halving_result(results_df: pd.DataFrame):
+    """최종 라운드(전체 기간) 순위 + 1위 조합 config 형식 출력"""
+    print("\n" + "=" * 80)
+    print("🏆 연속 절반 탐색 최종 후보 (전체 기간 수익률 기준)")
+    print("=" * 80)
+    print(results_df.to_string(float_format=lambda v: f"{v:.2f}"))
+    print("=" * 80)
+
+    best = results_df.iloc[0]
+    print(f"\n✅ 최적 파라미터 (1위 기준):")
+    print(f"   TURTLE_ENTRY_PERIOD        = {int(best['entry_period'])}")
+    print(f"   TURTLE_ATR_PERIOD          = {int(best['atr_period'])}")
+    print(f"   TURTLE_RISK_RATE           = {best['risk_rate']}")
+    print(f"   TURTLE_MAX_UNITS           = {int(best['max_units'])}")
+    print(f"   REENTRY_COOLDOWN_SEC       = {int(best['cooldown_sec'])}  # {int(best['cooldown_sec']) // 3600}h")
+    print(f"   TURTLE_EXIT_MODE           = \"{best['exit_mode']}\"")
+    print(f"   TURTLE_TRAILING_MULTIPLIER = {best['trailing_multiplier']}")
+
+
+# ============================================================
+# 4. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    bt.migrate_csv_store()
+    df_raw = bt.load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME)
+    if df_raw.empty:
+        print("📥 저장된 데이터 없음 → API에서 수집")
+        bt.sync_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME)
+        df_raw = bt.load_ohlcv(config.TICKER_UPBIT, config.TIMEFRAME)
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else "walkforward"
+
+    if mode == "halving":
+        results_df = run_halving_search(df_raw, initial_capital=config.BACKTEST_INITIAL_CAPITAL)
+        print_halving_result(results_df)
+        path = os.path.join(bt.DATA_DIR, f"halving_search_{config.TICKER_UPBIT}_{config.TIMEFRAME}m.csv")
+        results_df.to_csv(path)
+        print(f"\n💾 최종 후보 저장: {path}")
+        sys.exit(0)
+
+    result = run_walk_forward(df_raw, initial_capital=config.BACKTEST_INITIAL_CAPITAL)
+    print_walk_forward(result)
+    bt.print_result(result)
+
+    path = os.path.join(bt.DATA_DIR, f"walk_forward_{config.TICKER_UPBIT}_{config.TIMEFRAME}m.csv")
+    result["windows"].to_csv(path, index=False)
+    print(f"\n💾 창별 결과 저장: {path}")
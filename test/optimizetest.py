@@ -0,0 +1,183 @@
+"""
+파라미터 최적화 드라이버 테스트 (합성 캔들 사용)
+
+테스트 항목:
+  [TEST 01] 워크포워드 창 → 검증 구간이 빈틈/겹침 없이 이어짐
+  [TEST 02] 프로세스 풀 채점 결과 == 순차 채점 결과
+  [TEST 03] 워크포워드 검증 구간 → 학습 1위 조합 + 자본 이어가기 + 자산 곡선 연결
+  [TEST 04] 연속 절반 탐색 → 중복 후보 제거 + 전수보다 적은 백테스트 + 최종 성과 == 단일 백테스트
+
+실행 방법:
+    python -m test.optimizetest
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from test import backtest as bt
+from test import optimize as opt
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+SMALL_GRID = {
+    "entry_period": [10, 20],
+    "atr_period"  : [14, 20],
+    "cooldown_sec": [43200, 172800],
+}
+
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def make_candles(n: int, seed: int = 0) -> pd.DataFrame:
+    """1시간봉 랜덤워크 캔들 (추세 구간이 생기도록 느린 사인파 드리프트 추가)"""
+    rng   = np.random.default_rng(seed)
+    ret   = rng.normal(0, 0.012, n) + 0.0003 * np.sin(np.arange(n) / 400)
+    close = 500 * np.exp(np.cumsum(ret))
+    ts    = 1_514_764_800_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    df = pd.DataFrame({
+        "timestamp": ts,
+        "open"     : np.r_[close[0], close[:-1]],
+        "high"     : close * (1 + np.abs(rng.normal(0, 0.006, n))),
+        "low"      : close * (1 - np.abs(rng.normal(0, 0.006, n))),
+        "close"    : close,
+        "volume"   : rng.uniform(1e5, 1e6, n),
+    })
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_windows():
+    print_header("[TEST 01] 워크포워드 창 구성")
+    ts = bt.frame_to_raw_arrays(make_candles(24 * 400))["ts"]
+    windows = opt.walk_forward_windows(ts, train_days=180, test_days=30)
+
+    print(f"    창 {len(windows)}개")
+    check(len(windows) == 8, f"400일 / 학습 180일 / 검증 30일 → 창 {len(windows)}개 (기대 8)")
+    check(all(w["train_end"] == w["test_start"] for w in windows), "학습 끝 == 검증 시작")
+    check(all(a["test_end"] == b["test_start"] for a, b in zip(windows, windows[1:])),
+          "검증 구간이 빈틈/겹침 없이 이어짐")
+    check(windows[-1]["test_end"] == int(ts[-1]) + 1, "마지막 검증 구간은 데이터 끝까지")
+
+
+def test_2_pool_matches_sequential():
+    print_header("[TEST 02] 프로세스 풀 채점 == 순차 채점")
+    raw     = bt.frame_to_raw_arrays(make_candles(24 * 200, seed=1))
+    combos  = bt.grid_combos(SMALL_GRID)
+    windows = opt.walk_forward_windows(raw["ts"], train_days=60, test_days=30)
+    bounds  = [(w["train_start"], w["train_end"]) for w in windows]
+
+    seq  = list(bt.map_params(raw, combos, opt._window_scores, 3_000_000.0, bounds, workers=1))
+    pool = list(bt.map_params(raw, combos, opt._window_scores, 3_000_000.0, bounds, workers=2))
+    check(seq == pool, f"조합 {len(combos)}개 × 창 {len(bounds)}개 채점 일치")
+
+
+def test_3_walk_forward_stitching():
+    print_header("[TEST 03] 검증 구간 실행 + 자산 곡선 연결")
+    df  = make_candles(24 * 300, seed=2)
+    raw = bt.frame_to_raw_arrays(df)
+    result = opt.run_walk_forward(df, initial_capital=3_000_000.0, train_days=90, test_days=45,
+                                  param_grid=SMALL_GRID, workers=1)
+    windows = result["windows"]
+    print(windows.to_string(index=False))
+
+    # 창마다 학습 구간 1위 조합을 다시 계산해서 선택 결과와 비교
+    combos = bt.grid_combos(SMALL_GRID)
+    cache  = bt.IndicatorCache()
+    full   = [bt.run_backtest_arrays(bt.indicator_arrays(raw, p, cache), 3_000_000.0, p, verbose=False)
+              for p in combos]
+    picked_ok = True
+    for _, row in windows.iterrows():
+        start, end = row["train_start"].value, row["test_start"].value
+        scores = [opt.segment_stats(r["ts"], r["equity"], start, end, 3_000_000.0) for r in full]
+        best   = combos[min(range(len(combos)), key=lambda c: (-scores[c][0], scores[c][1]))]
+        picked_ok &= all(row[k] == best[k] for k in SMALL_GRID)
+    check(picked_ok, "창마다 학습 구간 수익률 1위 조합 선택")
+
+    capital = 3_000_000.0
+    for r in windows["test_return"]:
+        capital *= 1 + r / 100
+    check(np.isclose(capital, result["stats"]["final_equity"]),
+          f"검증 구간 수익률 연결 == 최종 자산 ({result['stats']['final_equity']:,.0f}원)")
+
+    ts = result["ts"]
+    check(len(ts) == len(result["equity"]) and bool(np.all(np.diff(ts) > 0)),
+          f"자산 곡선 {len(ts)}봉, 시각 순서 유지")
+    check(ts[0] >= windows["test_start"].iloc[0].value, "자산 곡선은 첫 검증 구간부터 시작")
+    sells = [t for t in result["trades"] if t["type"] == "sell"]
+    check(result["stats"]["total_trades"] == len(sells) == windows["test_trades"].sum(),
+          f"트레이드 {len(sells)}건 == 창별 합계")
+
+
+def test_4_halving_search():
+    print_header("[TEST 04] 연속 절반 탐색")
+    grid = {
+        "entry_period"       : [10, 20, 30],
+        "atr_period"         : [14, 20],
+        "trailing_multiplier": [1.5, 2.5],
+        "exit_mode"          : ["TRAILING", "10DAY_LOW", "20DAY_LOW"],
+    }
+    candidates = opt.halving_candidates(grid)
+    check(len(candidates) == 3 * 2 * (2 + 1 + 1),
+          f"후보 {len(candidates)}개 (저점 청산은 승수 무관 → 24개)")
+
+    df = make_candles(24 * 400, seed=3)
+    results = opt.run_halving_search(df, initial_capital=3_000_000.0, param_grid=grid,
+                                     eta=2, min_days=30, top_k=3, workers=1)
+    print(results.to_string())
+
+    runs, equiv = results.attrs["backtests"], results.attrs["full_equivalent"]
+    check(len(results) == 3, f"최종 후보 {len(results)}개 (top_k 3)")
+    check(equiv < len(candidates), f"전체 기간 환산 {equiv:.1f}회 < 후보 {len(candidates)}개 전수")
+    check(runs >= len(candidates), f"첫 라운드는 모든 후보 평가 | 총 {runs}회")
+
+    best   = results.iloc[0]
+    params = {**bt.default_params(), **{k: best[k] for k in grid}}
+    stats  = bt.run_backtest_arrays(bt.indicator_arrays(bt.frame_to_raw_arrays(df), params),
+                                    3_000_000.0, params, verbose=False)["stats"]
+    check(np.isclose(stats["total_return"], best["total_return"]),
+          f"1위 전체 기간 수익률 {best['total_return']:+.2f}% == 단일 백테스트")
+    check(results["total_return"].is_monotonic_decreasing, "수익률 내림차순 정렬")
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    tests = [
+        test_1_windows,
+        test_2_pool_matches_sequential,
+        test_3_walk_forward_stitching,
+        test_4_halving_search,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 최적화 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
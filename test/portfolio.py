@@ -0,0 +1,340 @@
+# test/portfolio.py
+"""
+멀티 마켓 포트폴리오 백테스트
+
+- 여러 캔들 시리즈(KRW-XRP 60분, KRW-BTC 60분, KRW-ETH 240분 ...)를 봉 마감 시각 기준 공통 인덱스(합집합)로 정렬
+  (캔들 timestamp는 봉 안 마지막 체결 시각이라 마켓마다 다름 → 봉 간격으로 올림한 마감 시각으로 맞춤)
+- 자본 1개를 모든 마켓이 공유, 유닛 한도 등 파라미터는 마켓별로 지정 가능
+- 봉 루프 안 판정(평가액 / 진입 신호 / 청산 / 피라미딩 조건)은 마켓 축 NumPy 벡터 연산
+  → 마켓 수가 늘어도 봉당 비용이 거의 그대로, 실제 매매가 일어난 마켓만 스칼라로 처리
+- 마켓 1개로 돌리면 bt.run_backtest_arrays()와 트레이드/자산 곡선이 같다
+
+실행 방법:
+    python -m test.portfolio                          # data/ 저장소 전체
+    python -m test.portfolio KRW-XRP:60 KRW-BTC:60
+"""
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from test import backtest as bt
+import config
+
+
+# ============================================================
+# 1. 데이터 로드 / 정렬
+# ============================================================
+
+def market_key(ticker: str, timeframe: str) -> str:
+    """포트폴리오 안 마켓 이름 (저장소 디렉터리 이름과 동일) 예: KRW-XRP_60m"""
+    return f"{ticker}_{bt.to_upbit_minutes(timeframe)}m"
+
+
+def list_stored_markets() -> list[tuple[str, str]]:
+    """data/ 아래 캔들 저장소 목록 → [(ticker, 분 단위 timeframe), ...]"""
+    if not os.path.isdir(bt.DATA_DIR):
+        return []
+    markets = []
+    for name in sorted(os.listdir(bt.DATA_DIR)):
+        path = os.path.join(bt.DATA_DIR, name)
+        ticker, _, tf = name.rpartition("_")
+        if ticker and tf.endswith("m") and tf[:-1].isdigit() and bt._read_store_meta(path):
+            markets.append((ticker, tf[:-1]))
+    return markets
+
+
+def bar_interval_ns(key: str, ts: np.ndarray) -> int:
+    """마켓 이름의 봉 간격 (ns) 예: KRW-ETH_240m → 4시간 / 이름에 없으면 봉 시각 간격의 중앙값 (분 단위 반올림)"""
+    tf = key.rpartition("_")[2]
+    if tf.endswith("m") and tf[:-1].isdigit():
+        return int(tf[:-1]) * 60_000_000_000
+    gaps = np.diff(ts)
+    minutes = round(float(np.median(gaps)) / 60e9) if len(gaps) else 1
+    return max(minutes, 1) * 60_000_000_000
+
+
+def align_markets(arrays: dict[str, dict], exit_modes: dict[str, str]) -> dict:
+    """
+    마켓별 커널 입력 배열 → 봉 마감 시각 인덱스 기준 (봉 수 T × 마켓 수 M) 행렬
+    - ts        : 봉 마감 시각 (봉 시각을 봉 간격으로 내린 뒤 + 1봉) 합집합
+                  → 같은 봉 안에서 마지막 체결 시각이 다른 마켓도 같은 행,
+                    240분봉은 그 봉의 마지막 60분봉과 같은 행에서 처음 보임
+    - bar_ts    : 그 행에 해당하는 마켓별 원래 봉 시각 (트레이드 시각 / 쿨다운 기준, 봉 없으면 0)
+    - has_bar   : 해당 시각에 그 마켓 봉이 있는지 (없으면 매매 판정 안 함)
+    - mark      : 평가용 가격 (마지막 종가를 앞으로 채움, 첫 봉 전에는 0)
+    - prev_close: 그 마켓 직전 봉 종가 (첫 봉이면 0)
+    - exit_low  : 마켓별 청산 모드에 맞는 저점 (트레일링이면 사용 안 함)
+    """
+    keys = list(arrays)
+    close_ts = {}
+    for k in keys:
+        interval = bar_interval_ns(k, arrays[k]["ts"])
+        close_ts[k] = (arrays[k]["ts"] // interval + 1) * interval
+    ts   = np.unique(np.concatenate([close_ts[k] for k in keys]))
+    T, M = len(ts), len(keys)
+
+    bar_ts   = np.zeros((T, M), dtype=np.int64)
+    close    = np.full((T, M), np.nan)
+    atr      = np.zeros((T, M))
+    high     = np.zeros((T, M))
+    exit_low = np.zeros((T, M))
+    has_bar  = np.zeros((T, M), dtype=bool)
+
+    for j, key in enumerate(keys):
+        a   = arrays[key]
+        idx = np.searchsorted(ts, close_ts[key])
+        low_col = "exit_low_20" if exit_modes[key] == "20DAY_LOW" else "exit_low_10"
+        bar_ts[idx, j]   = a["ts"]
+        close[idx, j]    = a["close"]
+        atr[idx, j]      = a["atr"]
+        high[idx, j]     = a["entry_high"]
+        exit_low[idx, j] = a[low_col]
+        has_bar[idx, j]  = True
+
+    # 마지막 종가 앞으로 채우기 (봉이 없는 시각의 평가액용)
+    last_row = np.where(has_bar, np.arange(T)[:, None], 0)
+    np.maximum.accumulate(last_row, axis=0, out=last_row)
+    filled = close[last_row, np.arange(M)]
+    mark   = np.nan_to_num(filled, nan=0.0)
+    prev_close = np.vstack([np.zeros((1, M)), mark[:-1]])
+
+    return {
+        "keys"      : keys,
+        "ts"        : ts,
+        "bar_ts"    : bar_ts,
+        "has_bar"   : has_bar,
+        "mark"      : mark,
+        "prev_close": prev_close,
+        "atr"       : atr,
+        "entry_high": high,
+        "exit_low"  : exit_low,
+        "last_ts"   : np.array([int(arrays[k]["ts"][-1]) if len(arrays[k]["ts"]) else 0 for k in keys]),
+    }
+
+
+# ============================================================
+# 2. 포트폴리오 엔진
+# ============================================================
+
+def run_portfolio_backtest(frames: dict[str, pd.DataFrame],
+                           initial_capital: float = config.BACKTEST_INITIAL_CAPITAL,
+                           params: dict | None = None,
+                           market_params: dict[str, dict] | None = None) -> dict:
+    """
+    TURTLE_V1 포트폴리오 백테스트
+    - frames       : {마켓 이름: 원본 캔들 DataFrame (load_ohlcv 결과)}
+    - params       : 공통 파라미터 (default_params() 형식, None이면 config 값)
+    - market_params: {마켓 이름: 덮어쓸 파라미터} 예) {"KRW-BTC_60m": {"max_units": 2}}
+    - 같은 봉(같은 마감 시각)에서는 청산을 먼저 처리하고, 신규 진입/피라미딩은 마켓 순서대로 남은 원화에서 배분
+      (잔고가 부족한 마켓만 스킵)
+    - 트레이드 시각은 각 마켓의 원래 봉 시각, 자산 곡선(ts)은 봉 마감 시각 기준
+    - 반환: run_backtest()와 같은 형식 (trades에 market 키 추가) + markets (마켓별 요약 DataFrame)
+    """
+    base   = bt.default_params() if params is None else params
+    market_params = market_params or {}
+    mparams = {key: {**base, **market_params.get(key, {})} for key in frames}
+
+    cache  = bt.IndicatorCache()
+    arrays = {key: bt.indicator_arrays(bt.frame_to_raw_arrays(df), mparams[key], cache)
+              for key, df in frames.items()}
+    exit_modes = {key: p["exit_mode"].upper() for key, p in mparams.items()}
+    al = align_markets(arrays, exit_modes)
+
+    keys    = al["keys"]
+    ts_arr  = al["ts"]
+    T, M    = len(ts_arr), len(keys)
+    has_bar = al["has_bar"]
+    bar_ts  = al["bar_ts"]
+    mark    = al["mark"]
+    atr_m   = al["atr"]
+    high_m  = al["entry_high"]
+    low_m   = al["exit_low"]
+
+    # ── 마켓별 파라미터 벡터 ──
+    risk_rate    = np.array([mparams[k]["risk_rate"] for k in keys], dtype=np.float64)
+    max_units    = np.array([mparams[k]["max_units"] for k in keys], dtype=np.int64)
+    cooldown_ns  = np.array([mparams[k]["cooldown_sec"] for k in keys], dtype=np.float64)
+    trailing_mul = np.array([mparams[k]["trailing_multiplier"] for k in keys], dtype=np.float64)
+    use_trailing = np.array([exit_modes[k] not in ("10DAY_LOW", "20DAY_LOW") for k in keys])
+    exit_labels  = [{"10DAY_LOW": "10day_low", "20DAY_LOW": "20day_low"}.get(exit_modes[k], "trailing_stop")
+                    for k in keys]
+
+    # 진입 신호 / 저점 청산 신호는 포지션 상태와 무관 → 전 구간 한 번에 계산
+    entry_signal = (has_bar & (mark > high_m) & (al["prev_close"] <= high_m) & (atr_m > 0))
+    any_signal   = entry_signal.any(axis=1)
+    low_exit     = (low_m > 0) & (mark <= low_m)
+
+    # ── 마켓별 포지션 상태 ──
+    position   = np.zeros(M)
+    highest    = np.zeros(M)
+    units      = np.zeros(M, dtype=np.int64)
+    next_add   = np.zeros(M)
+    entry_atr  = np.zeros(M)
+    entry_cost = np.zeros(M)
+    last_exit  = np.zeros(M, dtype=np.int64)
+    exited     = np.zeros(M, dtype=bool)     # 청산 이력 있음 (쿨다운 기준)
+
+    capital     = initial_capital
+    peak_equity = initial_capital
+    n_held      = 0
+    trades      = []
+    equity      = np.empty(T, dtype=np.float64)
+    mdd, mdd_idx = 0.0, 0
+
+    def unit_size(total_equity: float, j: int, atr: float, price: float) -> float:
+        """1유닛 금액 = 허용손실(총자산 × risk) / 손절폭(2 × ATR) × 현재가, 총자산 20% 상한 / 최소 5,000원"""
+        unit_krw = total_equity * (float(risk_rate[j]) / 100) / (2 * atr) * price
+        return max(min(unit_krw, total_equity * 0.20), 5_000)
+
+    def buy(j: int, ts: int, price: float, unit_krw: float, atr: float | None):
+        nonlocal capital
+        fee = unit_krw * bt.FEE_RATE
+        amount = (unit_krw - fee) / price
+        capital -= unit_krw
+        if atr is not None:
+            position[j], entry_cost[j], highest[j] = amount, unit_krw, price
+            entry_atr[j], next_add[j], units[j] = atr, price + 0.5 * atr, 1
+            trade = {"type": "buy", "datetime": pd.Timestamp(ts), "price": price, "amount": amount,
+                     "unit_krw": unit_krw, "units": 1, "atr": atr}
+        else:
+            position[j] += amount
+            entry_cost[j] += unit_krw
+            units[j] += 1
+            next_add[j] = price + 0.5 * float(entry_atr[j])
+            trade = {"type": "buy", "datetime": pd.Timestamp(ts), "price": price, "amount": amount,
+                     "unit_krw": unit_krw, "units": int(units[j])}
+        trades.append({"market": keys[j], **trade})
+
+    def sell(j: int, ts: int, price: float, reason: str):
+        nonlocal capital
+        pos, cost = float(position[j]), float(entry_cost[j])
+        sell_amount = pos * price
+        fee = sell_amount * bt.FEE_RATE
+        weighted_avg = cost / pos
+        capital += sell_amount - fee
+        trades.append({
+            "market"     : keys[j],
+            "type"       : "sell",
+            "datetime"   : pd.Timestamp(ts),
+            "price"      : price,
+            "exit_reason": reason,
+            "pnl"        : sell_amount - fee - cost,
+            "profit_rate": (price - weighted_avg) / weighted_avg * 100,
+        })
+        position[j] = highest[j] = next_add[j] = entry_atr[j] = entry_cost[j] = 0.0
+        units[j] = 0
+
+    for t in range(T):
+        price = mark[t]
+
+        total_equity = capital + float(position @ price) if n_held else capital
+        equity[t] = total_equity
+        if total_equity > peak_equity:
+            peak_equity = total_equity
+        drawdown = (total_equity - peak_equity) / peak_equity * 100
+        if drawdown < mdd:
+            mdd, mdd_idx = drawdown, t
+
+        if not n_held and not any_signal[t]:
+            continue
+
+        held = position > 0
+        bar  = has_bar[t]
+        row_ts = bar_ts[t]
+        orders = []   # (마켓, 매수금액, 신규 진입 ATR 또는 None=피라미딩)
+
+        # ── [B] 보유 마켓: 최고가 갱신 → 청산 → 피라미딩 후보 ──
+        if n_held:
+            # 보유 마켓의 entry_atr는 항상 > 0 (진입 조건이 atr > 0)
+            active = held & bar
+            np.maximum(highest, np.where(active, price, 0.0), out=highest)
+            trailing_hit = price <= highest - trailing_mul * entry_atr
+            exit_hit     = active & np.where(use_trailing, trailing_hit, low_exit[t])
+
+            for j in exit_hit.nonzero()[0] if exit_hit.any() else ():
+                sell(j, int(row_ts[j]), float(price[j]), exit_labels[j])
+                last_exit[j], exited[j] = row_ts[j], True
+                n_held -= 1
+
+            add_hit = active & ~exit_hit & (units < max_units) & (price >= next_add)
+            for j in add_hit.nonzero()[0] if add_hit.any() else ():
+                orders.append((j, unit_size(total_equity, j, float(entry_atr[j]), float(price[j])), None))
+
+        # ── [A] 미보유 마켓: 쿨다운 지난 진입 신호 ──
+        if any_signal[t]:
+            cooling = exited & ((row_ts - last_exit) / 1e9 < cooldown_ns)
+            enter   = entry_signal[t] & ~held & ~cooling
+            for j in enter.nonzero()[0] if enter.any() else ():
+                atr = float(atr_m[t, j])
+                orders.append((j, unit_size(total_equity, j, atr, float(price[j])), atr))
+
+        # ── 마켓 순서대로 남은 원화에서 배분 ──
+        if len(orders) > 1:
+            orders.sort(key=lambda o: o[0])
+        for j, unit_krw, atr in orders:
+            if unit_krw > capital:
+                continue
+            buy(j, int(row_ts[j]), float(price[j]), unit_krw, atr)
+            if atr is not None:
+                n_held += 1
+
+    # ── 종료 시점 미청산 포지션 강제 청산 (마켓별 마지막 봉 종가) ──
+    for j in np.flatnonzero(position > 0):
+        sell(j, int(al["last_ts"][j]), float(mark[-1, j]), "force_close")
+
+    stats = bt.summarize_trades(trades, initial_capital, capital, mdd)
+
+    rows = []
+    for key in keys:
+        sells = [t for t in trades if t["market"] == key and t["type"] == "sell"]
+        rows.append({
+            "market"      : key,
+            "bars"        : len(arrays[key]["ts"]),
+            "max_units"   : mparams[key]["max_units"],
+            "total_trades": len(sells),
+            "wins"        : sum(t["pnl"] > 0 for t in sells),
+            "total_pnl"   : sum(t["pnl"] for t in sells),
+        })
+
+    return {
+        "trades" : trades,
+        "ts"     : ts_arr,
+        "equity" : equity,
+        "mdd_ts" : pd.Timestamp(int(ts_arr[mdd_idx])) if T else None,
+        "stats"  : stats,
+        "markets": pd.DataFrame(rows),
+    }
+
+
+def print_portfolio(result: dict):
+    """마켓별 트레이드 / 손익 요약 출력"""
+    print("\n" + "=" * 60)
+    print("🧺 마켓별 요약")
+    print("=" * 60)
+    print(result["markets"].to_string(index=False, float_format=lambda v: f"{v:+,.0f}"))
+    print("=" * 60)
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    # 인자 형식: KRW-XRP:60 KRW-BTC:240 (없으면 data/ 저장소 전체)
+    bt.migrate_csv_store()
+    jobs = [tuple(a.split(":")) for a in sys.argv[1:]] or list_stored_markets()
+    if not jobs:
+        print("📭 data/ 에 캔들 저장소 없음 → python -m test.downloader 로 먼저 수집")
+        sys.exit(1)
+
+    frames = {market_key(t, tf): bt.load_ohlcv(t, tf) for t, tf in jobs}
+    frames = {k: df for k, df in frames.items() if not df.empty}
+
+    started = time.time()
+    result = run_portfolio_backtest(frames, initial_capital=config.BACKTEST_INITIAL_CAPITAL)
+    print(f"\n⏱️ 포트폴리오 백테스트 {len(frames)}개 마켓 | {len(result['ts'])}봉 | {time.time() - started:.2f}초")
+
+    bt.print_result(result)
+    print_portfolio(result)
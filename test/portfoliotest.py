@@ -0,0 +1,224 @@
+"""
+멀티 마켓 포트폴리오 백테스트 테스트 (합성 캔들 사용)
+
+테스트 항목:
+  [TEST 01] 마켓 1개 → 단일 백테스트 커널과 트레이드/자산 곡선/성과 동일 (청산 모드 3종)
+  [TEST 02] 봉 간격/시작일이 다른 마켓 → 봉 마감 시각 합집합 인덱스 + 마지막 종가 평가
+  [TEST 03] 같은 봉 안에서 캔들 시각이 다른 마켓 → 같은 행 (청산 먼저, 진입은 마켓 순서) + 240분봉 공개 시점
+  [TEST 04] 공유 자본 → 원화 잔고가 음수가 되지 않고 마켓별 유닛 한도 준수
+  [TEST 05] data/ 저장소 목록 → 캔들 저장소만 포트폴리오 대상으로 인식
+
+실행 방법:
+    python -m test.portfoliotest
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from test import backtest as bt
+from test import portfolio as pf
+
+CAPITAL = 3_000_000.0
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def make_candles(n: int, seed: int = 0, minutes: int = 60, start_ms: int = 1_514_764_800_000) -> pd.DataFrame:
+    """랜덤워크 캔들 (추세 구간이 생기도록 느린 사인파 드리프트 추가)"""
+    rng   = np.random.default_rng(seed)
+    ret   = rng.normal(0, 0.012, n) + 0.0003 * np.sin(np.arange(n) / 400)
+    close = 500 * np.exp(np.cumsum(ret))
+    ts    = start_ms + np.arange(n, dtype=np.int64) * minutes * 60_000
+    df = pd.DataFrame({
+        "timestamp": ts,
+        "open"     : np.r_[close[0], close[:-1]],
+        "high"     : close * (1 + np.abs(rng.normal(0, 0.006, n))),
+        "low"      : close * (1 - np.abs(rng.normal(0, 0.006, n))),
+        "close"    : close,
+        "volume"   : rng.uniform(1e5, 1e6, n),
+    })
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_single_market_matches_kernel():
+    print_header("[TEST 01] 마켓 1개 == 단일 백테스트 커널")
+    df = make_candles(20_000, seed=1)
+    for mode in ["TRAILING", "10DAY_LOW", "20DAY_LOW"]:
+        params = {**bt.default_params(), "exit_mode": mode}
+        single = bt.run_backtest_arrays(bt.indicator_arrays(bt.frame_to_raw_arrays(df), params),
+                                        CAPITAL, params, verbose=False)
+        result = pf.run_portfolio_backtest({"KRW-XRP_60m": df}, CAPITAL, params)
+        trades = [{k: v for k, v in t.items() if k != "market"} for t in result["trades"]]
+
+        check(trades == single["trades"], f"{mode:<9} | 트레이드 {len(trades)}건 동일")
+        check(np.array_equal(result["equity"], single["equity"]) and result["stats"] == single["stats"],
+              f"{mode:<9} | 자산 곡선 / 성과 동일 (수익률 {result['stats']['total_return']:+.2f}%)")
+
+
+def test_2_alignment():
+    print_header("[TEST 02] 봉 간격/시작일이 다른 마켓 정렬")
+    frames = {
+        "KRW-XRP_60m" : make_candles(2_000, seed=2, minutes=60),
+        "KRW-ETH_240m": make_candles(500, seed=3, minutes=240),
+        "KRW-BTC_60m" : make_candles(1_000, seed=4, minutes=60, start_ms=1_514_764_800_000 + 500 * 3_600_000),
+    }
+    result = pf.run_portfolio_backtest(frames, CAPITAL)
+
+    union = np.unique(np.concatenate([
+        bt.indicator_arrays(bt.frame_to_raw_arrays(df), bt.default_params())["ts"] + pf.bar_interval_ns(k, None)
+        for k, df in frames.items()
+    ]))
+    check(np.array_equal(result["ts"], union), f"봉 마감 시각 합집합 인덱스 {len(union)}봉")
+    check(len(result["equity"]) == len(union), "자산 곡선 길이 == 인덱스 길이")
+    print(result["markets"].to_string(index=False))
+    check(set(t["market"] for t in result["trades"]) <= set(frames), "트레이드 market 키 = 입력 마켓")
+
+    arrays = {k: bt.indicator_arrays(bt.frame_to_raw_arrays(df), bt.default_params()) for k, df in frames.items()}
+    al = pf.align_markets(arrays, {k: "TRAILING" for k in frames})
+    j  = al["keys"].index("KRW-ETH_240m")
+    rows = np.flatnonzero(~al["has_bar"][:, j])
+    rows = rows[rows > np.argmax(al["has_bar"][:, j])]
+    ok = all(al["mark"][r, j] == al["mark"][r - 1, j] for r in rows[:500])
+    check(ok, "봉이 없는 시각은 직전 종가로 평가")
+
+
+def test_3_same_bar_rows():
+    print_header("[TEST 03] 같은 봉 = 같은 행 (캔들 시각 차이 무시)")
+    HOUR_NS = 3_600_000_000_000
+    base = make_candles(3_000, seed=5)
+    a, b = base.copy(), base.copy()
+    a["timestamp"] += 3_599_000                          # 봉 안 마지막 체결 시각이 다름 (59분 59초 / 30분)
+    b["timestamp"] += 1_800_000
+    for df in (a, b):
+        df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    frames = {"KRW-A_60m": a, "KRW-B_60m": b}
+    params = {**bt.default_params(), "risk_rate": 2.0, "cooldown_sec": 0}
+    result = pf.run_portfolio_backtest(frames, CAPITAL, params)
+
+    bars = len(bt.indicator_arrays(bt.frame_to_raw_arrays(a), params)["ts"])
+    check(len(result["ts"]) == bars, f"인덱스 {len(result['ts'])}봉 (마켓별 시각이 달라도 마켓 1개 봉 수 그대로)")
+
+    # 같은 마감 시각의 트레이드: 청산이 먼저, 신규 진입은 마켓 순서 (A → B)
+    rows = {}
+    for t in result["trades"]:
+        rows.setdefault(t["datetime"].value // HOUR_NS, []).append(t)
+    shared = [r for r in rows.values() if len({t["market"] for t in r}) > 1]
+    ok = True
+    for r in shared:
+        kinds = [t["type"] for t in r]
+        entries = [t["market"] for t in r if t["type"] == "buy" and t["units"] == 1]
+        ok &= kinds == sorted(kinds, key=lambda k: k != "sell") and entries == sorted(entries)
+    check(len(shared) > 0 and ok, f"두 마켓이 함께 매매한 봉 {len(shared)}개 → 청산 먼저, 진입은 마켓 순서")
+
+    # 240분봉은 그 봉의 마지막 60분봉과 같은 행에서 처음 보임
+    frames = {"KRW-XRP_60m": a.iloc[:400], "KRW-ETH_240m": make_candles(100, seed=6, minutes=240)}
+    frames["KRW-ETH_240m"]["timestamp"] += 14_390_000
+    frames["KRW-ETH_240m"]["datetime"] = pd.to_datetime(frames["KRW-ETH_240m"]["timestamp"], unit="ms")
+    arrays = {k: bt.indicator_arrays(bt.frame_to_raw_arrays(df), bt.default_params()) for k, df in frames.items()}
+    al = pf.align_markets(arrays, {k: "TRAILING" for k in frames})
+    eth = al["has_bar"][:, 1]
+    check(len(al["ts"]) == len(arrays["KRW-XRP_60m"]["ts"]) and eth.sum() == len(arrays["KRW-ETH_240m"]["ts"]),
+          "240분봉 행 = 60분봉 행의 부분집합")
+    check(bool(np.all(al["ts"][eth] % (4 * HOUR_NS) == 0)) and bool(al["has_bar"][eth, 0].all()),
+          "240분봉은 마감 시각(4시간 경계) 행에서 공개 = 그 봉의 마지막 60분봉과 같은 행")
+
+
+def test_4_shared_capital_and_unit_limits():
+    print_header("[TEST 04] 공유 자본 + 마켓별 유닛 한도")
+    frames = {f"KRW-C{i}_60m": make_candles(10_000, seed=10 + i) for i in range(6)}
+    limits = {"KRW-C0_60m": 1, "KRW-C1_60m": 2, "KRW-C2_60m": 3}
+    params = {**bt.default_params(), "risk_rate": 2.0, "max_units": 4, "cooldown_sec": 0}
+
+    started = time.time()
+    result  = pf.run_portfolio_backtest(frames, CAPITAL, params,
+                                        market_params={k: {"max_units": v} for k, v in limits.items()})
+    print(f"    6개 마켓 × 10,000봉 | {time.time() - started:.2f}초 | 트레이드 {result['stats']['total_trades']}건")
+
+    # 트레이드를 순서대로 재생해서 원화 잔고 추적
+    cash, cost, min_cash = CAPITAL, {}, CAPITAL
+    for t in result["trades"]:
+        if t["type"] == "buy":
+            cash -= t["unit_krw"]
+            cost[t["market"]] = cost.get(t["market"], 0.0) + t["unit_krw"]
+        else:
+            cash += cost.pop(t["market"]) + t["pnl"]
+        min_cash = min(min_cash, cash)
+    check(min_cash >= -1e-6, f"원화 잔고 최저 {min_cash:,.0f}원 (음수 없음)")
+    check(np.isclose(cash, result["stats"]["final_equity"]), "재생한 최종 잔고 == final_equity")
+
+    max_seen = {}
+    for t in result["trades"]:
+        if t["type"] == "buy":
+            max_seen[t["market"]] = max(max_seen.get(t["market"], 0), t["units"])
+    ok = all(max_seen.get(k, 0) <= limits.get(k, 4) for k in frames)
+    check(ok, f"마켓별 최대 유닛 {max_seen} (한도 C0=1, C1=2, C2=3, 나머지 4)")
+
+
+def test_5_list_stored_markets():
+    print_header("[TEST 05] data/ 저장소 목록")
+    original = bt.DATA_DIR
+    bt.DATA_DIR = tempfile.mkdtemp(prefix="zillion_pf_")
+    try:
+        df = make_candles(100)
+        bt.save_ohlcv(df, "KRW-XRP", "60")
+        bt.save_ohlcv(df, "KRW-BTC", "1h")
+        bt.save_ohlcv(df, "KRW-ETH", "240")
+        pd.DataFrame({"rank": [1]}).to_csv(os.path.join(bt.DATA_DIR, "grid_search_KRW-XRP_1hm.csv"))
+        os.makedirs(os.path.join(bt.DATA_DIR, ".download"))
+
+        markets = pf.list_stored_markets()
+        check(markets == [("KRW-BTC", "60"), ("KRW-ETH", "240"), ("KRW-XRP", "60")], f"{markets}")
+        check(pf.market_key("KRW-BTC", "1h") == "KRW-BTC_60m", "마켓 이름은 분 단위로 통일")
+    finally:
+        shutil.rmtree(bt.DATA_DIR, ignore_errors=True)
+        bt.DATA_DIR = original
+
+
+# ============================================================
+# 3. 전체 실행
+# ============================================================
+
+if __name__ == "__main__":
+    tests = [
+        test_1_single_market_matches_kernel,
+        test_2_alignment,
+        test_3_same_bar_rows,
+        test_4_shared_capital_and_unit_limits,
+        test_5_list_stored_markets,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    print("\n" + "=" * 65)
+    print(f"  🏁 포트폴리오 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)
@@ -0,0 +1,283 @@
+"""
+업비트 호출 한도 관리자 테스트 (로컬 가짜 업비트 서버 사용 - Remaining-Req 헤더 / 429 응답 흉내)
+
+테스트 항목:
+  [TEST 01] Remaining-Req 헤더 파싱 / 요청 URL → 그룹
+  [TEST 02] 서버 한도가 설정값보다 낮아도 헤더를 따라 한도 바로 아래로 호출 (429 없음)
+  [TEST 03] 429 응답 → 그룹 호출 보류 후 재요청 + throttled 카운터
+  [TEST 04] 주문 우선: 대기 중인 주문이 먼저 나감 / 거래 API는 주문용 자리를 남겨 둠
+  [TEST 05] ccxt 클라이언트 연동 (동기 / 비동기 모두 관리자 경유, 재요청 소진 시 RateLimitExceeded)
+
+실행 방법:
+    python -m test.ratelimittest
+"""
+
+import sys
+import os
+import json
+import asyncio
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import ccxt
+import ratelimit
+from ratelimit import RateGovernor
+import upbit_client as client
+import upbit_async
+import strategy
+
+# ============================================================
+# 0. 가짜 업비트 서버 (그룹별 최근 1초 요청 수로 한도 판정)
+# ============================================================
+
+class FakeLimitHandler(BaseHTTPRequestHandler):
+    limits: dict = {}          # {group: 초당 한도}
+    sent: dict = {}            # {group: [수신 시각]}
+    force_429: int = 0         # 이 횟수만큼 무조건 429 응답
+    served: int = 0
+    rejected: int = 0
+    lock = threading.Lock()
+
+    def _handle(self):
+        cls   = type(self)
+        path  = urlparse(self.path).path
+        group = ratelimit.group_for(path, self.command)
+        now   = time.monotonic()
+        with cls.lock:
+            cls.served += 1
+            window = [t for t in cls.sent.get(group, []) if now - t < 1.0]
+            limit  = cls.limits.get(group, 10)
+            throttled = cls.force_429 > 0 or len(window) >= limit
+            if cls.force_429 > 0:
+                cls.force_429 -= 1
+            if throttled:
+                cls.rejected += 1
+            else:
+                window.append(now)
+            cls.sent[group] = window
+            remaining = max(0, limit - len(window))
+
+        if throttled:
+            body, status = b'{"error":{"name":"too_many_requests","message":"Too many API requests."}}', 429
+        elif group == "default":
+            body, status = json.dumps([{"currency": "KRW", "balance": "1000000.0", "locked": "0.0",
+                                        "avg_buy_price": "0", "unit_currency": "KRW"}]).encode(), 200
+        else:
+            body, status = json.dumps([]).encode(), 200
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Remaining-Req", f"group={group}; min=1800; sec={remaining}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server() -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLimitHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def reset_server(limits: dict | None = None, force_429: int = 0):
+    FakeLimitHandler.limits    = limits or {}
+    FakeLimitHandler.sent      = {}
+    FakeLimitHandler.force_429 = force_429
+    FakeLimitHandler.served    = 0
+    FakeLimitHandler.rejected  = 0
+
+
+# ============================================================
+# 1. 헬퍼 함수
+# ============================================================
+
+def print_header(title: str):
+    print(f"\n{'='*65}")
+    print(f"  {title}")
+    print(f"{'='*65}")
+
+def check(condition: bool, label: str = "") -> bool:
+    tag = "✅ PASS" if condition else "❌ FAIL"
+    print(f"  {tag}  {label}")
+    return condition
+
+def point(exchange, base_url: str):
+    exchange.apiKey, exchange.secret = "ACCESS", "SECRET"
+    exchange.urls["api"] = {"public": base_url, "private": base_url}
+
+
+# ============================================================
+# 2. 테스트
+# ============================================================
+
+def test_1_parse(base_url: str):
+    print_header("[TEST 01] Remaining-Req 파싱 / 요청 그룹")
+    check(ratelimit.parse_remaining("group=default; min=1800; sec=29") == ("default", 29), "group=default; sec=29")
+    check(ratelimit.parse_remaining("group=candles; sec=0") == ("candles", 0), "min 없는 형식")
+    check(ratelimit.parse_remaining(None) is None and ratelimit.parse_remaining("garbage") is None,
+          "헤더 없음 / 형식 오류 → None")
+    check(ratelimit.header({"remaining-req": "x"}, "Remaining-Req") == "x", "헤더 이름 대소문자 무시")
+
+    cases = [
+        ("https://api.upbit.com/v1/candles/minutes/60", "GET", "candles"),
+        ("https://api.upbit.com/v1/ticker?markets=KRW-XRP", "GET", "ticker"),
+        ("https://api.upbit.com/v1/market/all", "GET", "market"),
+        ("https://api.upbit.com/v1/accounts", "GET", "default"),
+        ("https://api.upbit.com/v1/order?uuid=x", "GET", "default"),
+        ("https://api.upbit.com/v1/orders", "POST", "order"),
+        ("https://api.upbit.com/v1/order?uuid=x", "DELETE", "order"),
+    ]
+    for url, method, group in cases:
+        check(ratelimit.group_for(url, method) == group, f"{method} {urlparse(url).path} → {group}")
+
+
+def test_2_header_schedule(base_url: str):
+    print_header("[TEST 02] 헤더 기준 한도 바로 아래로 호출")
+    reset_server(limits={"candles": 4})
+    gov = RateGovernor(default=10)             # 설정값(10)이 서버 한도(4)보다 높음
+    n, started = 16, time.monotonic()
+    for _ in range(n):
+        ratelimit.get(f"{base_url}/v1/candles/minutes/60", limiter=gov)
+    elapsed = time.monotonic() - started
+    st = gov.stats()
+    print(f"    요청 {n}회 | {elapsed:.2f}초 | 429 {FakeLimitHandler.rejected}회 | "
+          f"대기 {st['delayed']}회 ({st['wait_sec']:.2f}초)")
+    check(FakeLimitHandler.rejected == 0 and st["throttled"] == 0, "서버 429 없음")
+    check(st["delayed"] > 0 and elapsed >= 2.5, "남은 호출 0 → 다음 1초까지 대기")
+    check(elapsed < 6.0, "한도 바로 아래 속도 유지 (과도한 대기 없음)")
+    check(st["groups"]["candles"]["remaining"] is not None, "그룹별 남은 호출 수 노출")
+
+
+def test_3_throttled_retry(base_url: str):
+    print_header("[TEST 03] 429 → 보류 후 재요청")
+    reset_server(force_429=2)
+    gov = RateGovernor(backoff=0.2)
+    started = time.monotonic()
+    resp = ratelimit.get(f"{base_url}/v1/ticker", limiter=gov)
+    elapsed = time.monotonic() - started
+    st = gov.stats()
+    print(f"    응답 {resp.status_code} | 요청 {st['requests']}회 | 429 {st['throttled']}회 | {elapsed:.2f}초")
+    check(resp.status_code == 200, "재요청으로 성공")
+    check(st["throttled"] == 2 and st["requests"] == 3, "throttled 카운터 = 429 횟수")
+    check(elapsed >= 0.2 + 0.4 - 0.05, "보류 시간 연속 2배 (0.2 + 0.4초)")
+
+    reset_server(force_429=100)
+    resp = ratelimit.get(f"{base_url}/v1/ticker", limiter=RateGovernor(backoff=0.05))
+    check(resp.status_code == 429, "재요청 소진 → 마지막 429 응답 반환")
+
+
+def test_4_priority(base_url: str):
+    print_header("[TEST 04] 주문 우선")
+    gov = RateGovernor(limits={"default": 1}, reserve=0)
+    gov.acquire("default")                    # 이번 1초 자리 소진
+    granted = []
+
+    def worker(name: str, priority: int):
+        gov.acquire("default", priority)
+        granted.append((name, time.monotonic()))
+
+    data = threading.Thread(target=worker, args=("잔고 조회", ratelimit.NORMAL))
+    data.start()
+    time.sleep(0.1)
+    order = threading.Thread(target=worker, args=("주문", ratelimit.URGENT))
+    order.start()
+    data.join(5)
+    order.join(5)
+    print(f"    처리 순서: {[name for name, _ in granted]}")
+    check([name for name, _ in granted] == ["주문", "잔고 조회"], "늦게 온 주문이 먼저 나감")
+
+    gov = RateGovernor(limits={"default": 3}, reserve=1)
+    waits = [gov.acquire("default") for _ in range(2)]
+    with ratelimit.urgent():
+        urgent_wait = gov.acquire("default")
+    print(f"    일반 2회 대기 {max(waits):.3f}초 | 주문 대기 {urgent_wait:.3f}초")
+    check(urgent_wait < 0.05, "일반 호출이 남겨 둔 자리로 주문은 바로 나감")
+    normal_wait = gov.acquire("default")
+    check(normal_wait > 0.5, "한도 - 여유분을 넘는 일반 호출은 다음 1초까지 대기")
+    check(gov.stats()["delayed"] == 1, "delayed 카운터")
+
+
+def test_5_ccxt_clients(base_url: str):
+    print_header("[TEST 05] ccxt 클라이언트 연동")
+    original = ratelimit.governor
+    ratelimit.governor = RateGovernor(backoff=0.05)
+    sync = client.GovernedUpbit({"enableRateLimit": False})
+    point(sync, base_url)
+    try:
+        reset_server(force_429=1)
+        rows = sync.private_get_accounts()
+        st = ratelimit.governor.stats()
+        check(rows and rows[0]["currency"] == "KRW", "동기: 429 1회 후 재요청 성공")
+        check(st["throttled"] == 1 and st["groups"]["default"]["remaining"] is not None,
+              "동기: 관리자에 429 / Remaining-Req 반영")
+
+        reset_server(force_429=100)
+        try:
+            sync.public_get_candles_minutes_unit({"unit": 60, "market": "KRW-XRP", "count": 1})
+            raised = None
+        except Exception as e:
+            raised = e
+        check(isinstance(raised, ccxt.RateLimitExceeded), "동기: 재요청 소진 → RateLimitExceeded")
+        check(strategy._error_pause(raised) == 0 and strategy._error_pause(ValueError()) == strategy.ERROR_PAUSE_SEC,
+              "판정 루프: 한도 초과는 고정 3초 대기 없이 관리자 대기로 재시도")
+
+        reset_server()
+        api = upbit_async.AsyncUpbit()
+        try:
+            api._run(_open(api))
+            point(api.exchange, base_url)
+            before = ratelimit.governor.stats()["requests"]
+            api._run(_gather_candles(api.exchange, 3))
+            st = ratelimit.governor.stats()
+            check(st["requests"] - before == 3 and st["groups"]["candles"]["remaining"] is not None,
+                  "비동기: 같은 관리자 경유 (요청 수 / 남은 호출 수)")
+        finally:
+            api.close()
+    finally:
+        ratelimit.governor = original
+
+
+async def _open(api: upbit_async.AsyncUpbit):
+    api._ensure_exchange()
+
+async def _gather_candles(exchange, n: int):
+    params = {"unit": 60, "market": "KRW-XRP", "count": 1}
+    return await asyncio.gather(*(exchange.public_get_candles_minutes_unit(params) for _ in range(n)))
+
+
+# ============================================================
+# 3. 실행
+# ============================================================
+
+if __name__ == "__main__":
+    server, base_url = start_server()
+    tests = [
+        test_1_parse,
+        test_2_header_schedule,
+        test_3_throttled_retry,
+        test_4_priority,
+        test_5_ccxt_clients,
+    ]
+
+    fail = 0
+    for t in tests:
+        try:
+            t(base_url)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"  ❌ 예외: {e}")
+            fail += 1
+
+    server.shutdown()
+    print("\n" + "=" * 65)
+    print(f"  🏁 호출 한도 테스트 {len(tests)}개 | 예외 {fail}개")
+    print("=" * 65)